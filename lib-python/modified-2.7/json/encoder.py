@@ -4,6 +4,15 @@ import re
 
 from __pypy__.builders import StringBuilder, UnicodeBuilder
 
+try:
+    from _json import encode_basestring_ascii as c_encode_basestring_ascii
+except ImportError:
+    c_encode_basestring_ascii = None
+try:
+    from _json import make_encoder as c_make_encoder
+except ImportError:
+    c_make_encoder = None
+
 ESCAPE = re.compile(r'[\x00-\x1f\\"\b\f\n\r\t]')
 ESCAPE_ASCII = re.compile(r'([\\"]|[^\ -~])')
 HAS_UTF8 = re.compile(r'[\x80-\xff]')
@@ -55,7 +64,14 @@ def raw_encode_basestring_ascii(s):
     if ESCAPE_ASCII.search(s):
         return str(ESCAPE_ASCII.sub(replace, s))
     return s
-encode_basestring_ascii = lambda s: '"' + raw_encode_basestring_ascii(s) + '"'
+def py_encode_basestring_ascii(s):
+    """Return an ASCII-only JSON representation of a Python string
+
+    """
+    return '"' + raw_encode_basestring_ascii(s) + '"'
+
+encode_basestring_ascii = (c_encode_basestring_ascii or
+                           py_encode_basestring_ascii)
 
 
 class JSONEncoder(object):
@@ -189,6 +205,14 @@ class JSONEncoder(object):
             markers = {}
         else:
             markers = None
+        if (c_make_encoder is not None and self.ensure_ascii and
+                self.encoding == 'utf-8'):
+            # the interp-level encoder produces the same output in one go
+            _iterencode = c_make_encoder(markers, self.default,
+                c_encode_basestring_ascii, self.indent, self.key_separator,
+                self.item_separator, self.sort_keys, self.skipkeys,
+                self.allow_nan)
+            return _iterencode(o, 0)[0]
         if self.ensure_ascii:
             builder = StringBuilder()
         else:
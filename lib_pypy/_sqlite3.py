@@ -283,6 +283,9 @@ def unicode_text_factory(x):
 
 
 class StatementCache(object):
+    """LRU cache of the prepared statements of a connection: the most
+    recently used ones are at the end of the OrderedDict."""
+
     def __init__(self, connection, maxcount):
         self.connection = connection
         self.maxcount = maxcount
@@ -290,12 +293,13 @@ class StatementCache(object):
 
     def get(self, sql, cursor, row_factory):
         try:
-            stat = self.cache[sql]
+            stat = self.cache.pop(sql)
         except KeyError:
             stat = Statement(self.connection, sql)
+            if len(self.cache) >= self.maxcount > 0:
+                self.cache.popitem(last=False)
+        if self.maxcount > 0:
             self.cache[sql] = stat
-            if len(self.cache) > self.maxcount:
-                self.cache.popitem(0)
         #
         if stat.in_use:
             stat = Statement(self.connection, sql)
@@ -794,14 +798,20 @@ class Cursor(object):
         else:
             raise ProgrammingError("executemany is only for DML statements")
 
+        # the same prepared statement is rebound for every set of parameters
+        statement = self.statement
+        db = self.connection.db
         self.rowcount = 0
         for params in many_params:
-            self.statement.set_params(params)
-            ret = sqlite.sqlite3_step(self.statement.statement)
+            statement.set_params(params)
+            ret = sqlite.sqlite3_step(statement.statement)
             if ret != SQLITE_DONE:
+                statement.reset()
                 raise self.connection._get_exception(ret)
-            self.rowcount += sqlite.sqlite3_changes(self.connection.db)
+            self.rowcount += sqlite.sqlite3_changes(db)
 
+        # give the statement back to the cache for the next executemany()
+        statement.reset()
         return self
 
     def executescript(self, sql):
@@ -869,19 +879,14 @@ class Cursor(object):
             return []
         if size is None:
             size = self.arraysize
-        lst = []
-        for row in self:
-            lst.append(row)
-            if len(lst) == size:
-                break
-        return lst
+        return self.statement.fetch_rows(self, size)
 
     def fetchall(self):
         self._check_closed()
         self._check_reset()
         if self.statement is None:
             return []
-        return list(self)
+        return self.statement.fetch_rows(self, -1)
 
     def _getdescription(self):
         if self._description is None:
@@ -947,14 +952,17 @@ class Statement(object):
                 next_char.value,))
         # sql_char should remain alive until here
 
+        self.param_count = sqlite.sqlite3_bind_parameter_count(self.statement)
+        self.param_names = None
         self._build_row_cast_map()
 
     def set_row_factory(self, row_factory):
         self.row_factory = row_factory
 
     def _build_row_cast_map(self):
+        self.column_count = sqlite.sqlite3_column_count(self.statement)
         self.row_cast_map = []
-        for i in xrange(sqlite.sqlite3_column_count(self.statement)):
+        for i in xrange(self.column_count):
             converter = None
 
             if self.con.detect_types & PARSE_COLNAMES:
@@ -981,30 +989,30 @@ class Statement(object):
 
     def _check_decodable(self, param):
         if self.con.text_factory in (unicode, OptimizedUnicode, unicode_text_factory):
-            for c in param:
-                if ord(c) & 0x80 != 0:
-                    raise self.con.ProgrammingError(
-                            "You must not use 8-bit bytestrings unless "
-                            "you use a text_factory that can interpret "
-                            "8-bit bytestrings (like text_factory = str). "
-                            "It is highly recommended that you instead "
-                            "just switch your application to Unicode strings.")
+            try:
+                param.decode('ascii')
+            except UnicodeDecodeError:
+                raise self.con.ProgrammingError(
+                        "You must not use 8-bit bytestrings unless "
+                        "you use a text_factory that can interpret "
+                        "8-bit bytestrings (like text_factory = str). "
+                        "It is highly recommended that you instead "
+                        "just switch your application to Unicode strings.")
 
     def set_param(self, idx, param):
-        cvt = converters.get(type(param))
-        if cvt is not None:
-            cvt = param = cvt(param)
-
-        param = adapt(param)
+        typ = type(param)
+        if typ not in _plain_param_types or (typ, PrepareProtocol) in adapters:
+            cvt = converters.get(typ)
+            if cvt is not None:
+                cvt = param = cvt(param)
+            param = adapt(param)
+            typ = type(param)
 
         if param is None:
             sqlite.sqlite3_bind_null(self.statement, idx)
-        elif type(param) in (bool, int, long):
-            if -2147483648 <= param <= 2147483647:
-                sqlite.sqlite3_bind_int(self.statement, idx, param)
-            else:
-                sqlite.sqlite3_bind_int64(self.statement, idx, param)
-        elif type(param) is float:
+        elif typ is int or typ is long or typ is bool:
+            sqlite.sqlite3_bind_int64(self.statement, idx, param)
+        elif typ is float:
             sqlite.sqlite3_bind_double(self.statement, idx, param)
         elif isinstance(param, str):
             self._check_decodable(param)
@@ -1012,11 +1020,23 @@ class Statement(object):
         elif isinstance(param, unicode):
             param = param.encode("utf-8")
             sqlite.sqlite3_bind_text(self.statement, idx, param, -1, SQLITE_TRANSIENT)
-        elif type(param) is buffer:
+        elif typ is buffer:
             sqlite.sqlite3_bind_blob(self.statement, idx, str(param), len(param), SQLITE_TRANSIENT)
         else:
             raise InterfaceError("parameter type %s is not supported" % str(type(param)))
 
+    def _get_param_names(self):
+        # the names of the parameters don't change, fetch them only once
+        if self.param_names is None:
+            names = []
+            for idx in range(1, self.param_count + 1):
+                param_name = sqlite.sqlite3_bind_parameter_name(self.statement, idx)
+                if param_name is not None:
+                    param_name = param_name[1:]
+                names.append(param_name)
+            self.param_names = names
+        return self.param_names
+
     def set_params(self, params):
         ret = sqlite.sqlite3_reset(self.statement)
         if ret != SQLITE_OK:
@@ -1024,82 +1044,93 @@ class Statement(object):
         self.mark_dirty()
 
         if params is None:
-            if sqlite.sqlite3_bind_parameter_count(self.statement) != 0:
+            if self.param_count != 0:
                 raise ProgrammingError("wrong number of arguments")
             return
 
-        params_type = None
         if isinstance(params, dict):
-            params_type = dict
-        else:
-            params_type = list
-
-        if params_type == list:
-            if len(params) != sqlite.sqlite3_bind_parameter_count(self.statement):
-                raise ProgrammingError("wrong number of arguments")
-
-            for i in range(len(params)):
-                self.set_param(i+1, params[i])
-        else:
-            for idx in range(1, sqlite.sqlite3_bind_parameter_count(self.statement) + 1):
-                param_name = sqlite.sqlite3_bind_parameter_name(self.statement, idx)
+            idx = 0
+            for param_name in self._get_param_names():
+                idx += 1
                 if param_name is None:
                     raise ProgrammingError("need named parameters")
-                param_name = param_name[1:]
                 try:
                     param = params[param_name]
                 except KeyError:
-                    raise ProgrammingError("missing parameter '%s'" %param)
+                    raise ProgrammingError("missing parameter '%s'" % param_name)
                 self.set_param(idx, param)
+        else:
+            if len(params) != self.param_count:
+                raise ProgrammingError("wrong number of arguments")
 
-    def next(self, cursor):
-        self.con._check_closed()
-        self.con._check_thread()
-        if self.exhausted:
-            raise StopIteration
-        item = self.item
+            for i in range(len(params)):
+                self.set_param(i+1, params[i])
 
+    def _step(self, cursor):
         ret = sqlite.sqlite3_step(self.statement)
-        if ret == SQLITE_DONE:
+        if ret == SQLITE_ROW:
+            self._readahead(cursor)
+        elif ret == SQLITE_DONE:
             self.exhausted = True
             self.item = None
-        elif ret != SQLITE_ROW:
+        else:
             exc = self.con._get_exception(ret)
             sqlite.sqlite3_reset(self.statement)
             raise exc
 
-        self._readahead(cursor)
+    def next(self, cursor):
+        self.con._check_closed()
+        self.con._check_thread()
+        if self.exhausted:
+            raise StopIteration
+        item = self.item
+        self._step(cursor)
         return item
 
+    def fetch_rows(self, cursor, size):
+        """Return a list of the next 'size' rows, or of all the remaining
+        rows if 'size' is not positive.  This does the checks only once
+        for the whole batch."""
+        self.con._check_closed()
+        self.con._check_thread()
+        rows = []
+        while not self.exhausted:
+            rows.append(self.item)
+            self._step(cursor)
+            if len(rows) == size:
+                break
+        return rows
+
     def _readahead(self, cursor):
-        self.column_count = sqlite.sqlite3_column_count(self.statement)
+        statement = self.statement
+        row_cast_map = self.row_cast_map
+        text_factory = self.con.text_factory
         row = []
         for i in xrange(self.column_count):
-            typ = sqlite.sqlite3_column_type(self.statement, i)
-
-            converter = self.row_cast_map[i]
+            converter = row_cast_map[i]
             if converter is None:
+                typ = sqlite.sqlite3_column_type(statement, i)
                 if typ == SQLITE_INTEGER:
-                    val = sqlite.sqlite3_column_int64(self.statement, i)
+                    val = sqlite.sqlite3_column_int64(statement, i)
                     if -sys.maxint-1 <= val <= sys.maxint:
                         val = int(val)
                 elif typ == SQLITE_FLOAT:
-                    val = sqlite.sqlite3_column_double(self.statement, i)
-                elif typ == SQLITE_BLOB:
-                    blob_len = sqlite.sqlite3_column_bytes(self.statement, i)
-                    blob = sqlite.sqlite3_column_blob(self.statement, i)
-                    val = buffer(string_at(blob, blob_len))
+                    val = sqlite.sqlite3_column_double(statement, i)
+                elif typ == SQLITE_TEXT:
+                    val = sqlite.sqlite3_column_text(statement, i)
+                    val = text_factory(val)
                 elif typ == SQLITE_NULL:
                     val = None
-                elif typ == SQLITE_TEXT:
-                    val = sqlite.sqlite3_column_text(self.statement, i)
-                    val = self.con.text_factory(val)
+                elif typ == SQLITE_BLOB:
+                    blob_len = sqlite.sqlite3_column_bytes(statement, i)
+                    blob = sqlite.sqlite3_column_blob(statement, i)
+                    val = buffer(string_at(blob, blob_len))
             else:
-                blob = sqlite.sqlite3_column_blob(self.statement, i)
+                blob = sqlite.sqlite3_column_blob(statement, i)
                 if not blob:
                     val = None
                 else:
-                    blob_len = sqlite.sqlite3_column_bytes(self.statement, i)
+                    blob_len = sqlite.sqlite3_column_bytes(statement, i)
                     val = string_at(blob, blob_len)
                     val = converter(val)
             row.append(val)
@@ -1215,31 +1246,37 @@ def _check_remaining_sql(s):
 def _convert_params(con, nargs, params):
     _params  = []
     for i in range(nargs):
-        typ = sqlite.sqlite3_value_type(params[i])
+        param = params[i]      # indexing the ctypes array is not free
+        typ = sqlite.sqlite3_value_type(param)
         if typ == SQLITE_INTEGER:
-            val = sqlite.sqlite3_value_int64(params[i])
+            val = sqlite.sqlite3_value_int64(param)
             if -sys.maxint-1 <= val <= sys.maxint:
                 val = int(val)
         elif typ == SQLITE_FLOAT:
-            val = sqlite.sqlite3_value_double(params[i])
-        elif typ == SQLITE_BLOB:
-            blob_len = sqlite.sqlite3_value_bytes(params[i])
-            blob = sqlite.sqlite3_value_blob(params[i])
-            val = buffer(string_at(blob, blob_len))
-        elif typ == SQLITE_NULL:
-            val = None
+            val = sqlite.sqlite3_value_double(param)
         elif typ == SQLITE_TEXT:
-            val = sqlite.sqlite3_value_text(params[i])
+            val = sqlite.sqlite3_value_text(param)
             # XXX changed from con.text_factory
             val = unicode(val, 'utf-8')
+        elif typ == SQLITE_NULL:
+            val = None
+        elif typ == SQLITE_BLOB:
+            blob_len = sqlite.sqlite3_value_bytes(param)
+            blob = sqlite.sqlite3_value_blob(param)
+            val = buffer(string_at(blob, blob_len))
         else:
             raise NotImplementedError
         _params.append(val)
     return _params
 
 def _convert_result(con, val):
+    typ = type(val)
     if val is None:
         sqlite.sqlite3_result_null(con)
+    elif typ is int or typ is bool or typ is long:
+        sqlite.sqlite3_result_int64(con, val)
+    elif typ is float:
+        sqlite.sqlite3_result_double(con, val)
     elif isinstance(val, (bool, int, long)):
         sqlite.sqlite3_result_int64(con, int(val))
     elif isinstance(val, str):
@@ -1355,6 +1392,11 @@ def adapt(val, proto=PrepareProtocol):
 
     return val
 
+# set_param() only calls adapt() for the objects that are not of one of these
+# exact types, or when an adapter was registered for their type
+_plain_param_types = frozenset([type(None), int, long, bool, float, str,
+                                unicode, buffer])
+
 register_adapters_and_converters()
 
 def OptimizedUnicode(s):
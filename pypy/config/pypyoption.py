@@ -34,7 +34,7 @@ working_modules.update(dict.fromkeys(
      "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
      "_bisect", "binascii", "_multiprocessing", '_warnings',
      "_collections", "_multibytecodec", "micronumpy", "_ffi",
-     "_continuation"]
+     "_continuation", "_json", "cPickle", "_csv"]
 ))
 
 translation_modules = default_modules.copy()
@@ -233,9 +233,24 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
         BoolOption("withstrslice", "use strings optimized for slicing",
                    default=False),
 
+        BoolOption("withfilereadslices",
+                   "make lines read from files share the read buffer",
+                   default=False,
+                   requires=[("objspace.std.withstrslice", True)]),
+
         BoolOption("withstrbuf", "use strings optimized for addition (ver 2)",
                    default=False),
 
+        BoolOption("withunicodeslice",
+                   "use unicode strings optimized for slicing",
+                   default=False,
+                   requires=[("objspace.std.withropeunicode", False)]),
+
+        BoolOption("withunicodebuf",
+                   "use unicode strings optimized for addition",
+                   default=False,
+                   requires=[("objspace.std.withropeunicode", False)]),
+
         BoolOption("withprebuiltchar",
                    "use prebuilt single-character string objects",
                    default=False),
@@ -253,6 +268,10 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "use specialised tuples",
                    default=False),
 
+        BoolOption("withunboxedtuple",
+                   "store tuples of ints or floats unboxed",
+                   default=False),
+
         BoolOption("withrope", "use ropes as the string implementation",
                    default=False,
                    requires=[("objspace.std.withstrslice", False),
@@ -367,6 +386,7 @@ def set_pypy_opt_level(config, level):
         config.objspace.std.suggest(getattributeshortcut=True)
         config.objspace.std.suggest(newshortcut=True)
         config.objspace.std.suggest(withspecialisedtuple=True)
+        config.objspace.std.suggest(withunboxedtuple=True)
         config.objspace.std.suggest(withidentitydict=True)
         #if not IS_64_BITS:
         #    config.objspace.std.suggest(withsmalllong=True)
@@ -385,6 +405,7 @@ def set_pypy_opt_level(config, level):
         config.objspace.std.suggest(withmapdict=True)
         config.objspace.std.suggest(withstrslice=True)
         config.objspace.std.suggest(withstrjoin=True)
+        config.objspace.std.suggest(withunicodeslice=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
         # xxx other options? ropes maybe?
@@ -2,7 +2,7 @@ import sys
 from pypy.rpython.lltypesystem import lltype, rclass, rffi
 from pypy.rpython.ootypesystem import ootype
 from pypy.rpython import rlist
-from pypy.rpython.lltypesystem import rstr as ll_rstr, rdict as ll_rdict
+from pypy.rpython.lltypesystem import rstr as ll_rstr, rordereddict as ll_rdict
 from pypy.rpython.lltypesystem import rlist as lltypesystem_rlist
 from pypy.rpython.lltypesystem.module import ll_math
 from pypy.rpython.lltypesystem.lloperation import llop
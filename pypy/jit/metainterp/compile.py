@@ -355,7 +355,10 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type):
                                       name=loopname)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
-        metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        memmgr = metainterp_sd.warmrunnerdesc.memory_manager
+        memmgr.keep_loop_alive(original_jitcell_token)
+        if asminfo is not None:
+            memmgr.add_code_size(original_jitcell_token, asminfo.asmlen)
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token):
@@ -396,6 +399,10 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
         ops_offset = None
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, n, ops_offset)
     #
+    if metainterp_sd.warmrunnerdesc is not None and asminfo is not None:
+        metainterp_sd.warmrunnerdesc.memory_manager.add_code_size(
+            original_loop_token, asminfo.asmlen)
+    #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
@@ -518,7 +525,8 @@ class ResumeGuardDescr(ResumeDescr):
             self._counter = cnt | i
 
     def handle_fail(self, metainterp_sd, jitdriver_sd):
-        if self.must_compile(metainterp_sd, jitdriver_sd):
+        if (self.must_compile(metainterp_sd, jitdriver_sd) and
+                self.can_start_tracing(metainterp_sd)):
             self.start_compiling()
             try:
                 self._trace_and_compile_from_bridge(metainterp_sd,
@@ -584,6 +592,14 @@ class ResumeGuardDescr(ResumeDescr):
                 assert 0, typetag
             return counter >= trace_eagerness
 
+    def can_start_tracing(self, metainterp_sd):
+        if metainterp_sd.can_start_tracing():
+            return True
+        # the JIT is over its compile budget: count the failures of this
+        # guard again from 0 before the next attempt
+        self.done_compiling()
+        return False
+
     def start_compiling(self):
         # start tracing and compiling from this guard.
         self._counter |= self.CNT_BUSY_FLAG
@@ -39,8 +39,7 @@ def getkind(TYPE, supports_floats=True,
         # XXX fix this for oo...
         if (TYPE != llmemory.Address and
             rffi.sizeof(TYPE) > rffi.sizeof(lltype.Signed)):
-            if supports_longlong:
-                assert rffi.sizeof(TYPE) == 8
+            if supports_longlong and rffi.sizeof(TYPE) == 8:
                 return 'float'
             raise NotImplementedError("type %s is too large" % TYPE)
         return "int"
@@ -660,6 +659,8 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    entry_count = 0     # for the memory manager, see memmgr.py
+    code_size = 0
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
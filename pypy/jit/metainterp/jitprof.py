@@ -41,7 +41,8 @@ def _setup():
     ncounters = len(names)
 _setup()
 
-JITPROF_LINES = ncounters + 1 + 1 # one for TOTAL, 1 for calls, update if needed
+JITPROF_LINES = ncounters + 1 + 1 + 2 # one for TOTAL, 1 for calls,
+                                      # 2 for the memmgr, update if needed
 _CPU_LINES = 4       # the last 4 lines are stored on the cpu
 
 class BaseProfiler(object):
@@ -84,6 +85,7 @@ class Profiler(BaseProfiler):
     calls = 0
     current = None
     cpu = None
+    memory_manager = None
 
     def start(self):
         self.starttime = self.timer()
@@ -172,6 +174,12 @@ class Profiler(BaseProfiler):
                                 cpu.total_freed_loops)
             self._print_intline("Freed # of bridges",
                                 cpu.total_freed_bridges)
+        memmgr = self.memory_manager
+        if memmgr is not None:   # for some tests
+            self._print_intline("Evicted # of loops",
+                                memmgr.num_evicted_loops)
+            self._print_intline("Retraced # of loops",
+                                memmgr.num_retraced_loops)
 
     def _print_line_time(self, string, i, tim):
         final = "%s:%s\t%d\t%f" % (string, " " * max(0, 13-len(string)), i, tim)
@@ -1,7 +1,8 @@
-import math
+import math, time
 from pypy.rlib.rarithmetic import r_int64
 from pypy.rlib.debug import debug_start, debug_print, debug_stop
 from pypy.rlib.objectmodel import we_are_translated
+from pypy.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,8 +20,28 @@ from pypy.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Loops that are entered often are declared "old" later: up to 8 times
+# later than 'max_age' generations.  The number of entries of every loop
+# is halved every 'max_age' generations, so that this only reflects the
+# recent use of the loop.
+#
+# Independently, if 'code_memory_limit' is set, the total size of the
+# machine code of the loops in 'alive_loops' is kept below it by removing
+# the loops that were entered the least often for their size.
+#
+# The MemoryManager also enforces the 'compile_budget' parameter: the
+# maximum percentage of the time that the JIT may spend tracing and
+# compiling.  After a pause of 'd' seconds spent on a loop or a bridge,
+# no new tracing starts for 'd * (100 - compile_budget) / compile_budget'
+# seconds; the loops and guards that become hot in the meantime keep
+# running in the interpreter and try again a bit later.  This spreads
+# the JIT pauses of a program that warms up, instead of having them
+# all at once.
+#
 
 class MemoryManager(object):
+    timer = time.time
+    frequent_entries = 16    # a loop entered that often lives twice longer
 
     def __init__(self):
         self.check_frequency = -1
@@ -37,7 +58,15 @@ class MemoryManager(object):
         # per second
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
+        self.next_decay = r_int64(-1)
         self.alive_loops = {}
+        self.total_code_size = 0
+        self.code_memory_limit = 0
+        self.num_evicted_loops = 0
+        self.num_retraced_loops = 0
+        self.compile_budget = 100
+        self.next_tracing_time = 0.0
+        self.num_delayed_tracings = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -48,17 +77,80 @@ class MemoryManager(object):
                 check_frequency = int(math.sqrt(max_age))
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
+            self.next_decay = self.current_generation + max_age
+
+    def set_code_memory_limit(self, limit):
+        self.code_memory_limit = max(limit, 0)
+
+    def set_compile_budget(self, percent):
+        if percent <= 0 or percent > 100:
+            percent = 100
+        self.compile_budget = percent
+        self.next_tracing_time = 0.0
+
+    def can_start_tracing(self):
+        if self.compile_budget >= 100:
+            return True
+        if self.timer() >= self.next_tracing_time:
+            return True
+        self.num_delayed_tracings += 1
+        return False
+
+    def tracing_started(self):
+        if self.compile_budget >= 100:
+            return 0.0
+        return self.timer()
+
+    def tracing_done(self, starttime):
+        if self.compile_budget >= 100:
+            return
+        now = self.timer()
+        pause = now - starttime
+        budget = self.compile_budget
+        self.next_tracing_time = now + pause * (100 - budget) / budget
 
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if 0 < self.code_memory_limit < self.total_code_size:
+            self._free_code_memory_now()
 
     def keep_loop_alive(self, looptoken):
+        looptoken.entry_count += 1
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.alive_loops:
+                self.alive_loops[looptoken] = None
+                self.total_code_size += looptoken.code_size
+
+    def add_code_size(self, looptoken, size):
+        # called when the machine code of a loop or of a bridge attached
+        # to it was produced
+        looptoken.code_size += size
+        if looptoken in self.alive_loops:
+            self.total_code_size += size
+
+    def loop_needed_again(self):
+        # called when entering a loop whose machine code was freed: it
+        # is going to be traced again
+        self.num_retraced_loops += 1
+
+    def _max_age_of(self, looptoken):
+        max_age = self.max_age
+        limit = self.frequent_entries
+        for i in range(3):
+            if looptoken.entry_count < limit:
+                break
+            max_age *= 2
+            limit *= 16
+        return max_age
+
+    def _evict(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.total_code_size -= looptoken.code_size
+        self.num_evicted_loops += 1
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -66,18 +158,67 @@ class MemoryManager(object):
         #print self.alive_loops.keys()
         debug_print("Current generation:", self.current_generation)
         debug_print("Loop tokens before:", oldtotal)
-        max_generation = self.current_generation - (self.max_age-1)
         for looptoken in self.alive_loops.keys():
+            max_generation = (self.current_generation -
+                              (self._max_age_of(looptoken) - 1))
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._evict(looptoken)
+        if self.current_generation >= self.next_decay:
+            for looptoken in self.alive_loops:
+                looptoken.entry_count >>= 1
+            self.next_decay = self.current_generation + self.max_age
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
+        debug_print("Loop tokens evicted so far:", self.num_evicted_loops)
+        debug_print("Loops retraced so far:     ", self.num_retraced_loops)
         #print self.alive_loops.keys()
-        if not we_are_translated() and oldtotal != newtotal:
+        if oldtotal != newtotal:
             looptoken = None
+            self._collect_for_tests()
+        debug_stop("jit-mem-collect")
+
+    def _free_code_memory_now(self):
+        debug_start("jit-mem-collect")
+        debug_print("Machine code size:", self.total_code_size)
+        # don't consider the loops of the last two generations: they were
+        # just compiled or entered
+        max_generation = self.current_generation - 1
+        candidates = []
+        for looptoken in self.alive_loops.keys():
+            if (looptoken.generation < max_generation and
+                    looptoken.code_size > 0):
+                candidates.append(looptoken)
+        LoopUsefulnessSort(candidates).sort()
+        # free down to 3/4 of the limit, to avoid doing it again at the
+        # next generation
+        target = self.code_memory_limit - self.code_memory_limit // 4
+        count = 0
+        for looptoken in candidates:
+            if self.total_code_size <= target:
+                break
+            self._evict(looptoken)
+            count += 1
+        debug_print("Loop tokens freed: ", count)
+        debug_print("Machine code left: ", self.total_code_size)
+        if count > 0:
+            candidates = None
+            looptoken = None
+            self._collect_for_tests()
+        debug_stop("jit-mem-collect")
+
+    def _collect_for_tests(self):
+        if not we_are_translated():
             from pypy.rlib import rgc
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
-        debug_stop("jit-mem-collect")
+
+
+def _usefulness(looptoken):
+    # number of recent entries per kilobyte of machine code
+    return looptoken.entry_count * 1024.0 / looptoken.code_size
+
+class LoopUsefulnessSort(make_timsort_class()):
+    def lt(self, a, b):
+        return _usefulness(a) < _usefulness(b)
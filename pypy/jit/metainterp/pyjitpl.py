@@ -1413,6 +1413,7 @@ class MetaInterpStaticData(object):
         self.profiler.cpu = cpu
         self.warmrunnerdesc = warmrunnerdesc
         if warmrunnerdesc:
+            self.profiler.memory_manager = warmrunnerdesc.memory_manager
             self.config = warmrunnerdesc.translator.config
         else:
             from pypy.config.pypyoption import get_pypy_config
@@ -1538,6 +1539,20 @@ class MetaInterpStaticData(object):
         if self.warmrunnerdesc is not None:       # for tests
             self.warmrunnerdesc.memory_manager.next_generation()
 
+    def can_start_tracing(self):
+        if self.warmrunnerdesc is not None:       # for tests
+            return self.warmrunnerdesc.memory_manager.can_start_tracing()
+        return True
+
+    def tracing_started(self):
+        if self.warmrunnerdesc is not None:       # for tests
+            return self.warmrunnerdesc.memory_manager.tracing_started()
+        return 0.0
+
+    def tracing_done(self, starttime):
+        if self.warmrunnerdesc is not None:       # for tests
+            self.warmrunnerdesc.memory_manager.tracing_done(starttime)
+
     # ---------------- logging ------------------------
 
     def log(self, msg):
@@ -1869,6 +1884,7 @@ class MetaInterp(object):
         debug_start('jit-tracing')
         self.staticdata._setup_once()
         self.staticdata.profiler.start_tracing()
+        starttime = self.staticdata.tracing_started()
         assert jitdriver_sd is self.jitdriver_sd
         self.staticdata.try_to_free_some_loops()
         self.create_empty_history()
@@ -1876,6 +1892,7 @@ class MetaInterp(object):
             original_boxes = self.initialize_original_boxes(jitdriver_sd, *args)
             return self._compile_and_run_once(original_boxes)
         finally:
+            self.staticdata.tracing_done(starttime)
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -1896,6 +1913,7 @@ class MetaInterp(object):
     def handle_guard_failure(self, key):
         debug_start('jit-tracing')
         self.staticdata.profiler.start_tracing()
+        starttime = self.staticdata.tracing_started()
         assert isinstance(key, compile.ResumeGuardDescr)
         # store the resumekey.wref_original_loop_token() on 'self' to make
         # sure that it stays alive as long as this MetaInterp
@@ -1906,6 +1924,7 @@ class MetaInterp(object):
             return self._handle_guard_failure(key)
         finally:
             self.resumekey_original_loop_token = None
+            self.staticdata.tracing_done(starttime)
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -1336,6 +1336,30 @@ class BasicTests:
         assert res == 9 + 8 + 7 + 6 + 5 + 4 + 3 + 2 + 1 + 0
         self.check_jitcell_token_count(0)
 
+    def test_mark_hot(self):
+        myjitdriver = JitDriver(greens = ['m'], reds = ['n', 'x'])
+        def g(m, n):
+            x = 0
+            while n > 0:
+                myjitdriver.can_enter_jit(m=m, n=n, x=x)
+                myjitdriver.jit_merge_point(m=m, n=n, x=x)
+                n -= 1
+                x += n * m
+            return x
+        def f(n, hot):
+            set_param(myjitdriver, 'threshold', 1000)
+            if hot:
+                myjitdriver.mark_hot(m=hot)
+            return g(1, n) + g(2, n)
+
+        res = self.meta_interp(f, [10, 2])
+        assert res == 3 * (9 + 8 + 7 + 6 + 5 + 4 + 3 + 2 + 1 + 0)
+        self.check_jitcell_token_count(1)
+
+        res = self.meta_interp(f, [10, 0])
+        assert res == 3 * (9 + 8 + 7 + 6 + 5 + 4 + 3 + 2 + 1 + 0)
+        self.check_jitcell_token_count(0)
+
     def test_dont_look_inside(self):
         @dont_look_inside
         def g(a, b):
@@ -15,12 +15,15 @@ from pypy.jit.metainterp.memmgr import MemoryManager
 from pypy.jit.metainterp.test.support import LLJitMixin
 from pypy.rlib.jit import JitDriver, dont_look_inside
 from pypy.jit.metainterp.warmspot import get_stats
+from pypy.jit.metainterp import pyjitpl
 from pypy.jit.metainterp.warmstate import JitCell
 from pypy.rlib import rgc
 
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    entry_count = 0
+    code_size = 0
 
 
 class _TestMemoryManager:
@@ -79,6 +82,101 @@ class _TestMemoryManager:
                 assert tokens[i] in memmgr.alive_loops
 
 
+    def test_frequently_entered_loops_live_longer(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        rare = FakeLoopToken()
+        frequent = FakeLoopToken()
+        memmgr.keep_loop_alive(rare)
+        for i in range(16):
+            memmgr.keep_loop_alive(frequent)
+        for i in range(10):
+            memmgr.next_generation()
+            if i < 3:
+                assert rare in memmgr.alive_loops
+            else:
+                assert rare not in memmgr.alive_loops
+        # twice 'max_age', but the number of entries is halved every
+        # 'max_age' generations, so 'frequent' is killed after 4 more
+        assert frequent not in memmgr.alive_loops
+        assert memmgr.num_evicted_loops == 2
+
+    def test_entries_decay(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        token = FakeLoopToken()
+        for i in range(4096):
+            memmgr.keep_loop_alive(token)
+        for i in range(4):
+            memmgr.next_generation()
+        assert token.entry_count == 2048
+        for i in range(4):
+            memmgr.next_generation()
+        assert token.entry_count == 1024
+        assert token in memmgr.alive_loops
+
+    def test_code_memory_limit(self):
+        memmgr = MemoryManager()
+        memmgr.set_code_memory_limit(1000)
+        tokens = [FakeLoopToken() for i in range(4)]
+        for token, entries in zip(tokens, [20, 5, 100, 1]):
+            for i in range(entries):
+                memmgr.keep_loop_alive(token)
+            memmgr.add_code_size(token, 200)
+            memmgr.next_generation()
+        assert memmgr.total_code_size == 800
+        assert len(memmgr.alive_loops) == 4
+        # this loop makes it 1100 bytes: the loops with the fewest
+        # entries are freed until we are at 3/4 of the limit
+        big = FakeLoopToken()
+        memmgr.keep_loop_alive(big)
+        memmgr.add_code_size(big, 300)
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys([tokens[0], tokens[2],
+                                                    big])
+        assert memmgr.total_code_size == 700
+        assert memmgr.num_evicted_loops == 2
+        # an evicted loop that is entered again counts again
+        memmgr.keep_loop_alive(tokens[1])
+        assert memmgr.total_code_size == 900
+
+    def test_code_memory_limit_spares_current_generation(self):
+        memmgr = MemoryManager()
+        memmgr.set_code_memory_limit(100)
+        token = FakeLoopToken()
+        memmgr.keep_loop_alive(token)
+        memmgr.add_code_size(token, 500)
+        memmgr._free_code_memory_now()
+        assert memmgr.alive_loops == {token: None}
+
+    def test_compile_budget(self):
+        memmgr = MemoryManager()
+        now = [10.0]
+        memmgr.timer = lambda: now[0]
+        memmgr.set_compile_budget(20)
+        assert memmgr.can_start_tracing()
+        starttime = memmgr.tracing_started()
+        now[0] = 11.0
+        memmgr.tracing_done(starttime)
+        # a pause of 1 second: no tracing for the next 4 seconds
+        assert not memmgr.can_start_tracing()
+        now[0] = 14.5
+        assert not memmgr.can_start_tracing()
+        now[0] = 15.0
+        assert memmgr.can_start_tracing()
+        assert memmgr.num_delayed_tracings == 2
+
+    def test_compile_budget_disabled(self):
+        memmgr = MemoryManager()
+        memmgr.timer = None     # not called
+        for percent in [100, 0, -5, 150]:
+            memmgr.set_compile_budget(percent)
+            starttime = memmgr.tracing_started()
+            memmgr.tracing_done(starttime)
+            assert memmgr.can_start_tracing()
+        assert memmgr.num_delayed_tracings == 0
+
+
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
     # behavior just rename this class to TestIntegration.
@@ -184,6 +282,33 @@ class _TestIntegration(LLJitMixin):
         res = self.meta_interp(f, [], loop_longevity=3)
         assert res == 42
         self.check_enter_count(2 + 10*4)
+        memmgr = pyjitpl._warmrunnerdesc.memory_manager
+        assert memmgr.num_evicted_loops > 0
+        assert memmgr.num_retraced_loops > 0
+
+    def test_compile_budget(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            for i in range(10):
+                g(1)
+                g(2)
+            return 42
+
+        res = self.meta_interp(f, [])
+        assert res == 42
+        self.check_jitcell_token_count(2)
+        # with a budget of 1%, the time spent on the loop of g(1) is more
+        # than enough to delay the loop of g(2) past the end of f()
+        res = self.meta_interp(f, [], compile_budget=1)
+        assert res == 42
+        self.check_jitcell_token_count(1)
 
     def test_call_assembler_keep_alive(self):
         myjitdriver1 = JitDriver(greens=['m'], reds=['n'])
@@ -66,7 +66,7 @@ def ll_meta_interp(function, args, backendopt=False, type_system='lltype',
 def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
                     backendopt=False, trace_limit=sys.maxint,
                     inline=False, loop_longevity=0, retrace_limit=5,
-                    function_threshold=4,
+                    function_threshold=4, compile_budget=100,
                     enable_opts=ALL_OPTS_NAMES, max_retrace_guards=15, **kwds):
     from pypy.config.config import ConfigError
     translator = interp.typer.annotator.translator
@@ -91,6 +91,7 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
         jd.warmstate.set_param_inlining(inline)
         jd.warmstate.set_param_loop_longevity(loop_longevity)
         jd.warmstate.set_param_retrace_limit(retrace_limit)
+        jd.warmstate.set_param_compile_budget(compile_budget)
         jd.warmstate.set_param_max_retrace_guards(max_retrace_guards)
         jd.warmstate.set_param_enable_opts(enable_opts)
     warmrunnerdesc.finish()
@@ -151,6 +152,9 @@ def locate_jit_merge_point(graph):
 def find_set_param(graphs):
     return _find_jit_marker(graphs, 'set_param')
 
+def find_mark_hot(graphs):
+    return _find_jit_marker(graphs, 'mark_hot')
+
 def find_force_quasi_immutable(graphs):
     results = []
     for graph in graphs:
@@ -222,6 +226,7 @@ class WarmRunnerDesc(object):
         self.codewriter.make_jitcodes(verbose=verbose)
         self.rewrite_can_enter_jits()
         self.rewrite_set_param()
+        self.rewrite_mark_hot()
         self.rewrite_force_virtual(vrefinfo)
         self.rewrite_force_quasi_immutable()
         self.add_finish()
@@ -907,6 +912,27 @@ class WarmRunnerDesc(object):
             op.opname = 'direct_call'
             op.args[:3] = [closures[key]]
 
+    def rewrite_mark_hot(self):
+        closures = {}
+        for graph, block, i in find_mark_hot(self.translator.graphs):
+            op = block.operations[i]
+            for jd in self.jitdrivers_sd:
+                if jd.jitdriver is op.args[1].value:
+                    break
+            else:
+                assert 0, "jitdriver of mark_hot() not found"
+            if jd not in closures:
+                ARGS = [v.concretetype for v in op.args[2:]]
+                assert ARGS == jd._green_args_spec, (
+                    "mark_hot() called with green variables of the wrong type")
+                _, PTR_MARK_HOT_FUNCTYPE = self.cpu.ts.get_FuncType(
+                    ARGS, lltype.Void)
+                funcptr = self.helper_func(PTR_MARK_HOT_FUNCTYPE,
+                                           jd.warmstate.mark_hot)
+                closures[jd] = Constant(funcptr, PTR_MARK_HOT_FUNCTYPE)
+            op.opname = 'direct_call'
+            op.args[:2] = [closures[jd]]
+
     def rewrite_force_virtual(self, vrefinfo):
         if self.cpu.ts.name != 'lltype':
             py.test.skip("rewrite_force_virtual: port it to ootype")
@@ -234,6 +234,19 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_compile_budget(self, value):
+        # a global parameter too
+        if self.warmrunnerdesc:
+            if self.warmrunnerdesc.memory_manager:
+                self.warmrunnerdesc.memory_manager.set_compile_budget(value)
+
+    def set_param_code_memory_limit(self, value):
+        # a global parameter too, in kilobytes
+        if self.warmrunnerdesc:
+            if self.warmrunnerdesc.memory_manager:
+                self.warmrunnerdesc.memory_manager.set_code_memory_limit(
+                    value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -337,6 +350,11 @@ class WarmEnterState(object):
                 cell.extra_delay = curgen
                 return
             #
+            # if the JIT is over its compile budget, try again a bit later
+            if not warmrunnerdesc.memory_manager.can_start_tracing():
+                cell.counter = int(self.THRESHOLD_LIMIT * 0.98)
+                return
+            #
             if not confirm_enter_jit(*args):
                 cell.counter = 0
                 return
@@ -380,6 +398,7 @@ class WarmEnterState(object):
                 procedure_token = cell.get_procedure_token()
                 if procedure_token is None:   # it was a weakref that has been freed
                     cell.counter = 0
+                    warmrunnerdesc.memory_manager.loop_needed_again()
                     return
                 # extract and unspecialize the red arguments to pass to
                 # the assembler
@@ -589,6 +608,14 @@ class WarmEnterState(object):
         self.can_inline_greenargs = can_inline_greenargs
         self.can_inline_callable = can_inline_callable
 
+        def mark_hot(*greenargs):
+            # jitdriver.mark_hot(): the next can_enter_jit() at this
+            # position reaches the threshold, unless the JIT is off
+            cell = jit_getter(True, *greenargs)
+            if cell.counter >= 0:
+                cell.counter = self.THRESHOLD_LIMIT
+        self.mark_hot = mark_hot
+
         if jd._should_unroll_one_iteration_ptr is None:
             def should_unroll_one_iteration(greenkey):
                 return False
@@ -610,6 +637,7 @@ class WarmEnterState(object):
                 from pypy.jit.metainterp.compile import compile_tmp_callback
                 if cell.counter == -1:    # used to be a valid entry bridge,
                     cell.counter = 0      # but was freed in the meantime.
+                    warmrunnerdesc.memory_manager.loop_needed_again()
                 memmgr = warmrunnerdesc.memory_manager
                 procedure_token = compile_tmp_callback(cpu, jd, greenkey,
                                                        redargtypes, memmgr)
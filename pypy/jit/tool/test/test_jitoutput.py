@@ -65,6 +65,8 @@ Total # of loops:       100
 Total # of bridges:     300
 Freed # of loops:       99
 Freed # of bridges:     299
+Evicted # of loops:     98
+Retraced # of loops:    7
 '''
 
 def test_parse():
@@ -88,3 +90,5 @@ def test_parse():
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
+    assert info.total_evicted_loops == 98
+    assert info.total_retraced_loops == 7
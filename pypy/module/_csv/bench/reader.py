@@ -0,0 +1,33 @@
+# Reads a CSV file with the built-in _csv and with lib_pypy/_csv.py.
+# usage: reader.py [file.csv]  -- without a file, a 200MB one is generated;
+# give it a multi-GB file to measure the throughput of a real ETL job.
+
+import imp, os, sys, time, tempfile
+import _csv
+lib_pypy_csv = imp.load_source('lib_pypy_csv', os.path.join(
+    os.path.dirname(__file__), '..', '..', '..', '..', 'lib_pypy',
+    '_csv.py'))
+
+def generate(filename, size):
+    f = open(filename, 'wb')
+    w = _csv.writer(f)
+    row = [12345, 'some name', 'a "quoted", text', 9.75, '', 'x' * 40]
+    rows = [row] * 1000
+    while f.tell() < size:
+        w.writerows(rows)
+    f.close()
+
+def f(module, filename):
+    t0 = time.time()
+    for row in module.reader(open(filename, 'rb')):
+        pass
+    t = time.time() - t0
+    return os.path.getsize(filename) / t / (1024 * 1024)
+
+if len(sys.argv) > 1:
+    filename = sys.argv[1]
+else:
+    filename = os.path.join(tempfile.gettempdir(), 'bench_csv_reader.csv')
+    generate(filename, 200 * 1024 * 1024)
+print 'built-in: %.1f MB/s' % f(_csv, filename)
+print 'lib_pypy: %.1f MB/s' % f(lib_pypy_csv, filename)
@@ -0,0 +1,24 @@
+# Writes a CSV file with the built-in _csv and with lib_pypy/_csv.py.
+
+import imp, os, time, tempfile
+import _csv
+lib_pypy_csv = imp.load_source('lib_pypy_csv', os.path.join(
+    os.path.dirname(__file__), '..', '..', '..', '..', 'lib_pypy',
+    '_csv.py'))
+
+def f(module, filename):
+    row = [12345, 'some name', 'a "quoted", text', 9.75, '', 'x' * 40]
+    rows = [row] * 1000
+    out = open(filename, 'wb')
+    w = module.writer(out)
+    t0 = time.time()
+    for i in range(2000):
+        w.writerows(rows)
+    out.close()
+    t = time.time() - t0
+    return os.path.getsize(filename) / t / (1024 * 1024)
+
+filename = os.path.join(tempfile.gettempdir(), 'bench_csv_writer.csv')
+print 'built-in: %.1f MB/s' % f(_csv, filename)
+print 'lib_pypy: %.1f MB/s' % f(lib_pypy_csv, filename)
+os.unlink(filename)
@@ -0,0 +1,272 @@
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+
+QUOTE_MINIMAL, QUOTE_ALL, QUOTE_NONNUMERIC, QUOTE_NONE = range(4)
+
+
+class State:
+    def __init__(self, space):
+        self.w_error = space.new_exception_class("_csv.Error")
+        self.w_dialects = space.newdict()
+        self.field_limit = 128 * 1024    # max parsed field size
+
+def get_state(space):
+    return space.fromcache(State)
+
+def csv_error(space, msg):
+    return OperationError(get_state(space).w_error, space.wrap(msg))
+
+# ____________________________________________________________
+
+class W_Dialect(Wrappable):
+    """CSV dialect
+
+    The Dialect type records CSV parsing and generation options."""
+
+    # the characters are '\0' when they are not set, which is fine
+    # because the reader refuses the input lines containing NUL bytes
+    delimiter = ','
+    doublequote = True
+    escapechar = '\0'
+    lineterminator = '\r\n'
+    quotechar = '"'
+    quoting = QUOTE_MINIMAL
+    skipinitialspace = False
+    strict = False
+
+def _get_char(space, name, w_src, default):
+    if w_src is None:
+        return default
+    if space.is_w(w_src, space.w_None):
+        return '\0'
+    if space.is_w(space.type(w_src), space.w_str):
+        s = space.str_w(w_src)
+        if len(s) == 0:
+            return '\0'
+        if len(s) == 1:
+            return s[0]
+    raise operationerrfmt(space.w_TypeError,
+                          "'%s' must be a 1-character string", name)
+
+def _get_bool(space, w_src, default):
+    if w_src is None:
+        return default
+    return space.is_true(w_src)
+
+def _get_str(space, name, w_src, default):
+    if w_src is None:
+        return default
+    if not space.is_w(space.type(w_src), space.w_str):
+        raise operationerrfmt(space.w_TypeError,
+                              "'%s' must be a string", name)
+    return space.str_w(w_src)
+
+def _get_quoting(space, w_src, default):
+    if w_src is None:
+        return default
+    if space.isinstance_w(w_src, space.w_int):
+        quoting = space.int_w(w_src)
+        if QUOTE_MINIMAL <= quoting <= QUOTE_NONE:
+            return quoting
+    raise OperationError(space.w_TypeError,
+                         space.wrap("bad 'quoting' value"))
+
+def _is_set(space, w_value):
+    return w_value is not None and not space.is_w(w_value, space.w_None)
+
+def _build_dialect(space, w_subtype, w_dialect, w_delimiter, w_doublequote,
+                   w_escapechar, w_lineterminator, w_quotechar, w_quoting,
+                   w_skipinitialspace, w_strict):
+    if w_dialect is not None and space.is_w(w_dialect, space.w_None):
+        w_dialect = None
+    if w_dialect is not None:
+        if space.isinstance_w(w_dialect, space.w_basestring):
+            w_dialect = get_dialect(space, w_dialect)
+
+        # Can we reuse this instance?
+        if (isinstance(space.interpclass_w(w_dialect), W_Dialect) and
+                not _is_set(space, w_delimiter) and
+                not _is_set(space, w_doublequote) and
+                not _is_set(space, w_escapechar) and
+                not _is_set(space, w_lineterminator) and
+                not _is_set(space, w_quotechar) and
+                not _is_set(space, w_quoting) and
+                not _is_set(space, w_skipinitialspace) and
+                not _is_set(space, w_strict)):
+            dialect = space.interp_w(W_Dialect, w_dialect)
+            return dialect
+
+        # the attributes that are not given explicitly come from the
+        # dialect argument, which can be any object
+        if w_delimiter is None:
+            w_delimiter = space.findattr(w_dialect, space.wrap('delimiter'))
+        if w_doublequote is None:
+            w_doublequote = space.findattr(w_dialect,
+                                           space.wrap('doublequote'))
+        if w_escapechar is None:
+            w_escapechar = space.findattr(w_dialect, space.wrap('escapechar'))
+        if w_lineterminator is None:
+            w_lineterminator = space.findattr(w_dialect,
+                                              space.wrap('lineterminator'))
+        if w_quotechar is None:
+            w_quotechar = space.findattr(w_dialect, space.wrap('quotechar'))
+        if w_quoting is None:
+            w_quoting = space.findattr(w_dialect, space.wrap('quoting'))
+        if w_skipinitialspace is None:
+            w_skipinitialspace = space.findattr(w_dialect,
+                                                space.wrap('skipinitialspace'))
+        if w_strict is None:
+            w_strict = space.findattr(w_dialect, space.wrap('strict'))
+
+    if w_subtype is None:
+        dialect = W_Dialect()
+    else:
+        dialect = space.allocate_instance(W_Dialect, w_subtype)
+    dialect.delimiter = _get_char(space, 'delimiter', w_delimiter, ',')
+    dialect.doublequote = _get_bool(space, w_doublequote, True)
+    dialect.escapechar = _get_char(space, 'escapechar', w_escapechar, '\0')
+    dialect.lineterminator = _get_str(space, 'lineterminator',
+                                      w_lineterminator, '\r\n')
+    dialect.quotechar = _get_char(space, 'quotechar', w_quotechar, '"')
+    if dialect.quotechar == '\0':
+        default_quoting = QUOTE_NONE
+    else:
+        default_quoting = QUOTE_MINIMAL
+    dialect.quoting = _get_quoting(space, w_quoting, default_quoting)
+    dialect.skipinitialspace = _get_bool(space, w_skipinitialspace, False)
+    dialect.strict = _get_bool(space, w_strict, False)
+
+    if dialect.delimiter == '\0':
+        raise OperationError(space.w_TypeError,
+                             space.wrap("delimiter must be set"))
+    if dialect.quoting != QUOTE_NONE and dialect.quotechar == '\0':
+        raise OperationError(space.w_TypeError,
+                             space.wrap("quotechar must be set if quoting "
+                                        "enabled"))
+    if len(dialect.lineterminator) == 0:
+        raise OperationError(space.w_TypeError,
+                             space.wrap("lineterminator must be set"))
+    return dialect
+
+def W_Dialect___new__(space, w_subtype, w_dialect=NoneNotWrapped,
+                      w_delimiter=NoneNotWrapped, w_doublequote=NoneNotWrapped,
+                      w_escapechar=NoneNotWrapped,
+                      w_lineterminator=NoneNotWrapped,
+                      w_quotechar=NoneNotWrapped, w_quoting=NoneNotWrapped,
+                      w_skipinitialspace=NoneNotWrapped,
+                      w_strict=NoneNotWrapped):
+    dialect = _build_dialect(space, w_subtype, w_dialect, w_delimiter,
+                             w_doublequote, w_escapechar, w_lineterminator,
+                             w_quotechar, w_quoting, w_skipinitialspace,
+                             w_strict)
+    return space.wrap(dialect)
+
+def _get_escapechar(space, dialect):
+    if dialect.escapechar == '\0':
+        return space.w_None
+    return space.wrap(dialect.escapechar)
+
+def _get_quotechar(space, dialect):
+    if dialect.quotechar == '\0':
+        return space.w_None
+    return space.wrap(dialect.quotechar)
+
+# like in CPython, deleting the attributes that are characters or strings
+# gives a TypeError, and setting the other ones gives an AttributeError
+
+def _del_readonly(space, dialect):
+    raise OperationError(space.w_TypeError,
+                         space.wrap("readonly attribute"))
+
+def _set_readonly(space, dialect, w_value):
+    raise OperationError(space.w_AttributeError,
+                         space.wrap("readonly attribute"))
+
+def _get_attr(name, is_str=False):
+    def fget(space, dialect):
+        return space.wrap(getattr(dialect, name))
+    fget.func_name = 'fget_' + name
+    if is_str:
+        return GetSetProperty(fget, None, _del_readonly, cls=W_Dialect)
+    return GetSetProperty(fget, _set_readonly, cls=W_Dialect)
+
+W_Dialect.typedef = TypeDef("Dialect",
+    __module__ = "_csv",
+    __doc__ = W_Dialect.__doc__,
+    __new__ = interp2app(W_Dialect___new__),
+    delimiter = _get_attr('delimiter', is_str=True),
+    doublequote = _get_attr('doublequote'),
+    escapechar = GetSetProperty(_get_escapechar, None, _del_readonly,
+                                cls=W_Dialect),
+    lineterminator = _get_attr('lineterminator', is_str=True),
+    quotechar = GetSetProperty(_get_quotechar, None, _del_readonly,
+                               cls=W_Dialect),
+    quoting = _get_attr('quoting'),
+    skipinitialspace = _get_attr('skipinitialspace'),
+    strict = _get_attr('strict'),
+    )
+
+# ____________________________________________________________
+
+def register_dialect(space, w_name, w_dialect=NoneNotWrapped,
+                     w_delimiter=NoneNotWrapped, w_doublequote=NoneNotWrapped,
+                     w_escapechar=NoneNotWrapped,
+                     w_lineterminator=NoneNotWrapped,
+                     w_quotechar=NoneNotWrapped, w_quoting=NoneNotWrapped,
+                     w_skipinitialspace=NoneNotWrapped,
+                     w_strict=NoneNotWrapped):
+    """Create a mapping from a string name to a dialect class.
+    dialect = csv.register_dialect(name, dialect)"""
+    if not space.isinstance_w(w_name, space.w_basestring):
+        raise OperationError(space.w_TypeError,
+                             space.wrap("dialect name must be a string "
+                                        "or unicode"))
+    dialect = _build_dialect(space, None, w_dialect, w_delimiter,
+                             w_doublequote, w_escapechar, w_lineterminator,
+                             w_quotechar, w_quoting, w_skipinitialspace,
+                             w_strict)
+    space.setitem(get_state(space).w_dialects, w_name, space.wrap(dialect))
+
+def unregister_dialect(space, w_name):
+    """Delete the name/dialect mapping associated with a string name.\n
+    csv.unregister_dialect(name)"""
+    try:
+        space.delitem(get_state(space).w_dialects, w_name)
+    except OperationError, e:
+        if not e.match(space, space.w_KeyError):
+            raise
+        raise csv_error(space, "unknown dialect")
+
+def get_dialect(space, w_name):
+    """Return the dialect instance associated with name.
+    dialect = csv.get_dialect(name)"""
+    try:
+        return space.getitem(get_state(space).w_dialects, w_name)
+    except OperationError, e:
+        if not e.match(space, space.w_KeyError):
+            raise
+        raise csv_error(space, "unknown dialect")
+
+def list_dialects(space):
+    """Return a list of all know dialect names
+    names = csv.list_dialects()"""
+    return space.call_function(space.w_list, get_state(space).w_dialects)
+
+def field_size_limit(space, w_limit=NoneNotWrapped):
+    """Sets an upper limit on parsed fields.
+    csv.field_size_limit([limit])
+
+    Returns old limit. If limit is not given, no new limit is set and
+    the old limit is returned"""
+    state = get_state(space)
+    old_limit = state.field_limit
+    if w_limit is not None:
+        if not (space.isinstance_w(w_limit, space.w_int) or
+                space.isinstance_w(w_limit, space.w_long)):
+            raise operationerrfmt(space.w_TypeError,
+                                  "int expected, got %s",
+                                  space.type(w_limit).getname(space))
+        state.field_limit = space.int_w(w_limit)
+    return space.wrap(old_limit)
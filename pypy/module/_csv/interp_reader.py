@@ -0,0 +1,300 @@
+"""
+Interp-level CSV reader.  The state machine is the one of lib_pypy/_csv.py,
+but each input line is scanned by a single RPython loop, which copies the
+runs of ordinary characters into the current field in one go.
+"""
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.rlib.rstring import StringBuilder
+from pypy.module._csv.interp_csv import _build_dialect, csv_error, get_state
+from pypy.module._csv.interp_csv import QUOTE_NONE, QUOTE_NONNUMERIC
+
+(START_RECORD, START_FIELD, ESCAPED_CHAR, IN_FIELD,
+ IN_QUOTED_FIELD, ESCAPE_IN_QUOTED_FIELD, QUOTE_IN_QUOTED_FIELD,
+ EAT_CRNL) = range(8)
+
+
+class W_Reader(Wrappable):
+    """CSV reader
+
+    Reader objects are responsible for reading and parsing tabular data
+    in CSV format."""
+
+    def __init__(self, space, dialect, w_iter):
+        self.space = space
+        self.dialect = dialect
+        self.w_iter = w_iter
+        self.line_num = 0
+        self.field_limit = 0
+        self.parse_reset()
+
+    def parse_reset(self):
+        self.fields_w = []
+        self.field = StringBuilder()
+        self.state = START_RECORD
+        self.numeric_field = False
+
+    def descr_iter(self, space):
+        return space.wrap(self)
+
+    def descr_next(self, space):
+        self.parse_reset()
+        self.field_limit = get_state(space).field_limit
+        while True:
+            try:
+                w_line = space.next(self.w_iter)
+            except OperationError, e:
+                if e.match(space, space.w_StopIteration):
+                    # end of input
+                    if self.field.getlength() > 0:
+                        raise csv_error(space, "newline inside string")
+                raise
+            self.line_num += 1
+            if space.isinstance_w(w_line, space.w_str):
+                line = space.str_w(w_line)
+            elif space.isinstance_w(w_line, space.w_unicode):
+                line = space.str_w(space.str(w_line))
+            else:
+                raise csv_error(space, "expected string or Unicode object, "
+                                       "%s found" %
+                                       space.type(w_line).getname(space))
+            if '\0' in line:
+                raise csv_error(space, "line contains NULL byte")
+            self.parse_line(line)
+            self.parse_eol()
+            if self.state == START_RECORD:
+                break
+        fields_w = self.fields_w
+        self.fields_w = []
+        return space.newlist(fields_w)
+
+    # ---------- parsing ----------
+
+    def parse_line(self, line):
+        dialect = self.dialect
+        delimiter = dialect.delimiter
+        escapechar = dialect.escapechar
+        if dialect.quoting == QUOTE_NONE:
+            quotechar = '\0'    # never found, there are no NUL bytes
+        else:
+            quotechar = dialect.quotechar
+        end = len(line)
+        pos = 0
+        while pos < end:
+            c = line[pos]
+            state = self.state
+            if state == IN_FIELD:
+                # in unquoted field: copy the ordinary characters at once
+                start = pos
+                while (c != '\n' and c != '\r' and c != escapechar and
+                       c != delimiter):
+                    pos += 1
+                    if pos == end:
+                        break
+                    c = line[pos]
+                self.add_slice(line, start, pos)
+                if pos == end:
+                    break
+                if c == '\n' or c == '\r':
+                    # end of line - return [fields]
+                    self.save_field()
+                    self.state = EAT_CRNL
+                elif c == escapechar:
+                    # possible escaped character
+                    self.state = ESCAPED_CHAR
+                else:
+                    # save field - wait for new field
+                    self.save_field()
+                    self.state = START_FIELD
+
+            elif state == START_RECORD:
+                if c == '\n' or c == '\r':
+                    self.state = EAT_CRNL
+                else:
+                    # process the character again as the start of a field
+                    self.state = START_FIELD
+                    continue
+
+            elif state == START_FIELD:
+                if c == '\n' or c == '\r':
+                    # save empty field - return [fields]
+                    self.save_field()
+                    self.state = EAT_CRNL
+                elif c == quotechar:
+                    # start quoted field
+                    self.state = IN_QUOTED_FIELD
+                elif c == escapechar:
+                    # possible escaped character
+                    self.state = ESCAPED_CHAR
+                elif c == ' ' and dialect.skipinitialspace:
+                    # ignore space at start of field
+                    pass
+                elif c == delimiter:
+                    # save empty field
+                    self.save_field()
+                else:
+                    # begin new unquoted field
+                    if dialect.quoting == QUOTE_NONNUMERIC:
+                        self.numeric_field = True
+                    self.state = IN_FIELD
+                    continue
+
+            elif state == ESCAPED_CHAR:
+                self.add_char(c)
+                self.state = IN_FIELD
+
+            elif state == IN_QUOTED_FIELD:
+                # copy the ordinary characters at once, including newlines
+                start = pos
+                while c != escapechar and c != quotechar:
+                    pos += 1
+                    if pos == end:
+                        break
+                    c = line[pos]
+                self.add_slice(line, start, pos)
+                if pos == end:
+                    break
+                if c == escapechar:
+                    # possible escape character
+                    self.state = ESCAPE_IN_QUOTED_FIELD
+                elif dialect.doublequote:
+                    # doublequote; " represented by ""
+                    self.state = QUOTE_IN_QUOTED_FIELD
+                else:
+                    # end of quote part of field
+                    self.state = IN_FIELD
+
+            elif state == ESCAPE_IN_QUOTED_FIELD:
+                self.add_char(c)
+                self.state = IN_QUOTED_FIELD
+
+            elif state == QUOTE_IN_QUOTED_FIELD:
+                # doublequote - seen a quote in a quoted field
+                if c == quotechar:
+                    # save "" as "
+                    self.add_char(c)
+                    self.state = IN_QUOTED_FIELD
+                elif c == delimiter:
+                    # save field - wait for new field
+                    self.save_field()
+                    self.state = START_FIELD
+                elif c == '\n' or c == '\r':
+                    # end of line - return [fields]
+                    self.save_field()
+                    self.state = EAT_CRNL
+                elif not dialect.strict:
+                    self.add_char(c)
+                    self.state = IN_FIELD
+                else:
+                    raise csv_error(self.space, "'" + delimiter +
+                                    "' expected after '" +
+                                    dialect.quotechar + "'")
+
+            elif state == EAT_CRNL:
+                if c != '\n' and c != '\r':
+                    raise csv_error(self.space,
+                                    "new-line character seen in unquoted "
+                                    "field - do you need to open the file "
+                                    "in universal-newline mode?")
+
+            else:
+                raise OperationError(self.space.w_RuntimeError,
+                                     self.space.wrap("unknown state"))
+            pos += 1
+
+    def parse_eol(self):
+        state = self.state
+        if state == EAT_CRNL:
+            self.state = START_RECORD
+        elif state == START_RECORD:
+            # empty line - return []
+            pass
+        elif state == IN_FIELD or state == START_FIELD:
+            # end of line - return [fields]
+            self.save_field()
+            self.state = START_RECORD
+        elif state == ESCAPED_CHAR:
+            self.add_char('\n')
+            self.state = IN_FIELD
+        elif state == IN_QUOTED_FIELD:
+            pass
+        elif state == ESCAPE_IN_QUOTED_FIELD:
+            self.add_char('\n')
+            self.state = IN_QUOTED_FIELD
+        elif state == QUOTE_IN_QUOTED_FIELD:
+            # end of line - return [fields]
+            self.save_field()
+            self.state = START_RECORD
+        else:
+            raise OperationError(self.space.w_RuntimeError,
+                                 self.space.wrap("unknown state"))
+
+    def save_field(self):
+        space = self.space
+        field = self.field.build()
+        self.field = StringBuilder()
+        if self.numeric_field:
+            self.numeric_field = False
+            w_field = space.call_function(space.w_float, space.wrap(field))
+        else:
+            w_field = space.wrap(field)
+        self.fields_w.append(w_field)
+
+    def check_limit(self, n):
+        if self.field.getlength() + n > self.field_limit:
+            raise csv_error(self.space, "field larger than field limit (%d)"
+                                        % self.field_limit)
+
+    def add_char(self, c):
+        self.check_limit(1)
+        self.field.append(c)
+
+    def add_slice(self, line, start, stop):
+        if stop > start:
+            self.check_limit(stop - start)
+            self.field.append_slice(line, start, stop)
+
+    def fget_line_num(self, space):
+        return space.wrap(self.line_num)
+
+    def fget_dialect(self, space):
+        return space.wrap(self.dialect)
+
+
+def reader(space, w_iterator, w_dialect=NoneNotWrapped,
+           w_delimiter=NoneNotWrapped, w_doublequote=NoneNotWrapped,
+           w_escapechar=NoneNotWrapped, w_lineterminator=NoneNotWrapped,
+           w_quotechar=NoneNotWrapped, w_quoting=NoneNotWrapped,
+           w_skipinitialspace=NoneNotWrapped, w_strict=NoneNotWrapped):
+    """
+    csv_reader = reader(iterable [, dialect='excel']
+                       [optional keyword args])
+    for row in csv_reader:
+        process(row)
+
+    The "iterable" argument can be any object that returns a line
+    of input for each iteration, such as a file object or a list.  The
+    optional \"dialect\" parameter is discussed below.  The function
+    also accepts optional keyword arguments which override settings
+    provided by the dialect.
+
+    The returned object is an iterator.  Each iteration returns a row
+    of the CSV file (which can span multiple input lines)"""
+    w_iter = space.iter(w_iterator)
+    dialect = _build_dialect(space, None, w_dialect, w_delimiter,
+                             w_doublequote, w_escapechar, w_lineterminator,
+                             w_quotechar, w_quoting, w_skipinitialspace,
+                             w_strict)
+    return space.wrap(W_Reader(space, dialect, w_iter))
+
+W_Reader.typedef = TypeDef("Reader",
+    __module__ = "_csv",
+    __doc__ = W_Reader.__doc__,
+    __iter__ = interp2app(W_Reader.descr_iter),
+    next = interp2app(W_Reader.descr_next),
+    dialect = GetSetProperty(W_Reader.fget_dialect),
+    line_num = GetSetProperty(W_Reader.fget_line_num),
+    )
+W_Reader.typedef.acceptable_as_base_class = False
@@ -0,0 +1,193 @@
+"""
+Interp-level CSV writer.  The rows are joined directly into a StringBuilder;
+writerows() passes the data of several rows at once to the file's write().
+"""
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.rlib.rstring import StringBuilder
+from pypy.module._csv.interp_csv import _build_dialect, csv_error
+from pypy.module._csv.interp_csv import QUOTE_ALL, QUOTE_NONE
+from pypy.module._csv.interp_csv import QUOTE_NONNUMERIC
+
+FLUSH_SIZE = 64 * 1024
+
+
+class W_Writer(Wrappable):
+    """CSV writer
+
+    Writer objects are responsible for generating tabular data
+    in CSV format from sequence input."""
+
+    def __init__(self, space, dialect, w_write):
+        self.space = space
+        self.dialect = dialect
+        self.w_write = w_write
+
+    def join_row(self, builder, w_row):
+        space = self.space
+        dialect = self.dialect
+        try:
+            fields_w = space.listview(w_row)
+        except OperationError, e:
+            if not e.match(space, space.w_TypeError):
+                raise
+            raise csv_error(space, "sequence expected")
+        quote_empty = len(fields_w) == 1
+        first = True
+        for w_field in fields_w:
+            quoted = False
+            if dialect.quoting == QUOTE_NONNUMERIC:
+                try:
+                    space.call_function(space.w_float, w_field)
+                except OperationError:
+                    quoted = True
+            elif dialect.quoting == QUOTE_ALL:
+                quoted = True
+            if space.is_w(w_field, space.w_None):
+                field = ""
+            elif space.is_w(space.type(w_field), space.w_str):
+                field = space.str_w(w_field)
+            else:
+                field = space.str_w(space.str(w_field))
+            # If this is not the first field we need a field separator
+            if first:
+                first = False
+            else:
+                builder.append(dialect.delimiter)
+            self.join_field(builder, field, quoted, quote_empty)
+        # add line terminator
+        builder.append(dialect.lineterminator)
+
+    def join_field(self, builder, field, quoted, quote_empty):
+        dialect = self.dialect
+        lineterminator = dialect.lineterminator
+        quotechar = dialect.quotechar
+        escapechar = dialect.escapechar
+        # first find out if the field must be quoted or escaped
+        need_escape = False
+        for c in field:
+            if c == '\0':
+                continue
+            if dialect.quoting == QUOTE_NONE:
+                if (c in lineterminator or c == escapechar or
+                        c == dialect.delimiter or c == quotechar):
+                    need_escape = True
+            elif c == quotechar:
+                if dialect.doublequote:
+                    quoted = True
+                else:
+                    need_escape = True
+            elif (c in lineterminator or c == dialect.delimiter or
+                    c == escapechar):
+                quoted = True
+        if need_escape and escapechar == '\0':
+            raise csv_error(self.space, "need to escape, but no escapechar set")
+
+        # If field is empty check if it needs to be quoted
+        if len(field) == 0 and quote_empty:
+            if dialect.quoting == QUOTE_NONE:
+                raise csv_error(self.space,
+                                "single empty field record must be quoted")
+            quoted = True
+
+        if quoted:
+            builder.append(quotechar)
+        if not need_escape and not (quoted and dialect.doublequote):
+            builder.append(field)
+        else:
+            for c in field:
+                if c == '\0':
+                    pass
+                elif dialect.quoting == QUOTE_NONE:
+                    if (c in lineterminator or c == escapechar or
+                            c == dialect.delimiter or c == quotechar):
+                        builder.append(escapechar)
+                elif c == quotechar:
+                    if dialect.doublequote:
+                        builder.append(quotechar)
+                    else:
+                        builder.append(escapechar)
+                builder.append(c)
+        if quoted:
+            builder.append(quotechar)
+
+    def descr_writerow(self, space, w_row):
+        """writerow(sequence)
+
+        Construct and write a CSV record from a sequence of fields.  Non-string
+        elements will be converted to string."""
+        builder = StringBuilder()
+        self.join_row(builder, w_row)
+        return space.call_function(self.w_write, space.wrap(builder.build()))
+
+    def descr_writerows(self, space, w_rows):
+        """writerows(sequence of sequences)
+
+        Construct and write a series of sequences to a csv file.  Non-string
+        elements will be converted to string."""
+        w_iter = space.iter(w_rows)
+        builder = StringBuilder()
+        try:
+            while True:
+                try:
+                    w_row = space.next(w_iter)
+                except OperationError, e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                self.join_row(builder, w_row)
+                if builder.getlength() >= FLUSH_SIZE:
+                    self.flush(builder)
+                    builder = StringBuilder()
+        finally:
+            # also write the rows before an error
+            self.flush(builder)
+
+    def flush(self, builder):
+        if builder.getlength() > 0:
+            space = self.space
+            space.call_function(self.w_write, space.wrap(builder.build()))
+
+    def fget_dialect(self, space):
+        return space.wrap(self.dialect)
+
+
+def writer(space, w_fileobj, w_dialect=NoneNotWrapped,
+           w_delimiter=NoneNotWrapped, w_doublequote=NoneNotWrapped,
+           w_escapechar=NoneNotWrapped, w_lineterminator=NoneNotWrapped,
+           w_quotechar=NoneNotWrapped, w_quoting=NoneNotWrapped,
+           w_skipinitialspace=NoneNotWrapped, w_strict=NoneNotWrapped):
+    """
+    csv_writer = csv.writer(fileobj [, dialect='excel']
+                            [optional keyword args])
+    for row in sequence:
+        csv_writer.writerow(row)
+
+    [or]
+
+    csv_writer = csv.writer(fileobj [, dialect='excel']
+                            [optional keyword args])
+    csv_writer.writerows(rows)
+
+    The \"fileobj\" argument can be any object that supports the file API."""
+    w_write = space.findattr(w_fileobj, space.wrap('write'))
+    if w_write is None or not space.is_true(space.callable(w_write)):
+        raise OperationError(space.w_TypeError,
+                             space.wrap("argument 1 must have a 'write' "
+                                        "method"))
+    dialect = _build_dialect(space, None, w_dialect, w_delimiter,
+                             w_doublequote, w_escapechar, w_lineterminator,
+                             w_quotechar, w_quoting, w_skipinitialspace,
+                             w_strict)
+    return space.wrap(W_Writer(space, dialect, w_write))
+
+W_Writer.typedef = TypeDef("Writer",
+    __module__ = "_csv",
+    __doc__ = W_Writer.__doc__,
+    writerow = interp2app(W_Writer.descr_writerow),
+    writerows = interp2app(W_Writer.descr_writerows),
+    dialect = GetSetProperty(W_Writer.fget_dialect),
+    )
+W_Writer.typedef.acceptable_as_base_class = False
@@ -0,0 +1,205 @@
+"""
+Tests for the interp-level _csv module.
+"""
+
+from pypy.conftest import gettestobjspace
+
+
+class AppTestDialect(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=['_csv'])
+
+    def test_defaults(self):
+        import _csv
+        d = _csv.Dialect()
+        assert d.delimiter == ','
+        assert d.doublequote is True
+        assert d.escapechar is None
+        assert d.lineterminator == '\r\n'
+        assert d.quotechar == '"'
+        assert d.quoting == _csv.QUOTE_MINIMAL
+        assert d.skipinitialspace is False
+        assert d.strict is False
+        raises(TypeError, setattr, d, 'delimiter', ';')
+        raises(AttributeError, setattr, d, 'quoting', None)
+
+    def test_from_object(self):
+        import _csv
+        class semicolon:
+            delimiter = ';'
+            quotechar = None
+            lineterminator = '\n'
+        d = _csv.Dialect(semicolon, escapechar='\\')
+        assert d.delimiter == ';'
+        assert d.quotechar is None
+        assert d.quoting == _csv.QUOTE_NONE
+        assert d.escapechar == '\\'
+        assert d.lineterminator == '\n'
+        assert _csv.Dialect(d) is d
+        assert _csv.Dialect(d, delimiter=':').delimiter == ':'
+
+    def test_errors(self):
+        import _csv
+        raises(TypeError, _csv.Dialect, delimiter='')
+        raises(TypeError, _csv.Dialect, delimiter='ab')
+        raises(TypeError, _csv.Dialect, delimiter=1)
+        raises(TypeError, _csv.Dialect, quoting=7)
+        raises(TypeError, _csv.Dialect, quoting=_csv.QUOTE_ALL,
+               quotechar=None)
+        raises(TypeError, _csv.Dialect, lineterminator='')
+        raises(TypeError, _csv.Dialect, lineterminator=1)
+        raises(TypeError, _csv.Dialect, foo=1)
+
+    def test_registry(self):
+        import _csv
+        _csv.register_dialect('tabs', delimiter='\t')
+        try:
+            assert 'tabs' in _csv.list_dialects()
+            assert _csv.get_dialect('tabs').delimiter == '\t'
+            assert _csv.Dialect('tabs').delimiter == '\t'
+        finally:
+            _csv.unregister_dialect('tabs')
+        raises(_csv.Error, _csv.get_dialect, 'tabs')
+        raises(_csv.Error, _csv.unregister_dialect, 'tabs')
+        raises(TypeError, _csv.register_dialect, 42)
+
+    def test_field_size_limit(self):
+        import _csv
+        old = _csv.field_size_limit()
+        assert old == 128 * 1024
+        assert _csv.field_size_limit(10) == old
+        try:
+            raises(_csv.Error, list, _csv.reader(['x' * 11]))
+            assert list(_csv.reader(['x' * 10])) == [['x' * 10]]
+        finally:
+            _csv.field_size_limit(old)
+        raises(TypeError, _csv.field_size_limit, 'x')
+
+
+class AppTestReader(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=['_csv'])
+
+    def test_simple(self):
+        import _csv
+        r = _csv.reader(['a,b,c\r\n', '1,,3\n', '\n', 'x'])
+        assert r.next() == ['a', 'b', 'c']
+        assert r.line_num == 1
+        assert r.next() == ['1', '', '3']
+        assert r.next() == []
+        assert r.next() == ['x']
+        assert r.line_num == 4
+        raises(StopIteration, r.next)
+        assert r.dialect.delimiter == ','
+
+    def test_quoting(self):
+        import _csv
+        assert list(_csv.reader(['"a,b","c""d",e\n'])) == [
+            ['a,b', 'c"d', 'e']]
+        # a quoted field spanning two lines
+        assert list(_csv.reader(['1,"two\n', 'lines",3\n'])) == [
+            ['1', 'two\nlines', '3']]
+        assert list(_csv.reader(['"a"b,c'])) == [['ab', 'c']]
+        raises(_csv.Error, list, _csv.reader(['"a"b,c'], strict=True))
+        assert list(_csv.reader(['"a"b"c"'], doublequote=False)) == [
+            ['ab"c"']]
+        assert list(_csv.reader(['"a,b'], quoting=_csv.QUOTE_NONE)) == [
+            ['"a', 'b']]
+        raises(_csv.Error, list, _csv.reader(['"unterminated']))
+
+    def test_options(self):
+        import _csv
+        assert list(_csv.reader(['a; b;  c'], delimiter=';',
+                                skipinitialspace=True)) == [['a', 'b', 'c']]
+        assert list(_csv.reader(['a\\,b,c\\', 'd'], escapechar='\\')) == [
+            ['a,b', 'c\nd']]
+        assert list(_csv.reader(['"a\\"b",c'], escapechar='\\')) == [
+            ['a"b', 'c']]
+        assert list(_csv.reader(['1,2.5,"x"'],
+                                quoting=_csv.QUOTE_NONNUMERIC)) == [
+            [1.0, 2.5, 'x']]
+        raises(ValueError, list, _csv.reader(['a'],
+                                             quoting=_csv.QUOTE_NONNUMERIC))
+        assert list(_csv.reader([u'a,b'])) == [['a', 'b']]
+
+    def test_errors(self):
+        import _csv
+        raises(_csv.Error, list, _csv.reader(['a\0b']))
+        raises(_csv.Error, list, _csv.reader(['a\rb']))
+        raises(_csv.Error, list, _csv.reader([42]))
+        raises(TypeError, _csv.reader, 42)
+
+    def test_csv_module(self):
+        import csv
+        from StringIO import StringIO
+        f = StringIO('name,value\r\nx,"1,5"\r\n')
+        assert list(csv.DictReader(f)) == [{'name': 'x', 'value': '1,5'}]
+        dialect = csv.Sniffer().sniff('a;b;c\n1;2;3\n')
+        assert dialect.delimiter == ';'
+
+
+class AppTestWriter(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=['_csv'])
+        cls.w_write = cls.space.appexec([], """():
+            import _csv
+            class File(object):
+                def __init__(self):
+                    self.data = []
+                def write(self, s):
+                    self.data.append(s)
+            def write(rows, **kwds):
+                f = File()
+                _csv.writer(f, **kwds).writerows(rows)
+                return ''.join(f.data)
+            return write
+        """)
+
+    def test_simple(self):
+        assert self.write([['a', 1, 2.5, None], []]) == 'a,1,2.5,\r\n\r\n'
+        assert self.write([['a,b', 'c"d', 'e\nf', '']]) == (
+            '"a,b","c""d","e\nf",\r\n')
+        assert self.write([['']]) == '""\r\n'
+        assert self.write([['a', 'b']], lineterminator='\n',
+                          delimiter='\t') == 'a\tb\n'
+
+    def test_quoting(self):
+        import _csv
+        assert self.write([['a', 1]], quoting=_csv.QUOTE_ALL) == (
+            '"a","1"\r\n')
+        assert self.write([['a', 1, '2.5']],
+                          quoting=_csv.QUOTE_NONNUMERIC) == '"a",1,2.5\r\n'
+        assert self.write([['a,b', 'c\\']], quoting=_csv.QUOTE_NONE,
+                          escapechar='\\') == 'a\\,b,c\\\\\r\n'
+        assert self.write([['c"d']], doublequote=False,
+                          escapechar='\\') == 'c\\"d\r\n'
+
+    def test_errors(self):
+        import _csv
+        raises(_csv.Error, self.write, [['a,b']], quoting=_csv.QUOTE_NONE)
+        raises(_csv.Error, self.write, [['']], quoting=_csv.QUOTE_NONE)
+        raises(_csv.Error, self.write, [['"']], doublequote=False)
+        raises(_csv.Error, self.write, [42])
+        raises(TypeError, _csv.writer, 42)
+
+    def test_writerow_and_partial_writerows(self):
+        import _csv
+        class File(object):
+            data = ''
+            def write(self, s):
+                self.data += s
+        f = File()
+        w = _csv.writer(f)
+        w.writerow(['x'])
+        raises(_csv.Error, w.writerows, [['a'], 42])
+        assert f.data == 'x\r\na\r\n'
+
+    def test_roundtrip(self):
+        import _csv
+        rows = [['a', 'b,c', 'd"e', 'f\r\ng', ' h', ''], ['1', '2']]
+        data = self.write(rows)
+        lines = data.splitlines(True)
+        assert list(_csv.reader(lines)) == rows
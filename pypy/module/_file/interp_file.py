@@ -158,10 +158,10 @@ class W_File(W_AbstractStream):
         self.getstream().flush()
 
     def direct_next(self):
-        line = self.getstream().readline()
-        if line == '':
+        data, start, stop = self.getstream().readline_slice()
+        if start == stop:
             raise OperationError(self.space.w_StopIteration, self.space.w_None)
-        return line
+        return wrap_line(self.space, data, start, stop)
 
     @unwrap_spec(n=int)
     def direct_read(self, n=-1):
@@ -182,7 +182,8 @@ class W_File(W_AbstractStream):
     def direct_readline(self, size=-1):
         stream = self.getstream()
         if size < 0:
-            return stream.readline()
+            data, start, stop = stream.readline_slice()
+            return wrap_line(self.space, data, start, stop)
         else:
             # very inefficient unless there is a peek()
             result = []
@@ -200,7 +201,7 @@ class W_File(W_AbstractStream):
                 if c.endswith('\n'):
                     break
                 size -= len(c)
-            return ''.join(result)
+            return self.space.wrap(''.join(result))
 
     @unwrap_spec(size=int)
     def direct_readlines(self, size=0):
@@ -211,11 +212,12 @@ class W_File(W_AbstractStream):
             data = stream.readall()
         else:
             data = stream.read(size)
+        space = self.space
         result = []
         splitfrom = 0
         for i in range(len(data)):
             if data[i] == '\n':
-                result.append(data[splitfrom : i + 1])
+                result.append(wrap_line(space, data, splitfrom, i + 1))
                 splitfrom = i + 1
         #
         if splitfrom < len(data):
@@ -223,10 +225,10 @@ class W_File(W_AbstractStream):
             # to be because the 'read(size)' returned data up to the middle
             # of a line.  In that case, use 'readline()' to read until the
             # end of the current line.
-            data = data[splitfrom:]
             if size > 0:
-                data += stream.readline()
-            result.append(data)
+                data = data[splitfrom:] + stream.readline()
+                splitfrom = 0
+            result.append(wrap_line(space, data, splitfrom, len(data)))
         return result
 
     @unwrap_spec(offset=r_longlong, whence=int)
@@ -348,7 +350,8 @@ This is needed for lower-level file interfaces, such os.read().''')
         """isatty() -> true or false.  True if the file is connected to a tty device.""")
 
     _decl(locals(), "next",
-        """next() -> the next line in the file, or raise StopIteration""")
+        """next() -> the next line in the file, or raise StopIteration""",
+        wrapresult="result")
 
     _decl(locals(), "read",
         """read([size]) -> read at most size bytes, returned as a string.
@@ -362,7 +365,8 @@ may be returned, even if no size parameter was given.""")
 
 Retain newline.  A non-negative size argument limits the maximum
 number of bytes to return (an incomplete line may be returned then).
-Return an empty string at EOF.""")
+Return an empty string at EOF.""",
+        wrapresult="result")
 
     _decl(locals(), "readlines",
         """readlines([size]) -> list of strings, each a line from the file.
@@ -370,7 +374,7 @@ Return an empty string at EOF.""")
 Call readline() repeatedly and return a list of the lines so read.
 The optional size argument, if given, is an approximate bound on the
 total number of bytes in the lines returned.""",
-        wrapresult = "wrap_list_of_str(space, result)")
+        wrapresult = "space.newlist(result)")
 
     _decl(locals(), "seek",
         """seek(offset[, whence]) -> None.  Move to new file position.
@@ -552,8 +556,21 @@ Note:  open() is an alias for file().
 
 # ____________________________________________________________
 
-def wrap_list_of_str(space, lst):
-    return space.newlist([space.wrap(s) for s in lst])
+def wrap_line(space, data, start, stop):
+    """Wrap data[start:stop].  With the 'withfilereadslices' option a long
+    line shares 'data', which is usually the read buffer of the stream."""
+    if start == 0 and stop == len(data):
+        return space.wrap(data)
+    assert start >= 0
+    assert stop >= 0
+    if space.config.objspace.std.withfilereadslices:
+        from pypy.objspace.std.strsliceobject import W_StringSliceObject
+        # same heuristic as stringtype.sliced(): only share 'data' if the
+        # line is a large enough part of it, so that short lines don't
+        # keep the whole buffer alive
+        if (stop - start) > len(data) * 0.20 + 40:
+            return W_StringSliceObject(data, start, stop)
+    return space.wrap(data[start:stop])
 
 class FileState:
     def __init__(self, space):
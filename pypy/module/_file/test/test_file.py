@@ -257,6 +257,63 @@ Delivered-To: gkj@sundance.gregorykjohnson.com'''
             assert self.temppath in g.getvalue()
 
 
+class AppTestFileReadSlices(AppTestFile):
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=("_file", ),
+                                    **{"objspace.std.withstrslice": True,
+                                       "objspace.std.withfilereadslices": True})
+        cls.w_temppath = cls.space.wrap(
+            str(py.test.ensuretemp("fileimpl").join("slices.txt")))
+        cls.w_file = getfile(cls.space)
+
+    def test_lines_share_buffer(self):
+        import __pypy__
+        lines = (["short\n", "x" * 3000 + "\n"] +
+                 ["line %d\n" % i for i in range(100)] + ["no newline"])
+        with self.file(self.temppath, "w") as f:
+            f.writelines(lines)
+        for mode in ["r", "rb", "rU"]:
+            with self.file(self.temppath, mode) as f:
+                line = f.readline()
+                assert line == lines[0]
+                assert 'W_StringSliceObject' not in __pypy__.internal_repr(
+                    line)
+                line = f.readline()
+                assert line == lines[1]
+                if mode != "rU":    # universal newlines copy the lines
+                    assert 'W_StringSliceObject' in __pypy__.internal_repr(
+                        line)
+                assert list(f) == lines[2:]
+            with self.file(self.temppath, mode) as f:
+                result = f.readlines()
+                assert result == lines
+                assert 'W_StringSliceObject' in __pypy__.internal_repr(
+                    result[1])
+                for line in result[2:]:
+                    assert 'W_StringSliceObject' not in (
+                        __pypy__.internal_repr(line))
+            with self.file(self.temppath, mode) as f:
+                assert f.readlines(100) == lines[:2]
+                assert f.readline(3) == "lin"
+                assert f.readline() == "e 0\n"
+                assert f.tell() == len("".join(lines[:3]))
+
+    def test_short_line_does_not_share_buffer(self):
+        import __pypy__
+        with self.file(self.temppath, "w") as f:
+            f.write("a\n" + "b" * 5000 + "\n")
+        for mode in ["r", "rb"]:
+            with self.file(self.temppath, mode) as f:
+                line = f.readline()
+                assert line == "a\n"
+                assert 'W_StringSliceObject' not in __pypy__.internal_repr(
+                    line)
+                line = next(f)
+                assert line == "b" * 5000 + "\n"
+                assert 'W_StringSliceObject' in __pypy__.internal_repr(
+                    line)
+
+
 class AppTestNonblocking(object):
     def setup_class(cls):
         from pypy.module._file.interp_file import W_File
@@ -0,0 +1,16 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """json speedups
+    """
+
+    appleveldefs = {
+        }
+
+    interpleveldefs = {
+        'scanstring': 'interp_decoder.scanstring',
+        'make_scanner': 'interp_decoder.W_Scanner',
+        'encode_basestring_ascii': 'interp_encoder.encode_basestring_ascii',
+        'make_encoder': 'interp_encoder.W_Encoder',
+        }
@@ -0,0 +1,12 @@
+
+import json
+
+def f():
+    record = {"id": 12345, "name": u"widget \xe9", "price": 9.75,
+              "tags": ["a", "b", "c"], "active": True, "parent": None,
+              "description": "some text with an escape\nin it"}
+    data = [dict(record, id=i) for i in range(20000)]
+    for i in range(10):
+        json.dumps(data)
+
+f()
@@ -0,0 +1,12 @@
+
+import json
+
+def f():
+    record = {"id": 12345, "name": "widget", "price": 9.75,
+              "tags": ["a", "b", "c"], "active": True, "parent": None,
+              "description": "some text with an escape\nin it"}
+    doc = json.dumps([record] * 20000)
+    for i in range(10):
+        json.loads(doc)
+
+f()
@@ -0,0 +1,523 @@
+"""
+Interp-level JSON scanner.  It replaces the regular expressions and the
+per-token function calls of json/decoder.py and json/scanner.py by a single
+recursive descent over the string, which builds the result objects directly.
+"""
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter import unicodehelper
+from pypy.rlib.rarithmetic import ovfcheck
+from pypy.rlib.rfloat import rstring_to_float
+from pypy.rlib.rstring import StringBuilder, UnicodeBuilder
+from pypy.rlib.runicode import MAXUNICODE, UNICHR
+
+
+class NoValue(Exception):
+    """There is no JSON value at the given position."""
+
+
+def _isspace(c):
+    return c == ord(' ') or c == ord('\t') or c == ord('\n') or c == ord('\r')
+
+def _isdigit(c):
+    return ord('0') <= c <= ord('9')
+
+def _hexdigit(c):
+    if ord('0') <= c <= ord('9'):
+        return c - ord('0')
+    if ord('a') <= c <= ord('f'):
+        return c - ord('a') + 10
+    if ord('A') <= c <= ord('F'):
+        return c - ord('A') + 10
+    return -1
+
+
+class Decoder(object):
+    """Decodes the JSON document 's', which is a str or a unicode: the
+    subclasses below only differ in how they turn slices of 's' into
+    unicode strings."""
+    _mixin_ = True
+
+    def __init__(self, space, s, w_doc, scanner, encoding, strict):
+        self.space = space
+        self.s = s
+        self.length = len(s)
+        self.w_doc = w_doc
+        self.scanner = scanner
+        self.encoding = encoding
+        self.strict = strict
+        self.pos = 0
+        self.memo = {}    # raw key -> decoded key, see parse_key()
+
+    def char(self, i):
+        return ord(self.s[i])
+
+    def wrap_slice(self, start, end):
+        assert start >= 0
+        assert end >= start
+        return self.space.wrap(self.s[start:end])
+
+    def error(self, msg, pos):
+        # same format as errmsg() in json/decoder.py
+        lineno = 1
+        lastnl = 0
+        i = 0
+        while i < pos and i < self.length:
+            if self.char(i) == ord('\n'):
+                lineno += 1
+                lastnl = i
+            i += 1
+        if lineno == 1:
+            colno = pos
+        else:
+            colno = pos - lastnl
+        return operationerrfmt(self.space.w_ValueError,
+                               "%s: line %d column %d (char %d)",
+                               msg, lineno, colno, pos)
+
+    def skip_whitespace(self, i):
+        while i < self.length and _isspace(self.char(i)):
+            i += 1
+        return i
+
+    def startswith(self, i, literal):
+        if i + len(literal) > self.length:
+            return False
+        for j in range(len(literal)):
+            if self.char(i + j) != ord(literal[j]):
+                return False
+        return True
+
+    def scan_toplevel(self, idx):
+        space = self.space
+        if idx < 0 or idx >= self.length:
+            raise OperationError(space.w_StopIteration, space.wrap(idx))
+        try:
+            w_value = self.scan_once(idx)
+        except NoValue:
+            raise OperationError(space.w_StopIteration, space.wrap(idx))
+        return space.newtuple([w_value, space.wrap(self.pos)])
+
+    def scan_string(self, end):
+        space = self.space
+        if end < 0 or end > self.length:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("end is out of bounds"))
+        w_result = self.parse_string(end)
+        return space.newtuple([w_result, space.wrap(self.pos)])
+
+    def scan_value(self, i):
+        try:
+            return self.scan_once(i)
+        except NoValue:
+            raise self.error("Expecting object", i)
+
+    def scan_once(self, i):
+        """Decodes the value starting at 'i' and sets self.pos to the index
+        after it.  Raises NoValue if there is no value at 'i'."""
+        space = self.space
+        if i >= self.length:
+            raise NoValue
+        c = self.char(i)
+        if c == ord('"'):
+            return self.parse_string(i + 1)
+        elif c == ord('{'):
+            return self.parse_object(i + 1)
+        elif c == ord('['):
+            return self.parse_array(i + 1)
+        elif c == ord('n') and self.startswith(i, 'null'):
+            self.pos = i + 4
+            return space.w_None
+        elif c == ord('t') and self.startswith(i, 'true'):
+            self.pos = i + 4
+            return space.w_True
+        elif c == ord('f') and self.startswith(i, 'false'):
+            self.pos = i + 5
+            return space.w_False
+        if c == ord('-') or _isdigit(c):
+            w_number = self.parse_number(i)
+            if w_number is not None:
+                return w_number
+        if c == ord('N') and self.startswith(i, 'NaN'):
+            return self.parse_constant('NaN', i + 3)
+        elif c == ord('I') and self.startswith(i, 'Infinity'):
+            return self.parse_constant('Infinity', i + 8)
+        elif c == ord('-') and self.startswith(i, '-Infinity'):
+            return self.parse_constant('-Infinity', i + 9)
+        raise NoValue
+
+    def parse_constant(self, name, end):
+        self.pos = end
+        return self.space.call_function(self.scanner.w_parse_constant,
+                                        self.space.wrap(name))
+
+    def skip_digits(self, i):
+        while i < self.length and _isdigit(self.char(i)):
+            i += 1
+        return i
+
+    def parse_number(self, start):
+        # -?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?
+        space = self.space
+        i = start
+        if self.char(i) == ord('-'):
+            i += 1
+        if i < self.length and self.char(i) == ord('0'):
+            i += 1
+        elif i < self.length and _isdigit(self.char(i)):
+            i = self.skip_digits(i + 1)
+        else:
+            return None
+        is_float = False
+        if (i + 1 < self.length and self.char(i) == ord('.') and
+                _isdigit(self.char(i + 1))):
+            i = self.skip_digits(i + 2)
+            is_float = True
+        if i < self.length and (self.char(i) == ord('e') or
+                                self.char(i) == ord('E')):
+            j = i + 1
+            if j < self.length and (self.char(j) == ord('-') or
+                                    self.char(j) == ord('+')):
+                j += 1
+            if j < self.length and _isdigit(self.char(j)):
+                i = self.skip_digits(j + 1)
+                is_float = True
+        self.pos = i
+        scanner = self.scanner
+        if is_float:
+            if scanner.w_parse_float is None:
+                return space.wrap(rstring_to_float(self.getslice_ascii(start,
+                                                                       i)))
+            return space.call_function(scanner.w_parse_float,
+                                       self.wrap_slice(start, i))
+        if scanner.w_parse_int is None:
+            return self.decode_int(start, i)
+        return space.call_function(scanner.w_parse_int,
+                                   self.wrap_slice(start, i))
+
+    def decode_int(self, start, end):
+        i = start
+        negative = self.char(i) == ord('-')
+        if negative:
+            i += 1
+        result = 0
+        try:
+            while i < end:
+                digit = self.char(i) - ord('0')
+                result = ovfcheck(result * 10)
+                if negative:
+                    result = ovfcheck(result - digit)
+                else:
+                    result = ovfcheck(result + digit)
+                i += 1
+        except OverflowError:
+            return self.space.call_function(self.space.w_long,
+                                            self.wrap_slice(start, end))
+        return self.space.wrap(result)
+
+    def parse_array(self, i):
+        space = self.space
+        values_w = []
+        i = self.skip_whitespace(i)
+        if i < self.length and self.char(i) == ord(']'):
+            self.pos = i + 1
+            return space.newlist(values_w)
+        while True:
+            values_w.append(self.scan_value(i))
+            i = self.skip_whitespace(self.pos)
+            if i < self.length and self.char(i) == ord(']'):
+                break
+            if i >= self.length or self.char(i) != ord(','):
+                # json/decoder.py reports the index after the bad character
+                raise self.error("Expecting , delimiter", i + 1)
+            i = self.skip_whitespace(i + 1)
+        self.pos = i + 1
+        return space.newlist(values_w)
+
+    def parse_object(self, i):
+        space = self.space
+        scanner = self.scanner
+        w_pairs_hook = scanner.w_object_pairs_hook
+        w_dict = None
+        pairs_w = None
+        if w_pairs_hook is None:
+            w_dict = space.newdict()
+        else:
+            pairs_w = []
+        i = self.skip_whitespace(i)
+        if i >= self.length or self.char(i) != ord('}'):
+            while True:
+                if i >= self.length or self.char(i) != ord('"'):
+                    raise self.error("Expecting property name", i)
+                w_key = self.parse_key(i + 1)
+                i = self.skip_whitespace(self.pos)
+                if i >= self.length or self.char(i) != ord(':'):
+                    raise self.error("Expecting : delimiter", i)
+                i = self.skip_whitespace(i + 1)
+                w_value = self.scan_value(i)
+                if w_dict is not None:
+                    space.setitem(w_dict, w_key, w_value)
+                else:
+                    pairs_w.append(space.newtuple([w_key, w_value]))
+                i = self.skip_whitespace(self.pos)
+                if i < self.length and self.char(i) == ord('}'):
+                    break
+                if i >= self.length or self.char(i) != ord(','):
+                    raise self.error("Expecting , delimiter", i)
+                i = self.skip_whitespace(i + 1)
+        self.pos = i + 1
+        if w_dict is None:
+            return space.call_function(w_pairs_hook, space.newlist(pairs_w))
+        if scanner.w_object_hook is not None:
+            return space.call_function(scanner.w_object_hook, w_dict)
+        return w_dict
+
+    def parse_key(self, start):
+        # The same keys usually come back again and again in a document:
+        # decode them only once, and let all the dicts share the key objects.
+        i = start
+        while i < self.length:
+            c = self.char(i)
+            if c == ord('"'):
+                key = self.s[start:i]
+                w_key = self.memo.get(key, None)
+                if w_key is None:
+                    w_key = self.parse_string(start)
+                    self.memo[key] = w_key
+                else:
+                    self.pos = i + 1
+                return w_key
+            if c == ord('\\') or c < 0x20:
+                break
+            i += 1
+        return self.parse_string(start)
+
+    def parse_string(self, i):
+        """Decodes the string whose opening quote is at 'i - 1'."""
+        space = self.space
+        begin = i - 1
+        start = i
+        bits = 0
+        builder = None
+        while True:
+            if i >= self.length:
+                raise self.error("Unterminated string starting at", begin)
+            c = self.char(i)
+            if c == ord('"'):
+                break
+            if c == ord('\\'):
+                if builder is None:
+                    builder = UnicodeBuilder()
+                builder.append(self.decode_chunk(start, i, bits))
+                i = self.parse_escape(builder, i + 1, begin)
+                start = i
+                bits = 0
+                continue
+            if c < 0x20 and self.strict:
+                w_repr = space.repr(self.wrap_slice(i, i + 1))
+                raise self.error("Invalid control character %s at" %
+                                 (space.str_w(w_repr),), i + 1)
+            bits |= c
+            i += 1
+        self.pos = i + 1
+        chunk = self.decode_chunk(start, i, bits)
+        if builder is None:
+            return space.wrap(chunk)
+        builder.append(chunk)
+        return space.wrap(builder.build())
+
+    def parse_escape(self, builder, i, begin):
+        """Decodes the escape sequence after the backslash at 'i - 1'.
+        Returns the index after it."""
+        if i >= self.length:
+            raise self.error("Unterminated string starting at", begin)
+        c = self.char(i)
+        if c == ord('"'):
+            builder.append(u'"')
+        elif c == ord('\\'):
+            builder.append(u'\\')
+        elif c == ord('/'):
+            builder.append(u'/')
+        elif c == ord('b'):
+            builder.append(u'\b')
+        elif c == ord('f'):
+            builder.append(u'\f')
+        elif c == ord('n'):
+            builder.append(u'\n')
+        elif c == ord('r'):
+            builder.append(u'\r')
+        elif c == ord('t'):
+            builder.append(u'\t')
+        elif c == ord('u'):
+            return self.parse_unicode_escape(builder, i)
+        else:
+            w_repr = self.space.repr(self.wrap_slice(i, i + 1))
+            raise self.error("Invalid \\escape: " + self.space.str_w(w_repr),
+                             i)
+        return i + 1
+
+    def parse_unicode_escape(self, builder, i):
+        uni = self.decode_hex4(i + 1)
+        if uni < 0:
+            raise self.error("Invalid \\uXXXX escape", i)
+        end = i + 5
+        # join surrogate pairs on UCS-4 builds
+        if 0xd800 <= uni <= 0xdbff and MAXUNICODE > 65535:
+            msg = "Invalid \\uXXXX\\uXXXX surrogate pair"
+            if not (end + 1 < self.length and self.char(end) == ord('\\') and
+                    self.char(end + 1) == ord('u')):
+                raise self.error(msg, i)
+            uni2 = self.decode_hex4(end + 2)
+            if not 0xdc00 <= uni2 <= 0xdfff:
+                raise self.error(msg, i)
+            uni = 0x10000 + (((uni - 0xd800) << 10) | (uni2 - 0xdc00))
+            end += 6
+        builder.append(UNICHR(uni))
+        return end
+
+    def decode_hex4(self, i):
+        if i + 4 > self.length:
+            return -1
+        result = 0
+        for j in range(i, i + 4):
+            digit = _hexdigit(self.char(j))
+            if digit < 0:
+                return -1
+            result = (result << 4) | digit
+        return result
+
+
+class StrDecoder(Decoder):
+
+    def getslice_ascii(self, start, end):
+        assert start >= 0
+        assert end >= start
+        return self.s[start:end]
+
+    def decode_chunk(self, start, end, bits):
+        # 'bits' is the or of all the characters in the chunk
+        assert start >= 0
+        assert end >= start
+        if bits < 0x80:
+            builder = UnicodeBuilder(end - start)
+            for i in range(start, end):
+                builder.append(unichr(self.char(i)))
+            return builder.build()
+        chunk = self.s[start:end]
+        if self.encoding == 'utf-8':
+            return unicodehelper.PyUnicode_DecodeUTF8(self.space, chunk)
+        space = self.space
+        w_chunk = space.call_method(space.wrap(chunk), 'decode',
+                                    space.wrap(self.encoding))
+        return space.unicode_w(w_chunk)
+
+
+class UnicodeDecoder(Decoder):
+
+    def getslice_ascii(self, start, end):
+        builder = StringBuilder(end - start)
+        for i in range(start, end):
+            builder.append(chr(self.char(i)))
+        return builder.build()
+
+    def decode_chunk(self, start, end, bits):
+        assert start >= 0
+        assert end >= start
+        return self.s[start:end]
+
+
+def _check_string(space, w_string):
+    if not (space.isinstance_w(w_string, space.w_unicode) or
+            space.isinstance_w(w_string, space.w_str)):
+        raise operationerrfmt(space.w_TypeError,
+                              "first argument must be a string, not %s",
+                              space.type(w_string).getname(space))
+
+# ____________________________________________________________
+
+class W_Scanner(Wrappable):
+    """The settings of a json.JSONDecoder, read once when the scanner
+    is made."""
+
+    def __init__(self, space, w_context):
+        self.strict = space.is_true(space.getattr(w_context,
+                                                  space.wrap("strict")))
+        self.encoding = _encoding_w(space, space.getattr(
+            w_context, space.wrap("encoding")))
+        self.w_object_hook = _hook_w(space, w_context, "object_hook", None)
+        self.w_object_pairs_hook = _hook_w(space, w_context,
+                                           "object_pairs_hook", None)
+        # None when the default conversion can be done at interp-level
+        self.w_parse_float = _hook_w(space, w_context, "parse_float",
+                                     space.w_float)
+        self.w_parse_int = _hook_w(space, w_context, "parse_int",
+                                   space.w_int)
+        self.w_parse_constant = space.getattr(w_context,
+                                              space.wrap("parse_constant"))
+
+    @unwrap_spec(idx=int)
+    def descr_call(self, space, w_string, idx):
+        _check_string(space, w_string)
+        if space.isinstance_w(w_string, space.w_unicode):
+            decoder = UnicodeDecoder(space, space.unicode_w(w_string),
+                                     w_string, self, self.encoding,
+                                     self.strict)
+            return decoder.scan_toplevel(idx)
+        decoder = StrDecoder(space, space.str_w(w_string), w_string, self,
+                             self.encoding, self.strict)
+        return decoder.scan_toplevel(idx)
+
+def _hook_w(space, w_context, name, w_default):
+    w_hook = space.getattr(w_context, space.wrap(name))
+    if space.is_w(w_hook, space.w_None):
+        return None
+    if w_default is not None and space.is_w(w_hook, w_default):
+        return None
+    return w_hook
+
+def _encoding_w(space, w_encoding):
+    if space.is_w(w_encoding, space.w_None):
+        return 'utf-8'
+    encoding = space.str_w(w_encoding)
+    if encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+        return 'utf-8'
+    return encoding
+
+def W_Scanner___new__(space, w_subtype, w_context):
+    scanner = space.allocate_instance(W_Scanner, w_subtype)
+    scanner.__init__(space, w_context)
+    return space.wrap(scanner)
+
+W_Scanner.typedef = TypeDef("Scanner",
+    __module__ = "_json",
+    __doc__ = "JSON scanner object",
+    __new__ = interp2app(W_Scanner___new__),
+    __call__ = interp2app(W_Scanner.descr_call),
+    )
+
+
+@unwrap_spec(end=int, strict=bool)
+def scanstring(space, w_string, end, w_encoding=None, strict=True):
+    """scanstring(basestring, end, encoding, strict=True) -> (str, end)
+
+    Scan the string s for a JSON string. End is the index of the
+    character in s after the quote that started the JSON string.
+    Unescapes all valid JSON string escape sequences and raises ValueError
+    on attempt to decode an invalid string. If strict is False then literal
+    control characters are allowed in the string.
+
+    Returns a tuple of the decoded string and the index of the character in s
+    after the end quote."""
+    _check_string(space, w_string)
+    if w_encoding is None:
+        w_encoding = space.w_None
+    encoding = _encoding_w(space, w_encoding)
+    if space.isinstance_w(w_string, space.w_unicode):
+        decoder = UnicodeDecoder(space, space.unicode_w(w_string), w_string,
+                                 None, encoding, strict)
+        return decoder.scan_string(end)
+    decoder = StrDecoder(space, space.str_w(w_string), w_string, None,
+                         encoding, strict)
+    return decoder.scan_string(end)
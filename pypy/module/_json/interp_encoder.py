@@ -0,0 +1,291 @@
+"""
+Interp-level JSON encoder.  It walks the objects and streams their JSON
+representation into a single StringBuilder, instead of going through the
+generators and the regular expressions of json/encoder.py.
+"""
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter import unicodehelper
+from pypy.rlib.objectmodel import specialize
+from pypy.rlib.rfloat import formatd, isinf, isnan, DTSF_ADD_DOT_0
+from pypy.rlib.rstring import StringBuilder
+
+HEXDIGITS = "0123456789abcdef"
+
+
+def _needs_escape(s):
+    for c in s:
+        if not (' ' <= c <= '~') or c == '"' or c == '\\':
+            return True
+    return False
+
+def _append_u(builder, n):
+    builder.append('\\u')
+    builder.append(HEXDIGITS[(n >> 12) & 0xf])
+    builder.append(HEXDIGITS[(n >> 8) & 0xf])
+    builder.append(HEXDIGITS[(n >> 4) & 0xf])
+    builder.append(HEXDIGITS[n & 0xf])
+
+@specialize.argtype(1)
+def _escape_ascii(builder, s):
+    # 's' is either a str with only ASCII characters, or a unicode
+    for c in s:
+        n = ord(c)
+        if ord(' ') <= n <= ord('~'):
+            if n == ord('"') or n == ord('\\'):
+                builder.append('\\')
+            builder.append(chr(n))
+        elif n == ord('\n'):
+            builder.append('\\n')
+        elif n == ord('\r'):
+            builder.append('\\r')
+        elif n == ord('\t'):
+            builder.append('\\t')
+        elif n == ord('\b'):
+            builder.append('\\b')
+        elif n == ord('\f'):
+            builder.append('\\f')
+        elif n >= 0x10000:
+            # surrogate pair
+            n -= 0x10000
+            _append_u(builder, 0xd800 | ((n >> 10) & 0x3ff))
+            _append_u(builder, 0xdc00 | (n & 0x3ff))
+        else:
+            _append_u(builder, n)
+
+def encode_string(space, builder, w_string):
+    """Appends the quoted, ASCII-only representation of a str or unicode."""
+    builder.append('"')
+    if space.isinstance_w(w_string, space.w_str):
+        s = space.str_w(w_string)
+        if not _needs_escape(s):
+            builder.append(s)
+        else:
+            for c in s:
+                if ord(c) >= 0x80:
+                    u = unicodehelper.PyUnicode_DecodeUTF8(space, s)
+                    _escape_ascii(builder, u)
+                    break
+            else:
+                _escape_ascii(builder, s)
+    elif space.isinstance_w(w_string, space.w_unicode):
+        _escape_ascii(builder, space.unicode_w(w_string))
+    else:
+        raise operationerrfmt(space.w_TypeError,
+                              "first argument must be a string, not %s",
+                              space.type(w_string).getname(space))
+    builder.append('"')
+
+def encode_basestring_ascii(space, w_string):
+    """encode_basestring_ascii(basestring) -> str
+
+    Return an ASCII-only JSON representation of a Python string"""
+    builder = StringBuilder()
+    encode_string(space, builder, w_string)
+    return space.wrap(builder.build())
+
+# ____________________________________________________________
+
+class W_Encoder(Wrappable):
+    """The settings of a json.JSONEncoder, with the interp-level
+    encoding loop."""
+
+    def __init__(self, space, w_markers, w_default, w_encoder, w_indent,
+                 key_separator, item_separator, sort_keys, skipkeys,
+                 allow_nan):
+        if space.is_w(w_markers, space.w_None):
+            w_markers = None
+        self.w_markers = w_markers
+        self.w_default = w_default
+        self.w_encoder = w_encoder
+        # the common case: our own encode_basestring_ascii()
+        w_fast_encoder = space.getattr(space.getbuiltinmodule('_json'),
+                                       space.wrap('encode_basestring_ascii'))
+        self.fast_encoder = space.is_w(w_encoder, w_fast_encoder)
+        if space.is_w(w_indent, space.w_None):
+            self.indent = -1
+        else:
+            self.indent = space.int_w(w_indent)
+        self.key_separator = key_separator
+        self.item_separator = item_separator
+        self.sort_keys = sort_keys
+        self.skipkeys = skipkeys
+        self.allow_nan = allow_nan
+
+    @unwrap_spec(level=int)
+    def descr_call(self, space, w_obj, level):
+        builder = StringBuilder()
+        self.encode(space, builder, w_obj, level)
+        return space.newtuple([space.wrap(builder.build())])
+
+    def encode(self, space, builder, w_obj, level):
+        if (space.isinstance_w(w_obj, space.w_str) or
+                space.isinstance_w(w_obj, space.w_unicode)):
+            self.encode_string(space, builder, w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            builder.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            builder.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            builder.append('false')
+        elif space.isinstance_w(w_obj, space.w_int):
+            if space.is_w(space.type(w_obj), space.w_int):
+                builder.append(str(space.int_w(w_obj)))
+            else:
+                builder.append(space.str_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_long):
+            builder.append(space.str_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            builder.append(self.floatstr(space, w_obj))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+                space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(space, builder, w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(space, builder, w_obj, level)
+        else:
+            w_id = self.mark(space, w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode(space, builder, w_res, level)
+            self.unmark(space, w_id)
+
+    def encode_string(self, space, builder, w_string):
+        if self.fast_encoder:
+            encode_string(space, builder, w_string)
+        else:
+            w_res = space.call_function(self.w_encoder, w_string)
+            builder.append(space.str_w(w_res))
+
+    def floatstr(self, space, w_obj):
+        x = space.float_w(w_obj)
+        if isnan(x):
+            text = 'NaN'
+        elif isinf(x):
+            if x > 0.0:
+                text = 'Infinity'
+            else:
+                text = '-Infinity'
+        else:
+            return formatd(x, 'r', 0, DTSF_ADD_DOT_0)
+        if not self.allow_nan:
+            raise operationerrfmt(space.w_ValueError,
+                "Out of range float values are not JSON compliant: %s",
+                space.str_w(space.repr(w_obj)))
+        return text
+
+    def mark(self, space, w_obj):
+        if self.w_markers is None:
+            return None
+        w_id = space.id(w_obj)
+        if space.is_true(space.contains(self.w_markers, w_id)):
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("Circular reference detected"))
+        space.setitem(self.w_markers, w_id, space.w_None)
+        return w_id
+
+    def unmark(self, space, w_id):
+        if w_id is not None:
+            space.delitem(self.w_markers, w_id)
+
+    def newline_indent(self, level):
+        return '\n' + ' ' * (self.indent * level)
+
+    def encode_list(self, space, builder, w_list, level):
+        items_w = space.fixedview(w_list)
+        if not items_w:
+            builder.append('[]')
+            return
+        w_id = self.mark(space, w_list)
+        builder.append('[')
+        separator = self.item_separator
+        if self.indent >= 0:
+            level += 1
+            separator += self.newline_indent(level)
+            builder.append(self.newline_indent(level))
+        first = True
+        for w_item in items_w:
+            if first:
+                first = False
+            else:
+                builder.append(separator)
+            self.encode(space, builder, w_item, level)
+        if self.indent >= 0:
+            builder.append(self.newline_indent(level - 1))
+        builder.append(']')
+        self.unmark(space, w_id)
+
+    def encode_dict(self, space, builder, w_dict, level):
+        if space.len_w(w_dict) == 0:
+            builder.append('{}')
+            return
+        w_id = self.mark(space, w_dict)
+        builder.append('{')
+        separator = self.item_separator
+        if self.indent >= 0:
+            level += 1
+            separator += self.newline_indent(level)
+            builder.append(self.newline_indent(level))
+        w_items = space.call_method(w_dict, "items")
+        if self.sort_keys:
+            # the keys are all different, so this sorts by key
+            space.call_method(w_items, "sort")
+        first = True
+        for w_item in space.fixedview(w_items):
+            w_key, w_value = space.fixedview(w_item, 2)
+            key = None
+            if (space.isinstance_w(w_key, space.w_str) or
+                    space.isinstance_w(w_key, space.w_unicode)):
+                pass
+            # JavaScript is weakly typed for these, like in json/encoder.py
+            elif space.isinstance_w(w_key, space.w_float):
+                key = self.floatstr(space, w_key)
+            elif space.is_w(w_key, space.w_True):
+                key = 'true'
+            elif space.is_w(w_key, space.w_False):
+                key = 'false'
+            elif space.is_w(w_key, space.w_None):
+                key = 'null'
+            elif (space.isinstance_w(w_key, space.w_int) or
+                    space.isinstance_w(w_key, space.w_long)):
+                key = space.str_w(space.str(w_key))
+            elif self.skipkeys:
+                continue
+            else:
+                raise operationerrfmt(space.w_TypeError,
+                                      "key %s is not a string",
+                                      space.str_w(space.repr(w_key)))
+            if first:
+                first = False
+            else:
+                builder.append(separator)
+            if key is None:
+                self.encode_string(space, builder, w_key)
+            else:
+                self.encode_string(space, builder, space.wrap(key))
+            builder.append(self.key_separator)
+            self.encode(space, builder, w_value, level)
+        if self.indent >= 0:
+            builder.append(self.newline_indent(level - 1))
+        builder.append('}')
+        self.unmark(space, w_id)
+
+@unwrap_spec(sort_keys=bool, skipkeys=bool, allow_nan=bool)
+def W_Encoder___new__(space, w_subtype, w_markers, w_default, w_encoder,
+                      w_indent, w_key_separator, w_item_separator, sort_keys,
+                      skipkeys, allow_nan):
+    # the separators may also be given as (ASCII) unicode strings
+    key_separator = space.str_w(space.str(w_key_separator))
+    item_separator = space.str_w(space.str(w_item_separator))
+    encoder = space.allocate_instance(W_Encoder, w_subtype)
+    encoder.__init__(space, w_markers, w_default, w_encoder, w_indent,
+                     key_separator, item_separator, sort_keys, skipkeys,
+                     allow_nan)
+    return space.wrap(encoder)
+
+W_Encoder.typedef = TypeDef("Encoder",
+    __module__ = "_json",
+    __doc__ = "_iterencode(obj, _current_indent_level) -> iterable",
+    __new__ = interp2app(W_Encoder___new__),
+    __call__ = interp2app(W_Encoder.descr_call),
+    )
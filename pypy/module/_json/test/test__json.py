@@ -0,0 +1,256 @@
+"""
+Tests for the json speedups implemented at interp-level in pypy/module/_json.
+"""
+
+from pypy.conftest import gettestobjspace
+
+
+class AppTestDecoder(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=['_json', 'struct'])
+
+    def test_module(self):
+        import _json
+        assert _json.make_scanner.__module__ == '_json'
+        assert _json.scanstring.__module__ == '_json'
+        assert _json.make_encoder.__module__ == '_json'
+
+    def test_scanstring(self):
+        from _json import scanstring
+        assert scanstring('"abc" x', 1) == (u'abc', 5)
+        assert type(scanstring('"abc"', 1)[0]) is unicode
+        assert scanstring(u'"\\u1234\\n\\"\\\\\\/"', 1) == (u'\u1234\n"\\/',
+                                                            16)
+        assert scanstring('"\xc3\xa9t\xc3\xa9"', 1) == (u'\xe9t\xe9', 7)
+        assert scanstring('"\xe9t\xe9"', 1, 'latin-1') == (u'\xe9t\xe9', 5)
+        assert scanstring('"a\tb"', 1, None, False) == (u'a\tb', 5)
+        assert scanstring('"\\ud834\\udd20"', 1) == (u'\U0001d120', 14)
+
+    def test_scanstring_errors(self):
+        from _json import scanstring
+        raises(ValueError, scanstring, '"abc', 1)
+        raises(ValueError, scanstring, '"a\\', 1)
+        raises(ValueError, scanstring, '"a\\x"', 1)
+        raises(ValueError, scanstring, '"a\\u12"', 1)
+        raises(ValueError, scanstring, '"a\\u12x4"', 1)
+        raises(ValueError, scanstring, '"a\tb"', 1)
+        raises(ValueError, scanstring, '"abc"', 10)
+        raises(UnicodeDecodeError, scanstring, '"\xff"', 1)
+        raises(TypeError, scanstring, 42, 1)
+        raises(OverflowError, scanstring, 'xxx', 2 ** 100)
+        exc = raises(ValueError, scanstring, '[\n"\\q"]', 3)
+        assert str(exc.value) == (
+            "Invalid \\escape: 'q': line 2 column 3 (char 4)")
+
+    def test_scanner(self):
+        import _json
+        class Context(object):
+            strict = True
+            encoding = None
+            object_hook = None
+            object_pairs_hook = None
+            parse_float = float
+            parse_int = int
+            parse_constant = {'NaN': 'nan'}.__getitem__
+        scan = _json.make_scanner(Context())
+        assert scan('[1, 2.5, -3e2, "x", true, false, null]', 0) == (
+            [1, 2.5, -300.0, u'x', True, False, None], 38)
+        assert scan(' {"a": {"b": []}, "c" : 0}', 1) == (
+            {u'a': {u'b': []}, u'c': 0}, 26)
+        assert scan('xNaN', 1) == ('nan', 4)
+        assert scan('123456789012345678901234567890', 0) == (
+            123456789012345678901234567890, 30)
+        assert scan('-9223372036854775808', 0)[0] == -9223372036854775808
+        assert scan('0.5', 0) == (0.5, 3)
+        assert scan('1.', 0) == (1, 1)
+        assert scan('1e', 0) == (1, 1)
+        assert scan(u'["\u1234"]', 0) == ([u'\u1234'], 5)
+        raises(StopIteration, scan, '', 0)
+        raises(StopIteration, scan, 'x', 0)
+        raises(StopIteration, scan, '-', 0)
+        raises(StopIteration, scan, '[]', 5)
+
+    def test_scanner_hooks(self):
+        import _json
+        class Context(object):
+            strict = False
+            encoding = 'latin-1'
+            object_hook = None
+            object_pairs_hook = list
+            parse_float = str
+            parse_int = lambda self, s: 'int' + s
+            parse_constant = None
+        context = Context()
+        context.parse_int = lambda s: 'int' + s
+        scan = _json.make_scanner(context)
+        assert scan('{"a": 1, "b": 1.5, "c\xe9": "\t"}', 0) == (
+            [(u'a', 'int1'), (u'b', '1.5'), (u'c\xe9', u'\t')], 29)
+        context.object_pairs_hook = None
+        context.object_hook = lambda d: sorted(d)
+        scan = _json.make_scanner(context)
+        assert scan('{"b": 2, "a": 1}', 0) == ([u'a', u'b'], 16)
+
+    def test_scanner_shares_keys(self):
+        import _json
+        class Context(object):
+            strict = True
+            encoding = None
+            object_hook = None
+            object_pairs_hook = list
+            parse_float = float
+            parse_int = int
+            parse_constant = None
+        scan = _json.make_scanner(Context())
+        result, end = scan('[{"key": 1}, {"key": 2}, {"k\\u0065y": 3}]', 0)
+        assert result[0][0][0] is result[1][0][0]
+        assert result[2][0][0] == u'key'
+
+    def test_scanner_errors(self):
+        import _json
+        class Context(object):
+            strict = True
+            encoding = None
+            object_hook = None
+            object_pairs_hook = None
+            parse_float = float
+            parse_int = int
+            parse_constant = None
+        scan = _json.make_scanner(Context())
+        for doc, msg in [
+                ('[1 2]', "Expecting , delimiter: line 1 column 4 (char 4)"),
+                ('[1, ]', "Expecting object: line 1 column 4 (char 4)"),
+                ('{"a" 1}', "Expecting : delimiter: line 1 column 5 (char 5)"),
+                ('{1: 2}', "Expecting property name: line 1 column 1 "
+                           "(char 1)"),
+                ('{"a": 1,}', "Expecting property name: line 1 column 8 "
+                              "(char 8)"),
+                ('{"a": 1', "Expecting , delimiter: line 1 column 7 "
+                            "(char 7)"),
+                ('\n\n  ["abc', "Unterminated string starting at: line 3 "
+                                "column 4 (char 5)"),
+                ]:
+            exc = raises(ValueError, scan, doc, doc.index(doc.strip()[0]))
+            assert str(exc.value) == msg
+        raises(AttributeError, _json.make_scanner, 1)
+
+    def test_errors_match_json_decoder(self):
+        import _json
+        from json import decoder, scanner
+        context = decoder.JSONDecoder()
+        context.parse_string = decoder.py_scanstring
+        py_scan = scanner.py_make_scanner(context)
+        scan = _json.make_scanner(context)
+        for doc in ['"tab\there"', '[1, "a\x01b"]', '[\n"x\n"]',
+                    '[1 2]', '[1, 2', '[1,\n 2 3]', '{"a": 1 "b": 2}',
+                    '{"a" 1}', '{"a": 1,}', '{"a": 1', '"abc', '["abc',
+                    '"abc\\', '[\n\n  "abc', '"a\\qb"']:
+            exc = raises(ValueError, scan, doc, 0)
+            py_exc = raises(ValueError, py_scan, doc, 0)
+            assert str(exc.value) == str(py_exc.value)
+
+    def test_json_module(self):
+        import json
+        doc = '{"a": [1, 2.5, "x\\u00e9", {"b": null}], "c": true}'
+        assert json.loads(doc) == {u'a': [1, 2.5, u'x\xe9', {u'b': None}],
+                                   u'c': True}
+        assert json.loads(u'  [1]  ') == [1]
+        raises(ValueError, json.loads, '[1] x')
+        raises(ValueError, json.loads, '')
+
+
+class AppTestEncoder(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=['_json', 'struct'])
+        cls.w_make_encoder = cls.space.appexec([], """():
+            import _json
+            def raising_default(o):
+                raise TypeError(repr(o) + " is not JSON serializable")
+            def make_encoder(check_circular=True, default=raising_default,
+                             indent=None, separators=(', ', ': '),
+                             sort_keys=False, skipkeys=False, allow_nan=True):
+                if check_circular:
+                    markers = {}
+                else:
+                    markers = None
+                item_separator, key_separator = separators
+                encoder = _json.make_encoder(markers, default,
+                                             _json.encode_basestring_ascii,
+                                             indent, key_separator,
+                                             item_separator, sort_keys,
+                                             skipkeys, allow_nan)
+                return lambda o: encoder(o, 0)[0]
+            return make_encoder
+        """)
+
+    def test_encode_basestring_ascii(self):
+        from _json import encode_basestring_ascii as enc
+        assert enc('abc') == '"abc"'
+        assert type(enc(u'abc')) is str
+        assert enc('a"b\\c\n\x01') == '"a\\"b\\\\c\\n\\u0001"'
+        assert enc(u'\u1234\xe9') == '"\\u1234\\u00e9"'
+        assert enc('\xc3\xa9') == '"\\u00e9"'
+        assert enc(u'\U0001d120') == '"\\ud834\\udd20"'
+        raises(UnicodeDecodeError, enc, 'xx\xff')
+        raises(TypeError, enc, 42)
+
+    def test_encoder(self):
+        enc = self.make_encoder()
+        assert enc([1, 2.5, -3L, "x", u"\xe9", True, False, None, (), {}]) == (
+            '[1, 2.5, -3, "x", "\\u00e9", true, false, null, [], {}]')
+        assert enc({'a': [{}]}) == '{"a": [{}]}'
+        assert enc(1e16) == '1e+16'
+        assert enc(float('inf')) == 'Infinity'
+        assert enc({1: 1, 2.5: 2, None: 3}) in [
+            '{"1": 1, "2.5": 2, "null": 3}', '{"2.5": 2, "null": 3, "1": 1}',
+            '{"null": 3, "1": 1, "2.5": 2}', '{"1": 1, "null": 3, "2.5": 2}',
+            '{"2.5": 2, "1": 1, "null": 3}', '{"null": 3, "2.5": 2, "1": 1}']
+        class Int(int):
+            def __str__(self):
+                return '42'
+        assert enc(Int(5)) == '42'
+
+    def test_encoder_options(self):
+        enc = self.make_encoder(sort_keys=True, separators=(',', ':'))
+        assert enc({'b': 1, 'a': [1, 2], 'c': {}}) == (
+            '{"a":[1,2],"b":1,"c":{}}')
+        enc = self.make_encoder(indent=2, sort_keys=True)
+        assert enc({'a': [1], 'b': {}}) == (
+            '{\n  "a": [\n    1\n  ], \n  "b": {}\n}')
+        enc = self.make_encoder(skipkeys=True)
+        assert enc({(1,): 2}) == '{}'
+        enc = self.make_encoder(allow_nan=False)
+        raises(ValueError, enc, [float('nan')])
+        enc = self.make_encoder(default=lambda o: sorted(o))
+        assert enc(set([2, 1])) == '[1, 2]'
+
+    def test_encoder_errors(self):
+        enc = self.make_encoder()
+        raises(TypeError, enc, object())
+        raises(TypeError, enc, {(1,): 2})
+        l = []
+        l.append(l)
+        exc = raises(ValueError, enc, l)
+        assert str(exc.value) == "Circular reference detected"
+        d = {}
+        d['x'] = [d]
+        raises(ValueError, enc, d)
+        enc = self.make_encoder(default=lambda o: o)
+        raises(ValueError, enc, object())
+        # shared, non-circular objects are fine
+        x = [1]
+        assert self.make_encoder()([x, x]) == '[[1], [1]]'
+
+    def test_json_module(self):
+        import json
+        assert json.dumps({'a': [1, 2.5, u'x\xe9', None]}) == (
+            '{"a": [1, 2.5, "x\\u00e9", null]}')
+        assert json.dumps(u'\u1234') == '"\\u1234"'
+        assert json.dumps([1], indent=1) == '[\n 1\n]'
+        assert json.dumps(u'\xe9', ensure_ascii=False) == u'"\xe9"'
+        assert json.dumps('\xe9', encoding='latin-1') == '"\\u00e9"'
+        class MyEncoder(json.JSONEncoder):
+            def default(self, o):
+                return list(o)
+        assert MyEncoder().encode(set([3])) == '[3]'
@@ -13,7 +13,7 @@ from pypy.tool.pairtype import extendabletype
 #
 # Constants and exposed functions
 
-from pypy.rlib.rsre import rsre_core
+from pypy.rlib.rsre import rsre_core, rsre_dfa, rsre_prefilter
 from pypy.rlib.rsre.rsre_char import MAGIC, CODESIZE, getlower, set_unicode_db
 
 @unwrap_spec(char_ord=int, flags=int)
@@ -82,14 +82,20 @@ def import_re(space):
     w_import = space.getattr(w_builtin, space.wrap("__import__"))
     return space.call_function(w_import, space.wrap("re"))
 
-def matchcontext(space, ctx):
+def matchcontext(space, ctx, dfa=None):
     try:
+        if dfa is not None:
+            return rsre_dfa.match_context(ctx, dfa)
         return rsre_core.match_context(ctx)
     except rsre_core.Error, e:
         raise OperationError(space.w_RuntimeError, space.wrap(e.msg))
 
-def searchcontext(space, ctx):
+def searchcontext(space, ctx, dfa=None, prefilter=None):
     try:
+        if prefilter is not None:
+            return rsre_prefilter.search_context(ctx, prefilter)
+        if dfa is not None:
+            return rsre_dfa.search_context(ctx, dfa)
         return rsre_core.search_context(ctx)
     except rsre_core.Error, e:
         raise OperationError(space.w_RuntimeError, space.wrap(e.msg))
@@ -100,6 +106,10 @@ def searchcontext(space, ctx):
 
 class W_SRE_Pattern(Wrappable):
     _immutable_fields_ = ["code", "flags"]
+    dfa = None
+    dfa_compiled = False
+    prefilter = None
+    prefilter_computed = False
 
     def cannot_copy_w(self):
         space = self.space
@@ -125,6 +135,22 @@ class W_SRE_Pattern(Wrappable):
             return rsre_core.StrMatchContext(self.code, str,
                                              pos, endpos, self.flags)
 
+    def getdfa(self):
+        # the DFA prefilter is built the first time the pattern is used;
+        # it stays None if the pattern cannot be turned into a DFA
+        if not self.dfa_compiled:
+            self.dfa = rsre_dfa.compile_dfa(self.code, self.flags)
+            self.dfa_compiled = True
+        return self.dfa
+
+    def getprefilter(self):
+        # the set of literals that every match starts with, if any; when
+        # there is one, searching uses it instead of the DFA
+        if not self.prefilter_computed:
+            self.prefilter = rsre_prefilter.extract_prefilter(self.code)
+            self.prefilter_computed = True
+        return self.prefilter
+
     def getmatch(self, ctx, found):
         if found:
             return W_SRE_Match(self, ctx)
@@ -134,20 +160,25 @@ class W_SRE_Pattern(Wrappable):
     @unwrap_spec(pos=int, endpos=int)
     def match_w(self, w_string, pos=0, endpos=sys.maxint):
         ctx = self.make_ctx(w_string, pos, endpos)
-        return self.getmatch(ctx, matchcontext(self.space, ctx))
+        return self.getmatch(ctx, matchcontext(self.space, ctx,
+                                               self.getdfa()))
 
     @unwrap_spec(pos=int, endpos=int)
     def search_w(self, w_string, pos=0, endpos=sys.maxint):
         ctx = self.make_ctx(w_string, pos, endpos)
-        return self.getmatch(ctx, searchcontext(self.space, ctx))
+        return self.getmatch(ctx, searchcontext(self.space, ctx,
+                                                self.getdfa(),
+                                                self.getprefilter()))
 
     @unwrap_spec(pos=int, endpos=int)
     def findall_w(self, w_string, pos=0, endpos=sys.maxint):
         space = self.space
         matchlist_w = []
         ctx = self.make_ctx(w_string, pos, endpos)
+        dfa = self.getdfa()
+        prefilter = self.getprefilter()
         while ctx.match_start <= ctx.end:
-            if not searchcontext(space, ctx):
+            if not searchcontext(space, ctx, dfa, prefilter):
                 break
             num_groups = self.num_groups
             w_emptystr = space.wrap("")
@@ -182,8 +213,10 @@ class W_SRE_Pattern(Wrappable):
         n = 0
         last = 0
         ctx = self.make_ctx(w_string)
+        dfa = self.getdfa()
+        prefilter = self.getprefilter()
         while not maxsplit or n < maxsplit:
-            if not searchcontext(space, ctx):
+            if not searchcontext(space, ctx, dfa, prefilter):
                 break
             if ctx.match_start == ctx.match_end:     # zero-width match
                 if ctx.match_start == ctx.end:       # or end of string
@@ -244,10 +277,12 @@ class W_SRE_Pattern(Wrappable):
                 filter_is_callable = space.is_true(space.callable(w_filter))
         #
         ctx = self.make_ctx(w_string)
+        dfa = self.getdfa()
+        prefilter = self.getprefilter()
         sublist_w = []
         n = last_pos = 0
         while not count or n < count:
-            if not searchcontext(space, ctx):
+            if not searchcontext(space, ctx, dfa, prefilter):
                 break
             if last_pos < ctx.match_start:
                 sublist_w.append(slice_w(space, ctx, last_pos,
@@ -513,19 +548,25 @@ class W_SRE_Scanner(Wrappable):
     def next_w(self):
         if self.ctx.match_start > self.ctx.end:
             raise OperationError(self.space.w_StopIteration, self.space.w_None)
-        if not searchcontext(self.space, self.ctx):
+        srepat = self.srepat
+        if not searchcontext(self.space, self.ctx, srepat.getdfa(),
+                             srepat.getprefilter()):
             raise OperationError(self.space.w_StopIteration, self.space.w_None)
         return self.getmatch(True)
 
     def match_w(self):
         if self.ctx.match_start > self.ctx.end:
             return self.space.w_None
-        return self.getmatch(matchcontext(self.space, self.ctx))
+        return self.getmatch(matchcontext(self.space, self.ctx,
+                                          self.srepat.getdfa()))
 
     def search_w(self):
         if self.ctx.match_start > self.ctx.end:
             return self.space.w_None
-        return self.getmatch(searchcontext(self.space, self.ctx))
+        srepat = self.srepat
+        return self.getmatch(searchcontext(self.space, self.ctx,
+                                           srepat.getdfa(),
+                                           srepat.getprefilter()))
 
     def getmatch(self, found):
         if found:
@@ -916,3 +916,43 @@ class AppTestOptimizations:
         import re
         assert re.search(".+ab", "wowowowawoabwowo")
         assert None == re.search(".+ab", "wowowaowowo")
+
+    def test_dfa_prefilter(self):
+        # long enough strings go through the DFA prefilter first
+        import re
+        padding = "x" * 50
+        r = re.compile("(ERROR|WARN|FATAL): (\w+)")
+        assert r.search(padding) is None
+        assert r.match(padding + "WARN: foo") is None
+        m = r.search(padding + "WARN: foo" + padding)
+        assert m.span(2) == (56, 109)
+        assert r.findall(padding + "ERROR: a " + padding + " FATAL: b") == [
+            ("ERROR", "a"), ("FATAL", "b")]
+        assert r.sub("-", padding + "ERROR: a " + padding) == (
+            padding + "- " + padding)
+        assert [m.group(1) for m in r.finditer(padding + "WARN: x WARN: y")
+                ] == ["WARN", "WARN"]
+        assert re.search("^abc", padding + "abc") is None
+        assert re.search("abc$", "abc" + padding) is None
+        assert re.search("abc$", padding + "abc\n").start() == 50
+        assert re.search(u"a.c", u"\u1234" * 50 + u"a\u1234c").start() == 50
+        # patterns with backreferences are not turned into a DFA
+        assert re.search(r"(a)\1", padding + "aa").start() == 50
+
+    def test_dfa_prefilter_bigcharset(self):
+        import re
+        r = re.compile(u"[\u1234\u4321]+b")
+        assert r.search(u"x" * 50 + u"\u4321b").start() == 50
+        assert r.search(u"x" * 50 + u"\u4322b") is None
+
+    def test_literal_prefilter(self):
+        import re
+        r = re.compile("(ERROR|WARN|FATAL): (\\w+)")
+        s = "x" * 30 + "WARN: foo FATAL FATAL: bar ERROR:"
+        assert r.search(s).groups() == ("WARN", "foo")
+        assert r.findall(s) == [("WARN", "foo"), ("FATAL", "bar")]
+        assert [m.start() for m in r.finditer(s)] == [30, 46]
+        assert r.sub("-", s) == "x" * 30 + "- FATAL - ERROR:"
+        assert r.search(s, 31).start() == 46
+        assert r.search(u"\u1234" * 30 + u"ERROR: x").start() == 30
+        assert r.search("WARN FATAL ERROR") is None
@@ -0,0 +1,43 @@
+"""
+Mixed-module definition for the cPickle module.
+Note that there is also a pure Python implementation in lib_pypy/cPickle.py;
+the present mixed-module version of cPickle takes precedence if it is enabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """C implementation of the Python pickle module.
+
+See the documentation of the pickle module for the details."""
+
+    interpleveldefs = {
+        'Pickler': 'interp_pickler.W_Pickler',
+        'dump': 'interp_pickler.dump',
+        'dumps': 'interp_pickler.dumps',
+        'Unpickler': 'interp_unpickler.W_Unpickler',
+        'load': 'interp_unpickler.load',
+        'loads': 'interp_unpickler.loads',
+        'HIGHEST_PROTOCOL': 'space.wrap(opcodes.HIGHEST_PROTOCOL)',
+        }
+
+    appleveldefs = {
+        'PickleError': 'app_cpickle.PickleError',
+        'PicklingError': 'app_cpickle.PicklingError',
+        'UnpicklingError': 'app_cpickle.UnpicklingError',
+        'BadPickleGet': 'app_cpickle.BadPickleGet',
+        'UnpickleableError': 'app_cpickle.UnpickleableError',
+        '__version__': 'app_cpickle.__version__',
+        'format_version': 'app_cpickle.format_version',
+        'compatible_formats': 'app_cpickle.compatible_formats',
+        # helpers for the interp-level Pickler and Unpickler
+        '_save_other': 'app_cpickle._save_other',
+        '_save_moduledict': 'app_cpickle._save_moduledict',
+        '_encode_long': 'app_cpickle._encode_long',
+        '_decode_long': 'app_cpickle._decode_long',
+        '_find_class': 'app_cpickle._find_class',
+        '_instantiate': 'app_cpickle._instantiate',
+        '_load_build': 'app_cpickle._load_build',
+        '_get_extension': 'app_cpickle._get_extension',
+        }
@@ -0,0 +1,286 @@
+"""
+App-level part of the cPickle module: the exceptions, and the less common
+cases of pickling and unpickling (classes, functions, instances and the
+__reduce__ protocol), which follow pickle.py.  The interp-level Pickler and
+Unpickler call the functions below; they are not meant to be used directly.
+"""
+import sys
+from types import ClassType, InstanceType, FunctionType
+from types import BuiltinFunctionType, TypeType, StringType, TupleType
+from copy_reg import dispatch_table
+from copy_reg import _extension_registry, _inverted_registry, _extension_cache
+from pickle import PickleError, PicklingError, UnpicklingError
+from pickle import whichmodule, _EmptyClass
+from pickle import encode_long as _encode_long, decode_long as _decode_long
+
+__version__ = "1.71"
+
+# These are purely informational; no code uses these.
+format_version = "2.0"                  # File format version we write
+compatible_formats = ["1.0",            # Original protocol 0
+                      "1.1",            # Protocol 0 with INST added
+                      "1.2",            # Original protocol 1
+                      "1.3",            # Protocol 1 with BINFLOAT added
+                      "2.0",            # Protocol 2
+                      ]                 # Old format versions we can read
+
+BadPickleGet = KeyError
+UnpickleableError = PicklingError
+
+# ____________________________________________________________
+# Pickling
+
+def _save_other(pickler, obj):
+    t = type(obj)
+    if t is InstanceType:
+        _save_inst(pickler, obj)
+        return
+    if t is FunctionType:
+        _save_function(pickler, obj)
+        return
+    if t is ClassType or t is BuiltinFunctionType:
+        _save_global(pickler, obj)
+        return
+
+    # Check for a class with a custom metaclass; treat as regular class
+    try:
+        issc = issubclass(t, TypeType)
+    except TypeError: # t is not a class (old Boost; see SF #502085)
+        issc = 0
+    if issc:
+        _save_global(pickler, obj)
+        return
+
+    # Check copy_reg.dispatch_table
+    reduce = dispatch_table.get(t)
+    if reduce:
+        rv = reduce(obj)
+    else:
+        # Check for a __reduce_ex__ method, fall back to __reduce__
+        reduce = getattr(obj, "__reduce_ex__", None)
+        if reduce:
+            rv = reduce(pickler.proto)
+        else:
+            reduce = getattr(obj, "__reduce__", None)
+            if reduce:
+                rv = reduce()
+            else:
+                raise PicklingError("Can't pickle %r object: %r" %
+                                    (t.__name__, obj))
+
+    # Check for string returned by reduce(), meaning "save as global"
+    if type(rv) is StringType:
+        _save_global(pickler, obj, rv)
+        return
+
+    # Assert that reduce() returned a tuple
+    if type(rv) is not TupleType:
+        raise PicklingError("%s must return string or tuple" % reduce)
+
+    # Assert that it returned an appropriately sized tuple
+    l = len(rv)
+    if not (2 <= l <= 5):
+        raise PicklingError("Tuple returned by %s must have "
+                            "two to five elements" % reduce)
+
+    # Save the reduce() output and finally memoize the object
+    _save_reduce(pickler, obj=obj, *rv)
+
+def _save_reduce(pickler, func, args, state=None,
+                 listitems=None, dictitems=None, obj=None):
+    # Assert that args is a tuple or None
+    if not isinstance(args, TupleType):
+        raise PicklingError("args from reduce() should be a tuple")
+
+    # Assert that func is callable
+    if not hasattr(func, '__call__'):
+        raise PicklingError("func from reduce should be callable")
+
+    save = pickler.save
+    write = pickler.write
+
+    # Protocol 2 special case: if func's name is __newobj__, use NEWOBJ
+    if pickler.proto >= 2 and getattr(func, "__name__", "") == "__newobj__":
+        cls = args[0]
+        if not hasattr(cls, "__new__"):
+            raise PicklingError(
+                "args[0] from __newobj__ args has no __new__")
+        if obj is not None and cls is not obj.__class__:
+            raise PicklingError(
+                "args[0] from __newobj__ args has the wrong class")
+        args = args[1:]
+        save(cls)
+        save(args)
+        write('\x81')       # NEWOBJ
+    else:
+        save(func)
+        save(args)
+        write('R')          # REDUCE
+
+    if obj is not None:
+        pickler.memoize(obj)
+
+    if listitems is not None:
+        pickler._batch_appends(listitems)
+
+    if dictitems is not None:
+        pickler._batch_setitems(dictitems)
+
+    if state is not None:
+        save(state)
+        write('b')          # BUILD
+
+def _save_moduledict(pickler, module):
+    _save_reduce(pickler, getattr, (module, '__dict__'))
+
+def _save_inst(pickler, obj):
+    # the memo of the interp-level pickler keeps the objects alive,
+    # so there is no need for pickle._keep_alive() here
+    cls = obj.__class__
+    save = pickler.save
+    write = pickler.write
+
+    if hasattr(obj, '__getinitargs__'):
+        args = obj.__getinitargs__()
+        len(args) # XXX Assert it's a sequence
+    else:
+        args = ()
+
+    write('(')              # MARK
+
+    if pickler.binary:
+        save(cls)
+        for arg in args:
+            save(arg)
+        write('o')          # OBJ
+    else:
+        for arg in args:
+            save(arg)
+        write('i' + cls.__module__ + '\n' + cls.__name__ + '\n')  # INST
+
+    pickler.memoize(obj)
+
+    try:
+        getstate = obj.__getstate__
+    except AttributeError:
+        stuff = obj.__dict__
+    else:
+        stuff = getstate()
+    save(stuff)
+    write('b')              # BUILD
+
+def _save_function(pickler, obj):
+    try:
+        return _save_global(pickler, obj)
+    except PicklingError, e:
+        pass
+    # Check copy_reg.dispatch_table
+    reduce = dispatch_table.get(type(obj))
+    if reduce:
+        rv = reduce(obj)
+    else:
+        # Check for a __reduce_ex__ method, fall back to __reduce__
+        reduce = getattr(obj, "__reduce_ex__", None)
+        if reduce:
+            rv = reduce(pickler.proto)
+        else:
+            reduce = getattr(obj, "__reduce__", None)
+            if reduce:
+                rv = reduce()
+            else:
+                raise e
+    return _save_reduce(pickler, obj=obj, *rv)
+
+def _save_global(pickler, obj, name=None):
+    write = pickler.write
+
+    if name is None:
+        name = obj.__name__
+
+    module = getattr(obj, "__module__", None)
+    if module is None:
+        module = whichmodule(obj, name)
+
+    try:
+        __import__(module)
+        mod = sys.modules[module]
+        klass = getattr(mod, name)
+    except (ImportError, KeyError, AttributeError):
+        raise PicklingError(
+            "Can't pickle %r: it's not found as %s.%s" %
+            (obj, module, name))
+    else:
+        if klass is not obj:
+            raise PicklingError(
+                "Can't pickle %r: it's not the same object as %s.%s" %
+                (obj, module, name))
+
+    if pickler.proto >= 2:
+        code = _extension_registry.get((module, name))
+        if code:
+            assert code > 0
+            if code <= 0xff:
+                write('\x82' + chr(code))                       # EXT1
+            elif code <= 0xffff:
+                write('\x83' + chr(code & 0xff) + chr(code >> 8))  # EXT2
+            else:
+                write('\x84' + chr(code & 0xff) + chr((code >> 8) & 0xff) +
+                      chr((code >> 16) & 0xff) + chr(code >> 24))  # EXT4
+            return
+
+    write('c' + module + '\n' + name + '\n')                    # GLOBAL
+    pickler.memoize(obj)
+
+# ____________________________________________________________
+# Unpickling
+
+def _find_class(module, name):
+    __import__(module)
+    mod = sys.modules[module]
+    return getattr(mod, name)
+
+def _instantiate(klass, args):
+    if (not args and
+            type(klass) is ClassType and
+            not hasattr(klass, "__getinitargs__")):
+        value = _EmptyClass()
+        value.__class__ = klass
+        return value
+    try:
+        return klass(*args)
+    except TypeError, err:
+        raise TypeError, "in constructor for %s: %s" % (
+            klass.__name__, str(err)), sys.exc_info()[2]
+
+def _load_build(inst, state):
+    setstate = getattr(inst, "__setstate__", None)
+    if setstate:
+        setstate(state)
+        return
+    slotstate = None
+    if isinstance(state, tuple) and len(state) == 2:
+        state, slotstate = state
+    if state:
+        d = inst.__dict__
+        try:
+            for k, v in state.iteritems():
+                d[intern(k)] = v
+        # keys in state don't have to be strings
+        # don't blow up, but don't go out of our way
+        except TypeError:
+            d.update(state)
+    if slotstate:
+        for k, v in slotstate.items():
+            setattr(inst, k, v)
+
+def _get_extension(find_class, code):
+    nil = []
+    obj = _extension_cache.get(code, nil)
+    if obj is not nil:
+        return obj
+    key = _inverted_registry.get(code)
+    if not key:
+        raise ValueError("unregistered extension code %d" % code)
+    obj = find_class(*key)
+    _extension_cache[code] = obj
+    return obj
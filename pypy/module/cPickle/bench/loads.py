@@ -0,0 +1,21 @@
+# Compares the built-in cPickle with the app-level one of lib_pypy.
+
+import imp, os, time
+import cPickle
+lib_pypy_cPickle = imp.load_source('lib_pypy_cPickle', os.path.join(
+    os.path.dirname(__file__), '..', '..', '..', '..', 'lib_pypy',
+    'cPickle.py'))
+
+def f(module, proto):
+    record = {"id": 12345, "name": u"widget \xe9", "price": 9.75,
+              "tags": ["a", "b", "c"], "active": True, "parent": None,
+              "dimensions": (10, 20, 30), "description": "some text"}
+    s = cPickle.dumps([dict(record, id=i) for i in range(20000)], proto)
+    t0 = time.time()
+    for i in range(10):
+        module.loads(s)
+    return time.time() - t0
+
+for proto in range(3):
+    print 'protocol %d: built-in %.3fs, lib_pypy %.3fs' % (
+        proto, f(cPickle, proto), f(lib_pypy_cPickle, proto))
@@ -0,0 +1,553 @@
+"""
+Interp-level Pickler.  The common types (None, bool, int, float, str,
+unicode, tuple, list and dict) are written directly into a StringBuilder,
+which is flushed to the file in chunks; everything else goes through the
+app-level helpers of app_cpickle.py, which follow pickle.py.
+"""
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter import unicodehelper
+from pypy.rlib.rstring import StringBuilder
+from pypy.rlib.rstruct.ieee import pack_float
+from pypy.module.cPickle import opcodes
+
+BATCHSIZE = 1000
+FLUSH_SIZE = 64 * 1024
+HEXDIGITS = "0123456789abcdef"
+
+
+class ModuleDicts(object):
+    """Maps the dictionaries of the modules in sys.modules to the modules.
+    Shared by all the Picklers, and rebuilt only when the number of
+    modules changes, so that dumps() of a small dict stays cheap."""
+
+    def __init__(self, space):
+        self.space = space
+        self.moduledicts = {}    # identity-keyed
+        self.nmodules = -1
+
+    def find(self, w_dict):
+        space = self.space
+        w_modules = space.sys.get('modules')
+        nmodules = space.len_w(w_modules)
+        if nmodules != self.nmodules:
+            self.rebuild(w_modules)
+            self.nmodules = nmodules
+        return self.moduledicts.get(w_dict, None)
+
+    def rebuild(self, w_modules):
+        space = self.space
+        self.moduledicts = {}
+        w_moduletype = space.type(space.sys)
+        for w_module in space.listview(space.call_method(w_modules,
+                                                         'values')):
+            if space.isinstance_w(w_module, w_moduletype):
+                w_moddict = space.getattr(w_module, space.wrap('__dict__'))
+                self.moduledicts[w_moddict] = w_module
+
+def app_helper(space, name):
+    w_module = space.getbuiltinmodule('cPickle')
+    return space.getattr(w_module, space.wrap(name))
+
+def _pack_int32(builder, n):
+    builder.append(chr(n & 0xff))
+    builder.append(chr((n >> 8) & 0xff))
+    builder.append(chr((n >> 16) & 0xff))
+    builder.append(chr((n >> 24) & 0xff))
+
+def _append_hex(builder, n, digits):
+    shift = 4 * (digits - 1)
+    while shift >= 0:
+        builder.append(HEXDIGITS[(n >> shift) & 0xf])
+        shift -= 4
+
+def _encode_raw_unicode_escape(builder, u):
+    # like u.encode('raw-unicode-escape'), but also escaping the
+    # backslashes and the newlines, as pickle.py does
+    for c in u:
+        n = ord(c)
+        if n >= 0x10000:
+            builder.append('\\U')
+            _append_hex(builder, n, 8)
+        elif n >= 0x100 or n == ord('\\') or n == ord('\n'):
+            builder.append('\\u')
+            _append_hex(builder, n, 4)
+        else:
+            builder.append(chr(n))
+
+def check_protocol(space, w_protocol):
+    if space.is_w(w_protocol, space.w_None):
+        return 0
+    proto = space.int_w(w_protocol)
+    if proto < 0:
+        return opcodes.HIGHEST_PROTOCOL
+    if proto > opcodes.HIGHEST_PROTOCOL:
+        raise operationerrfmt(space.w_ValueError,
+                              "pickle protocol must be <= %d",
+                              opcodes.HIGHEST_PROTOCOL)
+    return proto
+
+# ____________________________________________________________
+
+class W_Pickler(Wrappable):
+    """Pickler(file, protocol=0) -- write pickles of objects to a file.
+
+    Without a file, or when given only the protocol, the pickles are
+    accumulated and returned by getvalue()."""
+
+    def __init__(self, space, w_write, proto):
+        self.space = space
+        self.w_write = w_write   # None: keep the data for getvalue()
+        self.proto = proto
+        self.bin = proto >= 1
+        self.fast = False
+        self.builder = StringBuilder()
+        # identity-keyed, like __pypy__.identity_dict: object -> memo index
+        self.memo = {}
+        self.w_persistent_id = None
+        self.w_pid_func = None
+
+    def write(self, data):
+        self.builder.append(data)
+
+    def flush(self):
+        if self.w_write is not None and self.builder.getlength() > 0:
+            data = self.builder.build()
+            self.builder = StringBuilder()
+            self.space.call_function(self.w_write, self.space.wrap(data))
+
+    def dump(self, w_obj):
+        space = self.space
+        w_pid = space.findattr(space.wrap(self), space.wrap('persistent_id'))
+        if w_pid is not None and space.is_w(w_pid, space.w_None):
+            w_pid = None
+        self.w_pid_func = w_pid
+        if self.proto >= 2:
+            self.write(opcodes.PROTO)
+            self.write(chr(self.proto))
+        self.save(w_obj)
+        self.write(opcodes.STOP)
+        self.flush()
+
+    # ---------- memo ----------
+
+    def memoize(self, w_obj):
+        if self.fast:
+            return
+        # the indexes start at 1, as in CPython's cPickle
+        index = len(self.memo) + 1
+        self.write_put(index)
+        self.memo[w_obj] = index
+
+    def write_put(self, index):
+        if self.bin:
+            if index < 256:
+                self.write(opcodes.BINPUT)
+                self.write(chr(index))
+            else:
+                self.write(opcodes.LONG_BINPUT)
+                _pack_int32(self.builder, index)
+        else:
+            self.write(opcodes.PUT)
+            self.write(str(index))
+            self.write('\n')
+
+    def write_get(self, index):
+        if self.bin:
+            if index < 256:
+                self.write(opcodes.BINGET)
+                self.write(chr(index))
+            else:
+                self.write(opcodes.LONG_BINGET)
+                _pack_int32(self.builder, index)
+        else:
+            self.write(opcodes.GET)
+            self.write(str(index))
+            self.write('\n')
+
+    # ---------- saving ----------
+
+    def save(self, w_obj):
+        space = self.space
+        if self.builder.getlength() >= FLUSH_SIZE:
+            self.flush()
+        if self.w_pid_func is not None:
+            w_pid = space.call_function(self.w_pid_func, w_obj)
+            if not space.is_w(w_pid, space.w_None):
+                self.save_pers(w_pid)
+                return
+        w_type = space.type(w_obj)
+        # the types that are never memoized
+        if space.is_w(w_obj, space.w_None):
+            self.write(opcodes.NONE)
+            return
+        if space.is_w(w_type, space.w_bool):
+            self.save_bool(space.is_true(w_obj))
+            return
+        if space.is_w(w_type, space.w_int):
+            self.save_int(space.int_w(w_obj))
+            return
+        if space.is_w(w_type, space.w_float):
+            self.save_float(w_obj)
+            return
+        index = self.memo.get(w_obj, 0)
+        if index > 0:
+            self.write_get(index)
+            return
+        if space.is_w(w_type, space.w_str):
+            self.save_str(space.str_w(w_obj))
+            self.memoize(w_obj)
+        elif space.is_w(w_type, space.w_unicode):
+            self.save_unicode(space.unicode_w(w_obj))
+            self.memoize(w_obj)
+        elif space.is_w(w_type, space.w_tuple):
+            self.save_tuple(w_obj)
+        elif space.is_w(w_type, space.w_list):
+            self.save_list(w_obj)
+        elif space.is_w(w_type, space.w_dict):
+            self.save_dict(w_obj)
+        elif space.is_w(w_type, space.w_long):
+            self.save_long(w_obj)
+        else:
+            space.call_function(app_helper(space, '_save_other'),
+                                space.wrap(self), w_obj)
+
+    def save_pers(self, w_pid):
+        space = self.space
+        if self.bin:
+            self.save(w_pid)
+            self.write(opcodes.BINPERSID)
+        else:
+            self.write(opcodes.PERSID)
+            self.write(space.str_w(space.str(w_pid)))
+            self.write('\n')
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            if value:
+                self.write(opcodes.NEWTRUE)
+            else:
+                self.write(opcodes.NEWFALSE)
+        else:
+            if value:
+                self.write(opcodes.TRUE)
+            else:
+                self.write(opcodes.FALSE)
+
+    def save_int(self, value):
+        if self.bin:
+            if 0 <= value <= 0xff:
+                self.write(opcodes.BININT1)
+                self.write(chr(value))
+                return
+            if 0 <= value <= 0xffff:
+                self.write(opcodes.BININT2)
+                self.write(chr(value & 0xff))
+                self.write(chr(value >> 8))
+                return
+            high_bits = value >> 31
+            if high_bits == 0 or high_bits == -1:
+                self.write(opcodes.BININT)
+                _pack_int32(self.builder, value)
+                return
+        self.write(opcodes.INT)
+        self.write(str(value))
+        self.write('\n')
+
+    def save_long(self, w_obj):
+        space = self.space
+        if self.proto >= 2:
+            w_bytes = space.call_function(app_helper(space, '_encode_long'),
+                                          w_obj)
+            data = space.str_w(w_bytes)
+            if len(data) < 256:
+                self.write(opcodes.LONG1)
+                self.write(chr(len(data)))
+            else:
+                self.write(opcodes.LONG4)
+                _pack_int32(self.builder, len(data))
+            self.write(data)
+        else:
+            self.write(opcodes.LONG)
+            self.write(space.str_w(space.repr(w_obj)))
+            self.write('\n')
+
+    def save_float(self, w_obj):
+        space = self.space
+        if self.bin:
+            self.write(opcodes.BINFLOAT)
+            pack_float(self.builder, space.float_w(w_obj), 8, True)
+        else:
+            self.write(opcodes.FLOAT)
+            self.write(space.str_w(space.repr(w_obj)))
+            self.write('\n')
+
+    def save_str(self, s):
+        if self.bin:
+            if len(s) < 256:
+                self.write(opcodes.SHORT_BINSTRING)
+                self.write(chr(len(s)))
+            else:
+                self.write(opcodes.BINSTRING)
+                _pack_int32(self.builder, len(s))
+            self.write(s)
+        else:
+            self.write(opcodes.STRING)
+            self.write(self.space.str_w(self.space.repr(self.space.wrap(s))))
+            self.write('\n')
+
+    def save_unicode(self, u):
+        if self.bin:
+            data = unicodehelper.PyUnicode_EncodeUTF8(self.space, u)
+            self.write(opcodes.BINUNICODE)
+            _pack_int32(self.builder, len(data))
+            self.write(data)
+        else:
+            self.write(opcodes.UNICODE)
+            _encode_raw_unicode_escape(self.builder, u)
+            self.write('\n')
+
+    def save_tuple(self, w_tuple):
+        space = self.space
+        items_w = space.fixedview(w_tuple)
+        n = len(items_w)
+        if n == 0:
+            if self.proto:
+                self.write(opcodes.EMPTY_TUPLE)
+            else:
+                self.write(opcodes.MARK)
+                self.write(opcodes.TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            # the tuple may have been saved recursively by its items
+            index = self.memo.get(w_tuple, 0)
+            if index > 0:
+                for i in range(n):
+                    self.write(opcodes.POP)
+                self.write_get(index)
+                return
+            if n == 1:
+                self.write(opcodes.TUPLE1)
+            elif n == 2:
+                self.write(opcodes.TUPLE2)
+            else:
+                self.write(opcodes.TUPLE3)
+            self.memoize(w_tuple)
+            return
+        self.write(opcodes.MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_tuple, 0)
+        if index > 0:
+            if self.proto:
+                self.write(opcodes.POP_MARK)
+            else:
+                for i in range(n + 1):
+                    self.write(opcodes.POP)
+            self.write_get(index)
+            return
+        self.write(opcodes.TUPLE)
+        self.memoize(w_tuple)
+
+    def save_list(self, w_list):
+        if self.bin:
+            self.write(opcodes.EMPTY_LIST)
+        else:
+            self.write(opcodes.MARK)
+            self.write(opcodes.LIST)
+        self.memoize(w_list)
+        self.batch_appends(self.space.listview(w_list))
+
+    def save_dict(self, w_dict):
+        space = self.space
+        w_module = self.find_moduledict(w_dict)
+        if w_module is not None:
+            space.call_function(app_helper(space, '_save_moduledict'),
+                                space.wrap(self), w_module)
+            return
+        if self.bin:
+            self.write(opcodes.EMPTY_DICT)
+        else:
+            self.write(opcodes.MARK)
+            self.write(opcodes.DICT)
+        self.memoize(w_dict)
+        w_items = space.call_method(w_dict, 'items')
+        self.batch_setitems(space.listview(w_items))
+
+    def find_moduledict(self, w_dict):
+        # module dictionaries are saved as "getattr(module, '__dict__')"
+        return self.space.fromcache(ModuleDicts).find(w_dict)
+
+    def batch_appends(self, items_w):
+        if not self.bin:
+            for w_item in items_w:
+                self.save(w_item)
+                self.write(opcodes.APPEND)
+            return
+        n = len(items_w)
+        start = 0
+        while start < n:
+            stop = min(start + BATCHSIZE, n)
+            if stop - start == 1:
+                self.save(items_w[start])
+                self.write(opcodes.APPEND)
+            else:
+                self.write(opcodes.MARK)
+                for i in range(start, stop):
+                    self.save(items_w[i])
+                self.write(opcodes.APPENDS)
+            start = stop
+
+    def batch_setitems(self, items_w):
+        space = self.space
+        if not self.bin:
+            for w_item in items_w:
+                w_key, w_value = space.fixedview(w_item, 2)
+                self.save(w_key)
+                self.save(w_value)
+                self.write(opcodes.SETITEM)
+            return
+        n = len(items_w)
+        start = 0
+        while start < n:
+            stop = min(start + BATCHSIZE, n)
+            if stop - start > 1:
+                self.write(opcodes.MARK)
+            for i in range(start, stop):
+                w_key, w_value = space.fixedview(items_w[i], 2)
+                self.save(w_key)
+                self.save(w_value)
+            if stop - start > 1:
+                self.write(opcodes.SETITEMS)
+            else:
+                self.write(opcodes.SETITEM)
+            start = stop
+
+    # ---------- app-level interface ----------
+
+    def descr_dump(self, space, w_obj):
+        """dump(object) -- Write a pickled representation of object to
+        the file."""
+        self.dump(w_obj)
+        return space.wrap(self)
+
+    def descr_clear_memo(self, space):
+        """clear_memo() -- Clear the picklers memo."""
+        self.memo = {}
+
+    @unwrap_spec(clear=int)
+    def descr_getvalue(self, space, clear=1):
+        """getvalue() -- Finish picking a list-based pickle."""
+        data = self.builder.build()
+        if clear:
+            self.builder = StringBuilder()
+        return space.wrap(data)
+
+    def descr_save(self, space, w_obj):
+        self.save(w_obj)
+
+    @unwrap_spec(data=str)
+    def descr_write(self, space, data):
+        self.write(data)
+
+    def descr_memoize(self, space, w_obj):
+        self.memoize(w_obj)
+
+    def descr_batch_appends(self, space, w_items):
+        self.batch_appends(space.unpackiterable(w_items))
+
+    def descr_batch_setitems(self, space, w_items):
+        self.batch_setitems(space.unpackiterable(w_items))
+
+    def fget_memo(self, space):
+        # a snapshot in the format of pickle.py: id(obj) -> (index, obj)
+        w_memo = space.newdict()
+        for w_obj, index in self.memo.items():
+            space.setitem(w_memo, space.id(w_obj),
+                          space.newtuple([space.wrap(index), w_obj]))
+        return w_memo
+
+    def fget_fast(self, space):
+        return space.newbool(self.fast)
+
+    def fset_fast(self, space, w_value):
+        self.fast = space.is_true(w_value)
+
+    def fget_binary(self, space):
+        return space.newbool(self.bin)
+
+    def fget_proto(self, space):
+        return space.wrap(self.proto)
+
+    def fget_persistent_id(self, space):
+        if self.w_persistent_id is None:
+            return space.w_None
+        return self.w_persistent_id
+
+    def fset_persistent_id(self, space, w_value):
+        self.w_persistent_id = w_value
+
+
+def make_pickler(space, w_subtype, w_write, proto):
+    pickler = space.allocate_instance(W_Pickler, w_subtype)
+    pickler.__init__(space, w_write, proto)
+    return pickler
+
+def get_write(space, w_file):
+    w_write = space.findattr(w_file, space.wrap('write'))
+    if w_write is None:
+        raise OperationError(space.w_TypeError, space.wrap(
+            "argument must have 'write' attribute"))
+    return w_write
+
+def W_Pickler___new__(space, w_subtype, w_file=None, w_protocol=None):
+    if w_file is None or space.isinstance_w(w_file, space.w_int):
+        # Pickler() or Pickler(protocol): a list-based pickler
+        w_write = None
+        if w_file is not None:
+            w_protocol = w_file
+    else:
+        w_write = get_write(space, w_file)
+    proto = check_protocol(space, w_protocol)
+    return space.wrap(make_pickler(space, w_subtype, w_write, proto))
+
+W_Pickler.typedef = TypeDef("Pickler",
+    __module__ = "cPickle",
+    __doc__ = W_Pickler.__doc__,
+    __new__ = interp2app(W_Pickler___new__),
+    dump = interp2app(W_Pickler.descr_dump),
+    clear_memo = interp2app(W_Pickler.descr_clear_memo),
+    getvalue = interp2app(W_Pickler.descr_getvalue),
+    save = interp2app(W_Pickler.descr_save),
+    write = interp2app(W_Pickler.descr_write),
+    memoize = interp2app(W_Pickler.descr_memoize),
+    _batch_appends = interp2app(W_Pickler.descr_batch_appends),
+    _batch_setitems = interp2app(W_Pickler.descr_batch_setitems),
+    memo = GetSetProperty(W_Pickler.fget_memo),
+    fast = GetSetProperty(W_Pickler.fget_fast, W_Pickler.fset_fast),
+    binary = GetSetProperty(W_Pickler.fget_binary),
+    proto = GetSetProperty(W_Pickler.fget_proto),
+    persistent_id = GetSetProperty(W_Pickler.fget_persistent_id,
+                                   W_Pickler.fset_persistent_id),
+    )
+
+# ____________________________________________________________
+
+def dump(space, w_obj, w_file, w_protocol=None):
+    """dump(obj, file, protocol=0) -- Write an object in pickle format
+    to the given file."""
+    proto = check_protocol(space, w_protocol)
+    pickler = W_Pickler(space, get_write(space, w_file), proto)
+    pickler.dump(w_obj)
+
+def dumps(space, w_obj, w_protocol=None):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+    pickle format."""
+    proto = check_protocol(space, w_protocol)
+    pickler = W_Pickler(space, None, proto)
+    pickler.dump(w_obj)
+    return space.wrap(pickler.builder.build())
@@ -0,0 +1,594 @@
+"""
+Interp-level Unpickler.  The opcodes are read from a string or from a
+file, in chunks when the file is a real file or a cStringIO object, which
+can cheaply seek back the unused part of the last chunk, and interpreted
+by a single loop over an RPython list used as the stack.
+"""
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter import unicodehelper
+from pypy.interpreter.pyparser.parsestring import PyString_DecodeEscape
+from pypy.rlib.rstruct.ieee import unpack_float
+from pypy.rlib.rarithmetic import intmask
+from pypy.module.cPickle import opcodes
+from pypy.module.cPickle.interp_pickler import app_helper
+from pypy.module._file.interp_file import W_File
+from pypy.module.cStringIO.interp_stringio import W_InputOutputType
+
+MIN_CHUNK_SIZE = 1024
+MAX_CHUNK_SIZE = 64 * 1024
+
+
+def unpickling_error(space, msg):
+    return OperationError(app_helper(space, 'UnpicklingError'),
+                          space.wrap(msg))
+
+def _unpack_int32(s):
+    x = (ord(s[0]) | (ord(s[1]) << 8) | (ord(s[2]) << 16) |
+         (ord(s[3]) << 24))
+    if x >= 0x80000000:
+        x -= 0x100000000
+    return intmask(x)
+
+# ____________________________________________________________
+# Where the pickle data comes from
+
+class Source(object):
+
+    def __init__(self, space):
+        self.space = space
+
+    def eof(self):
+        return OperationError(self.space.w_EOFError, self.space.w_None)
+
+    def read(self, n):
+        raise NotImplementedError
+
+    def readline(self):
+        """Returns the next line, without the final newline."""
+        raise NotImplementedError
+
+    def readchar(self):
+        return self.read(1)[0]
+
+    def finish(self):
+        pass
+
+
+class StringSource(Source):
+    """The data of loads()."""
+
+    def __init__(self, space, data):
+        Source.__init__(self, space)
+        self.data = data
+        self.pos = 0
+
+    def read(self, n):
+        start = self.pos
+        end = start + n
+        if end > len(self.data):
+            raise self.eof()
+        self.pos = end
+        assert start >= 0
+        return self.data[start:end]
+
+    def readchar(self):
+        pos = self.pos
+        if pos >= len(self.data):
+            raise self.eof()
+        self.pos = pos + 1
+        return self.data[pos]
+
+    def readline(self):
+        start = self.pos
+        assert start >= 0
+        end = self.data.find('\n', start)
+        if end < 0:
+            raise self.eof()
+        self.pos = end + 1
+        return self.data[start:end]
+
+
+class BufferedFileSource(Source):
+    """Reads the file in growing chunks.  The file must support
+    seek(-n, 1), to give back what was read past the end of the pickle."""
+
+    def __init__(self, space, w_file):
+        Source.__init__(self, space)
+        self.w_read = space.getattr(w_file, space.wrap('read'))
+        self.w_seek = space.getattr(w_file, space.wrap('seek'))
+        self.buf = ''
+        self.pos = 0
+        self.chunk_size = MIN_CHUNK_SIZE
+
+    def fill(self, n):
+        # make sure that at least 'n' bytes are available, if possible
+        space = self.space
+        pos = self.pos
+        assert pos >= 0
+        data = self.buf[pos:]
+        while len(data) < n:
+            size = max(self.chunk_size, n - len(data))
+            if self.chunk_size < MAX_CHUNK_SIZE:
+                self.chunk_size *= 2
+            w_chunk = space.call_function(self.w_read, space.wrap(size))
+            chunk = space.str_w(w_chunk)
+            if not chunk:
+                break
+            data += chunk
+        self.buf = data
+        self.pos = 0
+
+    def read(self, n):
+        if self.pos + n > len(self.buf):
+            self.fill(n)
+            if n > len(self.buf):
+                raise self.eof()
+        start = self.pos
+        end = start + n
+        self.pos = end
+        assert start >= 0
+        return self.buf[start:end]
+
+    def readchar(self):
+        if self.pos >= len(self.buf):
+            self.fill(1)
+            if not self.buf:
+                raise self.eof()
+        pos = self.pos
+        self.pos = pos + 1
+        return self.buf[pos]
+
+    def readline(self):
+        start = self.pos
+        assert start >= 0
+        end = self.buf.find('\n', start)
+        while end < 0:
+            length = len(self.buf) - start
+            assert length >= 0
+            self.fill(length + 1)
+            if len(self.buf) <= length:
+                raise self.eof()
+            start = 0
+            end = self.buf.find('\n', length)
+        self.pos = end + 1
+        return self.buf[start:end]
+
+    def finish(self):
+        unused = len(self.buf) - self.pos
+        if unused > 0:
+            space = self.space
+            self.buf = ''
+            self.pos = 0
+            space.call_function(self.w_seek, space.wrap(-unused),
+                                space.wrap(1))
+
+
+class ExactFileSource(Source):
+    """For the other file-like objects: never reads past the pickle."""
+
+    def __init__(self, space, w_file):
+        Source.__init__(self, space)
+        self.w_read = space.getattr(w_file, space.wrap('read'))
+        self.w_readline = space.getattr(w_file, space.wrap('readline'))
+
+    def read(self, n):
+        space = self.space
+        data = space.str_w(space.call_function(self.w_read, space.wrap(n)))
+        if len(data) < n:
+            raise self.eof()
+        return data
+
+    def readline(self):
+        space = self.space
+        line = space.str_w(space.call_function(self.w_readline))
+        if not line.endswith('\n'):
+            raise self.eof()
+        end = len(line) - 1
+        assert end >= 0
+        return line[:end]
+
+
+def make_file_source(space, w_file):
+    # don't read ahead in the other file-like objects, even if they have
+    # seek(): e.g. GzipFile and BZ2File seek back by decompressing again
+    # from the start of the file
+    file = space.interpclass_w(w_file)
+    if isinstance(file, W_File) or isinstance(file, W_InputOutputType):
+        try:
+            space.call_method(w_file, 'tell')
+        except OperationError, e:
+            # e.g. a pipe
+            if not e.match(space, space.w_IOError):
+                raise
+        else:
+            return BufferedFileSource(space, w_file)
+    return ExactFileSource(space, w_file)
+
+# ____________________________________________________________
+
+class W_Unpickler(Wrappable):
+    """Unpickler(file) -- read pickles from a file."""
+
+    def __init__(self, space, w_file):
+        self.space = space
+        self.w_file = w_file
+        self.memo = {}     # memo index -> object
+        self.stack_w = []
+        self.marks = []
+        self.w_persistent_load = None
+        self.w_find_global = None
+
+    def load(self, source):
+        self.stack_w = []
+        self.marks = []
+        try:
+            return self.load_loop(source)
+        finally:
+            source.finish()
+            self.stack_w = []
+            self.marks = []
+
+    # ---------- the stack ----------
+
+    def push(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if len(self.stack_w) <= self.top_mark():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if len(self.stack_w) <= self.top_mark():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def top_mark(self):
+        if self.marks:
+            return self.marks[-1]
+        return 0
+
+    def pop_mark(self):
+        if not self.marks:
+            raise unpickling_error(self.space, "could not find MARK")
+        k = self.marks.pop()
+        assert k >= 0
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    # ---------- the main loop ----------
+
+    def load_loop(self, source):
+        space = self.space
+        while True:
+            key = source.readchar()
+            if key == opcodes.MARK:
+                self.marks.append(len(self.stack_w))
+            elif key == opcodes.STOP:
+                return self.pop()
+            elif key == opcodes.NONE:
+                self.push(space.w_None)
+            elif key == opcodes.NEWTRUE:
+                self.push(space.w_True)
+            elif key == opcodes.NEWFALSE:
+                self.push(space.w_False)
+            elif key == opcodes.BININT:
+                self.push(space.wrap(_unpack_int32(source.read(4))))
+            elif key == opcodes.BININT1:
+                self.push(space.wrap(ord(source.readchar())))
+            elif key == opcodes.BININT2:
+                s = source.read(2)
+                self.push(space.wrap(ord(s[0]) | (ord(s[1]) << 8)))
+            elif key == opcodes.BINFLOAT:
+                self.push(space.wrap(unpack_float(source.read(8), True)))
+            elif key == opcodes.SHORT_BINSTRING:
+                n = ord(source.readchar())
+                self.push(space.wrap(source.read(n)))
+            elif key == opcodes.BINSTRING:
+                n = _unpack_int32(source.read(4))
+                if n < 0:
+                    raise unpickling_error(space,
+                                           "BINSTRING pickle has negative "
+                                           "byte count")
+                self.push(space.wrap(source.read(n)))
+            elif key == opcodes.BINUNICODE:
+                n = _unpack_int32(source.read(4))
+                if n < 0:
+                    raise unpickling_error(space,
+                                           "BINUNICODE pickle has negative "
+                                           "byte count")
+                data = source.read(n)
+                self.push(space.wrap(
+                    unicodehelper.PyUnicode_DecodeUTF8(space, data)))
+            elif key == opcodes.EMPTY_TUPLE:
+                self.push(space.newtuple([]))
+            elif key == opcodes.TUPLE1:
+                w_item = self.pop()
+                self.push(space.newtuple([w_item]))
+            elif key == opcodes.TUPLE2:
+                w_item2 = self.pop()
+                w_item1 = self.pop()
+                self.push(space.newtuple([w_item1, w_item2]))
+            elif key == opcodes.TUPLE3:
+                w_item3 = self.pop()
+                w_item2 = self.pop()
+                w_item1 = self.pop()
+                self.push(space.newtuple([w_item1, w_item2, w_item3]))
+            elif key == opcodes.TUPLE:
+                self.push(space.newtuple(self.pop_mark()))
+            elif key == opcodes.EMPTY_LIST:
+                self.push(space.newlist([]))
+            elif key == opcodes.LIST:
+                self.push(space.newlist(self.pop_mark()))
+            elif key == opcodes.EMPTY_DICT:
+                self.push(space.newdict())
+            elif key == opcodes.DICT:
+                items_w = self.pop_mark()
+                w_dict = space.newdict()
+                self.setitems(w_dict, items_w)
+                self.push(w_dict)
+            elif key == opcodes.APPEND:
+                w_value = self.pop()
+                space.call_method(self.top(), 'append', w_value)
+            elif key == opcodes.APPENDS:
+                items_w = self.pop_mark()
+                space.call_method(self.top(), 'extend', space.newlist(items_w))
+            elif key == opcodes.SETITEM:
+                w_value = self.pop()
+                w_key = self.pop()
+                space.setitem(self.top(), w_key, w_value)
+            elif key == opcodes.SETITEMS:
+                items_w = self.pop_mark()
+                self.setitems(self.top(), items_w)
+            elif key == opcodes.BINPUT:
+                self.memo[ord(source.readchar())] = self.top()
+            elif key == opcodes.LONG_BINPUT:
+                self.memo[_unpack_int32(source.read(4))] = self.top()
+            elif key == opcodes.PUT:
+                self.memo[self.parse_int(source.readline())] = self.top()
+            elif key == opcodes.BINGET:
+                self.push(self.memo_get(ord(source.readchar())))
+            elif key == opcodes.LONG_BINGET:
+                self.push(self.memo_get(_unpack_int32(source.read(4))))
+            elif key == opcodes.GET:
+                self.push(self.memo_get(self.parse_int(source.readline())))
+            elif key == opcodes.POP:
+                if self.marks and self.marks[-1] == len(self.stack_w):
+                    self.marks.pop()
+                else:
+                    self.pop()
+            elif key == opcodes.POP_MARK:
+                self.pop_mark()
+            elif key == opcodes.DUP:
+                self.push(self.top())
+            elif key == opcodes.INT:
+                self.load_int(source.readline())
+            elif key == opcodes.LONG:
+                self.push(space.call_function(space.w_long,
+                                              space.wrap(source.readline()),
+                                              space.wrap(0)))
+            elif key == opcodes.LONG1:
+                n = ord(source.readchar())
+                self.load_long(source.read(n))
+            elif key == opcodes.LONG4:
+                n = _unpack_int32(source.read(4))
+                if n < 0:
+                    raise unpickling_error(space,
+                                           "LONG pickle has negative "
+                                           "byte count")
+                self.load_long(source.read(n))
+            elif key == opcodes.FLOAT:
+                self.push(space.call_function(space.w_float,
+                                              space.wrap(source.readline())))
+            elif key == opcodes.STRING:
+                self.load_string(source.readline())
+            elif key == opcodes.UNICODE:
+                data = source.readline()
+                self.push(space.wrap(
+                    unicodehelper.PyUnicode_DecodeRawUnicodeEscape(space,
+                                                                   data)))
+            elif key == opcodes.GLOBAL:
+                module = source.readline()
+                name = source.readline()
+                self.push(self.find_class(module, name))
+            elif key == opcodes.INST:
+                module = source.readline()
+                name = source.readline()
+                w_class = self.find_class(module, name)
+                w_args = space.newtuple(self.pop_mark())
+                self.push(space.call_function(app_helper(space,
+                                                         '_instantiate'),
+                                              w_class, w_args))
+            elif key == opcodes.OBJ:
+                items_w = self.pop_mark()
+                if not items_w:
+                    raise unpickling_error(space, "unpickling stack underflow")
+                w_args = space.newtuple(items_w[1:])
+                self.push(space.call_function(app_helper(space,
+                                                         '_instantiate'),
+                                              items_w[0], w_args))
+            elif key == opcodes.NEWOBJ:
+                w_args = self.pop()
+                w_class = self.pop()
+                args_w = [w_class] + space.fixedview(w_args)
+                w_new = space.getattr(w_class, space.wrap('__new__'))
+                self.push(space.call(w_new, space.newtuple(args_w)))
+            elif key == opcodes.REDUCE:
+                w_args = self.pop()
+                w_func = self.pop()
+                self.push(space.call(w_func, w_args))
+            elif key == opcodes.BUILD:
+                w_state = self.pop()
+                space.call_function(app_helper(space, '_load_build'),
+                                    self.top(), w_state)
+            elif key == opcodes.EXT1:
+                self.load_ext(ord(source.readchar()))
+            elif key == opcodes.EXT2:
+                s = source.read(2)
+                self.load_ext(ord(s[0]) | (ord(s[1]) << 8))
+            elif key == opcodes.EXT4:
+                self.load_ext(_unpack_int32(source.read(4)))
+            elif key == opcodes.PERSID:
+                self.load_persid(space.wrap(source.readline()))
+            elif key == opcodes.BINPERSID:
+                self.load_persid(self.pop())
+            elif key == opcodes.PROTO:
+                proto = ord(source.readchar())
+                if proto > opcodes.HIGHEST_PROTOCOL:
+                    raise operationerrfmt(space.w_ValueError,
+                                          "unsupported pickle protocol: %d",
+                                          proto)
+            else:
+                raise operationerrfmt(app_helper(space, 'UnpicklingError'),
+                                      "invalid load key, '%s'.", key)
+
+    # ---------- the less common opcodes ----------
+
+    def setitems(self, w_dict, items_w):
+        space = self.space
+        if len(items_w) % 2 != 0:
+            raise unpickling_error(space, "odd number of items for SETITEMS")
+        for i in range(0, len(items_w), 2):
+            space.setitem(w_dict, items_w[i], items_w[i + 1])
+
+    def memo_get(self, index):
+        try:
+            return self.memo[index]
+        except KeyError:
+            raise OperationError(self.space.w_KeyError,
+                                 self.space.wrap(index))
+
+    def parse_int(self, line):
+        space = self.space
+        return space.int_w(space.call_function(space.w_int, space.wrap(line)))
+
+    def load_int(self, line):
+        space = self.space
+        if line == '00':
+            self.push(space.w_False)
+        elif line == '01':
+            self.push(space.w_True)
+        else:
+            # may give a long, for pickles written on a 64-bit machine
+            self.push(space.call_function(space.w_int, space.wrap(line)))
+
+    def load_long(self, data):
+        space = self.space
+        self.push(space.call_function(app_helper(space, '_decode_long'),
+                                      space.wrap(data)))
+
+    def load_string(self, rep):
+        space = self.space
+        for quote in ['"', "'"]:
+            if rep.startswith(quote):
+                if len(rep) < 2 or not rep.endswith(quote):
+                    break
+                end = len(rep) - 1
+                assert end >= 1
+                s = PyString_DecodeEscape(space, rep[1:end], None)
+                self.push(space.wrap(s))
+                return
+        raise OperationError(space.w_ValueError,
+                             space.wrap("insecure string pickle"))
+
+    def find_class(self, module, name):
+        space = self.space
+        if self.w_find_global is not None:
+            return space.call_function(self.w_find_global, space.wrap(module),
+                                       space.wrap(name))
+        return space.call_method(space.wrap(self), 'find_class',
+                                 space.wrap(module), space.wrap(name))
+
+    def load_ext(self, code):
+        space = self.space
+        if self.w_find_global is not None:
+            w_find_class = self.w_find_global
+        else:
+            w_find_class = space.getattr(space.wrap(self),
+                                         space.wrap('find_class'))
+        self.push(space.call_function(app_helper(space, '_get_extension'),
+                                      w_find_class, space.wrap(code)))
+
+    def load_persid(self, w_pid):
+        space = self.space
+        w_load = space.findattr(space.wrap(self),
+                                space.wrap('persistent_load'))
+        if w_load is None or space.is_w(w_load, space.w_None):
+            raise unpickling_error(space,
+                "A load persistent id instruction was encountered,\n"
+                "but no persistent_load function was specified.")
+        if space.isinstance_w(w_load, space.w_list):
+            space.call_method(w_load, 'append', w_pid)
+            self.push(space.w_None)
+        else:
+            self.push(space.call_function(w_load, w_pid))
+
+    # ---------- app-level interface ----------
+
+    def descr_load(self, space):
+        """load() -- Load a pickle"""
+        return self.load(make_file_source(space, self.w_file))
+
+    def descr_find_class(self, space, w_module, w_name):
+        return space.call_function(app_helper(space, '_find_class'),
+                                   w_module, w_name)
+
+    def fget_memo(self, space):
+        w_memo = space.newdict()
+        for index, w_obj in self.memo.items():
+            space.setitem(w_memo, space.wrap(str(index)), w_obj)
+        return w_memo
+
+    def fget_persistent_load(self, space):
+        if self.w_persistent_load is None:
+            return space.w_None
+        return self.w_persistent_load
+
+    def fset_persistent_load(self, space, w_value):
+        self.w_persistent_load = w_value
+
+    def fget_find_global(self, space):
+        if self.w_find_global is None:
+            return space.w_None
+        return self.w_find_global
+
+    def fset_find_global(self, space, w_value):
+        if space.is_w(w_value, space.w_None):
+            w_value = None
+        self.w_find_global = w_value
+
+
+def W_Unpickler___new__(space, w_subtype, w_file):
+    unpickler = space.allocate_instance(W_Unpickler, w_subtype)
+    unpickler.__init__(space, w_file)
+    return space.wrap(unpickler)
+
+W_Unpickler.typedef = TypeDef("Unpickler",
+    __module__ = "cPickle",
+    __doc__ = W_Unpickler.__doc__,
+    __new__ = interp2app(W_Unpickler___new__),
+    load = interp2app(W_Unpickler.descr_load),
+    find_class = interp2app(W_Unpickler.descr_find_class),
+    memo = GetSetProperty(W_Unpickler.fget_memo),
+    persistent_load = GetSetProperty(W_Unpickler.fget_persistent_load,
+                                     W_Unpickler.fset_persistent_load),
+    find_global = GetSetProperty(W_Unpickler.fget_find_global,
+                                 W_Unpickler.fset_find_global),
+    )
+
+# ____________________________________________________________
+
+def load(space, w_file):
+    """load(file) -- Load a pickle from the given file"""
+    unpickler = W_Unpickler(space, w_file)
+    return unpickler.load(make_file_source(space, w_file))
+
+@unwrap_spec(data=str)
+def loads(space, data):
+    """loads(string) -- Load a pickle from the given string"""
+    unpickler = W_Unpickler(space, None)
+    return unpickler.load(StringSource(space, data))
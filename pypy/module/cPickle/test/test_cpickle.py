@@ -0,0 +1,281 @@
+"""
+Tests for the interp-level cPickle module.
+"""
+
+from pypy.conftest import gettestobjspace
+from pypy.tool.udir import udir
+
+
+class AppTestCPickle(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=['cPickle', 'struct',
+                                                'binascii', 'cStringIO'])
+        cls.w_tmpfile = cls.space.wrap(str(udir.join('cpickle.tmp')))
+        cls.w_roundtrip = cls.space.appexec([], """():
+            import cPickle
+            def roundtrip(obj):
+                for proto in range(cPickle.HIGHEST_PROTOCOL + 1):
+                    s = cPickle.dumps(obj, proto)
+                    res = cPickle.loads(s)
+                    assert res == obj, (proto, s, res)
+                    assert type(res) is type(obj)
+                return res
+            return roundtrip
+        """)
+
+    def test_module(self):
+        import cPickle
+        assert cPickle.Pickler.__module__ == 'cPickle'
+        assert cPickle.HIGHEST_PROTOCOL == 2
+        assert issubclass(cPickle.PicklingError, cPickle.PickleError)
+        assert issubclass(cPickle.UnpicklingError, cPickle.PickleError)
+
+    def test_simple_types(self):
+        for obj in [None, True, False, 0, 1, 255, 256, 65535, 65536, -1,
+                    2 ** 31 - 1, -2 ** 31, 2 ** 40, -2 ** 40, 3L, 2L ** 100,
+                    -2L ** 100, 0.0, -1.5, 1e300, 'abc', '', 'x' * 300,
+                    '\x00\n\'"\\', u'', u'\u1234\xe9\\\n', u'\U0001d120',
+                    (), (1,), (1, 2), (1, 2, 3), (1, 2, 3, 4), [], [1, 'a'],
+                    {}, {'a': 1, 2: [3]}]:
+            self.roundtrip(obj)
+
+    def test_exact_output(self):
+        import cPickle
+        assert cPickle.dumps(None) == 'N.'
+        assert cPickle.dumps(1) == 'I1\n.'
+        assert cPickle.dumps(True, 2) == '\x80\x02\x88.'
+        assert cPickle.dumps([1, 'a'], 1) == ']q\x01(K\x01U\x01aq\x02e.'
+        assert cPickle.dumps((1, 2), 2) == '\x80\x02K\x01K\x02\x86q\x01.'
+        assert cPickle.dumps({'a': 1}) == '(dp1\nS\'a\'\np2\nI1\ns.'
+
+    def test_batches(self):
+        l = range(2500)
+        d = dict.fromkeys(range(2001), 'x')
+        assert self.roundtrip(l) == l
+        assert self.roundtrip(d) == d
+        import cPickle
+        assert cPickle.dumps([None] * 2500, 1).count('e') == 3
+        assert cPickle.dumps([5], 1) == ']q\x01K\x05a.'
+
+    def test_shared_and_recursive(self):
+        import cPickle
+        x = [1, 2]
+        for proto in range(3):
+            a, b = cPickle.loads(cPickle.dumps([x, x], proto))
+            assert a is b
+            l = [1]
+            l.append(l)
+            res = cPickle.loads(cPickle.dumps(l, proto))
+            assert res[1] is res
+            d = {}
+            t = (d,)
+            d['t'] = t
+            res = cPickle.loads(cPickle.dumps(t, proto))
+            assert res[0]['t'] is res
+        # shared strings are written only once
+        s = 'x' * 100
+        assert len(cPickle.dumps((s, s), 2)) < 150
+
+    def test_classes_and_instances(self):
+        import cPickle
+        import copy_reg
+        class Old:
+            def __init__(self, x):
+                self.x = x
+        class New(object):
+            def __init__(self, x):
+                self.x = x
+        class WithReduce(object):
+            def __reduce__(self):
+                return (WithReduce, ())
+        class Slots(object):
+            __slots__ = ('a',)
+        import __builtin__
+        __builtin__.Old = Old
+        __builtin__.New = New
+        __builtin__.WithReduce = WithReduce
+        __builtin__.Slots = Slots
+        Old.__module__ = New.__module__ = '__builtin__'
+        WithReduce.__module__ = Slots.__module__ = '__builtin__'
+        try:
+            for proto in range(3):
+                res = cPickle.loads(cPickle.dumps(Old(5), proto))
+                assert res.__class__ is Old and res.x == 5
+                res = cPickle.loads(cPickle.dumps(New([6]), proto))
+                assert type(res) is New and res.x == [6]
+                res = cPickle.loads(cPickle.dumps(WithReduce(), proto))
+                assert type(res) is WithReduce
+                s = Slots()
+                s.a = 7
+                if proto >= 2:
+                    assert cPickle.loads(cPickle.dumps(s, proto)).a == 7
+                assert cPickle.loads(cPickle.dumps(New, proto)) is New
+                assert cPickle.loads(cPickle.dumps(len, proto)) is len
+            assert '\x81' in cPickle.dumps(New(1), 2)
+            copy_reg.add_extension('__builtin__', 'New', 240)
+            try:
+                s = cPickle.dumps(New, 2)
+                assert s == '\x80\x02\x82\xf0.'
+                assert cPickle.loads(s) is New
+            finally:
+                copy_reg.remove_extension('__builtin__', 'New', 240)
+        finally:
+            del __builtin__.Old, __builtin__.New
+            del __builtin__.WithReduce, __builtin__.Slots
+
+    def test_module_dict(self):
+        import cPickle, sys
+        s = cPickle.dumps(sys.__dict__)
+        assert cPickle.loads(s) is sys.__dict__
+        # the modules imported later are found too
+        import types
+        mod = types.ModuleType('cpickle_test_mod')
+        sys.modules['cpickle_test_mod'] = mod
+        try:
+            s = cPickle.dumps(mod.__dict__, 2)
+            assert cPickle.loads(s) is mod.__dict__
+        finally:
+            del sys.modules['cpickle_test_mod']
+
+    def test_errors(self):
+        import cPickle
+        raises(ValueError, cPickle.dumps, 1, 3)
+        class Local(object):
+            pass
+        raises(cPickle.PicklingError, cPickle.dumps, Local)
+        class BadReduce(object):
+            def __reduce__(self):
+                return 42
+        raises(cPickle.PicklingError, cPickle.dumps, BadReduce())
+        raises(EOFError, cPickle.loads, '')
+        raises(EOFError, cPickle.loads, 'I1')
+        raises(EOFError, cPickle.loads, 'U\x05ab')
+        raises(cPickle.UnpicklingError, cPickle.loads, 'z.')
+        raises(cPickle.UnpicklingError, cPickle.loads, 't.')
+        raises(cPickle.UnpicklingError, cPickle.loads, '.')
+        raises(ValueError, cPickle.loads, '\x80\x03N.')
+        raises(ValueError, cPickle.loads, "S'abc\n.")
+        raises(KeyError, cPickle.loads, 'g5\n.')
+        raises(TypeError, cPickle.Pickler, object())
+
+    def test_pickle_compatibility(self):
+        import cPickle, pickle
+        obj = [1, 2.5, 'x', u'\u1234', (None, True), {'a': [3L]}, 2 ** 70]
+        for proto in range(3):
+            assert cPickle.loads(pickle.dumps(obj, proto)) == obj
+            assert pickle.loads(cPickle.dumps(obj, proto)) == obj
+
+    def test_file(self):
+        import cPickle, cStringIO
+        f = cStringIO.StringIO()
+        big = ['x' * 1000] * 100 + range(50000)
+        for proto in range(3):
+            cPickle.dump(big, f, proto)
+            cPickle.dump(proto, f, proto)
+        f.seek(0)
+        for proto in range(3):
+            assert cPickle.load(f) == big
+            assert cPickle.load(f) == proto
+        raises(EOFError, cPickle.load, f)
+
+    def test_file_without_seek(self):
+        import cPickle
+        from StringIO import StringIO
+        data = cPickle.dumps({'a': 'b'}) + cPickle.dumps([1], 2)
+        class Reader(object):
+            def __init__(self, data):
+                self.f = StringIO(data)
+                self.read = self.f.read
+                self.readline = self.f.readline
+        f = Reader(data)
+        assert cPickle.load(f) == {'a': 'b'}
+        assert cPickle.load(f) == [1]
+
+    def test_file_without_readahead(self):
+        import cPickle
+        from StringIO import StringIO
+        class File(StringIO):
+            seeks = 0
+            def seek(self, *args):
+                self.seeks += 1
+                StringIO.seek(self, *args)
+        f = File()
+        for proto in range(3):
+            cPickle.dump(['x' * 5000, proto], f, proto)
+        f.seeks = 0
+        f.pos = 0
+        for proto in range(3):
+            assert cPickle.load(f) == ['x' * 5000, proto]
+        assert f.seeks == 0
+        raises(EOFError, cPickle.load, f)
+
+    def test_real_file(self):
+        import cPickle
+        pickles = [cPickle.dumps(range(i * 1000), i % 3) for i in range(3)]
+        f = open(self.tmpfile, 'wb')
+        f.write(''.join(pickles))
+        f.close()
+        f = open(self.tmpfile, 'rb')
+        end = 0
+        for i in range(3):
+            assert cPickle.load(f) == range(i * 1000)
+            # the part read ahead was given back to the file
+            end += len(pickles[i])
+            assert f.tell() == end
+        raises(EOFError, cPickle.load, f)
+        f.close()
+
+    def test_pickler_unpickler(self):
+        import cPickle
+        from StringIO import StringIO
+        f = StringIO()
+        p = cPickle.Pickler(f, 2)
+        assert p.proto == 2 and p.binary
+        x = [1]
+        p.dump(x)
+        p.dump(x)
+        p.clear_memo()
+        p.dump(x)
+        f.seek(0)
+        u = cPickle.Unpickler(f)
+        a = u.load()
+        assert u.load() is a
+        assert u.load() is not a
+        p = cPickle.Pickler(1)
+        p.dump('abc')
+        assert cPickle.loads(p.getvalue()) == 'abc'
+        p = cPickle.Pickler(f, -1)
+        assert p.proto == 2
+
+    def test_persistent_id(self):
+        import cPickle
+        from StringIO import StringIO
+        class Pickler(cPickle.Pickler):
+            def persistent_id(self, obj):
+                if obj == 'ext':
+                    return 'pid'
+        for proto in range(3):
+            f = StringIO()
+            Pickler(f, proto).dump([1, 'ext'])
+            f.seek(0)
+            u = cPickle.Unpickler(f)
+            u.persistent_load = lambda pid: pid + '!'
+            assert u.load() == [1, 'pid!']
+            f.seek(0)
+            raises(cPickle.UnpicklingError, cPickle.load, f)
+        f = StringIO()
+        p = cPickle.Pickler(f, 2)
+        p.persistent_id = lambda obj: None
+        p.dump(1)
+
+    def test_find_global(self):
+        import cPickle
+        from StringIO import StringIO
+        u = cPickle.Unpickler(StringIO(cPickle.dumps(len)))
+        u.find_global = lambda module, name: (module, name)
+        assert u.load() == ('__builtin__', 'len')
+        class Unpickler(cPickle.Unpickler):
+            def find_class(self, module, name):
+                return name
+        assert Unpickler(StringIO(cPickle.dumps(len, 2))).load() == 'len'
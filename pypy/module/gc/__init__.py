@@ -9,6 +9,8 @@ class Module(MixedModule):
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'garbage' : 'space.newlist([])',
+        'get_fragmentation_stats': 'interp_gc.get_fragmentation_stats',
+        'get_stats': 'interp_gc.get_stats',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
     appleveldefs = {
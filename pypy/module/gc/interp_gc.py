@@ -1,8 +1,12 @@
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import OperationError
 from pypy.rlib import rgc
+from pypy.rlib.unroll import unrolling_iterable
+from pypy.rlib.rarithmetic import LONG_BIT
 from pypy.rlib.streamio import open_file_as_stream
 
+WORD = LONG_BIT // 8
+
 def collect(space):
     "Run a full collection."
     # First clear the method cache.  See test_gc for an example of why.
@@ -47,6 +51,96 @@ def enable_finalizers(space):
 def disable_finalizers(space):
     space.user_del_action.finalizers_lock_count += 1
 
+_FRAGMENTATION_STATS = unrolling_iterable([
+    ('arenas', rgc.STAT_ARENAS),
+    ('arena_bytes', rgc.STAT_ARENA_BYTES),
+    ('pages', rgc.STAT_ARENA_PAGES),
+    ('free_pages', rgc.STAT_ARENA_FREE_PAGES),
+    ('used_bytes', rgc.STAT_ARENA_USED_BYTES),
+    ('compactions', rgc.STAT_ARENA_COMPACTIONS),
+    ])
+
+def get_fragmentation_stats(space):
+    """Return a dict describing the arenas in which the GC allocates
+    small objects: 'arenas', 'arena_bytes', 'pages', 'free_pages',
+    'used_bytes', 'compactions', and 'fragmentation', the fraction of
+    the arenas not used by objects.  The dict is empty if the GC does
+    not use arenas.
+    """
+    w_result = space.newdict()
+    _fill_stats(space, w_result, _FRAGMENTATION_STATS)
+    arena_bytes = rgc.get_statistics(rgc.STAT_ARENA_BYTES)
+    if arena_bytes > 0:
+        used_bytes = rgc.get_statistics(rgc.STAT_ARENA_USED_BYTES)
+        fragmentation = 1.0 - float(used_bytes) / float(arena_bytes)
+        space.setitem_str(w_result, 'fragmentation',
+                          space.wrap(fragmentation))
+    return w_result
+
+_GC_STATS = unrolling_iterable([
+    ('heap_usage', rgc.STAT_HEAP_USAGE),
+    ('minor_collections', rgc.STAT_MINOR_COLLECTIONS),
+    ('major_collections', rgc.STAT_MAJOR_COLLECTIONS),
+    ('nursery_allocated_bytes', rgc.STAT_NURSERY_ALLOCATED_BYTES),
+    ('nursery_surviving_bytes', rgc.STAT_NURSERY_SURVIVING_BYTES),
+    ('card_marked_arrays', rgc.STAT_CARD_MARKED_ARRAYS),
+    ('nursery_size', rgc.STAT_NURSERY_SIZE),
+    ('nursery_resizes', rgc.STAT_NURSERY_RESIZES),
+    ])
+_GC_TIME_STATS = unrolling_iterable([
+    ('minor_collection_time', rgc.STAT_MINOR_COLLECTION_TIME),
+    ('major_collection_time', rgc.STAT_MAJOR_COLLECTION_TIME),
+    ])
+
+def get_stats(space):
+    """Return a dict of statistics about the GC.  All values are
+    totals since the start of the process, unless said otherwise:
+    'heap_usage' (bytes currently used outside the nursery),
+    'minor_collections', 'major_collections', 'minor_collection_time',
+    'major_collection_time' (in seconds), 'nursery_allocated_bytes',
+    'nursery_surviving_bytes', 'nursery_survival_rate',
+    'card_marked_arrays' (arrays partially walked by minor collections
+    thanks to card marking), 'nursery_size' (current), 'nursery_resizes'
+    (see PYPY_GC_NURSERY_MAX), 'arenas' (see get_fragmentation_stats()),
+    and 'size_classes', a dict mapping the size of small objects to a
+    tuple (bytes allocated, bytes that survived the last major
+    collection).  Statistics that the GC does not support are missing.
+    """
+    w_result = space.newdict()
+    _fill_stats(space, w_result, _GC_STATS)
+    for name, index in _GC_TIME_STATS:
+        value = rgc.get_statistics(index)
+        if value >= 0:
+            space.setitem_str(w_result, name, space.wrap(value / 1000.0))
+    allocated = rgc.get_statistics(rgc.STAT_NURSERY_ALLOCATED_BYTES)
+    if allocated > 0:
+        surviving = rgc.get_statistics(rgc.STAT_NURSERY_SURVIVING_BYTES)
+        space.setitem_str(w_result, 'nursery_survival_rate',
+                          space.wrap(float(surviving) / float(allocated)))
+    if rgc.get_statistics(rgc.STAT_ARENAS) >= 0:
+        space.setitem_str(w_result, 'arenas',
+                          get_fragmentation_stats(space))
+    num_size_classes = rgc.get_statistics(rgc.STAT_SIZE_CLASSES)
+    if num_size_classes > 0:
+        w_size_classes = space.newdict()
+        for n in range(1, num_size_classes + 1):
+            allocated = rgc.get_statistics(
+                rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES + n)
+            surviving = rgc.get_statistics(
+                rgc.STAT_SIZE_CLASS_SURVIVING_BYTES + n)
+            space.setitem(w_size_classes, space.wrap(n * WORD),
+                          space.newtuple([space.wrap(allocated),
+                                          space.wrap(surviving)]))
+        space.setitem_str(w_result, 'size_classes', w_size_classes)
+    return w_result
+
+def _fill_stats(space, w_dict, stats):
+    for name, index in stats:
+        value = rgc.get_statistics(index)
+        if value >= 0:
+            space.setitem_str(w_dict, name, space.wrap(value))
+_fill_stats._annspecialcase_ = 'specialize:arg(2)'
+
 # ____________________________________________________________
 
 @unwrap_spec(filename='str0')
@@ -69,6 +69,16 @@ class AppTestGC(object):
         gc.enable()
         assert gc.isenabled()
 
+    def test_get_fragmentation_stats(self):
+        import gc
+        # empty when not translated
+        assert isinstance(gc.get_fragmentation_stats(), dict)
+
+    def test_get_stats(self):
+        import gc
+        # empty when not translated
+        assert isinstance(gc.get_stats(), dict)
+
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
 
@@ -104,6 +114,68 @@ class AppTestGcDumpHeap(object):
         gc.dump_heap_stats(self.fname)
 
 
+class AppTestGcStatistics(object):
+    def setup_class(cls):
+        from pypy.rlib import rgc
+        from pypy.rlib.rarithmetic import LONG_BIT
+        stats = {rgc.STAT_HEAP_USAGE: 5000,
+                 rgc.STAT_ARENAS: 2,
+                 rgc.STAT_ARENA_BYTES: 1000,
+                 rgc.STAT_ARENA_PAGES: 20,
+                 rgc.STAT_ARENA_FREE_PAGES: 5,
+                 rgc.STAT_ARENA_USED_BYTES: 250,
+                 rgc.STAT_ARENA_COMPACTIONS: 3,
+                 rgc.STAT_MINOR_COLLECTIONS: 40,
+                 rgc.STAT_MAJOR_COLLECTIONS: 4,
+                 rgc.STAT_MINOR_COLLECTION_TIME: 1500,
+                 rgc.STAT_MAJOR_COLLECTION_TIME: 250,
+                 rgc.STAT_NURSERY_ALLOCATED_BYTES: 8000,
+                 rgc.STAT_NURSERY_SURVIVING_BYTES: 2000,
+                 rgc.STAT_CARD_MARKED_ARRAYS: 7,
+                 rgc.STAT_SIZE_CLASSES: 2,
+                 rgc.STAT_NURSERY_SIZE: 4096,
+                 rgc.STAT_NURSERY_RESIZES: 6,
+                 rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES + 1: 100,
+                 rgc.STAT_SIZE_CLASS_SURVIVING_BYTES + 1: 10,
+                 rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES + 2: 200,
+                 rgc.STAT_SIZE_CLASS_SURVIVING_BYTES + 2: 20}
+        def fake_get_statistics(index):
+            return stats.get(index, -1)
+        cls._get_statistics = rgc.get_statistics
+        rgc.get_statistics = fake_get_statistics
+        cls.space = gettestobjspace()
+        cls.w_WORD = cls.space.wrap(LONG_BIT // 8)
+
+    def teardown_class(cls):
+        from pypy.rlib import rgc
+        rgc.get_statistics = cls._get_statistics
+
+    def test_get_fragmentation_stats(self):
+        import gc
+        stats = gc.get_fragmentation_stats()
+        assert stats == {'arenas': 2, 'arena_bytes': 1000, 'pages': 20,
+                         'free_pages': 5, 'used_bytes': 250,
+                         'compactions': 3, 'fragmentation': 0.75}
+
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        assert stats.pop('arenas') == gc.get_fragmentation_stats()
+        assert stats == {'heap_usage': 5000,
+                         'minor_collections': 40,
+                         'major_collections': 4,
+                         'minor_collection_time': 1.5,
+                         'major_collection_time': 0.25,
+                         'nursery_allocated_bytes': 8000,
+                         'nursery_surviving_bytes': 2000,
+                         'nursery_survival_rate': 0.25,
+                         'card_marked_arrays': 7,
+                         'nursery_size': 4096,
+                         'nursery_resizes': 6,
+                         'size_classes': {self.WORD: (100, 10),
+                                          2 * self.WORD: (200, 20)}}
+
+
 class AppTestGcMethodCache(object):
     def setup_class(cls):
         cls.space = gettestobjspace(**{"objspace.std.withmethodcache": True})
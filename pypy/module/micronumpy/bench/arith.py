@@ -0,0 +1,14 @@
+
+try:
+    import numpypy as numpy
+except:
+    import numpy
+
+def f():
+    a = numpy.ones(10000000)
+    b = a + a
+    c = (a + b - a) * b / b
+    # To ensure that the computation isn't totally optimized away.
+    c[0] = 3.0
+
+f()
@@ -0,0 +1,16 @@
+
+try:
+    import numpypy as numpy
+except:
+    import numpy
+
+def f():
+    a = numpy.ones(10000000)
+    b = a + a
+    c = a < b
+    d = a == b
+    # To ensure that the computation isn't totally optimized away.
+    c[0] = False
+    d[0] = True
+
+f()
@@ -0,0 +1,13 @@
+
+try:
+    import numpypy as numpy
+except:
+    import numpy
+
+def f():
+    a = numpy.ones(10000000)
+    b = numpy.ones(10000000, dtype='int32')
+    return (a.sum(), a.min(), a.max(), (a + a).sum(), b.sum(),
+            (a < a + a).all())
+
+f()
@@ -4,7 +4,12 @@ signatures
 """
 
 from pypy.rlib.jit import JitDriver, hint, unroll_safe, promote
-from pypy.module.micronumpy.interp_iter import ConstantIterator
+from pypy.module.micronumpy.interp_iter import ConstantIterator, ArrayIterator
+
+# the loops over contiguous arrays evaluate UNROLL_FACTOR elements per
+# iteration, which saves the loop overhead (the done() check, its guard and
+# the jump) for all but one of them
+UNROLL_FACTOR = 4
 
 class NumpyEvalFrame(object):
     _virtualizable2_ = ['iterators[*]', 'final_iter', 'arraylist[*]',
@@ -46,17 +51,39 @@ class NumpyEvalFrame(object):
     def next_first(self, shapelen):
         self.iterators[0] = self.iterators[0].next(shapelen)
 
+    def is_contiguous(self):
+        """ True if all the arrays are iterated over contiguously
+        """
+        if self.final_iter < 0:
+            return False
+        for iter in self.iterators:
+            if not (isinstance(iter, ArrayIterator) or
+                    isinstance(iter, ConstantIterator)):
+                return False
+        return True
+
+    def has_at_least(self, count):
+        """ True if at least 'count' more elements are left, the frame
+        must be contiguous
+        """
+        iter = self.get_final_iter()
+        assert isinstance(iter, ArrayIterator)
+        return iter.offset + (count - 1) * iter.element_size < iter.size
+
     def get_final_iter(self):
         final_iter = promote(self.final_iter)
         if final_iter < 0:
             assert False
         return self.iterators[final_iter]
 
-def get_printable_location(shapelen, sig):
+def get_printable_location(shapelen, unroll, sig):
+    if unroll:
+        return 'numpy ' + sig.debug_repr() + ' [%d dims, unrolled]' % (
+            shapelen,)
     return 'numpy ' + sig.debug_repr() + ' [%d dims]' % (shapelen,)
 
 numpy_driver = JitDriver(
-    greens=['shapelen', 'sig'],
+    greens=['shapelen', 'unroll', 'sig'],
     virtualizables=['frame'],
     reds=['frame', 'arr'],
     get_printable_location=get_printable_location,
@@ -67,17 +94,28 @@ class ComputationDone(Exception):
     def __init__(self, value):
         self.value = value
 
+@unroll_safe
+def eval_unrolled(sig, frame, arr, shapelen):
+    for i in range(UNROLL_FACTOR):
+        sig.eval(frame, arr)
+        frame.next(shapelen)
+
 def compute(arr):
     sig = arr.find_sig()
     shapelen = len(arr.shape)
     frame = sig.create_frame(arr)
+    unroll = frame.is_contiguous()
     try:
         while not frame.done():
             numpy_driver.jit_merge_point(sig=sig,
                                          shapelen=shapelen,
+                                         unroll=unroll,
                                          frame=frame, arr=arr)
-            sig.eval(frame, arr)
-            frame.next(shapelen)
+            if unroll and frame.has_at_least(UNROLL_FACTOR):
+                eval_unrolled(sig, frame, arr, shapelen)
+            else:
+                sig.eval(frame, arr)
+                frame.next(shapelen)
         return frame.cur_value
     except ComputationDone, e:
         return e.value
@@ -579,6 +579,20 @@ class AppTestNumArray(BaseNumpyAppTest):
         for i in range(4):
             assert c[i] == bool(a[i] + b[i])
 
+    def test_add_any_length(self):
+        # the loops over contiguous arrays are unrolled; check the lengths
+        # that are not a multiple of the unroll factor
+        from _numpypy import array
+        for n in range(10):
+            a = array(range(n))
+            b = array(range(n), dtype='int32')
+            assert list(a + a) == [i + i for i in range(n)]
+            assert list(a + b * 2) == [3 * i for i in range(n)]
+            assert (a + 1).sum() == sum(range(1, n + 1))
+            assert (a < n).all()
+            if n:
+                assert (a == n - 1).any()
+
     def test_add_other(self):
         from _numpypy import array
         a = array(range(5))
@@ -83,8 +83,11 @@ class TestNumpyJIt(LLJitMixin):
 
     def test_add(self):
         result = self.run("add")
-        self.check_simple_loop({'getinteriorfield_raw': 2, 'float_add': 1,
-                                'setinteriorfield_raw': 1, 'int_add': 1,
+        # the loop is unrolled 4 times: int_lt checks that there are at
+        # least 4 more items, int_ge is the usual check of the end
+        self.check_simple_loop({'getinteriorfield_raw': 8, 'float_add': 4,
+                                'setinteriorfield_raw': 4, 'int_add': 5,
+                                'int_lt': 1, 'guard_true': 1,
                                 'int_ge': 1, 'guard_false': 1, 'jump': 1,
                                 'arraylen_gc': 1})
         assert result == 3 + 3
@@ -98,8 +101,9 @@ class TestNumpyJIt(LLJitMixin):
     def test_floatadd(self):
         result = self.run("float_add")
         assert result == 3 + 3
-        self.check_simple_loop({"getinteriorfield_raw": 1, "float_add": 1,
-                                "setinteriorfield_raw": 1, "int_add": 1,
+        self.check_simple_loop({"getinteriorfield_raw": 4, "float_add": 4,
+                                "setinteriorfield_raw": 4, "int_add": 5,
+                                "int_lt": 1, "guard_true": 1,
                                 "int_ge": 1, "guard_false": 1, "jump": 1,
                                 'arraylen_gc': 1})
 
@@ -113,8 +117,9 @@ class TestNumpyJIt(LLJitMixin):
     def test_sum(self):
         result = self.run("sum")
         assert result == 2 * sum(range(30))
-        self.check_simple_loop({"getinteriorfield_raw": 2, "float_add": 2,
-                                "int_add": 1, "int_ge": 1, "guard_false": 1,
+        self.check_simple_loop({"getinteriorfield_raw": 8, "float_add": 8,
+                                "int_add": 5, "int_lt": 1, "guard_true": 1,
+                                "int_ge": 1, "guard_false": 1,
                                 "jump": 1, 'arraylen_gc': 1})
 
     def define_axissum():
@@ -152,8 +157,9 @@ class TestNumpyJIt(LLJitMixin):
         for i in range(30):
             expected *= i * 2
         assert result == expected
-        self.check_simple_loop({"getinteriorfield_raw": 2, "float_add": 1,
-                                "float_mul": 1, "int_add": 1,
+        self.check_simple_loop({"getinteriorfield_raw": 8, "float_add": 4,
+                                "float_mul": 4, "int_add": 5,
+                                "int_lt": 1, "guard_true": 1,
                                 "int_ge": 1, "guard_false": 1, "jump": 1,
                                 'arraylen_gc': 1})
 
@@ -188,8 +194,8 @@ class TestNumpyJIt(LLJitMixin):
 
     def define_any():
         return """
-        a = [0,0,0,0,0,0,0,0,0,0,0]
-        a[8] = -12
+        a = [0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0]
+        a[25] = -12
         b = a + a
         any(b)
         """
@@ -197,11 +203,12 @@ class TestNumpyJIt(LLJitMixin):
     def test_any(self):
         result = self.run("any")
         assert result == 1
-        self.check_simple_loop({"getinteriorfield_raw": 2, "float_add": 1,
-                                "int_and": 1, "int_add": 1,
-                                'cast_float_to_int': 1,
+        self.check_simple_loop({"getinteriorfield_raw": 8, "float_add": 4,
+                                "int_and": 4, "int_add": 5,
+                                'cast_float_to_int': 4,
+                                "int_lt": 1, "guard_true": 1,
                                 "int_ge": 1, "jump": 1,
-                                "guard_false": 2, 'arraylen_gc': 1})
+                                "guard_false": 5, 'arraylen_gc': 1})
 
     def define_already_forced():
         return """
@@ -238,9 +245,10 @@ class TestNumpyJIt(LLJitMixin):
     def test_ufunc(self):
         result = self.run("ufunc")
         assert result == -6
-        self.check_simple_loop({"getinteriorfield_raw": 2, "float_add": 1,
-                                "float_neg": 1,
-                                "setinteriorfield_raw": 1, "int_add": 1,
+        self.check_simple_loop({"getinteriorfield_raw": 8, "float_add": 4,
+                                "float_neg": 4,
+                                "setinteriorfield_raw": 4, "int_add": 5,
+                                "int_lt": 1, "guard_true": 1,
                                 "int_ge": 1, "guard_false": 1, "jump": 1,
                                 'arraylen_gc': 1})
 
@@ -266,8 +274,10 @@ class TestNumpyJIt(LLJitMixin):
 
     def test_specialization(self):
         self.run("specialization")
-        # This is 3, not 2 because there is a bridge for the exit.
-        self.check_trace_count(3)
+        # This is 5, not 2: the loops are unrolled, and there are bridges
+        # for the items left after the last unrolled iteration and for
+        # the exit.
+        self.check_trace_count(5)
 
     def define_slice():
         return """
@@ -311,7 +321,7 @@ class TestNumpyJIt(LLJitMixin):
 
     def define_multidim():
         return """
-        a = [[1, 2], [3, 4], [5, 6], [7, 8], [9, 10]]
+        a = [[1, 2], [3, 4], [5, 6], [7, 8], [9, 10], [11, 12], [13, 14], [15, 16], [17, 18], [19, 20]]
         b = a + a
         b -> 1 -> 1
         """
@@ -321,9 +331,10 @@ class TestNumpyJIt(LLJitMixin):
         assert result == 8
         # int_add might be 1 here if we try slightly harder with
         # reusing indexes or some optimization
-        self.check_simple_loop({'float_add': 1, 'getinteriorfield_raw': 2,
-                                'guard_false': 1, 'int_add': 1, 'int_ge': 1,
-                                'jump': 1, 'setinteriorfield_raw': 1,
+        self.check_simple_loop({'float_add': 4, 'getinteriorfield_raw': 8,
+                                'guard_false': 1, 'int_add': 5, 'int_ge': 1,
+                                'int_lt': 1, 'guard_true': 1,
+                                'jump': 1, 'setinteriorfield_raw': 4,
                                 'arraylen_gc': 1})
 
     def define_multidim_slice():
@@ -387,8 +398,9 @@ class TestNumpyJIt(LLJitMixin):
         result = self.run("virtual_slice")
         assert result == 4
         self.check_trace_count(1)
-        self.check_simple_loop({'getinteriorfield_raw': 2, 'float_add': 1,
-                                'setinteriorfield_raw': 1, 'int_add': 1,
+        self.check_simple_loop({'getinteriorfield_raw': 8, 'float_add': 4,
+                                'setinteriorfield_raw': 4, 'int_add': 5,
+                                'int_lt': 1, 'guard_true': 1,
                                 'int_ge': 1, 'guard_false': 1, 'jump': 1,
                                 'arraylen_gc': 1})
     def define_flat_iter():
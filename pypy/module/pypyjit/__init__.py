@@ -10,6 +10,8 @@ class Module(MixedModule):
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_optimize_hook': 'interp_resop.set_optimize_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
+        'get_warmup_profile': 'interp_warmup.get_warmup_profile',
+        'load_warmup_profile': 'interp_warmup.load_warmup_profile',
         'ResOperation': 'interp_resop.WrappedOp',
         'DebugMergePoint': 'interp_resop.DebugMergePoint',
         'Box': 'interp_resop.WrappedBox',
@@ -118,8 +118,10 @@ class __extend__(PyCode):
     __metaclass__ = extendabletype
 
     def _initialize(self):
+        from pypy.module.pypyjit.interp_warmup import prime_jit_cells
         PyCode__initialize(self)
         self.jit_cells = {}
+        prime_jit_cells(self)
 
     def _freeze_(self):
         self.jit_cells = {}
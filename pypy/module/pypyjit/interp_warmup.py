@@ -0,0 +1,107 @@
+""" Warmup profiles: the list of the loops compiled by a process, given to
+the next process so that it starts tracing them as soon as they are
+entered, instead of waiting for the counters to reach the threshold.
+
+Only the positions of the loops are kept, not the traces or the machine
+code: these contain the addresses of objects of the process that
+compiled them.  The new process traces the loops again, so there is
+nothing to validate apart from the identity of the code objects.
+"""
+
+from pypy.interpreter.pycode import PyCode
+from pypy.interpreter.error import OperationError
+from pypy.rpython.lltypesystem import lltype
+from pypy.rpython.lltypesystem.rclass import OBJECT
+from pypy.rpython.annlowlevel import cast_base_ptr_to_instance
+from pypy.rlib.objectmodel import compute_hash
+from pypy.rlib.rarithmetic import r_uint
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+
+class WarmupProfile(object):
+    def __init__(self, space):
+        self.hot_loops = {}           # code key -> list of offsets
+        self.compiled_loops = {}      # code key and offset -> None
+        self.compiled_loops_w = []    # the profile entries, in order
+
+def _make_key(filename, name, firstlineno, codehash):
+    return '%s\x00%s\x00%d\x00%d' % (filename, name, firstlineno, codehash)
+
+def code_key(pycode):
+    return _make_key(pycode.co_filename, pycode.co_name,
+                     pycode.co_firstlineno, compute_hash(pycode.co_code))
+
+def record_compiled_loop(space, jitdriver, greenkey):
+    """Called after the compilation of a loop or entry bridge."""
+    if jitdriver.name != 'pypyjit' or greenkey is None:
+        return
+    if greenkey[1].getint():
+        return       # is_being_profiled
+    next_instr = greenkey[0].getint()
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                     greenkey[2].getref_base())
+    pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+    profile = space.fromcache(WarmupProfile)
+    key = '%s\x00%d' % (code_key(pycode), next_instr)
+    if key in profile.compiled_loops:
+        return
+    profile.compiled_loops[key] = None
+    profile.compiled_loops_w.append(space.newtuple([
+        space.wrap(pycode.co_filename),
+        space.wrap(pycode.co_name),
+        space.wrap(pycode.co_firstlineno),
+        space.wrap(compute_hash(pycode.co_code)),
+        space.wrap(next_instr)]))
+
+def prime_jit_cells(pycode):
+    """Called when a code object is created: mark its loops that are in
+    the loaded warmup profile as hot."""
+    profile = pycode.space.fromcache(WarmupProfile)
+    if not profile.hot_loops:
+        return
+    offsets = profile.hot_loops.get(code_key(pycode), None)
+    if offsets is None:
+        return
+    for offset in offsets:
+        if 0 <= offset < len(pycode.co_code):
+            pypyjitdriver.mark_hot(next_instr=r_uint(offset),
+                                   is_being_profiled=False,
+                                   pycode=pycode)
+
+# ____________________________________________________________
+#
+# Public interface
+
+def get_warmup_profile(space):
+    """ get_warmup_profile()
+
+    Return the list of the loops compiled so far, as tuples
+    (co_filename, co_name, co_firstlineno, code_hash, offset).
+    The list can be saved with marshal and given to
+    load_warmup_profile() in the next process.
+    """
+    profile = space.fromcache(WarmupProfile)
+    return space.newlist(profile.compiled_loops_w[:])
+
+def load_warmup_profile(space, w_profile):
+    """ load_warmup_profile(profile)
+
+    Make the JIT trace the loops listed in 'profile', as returned by
+    get_warmup_profile(), the first time they are entered.  This only
+    applies to the code objects created afterwards, e.g. by importing
+    modules.  The loops whose code object changed are ignored.
+    """
+    profile = space.fromcache(WarmupProfile)
+    for w_entry in space.listview(w_profile):
+        w_filename, w_name, w_firstlineno, w_codehash, w_offset = (
+            space.fixedview(w_entry, 5))
+        key = _make_key(space.str_w(w_filename), space.str_w(w_name),
+                        space.int_w(w_firstlineno), space.int_w(w_codehash))
+        offset = space.int_w(w_offset)
+        if offset < 0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("negative offset in profile"))
+        try:
+            offsets = profile.hot_loops[key]
+        except KeyError:
+            offsets = profile.hot_loops[key] = []
+        offsets.append(offset)
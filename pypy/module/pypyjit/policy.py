@@ -5,6 +5,7 @@ from pypy.interpreter.error import OperationError
 from pypy.jit.metainterp.jitprof import counter_names
 from pypy.module.pypyjit.interp_resop import wrap_oplist, Cache, wrap_greenkey,\
      WrappedOp
+from pypy.module.pypyjit.interp_warmup import record_compiled_loop
 
 class PyPyJitIface(JitHookInterface):
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr):
@@ -27,6 +28,8 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        record_compiled_loop(self.space, debug_info.get_jitdriver(),
+                             debug_info.greenkey)
         w_greenkey = wrap_greenkey(self.space, debug_info.get_jitdriver(),
                                    debug_info.greenkey,
                                    debug_info.get_greenkey_repr())
@@ -128,7 +131,8 @@ class PyPyJitPolicy(JitPolicy):
                        'posix', '_socket', '_sre', '_lsprof', '_weakref',
                        '__pypy__', 'cStringIO', '_collections', 'struct',
                        'mmap', 'marshal', '_codecs', 'rctime']:
-            if modname == 'pypyjit' and 'interp_resop' in rest:
+            if modname == 'pypyjit' and ('interp_resop' in rest or
+                                         'interp_warmup' in rest):
                 return False
             return True
         return False
@@ -177,6 +177,18 @@ class AppTestJitHook(object):
         assert isinstance(op, pypyjit.ResOperation)
         assert 'function' in repr(op)
 
+    def test_on_compile_warmup_profile(self):
+        import pypyjit
+        self.on_compile()
+        self.on_compile()
+        self.on_compile_bridge()
+        code = self.f.func_code
+        profile = pypyjit.get_warmup_profile()
+        assert len(profile) == 1
+        assert profile[0][:3] == (code.co_filename, 'function',
+                                  code.co_firstlineno)
+        assert profile[0][4] == 0
+
     def test_on_abort(self):
         import pypyjit
         l = []
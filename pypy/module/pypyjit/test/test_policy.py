@@ -51,6 +51,7 @@ def test_pypy_module():
         assert pypypolicy.look_inside_pypy_module(modname)
         assert pypypolicy.look_inside_pypy_module(modname + '.foo')
     assert not pypypolicy.look_inside_pypy_module('pypyjit.interp_resop')
+    assert not pypypolicy.look_inside_pypy_module('pypyjit.interp_warmup')
 
 def test_see_jit_module():
     assert pypypolicy.look_inside_pypy_module('pypyjit.interp_jit')
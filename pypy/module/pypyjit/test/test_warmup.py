@@ -0,0 +1,66 @@
+import py
+from pypy.conftest import gettestobjspace, option
+from pypy.interpreter.gateway import interp2app
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+
+
+class AppTestWarmupProfile(object):
+    def setup_class(cls):
+        if option.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        cls.space = gettestobjspace(usemodules=('pypyjit',))
+        cls.marked = []
+        def fake_mark_hot(next_instr, is_being_profiled, pycode):
+            cls.marked.append((pycode.co_name, next_instr, is_being_profiled))
+        def get_marked(space):
+            result = space.wrap(cls.marked[:])
+            del cls.marked[:]
+            return result
+        cls._orig_mark_hot = pypyjitdriver.mark_hot
+        pypyjitdriver.mark_hot = fake_mark_hot
+        cls.w_get_marked = cls.space.wrap(interp2app(get_marked))
+        cls.w_make_profile = cls.space.appexec([], """():
+        def make_profile(source, offsets):
+            # the profile that a previous process would have saved
+            code = compile(source, 'mod.py', 'exec').co_consts[0]
+            return [(code.co_filename, code.co_name, code.co_firstlineno,
+                     hash(code.co_code), offset) for offset in offsets]
+        return make_profile
+        """)
+
+    def teardown_class(cls):
+        pypyjitdriver.mark_hot = cls._orig_mark_hot
+
+    def test_load_warmup_profile(self):
+        import pypyjit
+        source = "def f(n):\n    while n:\n        n -= 1\n"
+        pypyjit.load_warmup_profile(self.make_profile(source, [3, 6]))
+        assert self.get_marked() == []
+        exec compile(source, 'mod.py', 'exec')
+        assert self.get_marked() == [('f', 3, False), ('f', 6, False)]
+        # the profile stays loaded, e.g. for a reload()
+        exec compile(source, 'mod.py', 'exec')
+        assert len(self.get_marked()) == 2
+
+    def test_changed_code(self):
+        import pypyjit
+        source = "def g(n):\n    while n:\n        n -= 1\n"
+        pypyjit.load_warmup_profile(self.make_profile(source, [3]))
+        exec compile(source.replace('n -= 1', 'n = n - 1'), 'mod.py', 'exec')
+        exec compile(source, 'other.py', 'exec')
+        assert self.get_marked() == []
+
+    def test_offset_out_of_range(self):
+        import pypyjit
+        source = "def h():\n    pass\n"
+        pypyjit.load_warmup_profile(self.make_profile(source, [10000]))
+        exec compile(source, 'mod.py', 'exec')
+        assert self.get_marked() == []
+
+    def test_bad_profile(self):
+        import pypyjit
+        raises(ValueError, pypyjit.load_warmup_profile, [('x.py', 'f', 1)])
+        raises(TypeError, pypyjit.load_warmup_profile,
+               [('x.py', 'f', 'a', 0, 0)])
+        raises(ValueError, pypyjit.load_warmup_profile,
+               [('x.py', 'f', 1, 0, -5)])
@@ -207,3 +207,22 @@ class TestDicts(BaseTestPyPyC):
         loop, = log.loops_by_filename(self.filepath)
         opnames = log.opnames(loop.allops())
         assert opnames.count('new_with_vtable') == 0
+
+    def test_unboxed_tuple_stays_virtual(self):
+        def f(i):
+            return (i, i + 1, i + 2)
+        def main(n):
+            i = 0
+            total = 0
+            while i < n:
+                x, y, z = f(i)
+                total += x + y + z
+                i += 1
+            return total
+        log = self.run(main, [1000])
+        assert log.result == main(1000)
+        loop, = log.loops_by_filename(self.filepath)
+        opnames = log.opnames(loop.allops())
+        assert opnames.count('new_with_vtable') == 0
+        assert opnames.count('new_array') == 0
+        assert 'call' not in opnames
@@ -128,11 +128,17 @@ class PackFormatIterator(FormatIterator):
 
 
 class UnpackFormatIterator(FormatIterator):
+    """Unpacks the 'length' bytes starting at 'start' in the interp-level
+    Buffer 'buf'.  Only the bytes of each item are copied out of it."""
 
-    def __init__(self, space, input):
+    def __init__(self, space, buf, start=0, length=-1):
         self.space = space
-        self.input = input
-        self.inputpos = 0
+        self.buf = buf
+        self.start = start
+        if length < 0:
+            length = buf.getlength() - start
+        self.length = length
+        self.inputpos = 0      # relative to 'start'
         self.result_w = []     # list of wrapped objects
 
     # See above comment on operate.
@@ -150,14 +156,15 @@ class UnpackFormatIterator(FormatIterator):
         self.inputpos = (self.inputpos + mask) & ~mask
 
     def finished(self):
-        if self.inputpos != len(self.input):
+        if self.inputpos != self.length:
             raise StructError("unpack str size too long for format")
 
     def read(self, count):
         end = self.inputpos + count
-        if end > len(self.input):
+        if end > self.length:
             raise StructError("unpack str size too short for format")
-        s = self.input[self.inputpos : end]
+        s = self.buf.getslice(self.start + self.inputpos, self.start + end,
+                              1, count)
         self.inputpos = end
         return s
 
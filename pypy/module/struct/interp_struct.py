@@ -1,8 +1,14 @@
-from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.buffer import StringBuffer
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter.typedef import interp_attrproperty
 from pypy.module.struct.formatiterator import PackFormatIterator, UnpackFormatIterator
 from pypy.rlib import jit
 from pypy.rlib.rstruct.error import StructError
 from pypy.rlib.rstruct.formatiterator import CalcSizeFormatIterator
+from pypy.rlib.rstruct.formatiterator import compile_format
 
 
 @unwrap_spec(format=str)
@@ -33,9 +39,193 @@ def pack(space, format, args_w):
 
 @unwrap_spec(format=str, input='bufferstr')
 def unpack(space, format, input):
-    fmtiter = UnpackFormatIterator(space, input)
+    fmtiter = UnpackFormatIterator(space, StringBuffer(input))
     try:
         fmtiter.interpret(format)
     except StructError, e:
         raise e.at_applevel(space)
     return space.newtuple(fmtiter.result_w[:])
+
+
+def _check_offset(space, funcname, buf, offset, size):
+    # a negative offset counts from the end of the buffer, like in CPython
+    buflen = buf.getlength()
+    if offset < 0:
+        offset += buflen
+    if offset < 0 or buflen - offset < size:
+        raise StructError("%s requires a buffer of at least %d bytes" %
+                          (funcname, size)).at_applevel(space)
+    return offset
+
+@unwrap_spec(format=str, offset=int)
+def pack_into(space, format, w_buffer, offset, args_w):
+    size = _calcsize(space, format)
+    buf = space.rwbuffer_w(w_buffer)
+    offset = _check_offset(space, "pack_into", buf, offset, size)
+    fmtiter = PackFormatIterator(space, args_w, size)
+    try:
+        fmtiter.interpret(format)
+    except StructError, e:
+        raise e.at_applevel(space)
+    buf.setslice(offset, fmtiter.result.build())
+
+@unwrap_spec(format=str, offset=int)
+def unpack_from(space, format, w_buffer, offset=0):
+    size = _calcsize(space, format)
+    buf = space.buffer_w(w_buffer)
+    offset = _check_offset(space, "unpack_from", buf, offset, size)
+    fmtiter = UnpackFormatIterator(space, buf, offset, size)
+    try:
+        fmtiter.interpret(format)
+    except StructError, e:
+        raise e.at_applevel(space)
+    return space.newtuple(fmtiter.result_w[:])
+
+@unwrap_spec(format=str)
+def iter_unpack(space, format, w_buffer):
+    return W_Struct(format, _compile(space, format)).descr_iter_unpack(
+        space, w_buffer)
+
+def _compile(space, format):
+    try:
+        return compile_format(format)
+    except StructError, e:
+        raise e.at_applevel(space)
+
+# ____________________________________________________________
+
+class W_Struct(Wrappable):
+    """A format string compiled once, see compile_format()."""
+    _immutable_fields_ = ['format?', 'compiled?']
+
+    def __init__(self, format, compiled):
+        self.format = format
+        self.compiled = compiled
+
+    @unwrap_spec(format=str)
+    def descr__init__(self, space, format):
+        self.compiled = _compile(space, format)
+        self.format = format
+
+    def descr_size(self, space):
+        return space.wrap(self.compiled.size)
+
+    def descr_pack(self, space, args_w):
+        compiled = jit.promote(self.compiled)
+        fmtiter = PackFormatIterator(space, args_w, compiled.size)
+        try:
+            fmtiter.interpret_compiled(compiled)
+        except StructError, e:
+            raise e.at_applevel(space)
+        return space.wrap(fmtiter.result.build())
+
+    @unwrap_spec(input='bufferstr')
+    def descr_unpack(self, space, input):
+        compiled = jit.promote(self.compiled)
+        fmtiter = UnpackFormatIterator(space, StringBuffer(input))
+        try:
+            fmtiter.interpret_compiled(compiled)
+        except StructError, e:
+            raise e.at_applevel(space)
+        return space.newtuple(fmtiter.result_w[:])
+
+    @unwrap_spec(offset=int)
+    def descr_pack_into(self, space, w_buffer, offset, args_w):
+        compiled = jit.promote(self.compiled)
+        buf = space.rwbuffer_w(w_buffer)
+        offset = _check_offset(space, "pack_into", buf, offset, compiled.size)
+        fmtiter = PackFormatIterator(space, args_w, compiled.size)
+        try:
+            fmtiter.interpret_compiled(compiled)
+        except StructError, e:
+            raise e.at_applevel(space)
+        buf.setslice(offset, fmtiter.result.build())
+
+    @unwrap_spec(offset=int)
+    def descr_unpack_from(self, space, w_buffer, offset=0):
+        buf = space.buffer_w(w_buffer)
+        return self._unpack_from(space, buf, offset)
+
+    def _unpack_from(self, space, buf, offset):
+        compiled = jit.promote(self.compiled)
+        offset = _check_offset(space, "unpack_from", buf, offset,
+                               compiled.size)
+        fmtiter = UnpackFormatIterator(space, buf, offset, compiled.size)
+        try:
+            fmtiter.interpret_compiled(compiled)
+        except StructError, e:
+            raise e.at_applevel(space)
+        return space.newtuple(fmtiter.result_w[:])
+
+    def descr_iter_unpack(self, space, w_buffer):
+        size = self.compiled.size
+        if size == 0:
+            raise StructError("cannot iteratively unpack with a struct of "
+                              "length 0").at_applevel(space)
+        buf = space.buffer_w(w_buffer)
+        if buf.getlength() % size != 0:
+            raise StructError("iterative unpacking requires a buffer of a "
+                              "multiple of %d bytes" % (size,)
+                              ).at_applevel(space)
+        return space.wrap(W_UnpackIter(self, buf))
+
+_empty_format = compile_format('')
+
+def W_Struct___new__(space, w_subtype, __args__):
+    # the format is parsed by __init__, so that subclasses can override it
+    w_struct = space.allocate_instance(W_Struct, w_subtype)
+    W_Struct.__init__(w_struct, '', _empty_format)
+    return space.wrap(w_struct)
+
+W_Struct.typedef = TypeDef("Struct",
+    __module__ = "struct",
+    __doc__ = """Struct(fmt) --> compiled struct object
+
+Return a new Struct object which writes and reads binary data according to
+the format string fmt.  See help(struct) for more on format strings.""",
+    __new__ = interp2app(W_Struct___new__),
+    __init__ = interp2app(W_Struct.descr__init__),
+    format = interp_attrproperty("format", cls=W_Struct),
+    size = GetSetProperty(W_Struct.descr_size),
+    pack = interp2app(W_Struct.descr_pack),
+    unpack = interp2app(W_Struct.descr_unpack),
+    pack_into = interp2app(W_Struct.descr_pack_into),
+    unpack_from = interp2app(W_Struct.descr_unpack_from),
+    iter_unpack = interp2app(W_Struct.descr_iter_unpack),
+    )
+
+
+class W_UnpackIter(Wrappable):
+    """Iterator over the consecutive structs packed in a buffer."""
+
+    def __init__(self, w_struct, buf):
+        self.w_struct = w_struct
+        self.buf = buf
+        self.index = 0
+
+    def descr_iter(self, space):
+        return space.wrap(self)
+
+    def descr_next(self, space):
+        if self.buf is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        if self.index >= self.buf.getlength():
+            self.buf = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        offset = self.index
+        self.index += self.w_struct.compiled.size
+        return self.w_struct._unpack_from(space, self.buf, offset)
+
+    def descr_length_hint(self, space):
+        if self.buf is None:
+            return space.wrap(0)
+        remaining = self.buf.getlength() - self.index
+        return space.wrap(remaining // self.w_struct.compiled.size)
+
+W_UnpackIter.typedef = TypeDef("unpack_iterator",
+    __module__ = "struct",
+    __iter__ = interp2app(W_UnpackIter.descr_iter),
+    next = interp2app(W_UnpackIter.descr_next),
+    __length_hint__ = interp2app(W_UnpackIter.descr_length_hint),
+    )
+W_UnpackIter.typedef.acceptable_as_base_class = False
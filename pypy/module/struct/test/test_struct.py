@@ -386,6 +386,90 @@ class AppTestStruct(object):
         raises(self.struct.error, self.struct.unpack, "i", b)
 
 
+    def test_struct_object(self):
+        """
+        Struct objects compile the format once and behave like the
+        module-level functions.
+        """
+        struct = self.struct
+        for fmt in ["", "i", "<hxq", ">3sBd", "!?2p", "@cbi", "=5H", "Q f"]:
+            s = struct.Struct(fmt)
+            assert s.format == fmt
+            assert s.size == struct.calcsize(fmt)
+        s = struct.Struct(">hid")
+        data = s.pack(-2, 123456, 2.5)
+        assert data == struct.pack(">hid", -2, 123456, 2.5)
+        assert s.unpack(data) == (-2, 123456, 2.5)
+        assert s.unpack(buffer(data)) == (-2, 123456, 2.5)
+        s = struct.Struct("bi")     # native alignment
+        assert s.unpack(s.pack(1, 2)) == (1, 2)
+        assert s.pack(1, 2) == struct.pack("bi", 1, 2)
+        raises(struct.error, s.pack, 1)
+        raises(struct.error, s.pack, 1, 2, 3)
+        raises(struct.error, s.unpack, "x")
+        raises(struct.error, struct.Struct, "3")
+        raises(struct.error, struct.Struct, "[")
+        class S(struct.Struct):
+            pass
+        assert S("<i").unpack("\x01\x00\x00\x00") == (1,)
+
+    def test_struct_subclass_init(self):
+        """
+        Struct subclasses can call Struct.__init__() from their own
+        __init__(), which may take different arguments.
+        """
+        struct = self.struct
+        class S(struct.Struct):
+            def __init__(self):
+                struct.Struct.__init__(self, '<i')
+        s = S()
+        assert s.format == '<i'
+        assert s.size == 4
+        assert s.unpack("\x01\x00\x00\x00") == (1,)
+        assert s.pack(2) == "\x02\x00\x00\x00"
+        raises(TypeError, S, '<i')
+        s.__init__()
+        assert s.size == 4
+        raises(struct.error, struct.Struct.__init__, s, "[")
+        assert s.format == '<i'
+        raises(TypeError, struct.Struct)
+
+    def test_unpack_from_and_pack_into_errors(self):
+        """
+        unpack_from() and pack_into() check the size of the buffer and
+        accept negative offsets.
+        """
+        struct = self.struct
+        data = "\x01\x00\x02\x00\x03\x00"
+        assert struct.unpack_from("<h", data, -2) == (3,)
+        assert struct.Struct("<h").unpack_from(data, 4) == (3,)
+        assert struct.Struct("<2h").unpack_from(buffer(data, 2)) == (2, 3)
+        raises(struct.error, struct.unpack_from, "<h", data, 5)
+        raises(struct.error, struct.unpack_from, "<h", data, -7)
+        raises(struct.error, struct.Struct("<4h").unpack_from, data)
+        raises(TypeError, struct.pack_into, "<h", "readonly", 0, 1)
+
+    def test_iter_unpack(self):
+        """
+        iter_unpack() decodes consecutive structs from a buffer.
+        """
+        struct = self.struct
+        s = struct.Struct("<hb")
+        data = "".join([s.pack(i * 100, i) for i in range(5)])
+        it = s.iter_unpack(data)
+        assert iter(it) is it
+        assert it.__length_hint__() == 5
+        assert it.next() == (0, 0)
+        assert it.__length_hint__() == 4
+        assert list(it) == [(i * 100, i) for i in range(1, 5)]
+        raises(StopIteration, it.next)
+        assert list(struct.iter_unpack("<hb", buffer(data, 3))) == [
+            (i * 100, i) for i in range(1, 5)]
+        assert list(s.iter_unpack("")) == []
+        raises(struct.error, s.iter_unpack, "abcd")
+        raises(struct.error, struct.iter_unpack, "", "abc")
+
+
 class AppTestStructBuffer(object):
 
     def setup_class(cls):
@@ -417,3 +501,16 @@ class AppTestStructBuffer(object):
         assert self.struct.unpack_from("ii", b, 2) == (17, 42)
         b[:sz] = self.struct.pack("ii", 18, 43)
         assert self.struct.unpack_from("ii", b) == (18, 43)
+
+    def test_struct_pack_into(self):
+        struct = self.struct
+        b = self.bytebuffer(6)
+        b[:] = "x" * 6
+        struct.Struct("<hh").pack_into(b, 1, 258, 3)
+        assert b[:] == "x\x02\x01\x03\x00x"
+        struct.pack_into("<h", b, -2, 4)
+        assert b[:] == "x\x02\x01\x03\x04\x00"
+        assert struct.Struct("<hh").unpack_from(b, 1) == (258, 1027)
+        assert list(struct.iter_unpack("<h", b)) == [(632,), (769,), (4,)]
+        raises(struct.error, struct.pack_into, "<h", b, 5, 1)
+        raises(struct.error, struct.Struct("<h").pack_into, b, -7, 1)
@@ -8,3 +8,52 @@ def test_list_ddl():
     cursor.execute('CREATE TABLE foo (bar INTEGER)')
     result = list(cursor)
     assert result == []
+
+def test_statement_cache_lru():
+    from lib_pypy import _sqlite3
+    con = _sqlite3.connect(':memory:', cached_statements=2)
+    cache = con.statement_cache
+    cur = con.cursor()
+    cur.execute('select 1')
+    stat = cur.statement
+    cur.execute('select 2')
+    cur.execute('select 1')
+    cur.execute('select 3')
+    # 'select 2' was the least recently used statement
+    assert list(cache.cache) == ['select 1', 'select 3']
+    assert cache.cache['select 1'] is stat
+
+def test_executemany_reuses_statement():
+    from lib_pypy import _sqlite3
+    con = _sqlite3.connect(':memory:')
+    con.execute('create table t (a, b)')
+    cur = con.cursor()
+    cur.executemany('insert into t values (?, ?)',
+                    [(i, 'x%d' % i) for i in range(10)])
+    assert cur.rowcount == 10
+    stat = cur.statement
+    assert not stat.in_use
+    cur.executemany('insert into t values (:a, :b)', [{'a': 1, 'b': None}])
+    cur.executemany('insert into t values (?, ?)', [(2**40, u'\xe9')])
+    assert con.statement_cache.get('insert into t values (?, ?)',
+                                   cur, None) is stat
+    assert con.execute('select count(*) from t').fetchone() == (12,)
+    assert con.execute('select * from t where a = ?', (2**40,)).fetchall() \
+        == [(2**40, u'\xe9')]
+
+def test_fetch_batches():
+    from lib_pypy import _sqlite3
+    con = _sqlite3.connect(':memory:')
+    con.execute('create table t (a)')
+    con.executemany('insert into t values (?)', [(i,) for i in range(10)])
+    cur = con.execute('select a from t order by a')
+    assert cur.fetchone() == (0,)
+    assert cur.fetchmany(3) == [(1,), (2,), (3,)]
+    cur.arraysize = 2
+    assert cur.fetchmany() == [(4,), (5,)]
+    assert cur.fetchall() == [(6,), (7,), (8,), (9,)]
+    assert cur.fetchall() == []
+    assert cur.fetchmany(5) == []
+    assert cur.fetchone() is None
+    cur = con.execute('select a from t where a > 100')
+    assert cur.fetchall() == []
@@ -9,6 +9,8 @@ from pypy.interpreter.error import OperationError, operationerrfmt
 
 from pypy.rlib.objectmodel import r_dict, we_are_translated, specialize
 from pypy.rlib.debug import mark_dict_non_null
+from pypy.rlib.rfloat import isnan
+from pypy.rlib.unroll import unrolling_iterable
 
 from pypy.rlib import rerased
 
@@ -28,6 +30,96 @@ def _never_equal_to_string(space, w_lookup_type):
             space.is_w(w_lookup_type, space.w_float)
             )
 
+def _is_unboxable_float(space, w_obj):
+    # NaN is not equal to itself, so it can only be found by identity in
+    # an r_dict using space.eq_w(); never store it unboxed
+    return (space.is_w(space.type(w_obj), space.w_float) and
+            not isnan(space.float_w(w_obj)))
+
+def make_tuple_key_mixin(itemtype, arity):
+    """ Returns a mixin implementing is_correct_type(), unwrap() and wrap()
+    for strategies that store tuples of 'arity' ints or floats unboxed, as
+    RPython tuples. Shared by the dict and the set strategies.
+
+    Like the int and float strategies, these strategies don't keep the
+    original key objects: wrap() builds a new, equal tuple, so that the keys
+    returned by iteration are not identical to the ones that were stored. """
+    assert itemtype in (int, float)
+    assert arity in (2, 3)
+
+    def is_correct_item(space, w_item):
+        if itemtype is int:
+            return space.is_w(space.type(w_item), space.w_int)
+        return _is_unboxable_float(space, w_item)
+
+    def unwrap_item(space, w_item):
+        if itemtype is int:
+            return space.int_w(w_item)
+        return space.float_w(w_item)
+
+    def unboxed_class():
+        from pypy.objspace.std.unboxedtupleobject import W_IntTupleObject
+        from pypy.objspace.std.unboxedtupleobject import W_FloatTupleObject
+        if itemtype is int:
+            return W_IntTupleObject
+        return W_FloatTupleObject
+
+    class TupleKeyMixin(object):
+        _mixin_ = True
+
+        def is_correct_type(self, w_obj):
+            from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+            from pypy.objspace.std.unboxedtupleobject import (
+                W_UnboxedTupleObject)
+            space = self.space
+            if not (isinstance(w_obj, W_AbstractTupleObject) and
+                    space.is_w(space.type(w_obj), space.w_tuple)):
+                return False
+            if w_obj.length() != arity:
+                return False
+            if isinstance(w_obj, W_UnboxedTupleObject):
+                # unboxed tuples never contain NaNs
+                return isinstance(w_obj, unboxed_class())
+            for i in range(arity):
+                if not is_correct_item(space, w_obj.getitem(i)):
+                    return False
+            return True
+
+        def unwrap(self, w_tuple):
+            from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+            if isinstance(w_tuple, unboxed_class()):
+                items = w_tuple.items
+                if arity == 2:
+                    return (items[0], items[1])
+                return (items[0], items[1], items[2])
+            space = self.space
+            assert isinstance(w_tuple, W_AbstractTupleObject)
+            if arity == 2:
+                return (unwrap_item(space, w_tuple.getitem(0)),
+                        unwrap_item(space, w_tuple.getitem(1)))
+            return (unwrap_item(space, w_tuple.getitem(0)),
+                    unwrap_item(space, w_tuple.getitem(1)),
+                    unwrap_item(space, w_tuple.getitem(2)))
+
+        def wrap(self, key):
+            space = self.space
+            if arity == 2:
+                a, b = key
+                return space.newtuple([space.wrap(a), space.wrap(b)])
+            a, b, c = key
+            return space.newtuple([space.wrap(a), space.wrap(b), space.wrap(c)])
+
+    TupleKeyMixin.__name__ = 'TupleKeyMixin_%s%d' % (itemtype.__name__, arity)
+    return TupleKeyMixin
+
+def _never_equal_to_tuple(space, w_lookup_type):
+    return (space.is_w(w_lookup_type, space.w_NoneType) or
+            space.is_w(w_lookup_type, space.w_int) or
+            space.is_w(w_lookup_type, space.w_float) or
+            space.is_w(w_lookup_type, space.w_str) or
+            space.is_w(w_lookup_type, space.w_unicode)
+            )
+
 class W_DictMultiObject(W_Object):
     from pypy.objspace.std.dicttype import dict_typedef as typedef
 
@@ -95,7 +187,7 @@ def _add_indirections():
                     getitem_str delitem length \
                     clear w_keys values \
                     items iter setdefault \
-                    popitem listview_str listview_int \
+                    popitem listview_str listview_unicode listview_int \
                     view_as_kwargs".split()
 
     def make_method(method):
@@ -167,6 +259,9 @@ class DictStrategy(object):
     def listview_str(self, w_dict):
         return None
 
+    def listview_unicode(self, w_dict):
+        return None
+
     def listview_int(self, w_dict):
         return None
 
@@ -190,6 +285,12 @@ class EmptyDictStrategy(DictStrategy):
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
             self.switch_to_int_strategy(w_dict)
+        elif self.space.is_w(w_type, self.space.w_unicode):
+            self.switch_to_unicode_strategy(w_dict)
+        elif _is_unboxable_float(self.space, w_key):
+            self.switch_to_float_strategy(w_dict)
+        elif self.space.is_w(w_type, self.space.w_tuple):
+            self.switch_to_tuple_strategy(w_dict, w_key)
         elif withidentitydict and w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
@@ -201,6 +302,28 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.strategy = strategy
         w_dict.dstorage = storage
 
+    def switch_to_unicode_strategy(self, w_dict):
+        strategy = self.space.fromcache(UnicodeDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
+    def switch_to_float_strategy(self, w_dict):
+        strategy = self.space.fromcache(FloatDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
+    def switch_to_tuple_strategy(self, w_dict, w_key):
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        for strategycls in unrolling_tuple_dict_strategies:
+            tuplestrategy = self.space.fromcache(strategycls)
+            if tuplestrategy.is_correct_type(w_key):
+                strategy = tuplestrategy
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
     def switch_to_int_strategy(self, w_dict):
         strategy = self.space.fromcache(IntDictStrategy)
         storage = strategy.get_empty_storage()
@@ -541,6 +664,43 @@ class _UnwrappedIteratorMixin:
 class StrIteratorImplementation(_WrappedIteratorMixin, IteratorImplementation):
     pass
 
+class UnicodeDictStrategy(AbstractTypedStrategy, DictStrategy):
+
+    erase, unerase = rerased.new_erasing_pair("unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.unicode_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_unicode)
+
+    def get_empty_storage(self):
+        res = {}
+        mark_dict_non_null(res)
+        return self.erase(res)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def listview_unicode(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def iter(self, w_dict):
+        return UnicodeIteratorImplementation(self.space, self, w_dict)
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_unicode(self.listview_unicode(w_dict))
+
+class UnicodeIteratorImplementation(_WrappedIteratorMixin,
+                                    IteratorImplementation):
+    pass
+
 class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
     erase, unerase = rerased.new_erasing_pair("int")
     erase = staticmethod(erase)
@@ -578,6 +738,87 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 class IntIteratorImplementation(_WrappedIteratorMixin, IteratorImplementation):
     pass
 
+class FloatDictStrategy(AbstractTypedStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.float_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def is_correct_type(self, w_obj):
+        return _is_unboxable_float(self.space, w_obj)
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_str) or
+                space.is_w(w_lookup_type, space.w_unicode) or
+                space.is_w(w_lookup_type, space.w_tuple)
+                )
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_float):
+            # also correct for NaN, which is never stored here
+            key = space.float_w(w_key)
+            return self.unerase(w_dict.dstorage).get(key, None)
+        return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
+    def iter(self, w_dict):
+        return FloatIteratorImplementation(self.space, self, w_dict)
+
+class FloatIteratorImplementation(_WrappedIteratorMixin, IteratorImplementation):
+    pass
+
+def make_tuple_dict_strategy(itemtype, arity):
+    TupleKeyMixin = make_tuple_key_mixin(itemtype, arity)
+    name = "%s%d" % (itemtype.__name__, arity)
+
+    class TupleDictStrategy(TupleKeyMixin, AbstractTypedStrategy, DictStrategy):
+        erase, unerase = rerased.new_erasing_pair("tuple_" + name)
+        erase = staticmethod(erase)
+        unerase = staticmethod(unerase)
+
+        def get_empty_storage(self):
+            return self.erase({})
+
+        def _never_equal_to(self, w_lookup_type):
+            return _never_equal_to_tuple(self.space, w_lookup_type)
+
+        def iter(self, w_dict):
+            return TupleIteratorImplementation(self.space, self, w_dict)
+
+    class TupleIteratorImplementation(IteratorImplementation):
+        def __init__(self, space, strategy, dictimplementation):
+            IteratorImplementation.__init__(self, space, strategy,
+                                            dictimplementation)
+            self.tuplestrategy = strategy
+            self.iterator = strategy.unerase(
+                dictimplementation.dstorage).iteritems()
+
+        def next_entry(self):
+            # note that this 'for' loop only runs once, at most
+            for key, w_value in self.iterator:
+                return self.tuplestrategy.wrap(key), w_value
+            else:
+                return None, None
+
+    TupleDictStrategy.__name__ = "TupleDictStrategy_" + name
+    TupleIteratorImplementation.__name__ = "TupleIteratorImplementation_" + name
+    return TupleDictStrategy
+
+tuple_dict_strategies = [make_tuple_dict_strategy(itemtype, arity)
+                             for itemtype in (int, float)
+                             for arity in (2, 3)]
+unrolling_tuple_dict_strategies = unrolling_iterable(tuple_dict_strategies)
+
 class ObjectIteratorImplementation(_UnwrappedIteratorMixin, IteratorImplementation):
     pass
 
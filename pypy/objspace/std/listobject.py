@@ -53,6 +53,13 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
     else:
         return space.fromcache(StringListStrategy)
 
+    # check for unicode
+    for w_obj in list_w:
+        if not is_W_UnicodeObject(w_obj):
+            break
+    else:
+        return space.fromcache(UnicodeListStrategy)
+
     # check for floats
     for w_obj in list_w:
         if not is_W_FloatObject(w_obj):
@@ -70,6 +77,10 @@ def is_W_StringObject(w_object):
     from pypy.objspace.std.stringobject import W_StringObject
     return type(w_object) is W_StringObject
 
+def is_W_UnicodeObject(w_object):
+    from pypy.objspace.std.unicodeobject import W_UnicodeObject
+    return type(w_object) is W_UnicodeObject
+
 def is_W_FloatObject(w_object):
     from pypy.objspace.std.floatobject import W_FloatObject
     return type(w_object) is W_FloatObject
@@ -104,6 +115,12 @@ class W_ListObject(W_AbstractListObject):
         storage = strategy.erase(list_s)
         return W_ListObject.from_storage_and_strategy(space, storage, strategy)
 
+    @staticmethod
+    def newlist_unicode(space, list_u):
+        strategy = space.fromcache(UnicodeListStrategy)
+        storage = strategy.erase(list_u)
+        return W_ListObject.from_storage_and_strategy(space, storage, strategy)
+
     def __repr__(w_self):
         """ representation for debugging purposes """
         return "%s(%s, %s)" % (w_self.__class__.__name__, w_self.strategy, w_self.lstorage._x)
@@ -211,10 +228,20 @@ class W_ListObject(W_AbstractListObject):
         not use the list strategy, return None. """
         return self.strategy.getitems_str(self)
 
+    def getitems_unicode(self):
+        """ Return the items in the list as unwrapped unicodes. If the list
+        does not use the list strategy, return None. """
+        return self.strategy.getitems_unicode(self)
+
     def getitems_int(self):
         """ Return the items in the list as unwrapped ints. If the list does
         not use the list strategy, return None. """
         return self.strategy.getitems_int(self)
+
+    def getitems_float(self):
+        """ Return the items in the list as unwrapped floats. If the list does
+        not use the list strategy, return None. """
+        return self.strategy.getitems_float(self)
     # ___________________________________________________
 
 
@@ -315,9 +342,15 @@ class ListStrategy(object):
     def getitems_str(self, w_list):
         return None
 
+    def getitems_unicode(self, w_list):
+        return None
+
     def getitems_int(self, w_list):
         return None
 
+    def getitems_float(self, w_list):
+        return None
+
     def getstorage_copy(self, w_list):
         raise NotImplementedError
 
@@ -419,6 +452,8 @@ class EmptyListStrategy(ListStrategy):
             strategy = self.space.fromcache(IntegerListStrategy)
         elif is_W_StringObject(w_item):
             strategy = self.space.fromcache(StringListStrategy)
+        elif is_W_UnicodeObject(w_item):
+            strategy = self.space.fromcache(UnicodeListStrategy)
         elif is_W_FloatObject(w_item):
             strategy = self.space.fromcache(FloatListStrategy)
         else:
@@ -1028,6 +1063,9 @@ class FloatListStrategy(AbstractUnwrappedStrategy, ListStrategy):
         if reverse:
             l.reverse()
 
+    def getitems_float(self, w_list):
+        return self.unerase(w_list.lstorage)
+
 class StringListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     _none_value = None
     _applevel_repr = "str"
@@ -1058,6 +1096,36 @@ class StringListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     def getitems_str(self, w_list):
         return self.unerase(w_list.lstorage)
 
+class UnicodeListStrategy(AbstractUnwrappedStrategy, ListStrategy):
+    _none_value = None
+    _applevel_repr = "unicode"
+
+    def wrap(self, stringval):
+        return self.space.wrap(stringval)
+
+    def unwrap(self, w_string):
+        return self.space.unicode_w(w_string)
+
+    erase, unerase = rerased.new_erasing_pair("unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return is_W_UnicodeObject(w_obj)
+
+    def list_is_correct_type(self, w_list):
+        return w_list.strategy is self.space.fromcache(UnicodeListStrategy)
+
+    def sort(self, w_list, reverse):
+        l = self.unerase(w_list.lstorage)
+        sorter = UnicodeSort(l, len(l))
+        sorter.sort()
+        if reverse:
+            l.reverse()
+
+    def getitems_unicode(self, w_list):
+        return self.unerase(w_list.lstorage)
+
 # _______________________________________________________
 
 init_signature = Signature(['sequence'], None, None)
@@ -1074,6 +1142,20 @@ def init__List(space, w_list, __args__):
             w_iterable.copy_into(w_list)
             return
         elif isinstance(w_iterable, W_AbstractTupleObject):
+            if space.config.objspace.std.withliststrategies:
+                # unboxed tuples give us their items without boxing them
+                intlist = w_iterable.getitems_int()
+                if intlist is not None:
+                    strategy = space.fromcache(IntegerListStrategy)
+                    w_list.strategy = strategy
+                    w_list.lstorage = strategy.erase(intlist) # already a copy
+                    return
+                floatlist = w_iterable.getitems_float()
+                if floatlist is not None:
+                    strategy = space.fromcache(FloatListStrategy)
+                    w_list.strategy = strategy
+                    w_list.lstorage = strategy.erase(floatlist) # already a copy
+                    return
             w_list.__init__(space, w_iterable.getitems_copy())
             return
 
@@ -1091,6 +1173,13 @@ def init__List(space, w_list, __args__):
             w_list.lstorage = strategy.erase(strlist[:])
             return
 
+        unilist = space.listview_unicode(w_iterable)
+        if unilist is not None:
+            w_list.strategy = strategy = space.fromcache(UnicodeListStrategy)
+             # need to copy because unilist can share with w_iterable
+            w_list.lstorage = strategy.erase(unilist[:])
+            return
+
         # xxx special hack for speed
         from pypy.interpreter.generator import GeneratorIterator
         if isinstance(w_iterable, GeneratorIterator):
@@ -1421,6 +1510,7 @@ TimSort = make_timsort_class()
 IntBaseTimSort = make_timsort_class()
 FloatBaseTimSort = make_timsort_class()
 StringBaseTimSort = make_timsort_class()
+UnicodeBaseTimSort = make_timsort_class()
 
 class KeyContainer(baseobjspace.W_Root):
     def __init__(self, w_key, w_item):
@@ -1448,6 +1538,10 @@ class StringSort(StringBaseTimSort):
     def lt(self, a, b):
         return a < b
 
+class UnicodeSort(UnicodeBaseTimSort):
+    def lt(self, a, b):
+        return a < b
+
 class CustomCompareSort(SimpleSort):
     def lt(self, a, b):
         space = self.space
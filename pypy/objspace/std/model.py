@@ -17,11 +17,14 @@ def registerimplementation(implcls):
 option_to_typename = {
     "withspecialisedtuple" : ["specialisedtupleobject.W_SpecialisedTupleObject"],
     "withsmalltuple" : ["smalltupleobject.W_SmallTupleObject"],
+    "withunboxedtuple" : ["unboxedtupleobject.W_UnboxedTupleObject"],
     "withsmallint"   : ["smallintobject.W_SmallIntObject"],
     "withsmalllong"  : ["smalllongobject.W_SmallLongObject"],
     "withstrslice"   : ["strsliceobject.W_StringSliceObject"],
     "withstrjoin"    : ["strjoinobject.W_StringJoinObject"],
     "withstrbuf"     : ["strbufobject.W_StringBufferObject"],
+    "withunicodeslice" : ["unisliceobject.W_UnicodeSliceObject"],
+    "withunicodebuf" : ["unibufobject.W_UnicodeBufferObject"],
     "withrope"       : ["ropeobject.W_RopeObject",
                         "ropeobject.W_RopeIterObject"],
     "withropeunicode": ["ropeunicodeobject.W_RopeUnicodeObject",
@@ -257,6 +260,18 @@ class StdTypeModel:
                 (unicodeobject.W_UnicodeObject,
                                        strbufobject.delegate_buf2unicode)
                 ]
+        if config.objspace.std.withunicodeslice:
+            from pypy.objspace.std import unisliceobject
+            self.typeorder[unisliceobject.W_UnicodeSliceObject] += [
+                (unicodeobject.W_UnicodeObject,
+                                       unisliceobject.delegate_slice2unicode),
+                ]
+        if config.objspace.std.withunicodebuf:
+            from pypy.objspace.std import unibufobject
+            self.typeorder[unibufobject.W_UnicodeBufferObject] += [
+                (unicodeobject.W_UnicodeObject,
+                                       unibufobject.delegate_buf2unicode),
+                ]
         if config.objspace.std.withsmalltuple:
             from pypy.objspace.std import smalltupleobject
             self.typeorder[smalltupleobject.W_SmallTupleObject] += [
@@ -267,6 +282,11 @@ class StdTypeModel:
             self.typeorder[specialisedtupleobject.W_SpecialisedTupleObject] += [
                 (tupleobject.W_TupleObject, specialisedtupleobject.delegate_SpecialisedTuple2Tuple)]
 
+        if config.objspace.std.withunboxedtuple:
+            from pypy.objspace.std import unboxedtupleobject
+            self.typeorder[unboxedtupleobject.W_UnboxedTupleObject] += [
+                (tupleobject.W_TupleObject, unboxedtupleobject.delegate_UnboxedTuple2Tuple)]
+
         # put W_Root everywhere
         self.typeorder[W_Root] = []
         for type in self.typeorder:
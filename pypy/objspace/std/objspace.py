@@ -313,6 +313,9 @@ class StdObjSpace(ObjSpace, DescrOperation):
     def newlist_str(self, list_s):
         return W_ListObject.newlist_str(self, list_s)
 
+    def newlist_unicode(self, list_u):
+        return W_ListObject.newlist_unicode(self, list_u)
+
     def newdict(self, module=False, instance=False, kwargs=False,
                 strdict=False):
         return W_DictMultiObject.allocate_and_init_instance(
@@ -461,6 +464,17 @@ class StdObjSpace(ObjSpace, DescrOperation):
             return w_obj.getitems_str()
         return None
 
+    def listview_unicode(self, w_obj):
+        if type(w_obj) is W_ListObject:
+            return w_obj.getitems_unicode()
+        if type(w_obj) is W_DictMultiObject:
+            return w_obj.listview_unicode()
+        if type(w_obj) is W_SetObject or type(w_obj) is W_FrozensetObject:
+            return w_obj.listview_unicode()
+        if isinstance(w_obj, W_ListObject) and self._uses_list_iter(w_obj):
+            return w_obj.getitems_unicode()
+        return None
+
     def listview_int(self, w_obj):
         if type(w_obj) is W_ListObject:
             return w_obj.getitems_int()
@@ -468,6 +482,8 @@ class StdObjSpace(ObjSpace, DescrOperation):
             return w_obj.listview_int()
         if type(w_obj) is W_SetObject or type(w_obj) is W_FrozensetObject:
             return w_obj.listview_int()
+        if isinstance(w_obj, W_AbstractTupleObject):
+            return w_obj.getitems_int()
         if isinstance(w_obj, W_ListObject) and self._uses_list_iter(w_obj):
             return w_obj.getitems_int()
         return None
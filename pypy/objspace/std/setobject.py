@@ -13,6 +13,10 @@ from pypy.interpreter.generator import GeneratorIterator
 from pypy.objspace.std.listobject import W_ListObject
 from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.stringobject import W_StringObject
+from pypy.objspace.std.unicodeobject import W_UnicodeObject
+from pypy.objspace.std.dictmultiobject import _is_unboxable_float
+from pypy.objspace.std.dictmultiobject import make_tuple_key_mixin
+from pypy.rlib.unroll import unrolling_iterable
 
 class W_BaseSetObject(W_Object):
     typedef = None
@@ -92,6 +96,10 @@ class W_BaseSetObject(W_Object):
         """ If this is a string set return its contents as a list of uwnrapped strings. Otherwise return None. """
         return self.strategy.listview_str(self)
 
+    def listview_unicode(self):
+        """ If this is a unicode set return its contents as a list of uwnrapped unicode. Otherwise return None. """
+        return self.strategy.listview_unicode(self)
+
     def listview_int(self):
         """ If this is an int set return its contents as a list of uwnrapped ints. Otherwise return None. """
         return self.strategy.listview_int(self)
@@ -201,9 +209,18 @@ class SetStrategy(object):
     def listview_str(self, w_set):
         return None
 
+    def listview_unicode(self, w_set):
+        return None
+
     def listview_int(self, w_set):
         return None
 
+    def is_correct_type(self, w_key):
+        raise NotImplementedError
+
+    def get_storage_from_list(self, list_w):
+        raise NotImplementedError
+
     #def erase(self, storage):
     #    raise NotImplementedError
 
@@ -303,8 +320,10 @@ class EmptySetStrategy(SetStrategy):
             strategy = self.space.fromcache(IntegerSetStrategy)
         elif type(w_key) is W_StringObject:
             strategy = self.space.fromcache(StringSetStrategy)
+        elif type(w_key) is W_UnicodeObject:
+            strategy = self.space.fromcache(UnicodeSetStrategy)
         else:
-            strategy = self.space.fromcache(ObjectSetStrategy)
+            strategy = _pick_unboxed_key_strategy(self.space, w_key)
         w_set.strategy = strategy
         w_set.sstorage = strategy.get_empty_storage()
         w_set.add(w_key)
@@ -712,6 +731,39 @@ class StringSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def iter(self, w_set):
         return StringIteratorImplementation(self.space, self, w_set)
 
+class UnicodeSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    erase, unerase = rerased.new_erasing_pair("unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def listview_unicode(self, w_set):
+        return self.unerase(w_set.sstorage).keys()
+
+    def is_correct_type(self, w_key):
+        return type(w_key) is W_UnicodeObject
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(IntegerSetStrategy):
+            return False
+        if strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        return True
+
+    def unwrap(self, w_item):
+        return self.space.unicode_w(w_item)
+
+    def wrap(self, item):
+        return self.space.wrap(item)
+
+    def iter(self, w_set):
+        return UnicodeIteratorImplementation(self.space, self, w_set)
+
 class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("integer")
     erase = staticmethod(erase)
@@ -733,6 +785,8 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(StringSetStrategy):
             return False
+        if strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
         if strategy is self.space.fromcache(EmptySetStrategy):
             return False
         return True
@@ -746,6 +800,93 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def iter(self, w_set):
         return IntegerIteratorImplementation(self.space, self, w_set)
 
+class FloatSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def is_correct_type(self, w_key):
+        return _is_unboxable_float(self.space, w_key)
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(StringSetStrategy):
+            return False
+        if strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
+        if strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        return True
+
+    def unwrap(self, w_item):
+        return self.space.float_w(w_item)
+
+    def wrap(self, item):
+        return self.space.wrap(item)
+
+    def has_key(self, w_set, w_key):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_float):
+            # also correct for NaN, which is never stored here
+            d = self.unerase(w_set.sstorage)
+            return space.float_w(w_key) in d
+        return AbstractUnwrappedSetStrategy.has_key(self, w_set, w_key)
+
+    def iter(self, w_set):
+        return FloatIteratorImplementation(self.space, self, w_set)
+
+def make_tuple_set_strategy(itemtype, arity):
+    TupleKeyMixin = make_tuple_key_mixin(itemtype, arity)
+    name = "%s%d" % (itemtype.__name__, arity)
+
+    class TupleSetStrategy(TupleKeyMixin, AbstractUnwrappedSetStrategy,
+                           SetStrategy):
+        erase, unerase = rerased.new_erasing_pair("tuple_" + name)
+        erase = staticmethod(erase)
+        unerase = staticmethod(unerase)
+
+        def get_empty_storage(self):
+            return self.erase({})
+
+        def get_empty_dict(self):
+            return {}
+
+        def may_contain_equal_elements(self, strategy):
+            space = self.space
+            if (strategy is space.fromcache(EmptySetStrategy) or
+                strategy is space.fromcache(IntegerSetStrategy) or
+                strategy is space.fromcache(FloatSetStrategy) or
+                strategy is space.fromcache(StringSetStrategy) or
+                strategy is space.fromcache(UnicodeSetStrategy)):
+                return False
+            return True
+
+        def iter(self, w_set):
+            return TupleIteratorImplementation(self.space, self, w_set)
+
+    class TupleIteratorImplementation(IteratorImplementation):
+        def __init__(self, space, strategy, w_set):
+            IteratorImplementation.__init__(self, space, strategy, w_set)
+            self.tuplestrategy = strategy
+            d = strategy.unerase(w_set.sstorage)
+            self.iterator = d.iterkeys()
+
+        def next_entry(self):
+            # note that this 'for' loop only runs once, at most
+            for key in self.iterator:
+                return self.tuplestrategy.wrap(key)
+            else:
+                return None
+
+    TupleSetStrategy.__name__ = "TupleSetStrategy_" + name
+    TupleIteratorImplementation.__name__ = "TupleIteratorImplementation_" + name
+    return TupleSetStrategy
+
 class ObjectSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("object")
     erase = staticmethod(erase)
@@ -844,6 +985,30 @@ class StringIteratorImplementation(IteratorImplementation):
         else:
             return None
 
+class UnicodeIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.wrap(key)
+        else:
+            return None
+
+class FloatIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.wrap(key)
+        else:
+            return None
+
 class IntegerIteratorImplementation(IteratorImplementation):
     #XXX same implementation in dictmultiobject on dictstrategy-branch
     def __init__(self, space, strategy, w_set):
@@ -871,6 +1036,11 @@ class RDictIteratorImplementation(IteratorImplementation):
         else:
             return None
 
+tuple_set_strategies = [make_tuple_set_strategy(itemtype, arity)
+                            for itemtype in (int, float)
+                            for arity in (2, 3)]
+unrolling_tuple_set_strategies = unrolling_iterable(tuple_set_strategies)
+
 class W_SetIterObject(W_Object):
     from pypy.objspace.std.settype import setiter_typedef as typedef
     # XXX this class should be killed, and the various
@@ -904,6 +1074,19 @@ def next__SetIterObject(space, w_setiter):
 def newset(space):
     return r_dict(space.eq_w, space.hash_w, force_non_null=True)
 
+def _pick_unboxed_key_strategy(space, w_key):
+    """ Returns the float or tuple strategy able to store 'w_key' unboxed,
+    or ObjectSetStrategy. """
+    if _is_unboxable_float(space, w_key):
+        return space.fromcache(FloatSetStrategy)
+    strategy = space.fromcache(ObjectSetStrategy)
+    if space.is_w(space.type(w_key), space.w_tuple):
+        for strategycls in unrolling_tuple_set_strategies:
+            tuplestrategy = space.fromcache(strategycls)
+            if tuplestrategy.is_correct_type(w_key):
+                strategy = tuplestrategy
+    return strategy
+
 def set_strategy_and_setdata(space, w_set, w_iterable):
     from pypy.objspace.std.intobject import W_IntObject
     if w_iterable is None :
@@ -923,6 +1106,13 @@ def set_strategy_and_setdata(space, w_set, w_iterable):
         w_set.sstorage = strategy.get_storage_from_unwrapped_list(stringlist)
         return
 
+    unicodelist = space.listview_unicode(w_iterable)
+    if unicodelist is not None:
+        strategy = space.fromcache(UnicodeSetStrategy)
+        w_set.strategy = strategy
+        w_set.sstorage = strategy.get_storage_from_unwrapped_list(unicodelist)
+        return
+
     intlist = space.listview_int(w_iterable)
     if intlist is not None:
         strategy = space.fromcache(IntegerSetStrategy)
@@ -958,8 +1148,23 @@ def _pick_correct_strategy(space, w_set, iterable_w):
         w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
         return
 
-    w_set.strategy = space.fromcache(ObjectSetStrategy)
-    w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+    # check for unicode
+    for w_item in iterable_w:
+        if type(w_item) is not W_UnicodeObject:
+            break
+    else:
+        w_set.strategy = space.fromcache(UnicodeSetStrategy)
+        w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+        return
+
+    # check for floats and tuples of ints or floats
+    strategy = _pick_unboxed_key_strategy(space, iterable_w[0])
+    for w_item in iterable_w:
+        if not strategy.is_correct_type(w_item):
+            strategy = space.fromcache(ObjectSetStrategy)
+            break
+    w_set.strategy = strategy
+    w_set.sstorage = strategy.get_storage_from_list(iterable_w)
 
 def _initialize_set(space, w_obj, w_iterable=None):
     w_obj.clear()
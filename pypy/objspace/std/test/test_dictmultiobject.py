@@ -171,6 +171,15 @@ class TestW_DictObject:
         w_l = self.space.call_method(w_d, "keys")
         assert sorted(self.space.listview_str(w_l)) == ["a", "b"]
 
+    def test_listview_unicode_dict(self):
+        w = self.space.wrap
+        w_d = self.space.newdict()
+        w_d.initialize_content([(w(u"a"), w(1)), (w(u"b"), w(2))])
+
+        assert sorted(self.space.listview_unicode(w_d)) == [u"a", u"b"]
+        w_l = self.space.call_method(w_d, "keys")
+        assert sorted(self.space.listview_unicode(w_l)) == [u"a", u"b"]
+
 class AppTest_DictObject:
     def setup_class(cls):
         cls.w_on_pypy = cls.space.wrap("__pypy__" in sys.builtin_module_names)
@@ -797,6 +806,62 @@ class AppTestStrategies(object):
         o.a = 1
         assert "StringDictStrategy" in self.get_strategy(d)
 
+    def test_empty_to_unicode(self):
+        d = {}
+        d[u"a"] = 1
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+        assert d[u"a"] == 1
+        assert d["a"] == 1
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+
+    def test_unicode_never_equal(self):
+        d = {u"a": 1}
+        assert d.get(None) is None
+        assert d.get(1) is None
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+
+    def test_empty_to_float(self):
+        d = {}
+        d[1.5] = "a"
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        d[-0.0] = "b"
+        assert d[0.0] == "b"
+        assert d.get("x") is None
+        nan = float("nan")
+        assert d.get(nan) is None
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert d[1.5] == "a"
+        d[nan] = "c"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert sorted(d.values()) == ["a", "b", "c"]
+
+        d = {2.0: "a"}
+        assert d[2] == "a"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+
+    def test_empty_to_tuple(self):
+        d = {}
+        d[(1, 2)] = "a"
+        assert "TupleDictStrategy_int2" in self.get_strategy(d)
+        d[(3, 4)] = "b"
+        assert d[(1, 2)] == "a"
+        assert d.get((5, 6)) is None
+        assert d.get(1) is None
+        assert "TupleDictStrategy_int2" in self.get_strategy(d)
+        assert sorted(d.keys()) == [(1, 2), (3, 4)]
+        assert sorted(d.items()) == [((1, 2), "a"), ((3, 4), "b")]
+        assert d[(1.0, 2.0)] == "a"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+
+        d = {(1.5, 2.5, 3.5): 1}
+        assert "TupleDictStrategy_float3" in self.get_strategy(d)
+        d[(1.5, 2.5)] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {(1.5, 2.5, 3.5): 1, (1.5, 2.5): 2}
+
+        d = {(1, 2.5): 1}
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+
     def test_empty_to_int(self):
         import sys
         d = {}
@@ -831,6 +896,44 @@ class AppTestStrategies(object):
         # gives us (1, 2), but 1 is not in the dict any longer.
         raises(RuntimeError, list, it)
 
+    def test_tuple_keys_are_equal_copies(self):
+        t = (1, 2)
+        d = {t: "a"}
+        assert "TupleDictStrategy_int2" in self.get_strategy(d)
+        key = next(iter(d))
+        assert key == t
+        assert type(key) is tuple
+
+
+class AppTestStrategiesUnboxedTuple(AppTestStrategies):
+    def setup_class(cls):
+        AppTestStrategies.setup_class.im_func(cls)
+        cls.space = gettestobjspace(**{"objspace.std.withunboxedtuple": True})
+
+    def test_unboxed_tuple_keys(self):
+        import __pypy__
+        t = (1, 2)
+        assert "W_UnboxedTupleObject_int" in __pypy__.internal_repr(t)
+        d = {t: "a", (3, 4): "b"}
+        assert "TupleDictStrategy_int2" in self.get_strategy(d)
+        assert d[(1, 2)] == "a"
+        assert sorted(d) == [(1, 2), (3, 4)]
+        assert "TupleDictStrategy_int2" in self.get_strategy(d)
+        assert d.get((1.5, 2.5)) is None
+        assert d.get((1, 2, 3)) is None
+
+        d = {(1.5, 2.5, 3.5): 1}
+        assert "TupleDictStrategy_float3" in self.get_strategy(d)
+        assert d[(1.5, 2.5, 3.5)] == 1
+        d[(1, 2, 3)] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {(1.5, 2.5, 3.5): 1, (1, 2, 3): 2}
+
+        s = set([(1, 2), (3, 4)])
+        assert (3, 4) in s
+        assert (3, 4, 5) not in s
+        assert sorted(s) == [(1, 2), (3, 4)]
+
 
 class FakeString(str):
     hash_count = 0
@@ -908,6 +1011,8 @@ class FakeSpace:
     w_None = None
     w_NoneType = type(None, None)
     w_int = int
+    w_unicode = unicode
+    w_tuple = tuple
     w_bool = bool
     w_float = float
     StringObjectCls = FakeString
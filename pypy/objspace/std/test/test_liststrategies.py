@@ -1,4 +1,4 @@
-from pypy.objspace.std.listobject import W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy, FloatListStrategy, StringListStrategy, RangeListStrategy, make_range_list
+from pypy.objspace.std.listobject import W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy, FloatListStrategy, StringListStrategy, UnicodeListStrategy, RangeListStrategy, make_range_list
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -11,6 +11,7 @@ class TestW_ListStrategies(TestW_ListObject):
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap('a')]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap(2),self.space.wrap(3)]).strategy, IntegerListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap('a'), self.space.wrap('b')]).strategy, StringListStrategy)
+        assert isinstance(W_ListObject(self.space, [self.space.wrap(u'a'), self.space.wrap(u'b')]).strategy, UnicodeListStrategy)
 
     def test_empty_to_any(self):
         l = W_ListObject(self.space, [])
@@ -28,6 +29,11 @@ class TestW_ListStrategies(TestW_ListObject):
         l.append(self.space.wrap('a'))
         assert isinstance(l.strategy, StringListStrategy)
 
+        l = W_ListObject(self.space, [])
+        assert isinstance(l.strategy, EmptyListStrategy)
+        l.append(self.space.wrap(u'a'))
+        assert isinstance(l.strategy, UnicodeListStrategy)
+
         l = W_ListObject(self.space, [])
         assert isinstance(l.strategy, EmptyListStrategy)
         l.append(self.space.wrap(1.2))
@@ -49,6 +55,14 @@ class TestW_ListStrategies(TestW_ListObject):
         l.append(self.space.wrap(3))
         assert isinstance(l.strategy, ObjectListStrategy)
 
+    def test_unicode_to_any(self):
+        l = W_ListObject(self.space, [self.space.wrap(u'a'),self.space.wrap(u'b'),self.space.wrap(u'c')])
+        assert isinstance(l.strategy, UnicodeListStrategy)
+        l.append(self.space.wrap(u'd'))
+        assert isinstance(l.strategy, UnicodeListStrategy)
+        l.append(self.space.wrap('e'))
+        assert isinstance(l.strategy, ObjectListStrategy)
+
     def test_float_to_any(self):
         l = W_ListObject(self.space, [self.space.wrap(1.1),self.space.wrap(2.2),self.space.wrap(3.3)])
         assert isinstance(l.strategy, FloatListStrategy)
@@ -414,7 +428,7 @@ class TestW_ListStrategies(TestW_ListObject):
         l1 = W_ListObject(self.space, [self.space.wrap("eins"), self.space.wrap("zwei")])
         assert isinstance(l1.strategy, StringListStrategy)
         l2 = W_ListObject(self.space, [self.space.wrap(u"eins"), self.space.wrap(u"zwei")])
-        assert isinstance(l2.strategy, ObjectListStrategy)
+        assert isinstance(l2.strategy, UnicodeListStrategy)
         l3 = W_ListObject(self.space, [self.space.wrap("eins"), self.space.wrap(u"zwei")])
         assert isinstance(l3.strategy, ObjectListStrategy)
 
@@ -424,6 +438,37 @@ class TestW_ListStrategies(TestW_ListObject):
         w_l = self.space.newlist([self.space.wrap('a'), self.space.wrap('b')])
         assert space.listview_str(w_l) == ["a", "b"]
 
+    def test_listview_unicode(self):
+        space = self.space
+        assert space.listview_unicode(space.wrap(1)) == None
+        w_l = self.space.newlist([self.space.wrap(u'a'), self.space.wrap(u'b')])
+        assert space.listview_unicode(w_l) == [u"a", u"b"]
+        w_l = self.space.newlist([self.space.wrap('a'), self.space.wrap('b')])
+        assert space.listview_unicode(w_l) == None
+
+    def test_unicode_join_uses_listview_unicode(self):
+        space = self.space
+        w_l = self.space.newlist([self.space.wrap(u'a'), self.space.wrap(u'b')])
+        w_l.getitems = None
+        assert space.unicode_w(space.call_method(space.wrap(u"c"), "join", w_l)) == u"acb"
+
+    def test_unicode_contains_and_sort(self):
+        space = self.space
+        w_l = W_ListObject(space, [space.wrap(u'c'), space.wrap(u'a'), space.wrap(u'b')])
+        assert w_l.contains(space.wrap(u'b'))
+        assert w_l.contains(space.wrap('b'))
+        assert not w_l.contains(space.wrap(u'd'))
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        w_l.sort(True)
+        assert space.listview_unicode(w_l) == [u'c', u'b', u'a']
+
+    def test_newlist_unicode(self):
+        space = self.space
+        l = [u'a', u'b']
+        w_l = self.space.newlist_unicode(l)
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert space.listview_unicode(w_l) is l
+
     def test_string_join_uses_listview_str(self):
         space = self.space
         w_l = self.space.newlist([self.space.wrap('a'), self.space.wrap('b')])
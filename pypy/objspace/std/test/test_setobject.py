@@ -113,12 +113,12 @@ class TestW_SetObject:
         for item in w_set.strategy.unerase(w_set.sstorage):
             assert isinstance(item, W_Object)
 
-        w_list = W_ListObject(self.space, [w(1.0), w(2.0), w(3.0)])
+        w_list = W_ListObject(self.space, [w(1.0), w(2.0), w("3")])
         w_set = W_SetObject(self.space)
         _initialize_set(self.space, w_set, w_list)
         assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
         for item in w_set.strategy.unerase(w_set.sstorage):
-            assert isinstance(item, W_FloatObject)
+            assert isinstance(item, W_Object)
 
         # changed cached object, need to change it back for other tests to pass
         intstr.get_storage_from_list = tmp_func
@@ -136,6 +136,58 @@ class TestW_SetObject:
         assert sorted(self.space.listview_int(w_b)) == [1,2,3,4,5]
         assert self.space.listview_str(w_b) is None
 
+    def test_unicode_set(self):
+        from pypy.objspace.std.setobject import UnicodeSetStrategy
+        from pypy.objspace.std.setobject import ObjectSetStrategy
+        w = self.space.wrap
+
+        w_list = W_ListObject(self.space, [w(u"1"), w(u"2"), w(u"3")])
+        w_set = W_SetObject(self.space)
+        _initialize_set(self.space, w_set, w_list)
+        assert w_set.strategy is self.space.fromcache(UnicodeSetStrategy)
+        assert w_set.strategy.unerase(w_set.sstorage) == {u"1":None, u"2":None, u"3":None}
+        assert sorted(self.space.listview_unicode(w_set)) == [u"1", u"2", u"3"]
+        assert w_set.has_key(w(u"2"))
+
+        w_set.add(w("4"))
+        assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
+        assert w_set.has_key(w("3"))
+
+    def test_float_and_tuple_sets(self):
+        from pypy.objspace.std.setobject import FloatSetStrategy
+        from pypy.objspace.std.setobject import ObjectSetStrategy
+        space = self.space
+        w = space.wrap
+
+        w_list = W_ListObject(space, [w(1.5), w(2.5), w(-0.0), w(0.0)])
+        w_set = W_SetObject(space)
+        _initialize_set(space, w_set, w_list)
+        assert w_set.strategy is space.fromcache(FloatSetStrategy)
+        assert w_set.length() == 3
+        assert w_set.has_key(w(1.5))
+        assert not w_set.has_key(w(float("nan")))
+        assert w_set.strategy is space.fromcache(FloatSetStrategy)
+        w_set.add(w(float("nan")))
+        assert w_set.strategy is space.fromcache(ObjectSetStrategy)
+
+        w_t = space.newtuple
+        w_list = W_ListObject(space, [w_t([w(1), w(2)]), w_t([w(3), w(4)])])
+        w_set = W_SetObject(space)
+        _initialize_set(space, w_set, w_list)
+        assert w_set.strategy.__class__.__name__ == "TupleSetStrategy_int2"
+        assert w_set.has_key(w_t([w(3), w(4)]))
+        assert not w_set.has_key(w_t([w(3), w(5)]))
+        assert w_set.has_key(w_t([w(3.0), w(4.0)]))
+        assert w_set.strategy is space.fromcache(ObjectSetStrategy)
+
+        w_set = W_SetObject(space)
+        w_set.add(w_t([w(1.5), w(2.5), w(3.5)]))
+        assert w_set.strategy.__class__.__name__ == "TupleSetStrategy_float3"
+        w_set.add(w_t([w(1.5), w(2.5), w(3.5)]))
+        assert w_set.length() == 1
+        w_res = space.call_method(w_set, "pop")
+        assert space.unwrap(w_res) == (1.5, 2.5, 3.5)
+
 class AppTestAppSetTest:
 
     def setup_class(self):
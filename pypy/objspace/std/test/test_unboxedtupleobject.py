@@ -0,0 +1,222 @@
+import py, sys
+from pypy.objspace.std.tupleobject import W_TupleObject
+from pypy.objspace.std.unboxedtupleobject import W_UnboxedTupleObject
+from pypy.objspace.std.unboxedtupleobject import W_IntTupleObject
+from pypy.objspace.std.unboxedtupleobject import W_FloatTupleObject
+from pypy.objspace.std.listobject import IntegerListStrategy
+from pypy.objspace.std.listobject import FloatListStrategy
+from pypy.interpreter.error import OperationError
+from pypy.conftest import gettestobjspace, option
+from pypy.objspace.std.test import test_tupleobject
+from pypy.interpreter import gateway
+
+
+class TestW_UnboxedTupleObject():
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withunboxedtuple": True})
+
+    def test_isunboxedtupleobject(self):
+        space = self.space
+        w_tuple = space.newtuple([space.wrap(1), space.wrap(2),
+                                  space.wrap(3)])
+        assert isinstance(w_tuple, W_IntTupleObject)
+        assert w_tuple.items == [1, 2, 3]
+        w_tuple = space.newtuple([space.wrap(1.5)] * 5)
+        assert isinstance(w_tuple, W_FloatTupleObject)
+        assert w_tuple.items == [1.5] * 5
+
+    def test_isnotunboxedtupleobject(self):
+        space = self.space
+        for values in [[], [1, 2.5], [1.5, 2], [True, False], [1, 'a'],
+                       [1.5, float('nan')], [sys.maxint + 1]]:
+            w_tuple = space.newtuple([space.wrap(x) for x in values])
+            assert not isinstance(w_tuple, W_UnboxedTupleObject)
+
+    def test_hash_against_normal_tuple(self):
+        N_space = gettestobjspace(**{"objspace.std.withunboxedtuple": False})
+        S_space = self.space
+
+        def hash_test(values, must_be_unboxed=True):
+            N_values_w = [N_space.wrap(value) for value in values]
+            S_values_w = [S_space.wrap(value) for value in values]
+            N_w_tuple = N_space.newtuple(N_values_w)
+            S_w_tuple = S_space.newtuple(S_values_w)
+
+            if must_be_unboxed:
+                assert isinstance(S_w_tuple, W_UnboxedTupleObject)
+            assert isinstance(N_w_tuple, W_TupleObject)
+            assert S_space.is_true(S_space.eq(N_w_tuple, S_w_tuple))
+            assert S_space.is_true(S_space.eq(N_space.hash(N_w_tuple),
+                                              S_space.hash(S_w_tuple)))
+
+        hash_test([1])
+        hash_test([1, 2])
+        hash_test([-1, -2, 0, sys.maxint, -sys.maxint-1])
+        hash_test([1.5, 2.8, 3.25])
+        hash_test([1.0, 2.0, -0.0, 1e300, float('inf')])
+        hash_test(range(20))
+        hash_test([1, 'a'], must_be_unboxed=False)
+
+    def test_list_interop(self):
+        space = self.space
+        w_tuple = space.newtuple([space.wrap(i) for i in range(5)])
+        w_list = space.call_function(space.w_list, w_tuple)
+        assert isinstance(w_list.strategy, IntegerListStrategy)
+        assert space.listview_int(w_list) == range(5)
+        w_tuple2 = space.call_function(space.w_tuple, w_list)
+        assert isinstance(w_tuple2, W_IntTupleObject)
+        assert w_tuple2.items == range(5)
+        assert w_tuple2.items is not space.listview_int(w_list)
+        #
+        w_tuple = space.newtuple([space.wrap(i + 0.5) for i in range(5)])
+        w_list = space.call_function(space.w_list, w_tuple)
+        assert isinstance(w_list.strategy, FloatListStrategy)
+        w_tuple2 = space.call_function(space.w_tuple, w_list)
+        assert isinstance(w_tuple2, W_FloatTupleObject)
+        assert w_tuple2.items == [i + 0.5 for i in range(5)]
+
+
+class AppTestW_UnboxedTupleObject:
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withunboxedtuple": True})
+        def forbid_delegation(space, w_tuple):
+            def delegation_forbidden():
+                # haaaack
+                co = sys._getframe(2).f_code
+                if co.co_name.startswith('_mm_repr_tuple'):
+                    return
+                raise OperationError(space.w_ReferenceError, w_tuple)
+            w_tuple.delegating = delegation_forbidden
+            return w_tuple
+        if option.runappdirect:
+            cls.w_forbid_delegation = lambda self, x: x
+            cls.test_delegation = lambda self: skip("runappdirect")
+        else:
+            cls.w_forbid_delegation = cls.space.wrap(
+                gateway.interp2app(forbid_delegation))
+
+    def w_isunboxed(self, obj, expected=''):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        print obj, '==>', r, '   (expected: %r)' % expected
+        return ("UnboxedTupleObject" + expected) in r
+
+    def test_createunboxedtuple(self):
+        assert self.isunboxed((1, 2, 3, 4, 5), '_int')
+        assert self.isunboxed((1.5,), '_float')
+        assert self.isunboxed(tuple([1.5, 2.5, 3.5]), '_float')
+        assert not self.isunboxed((1, 2.5, 3))
+        assert not self.isunboxed((1, 2, '3'))
+
+    def test_delegation(self):
+        t = self.forbid_delegation((42, 43, 44))
+        raises(ReferenceError, t.index, 43)
+
+    def test_len_getitem(self):
+        t = self.forbid_delegation((5, 3, 1))
+        assert len(t) == 3
+        assert t[0] == 5
+        assert t[-1] == 1
+        assert t[-3] == 5
+        raises(IndexError, "t[3]")
+        raises(IndexError, "t[-4]")
+
+    def test_slicing(self):
+        t = self.forbid_delegation((1, 2, 3, 4, 5))
+        assert self.isunboxed(t[1:4], '_int')
+        assert t[1:4] == (2, 3, 4)
+        assert t[::2] == (1, 3, 5)
+        assert t[::-1] == (5, 4, 3, 2, 1)
+        assert t[3:1] == ()
+        assert t[4:100] == (5,)
+
+    def test_add_mul(self):
+        t = self.forbid_delegation((1.5, 2.5))
+        assert self.isunboxed(t + (3.5,), '_float')
+        assert t + (3.5,) == (1.5, 2.5, 3.5)
+        assert self.isunboxed(t * 3, '_float')
+        assert t * 3 == (1.5, 2.5) * 3
+        assert 2 * t == (1.5, 2.5, 1.5, 2.5)
+        assert t * 0 == ()
+        assert (1, 2) + (3.5,) == (1, 2, 3.5)
+
+    def test_contains(self):
+        t = self.forbid_delegation((1, 2, 3))
+        assert 2 in t
+        assert 4 not in t
+        assert 2.0 in t
+        assert 2L in t
+        assert 'a' not in t
+        t = (1.5, 2.0)
+        assert 2 in t
+        assert 1.5 in t
+        assert 2.5 not in t
+
+    def test_iter(self):
+        t = (1, 2, 3, 4)
+        assert list(iter(t)) == [1, 2, 3, 4]
+        assert [x * 2 for x in (1.5, 2.5)] == [3.0, 5.0]
+
+    def test_eq_no_delegation(self):
+        a = self.forbid_delegation((1, 2, 3))
+        b = (1,)
+        b += (2, 3)
+        assert a == b
+        assert not a != b
+        assert a != (1, 2, 4)
+        assert a != (1, 2)
+
+    def test_eq_can_delegate(self):
+        assert (1, 2, 3) == (1.0, 2.0, 3.0)
+        assert (1, 2, 3) == (1L, 2, 3)
+        assert (1.5, 2.0) == (1.5, 2)
+        assert not (1, 2, 3) == (1, 2, 'a')
+
+    def test_ordering(self):
+        a = (1, 2, 3)
+        assert a < (1, 2, 4)
+        assert a < (1, 2, 3, 0)
+        assert a <= (1, 2, 3)
+        assert a > (1, 2)
+        assert a >= (0.5, 5)
+        assert (1.5, 2.5) < (1.5, 3)
+
+    def test_hash(self):
+        a = (1, 2, 3)
+        b = (1,)
+        b += (2, 3) # else a and b refer to same constant
+        assert hash(a) == hash(b)
+        assert hash(a) != hash((3, 2, 1))
+        assert hash(a) == hash((1L, 2L, 3L)) == hash((1.0, 2.0, 3.0))
+        assert hash((1.5, -0.0)) == hash((1.5, 0))
+        d = {(1, 2, 3): 'a', (1.5, 2.5): 'b'}
+        assert d[1, 2, 3.0] == 'a'
+        assert d[1.5, 2.5] == 'b'
+
+    def test_nan(self):
+        nan = float('nan')
+        t = (nan, 1.0)
+        assert not self.isunboxed(t)
+        assert t[0] is nan
+
+    def test_list_roundtrip(self):
+        l = [1, 2, 3]
+        t = tuple(l)
+        assert self.isunboxed(t, '_int')
+        l.append(4)
+        assert t == (1, 2, 3)
+        l2 = list(t)
+        l2.append(5)
+        assert l2 == [1, 2, 3, 5]
+        assert t == (1, 2, 3)
+        assert self.isunboxed(tuple(range(3)), '_int')
+        assert self.isunboxed(tuple([0.5, 1.5]), '_float')
+        assert set((1, 2, 2)) == set([1, 2])
+
+
+class AppTestAll(test_tupleobject.AppTestW_TupleObject):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withunboxedtuple": True})
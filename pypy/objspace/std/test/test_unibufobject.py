@@ -0,0 +1,70 @@
+import py, sys
+
+from pypy.objspace.std.test import test_unicodeobject
+from pypy.conftest import gettestobjspace
+
+class AppTestUnicodeBufferObject(test_unicodeobject.AppTestUnicodeString):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('unicodedata',),
+                                    **{"objspace.std.withunicodebuf": True})
+        cls.w_version_info = cls.space.wrap(sys.version_info)
+
+    def test_basic(self):
+        import __pypy__
+        s = u"Hello, ".__add__(u"World!")
+        assert type(s) is unicode
+        assert 'W_UnicodeBufferObject' in __pypy__.internal_repr(s)
+        assert s == u"Hello, World!"
+
+    def test_add(self):
+        import __pypy__
+        all = u""
+        for i in range(20):
+            all += unicode(i)
+        assert 'W_UnicodeBufferObject' in __pypy__.internal_repr(all)
+        assert all == u"012345678910111213141516171819"
+        assert len(all) == 30
+
+    def test_hash(self):
+        import __pypy__
+        def join(s): return s[:len(s) // 2] + s[len(s) // 2:]
+        t = u'a' * 101
+        s = join(t)
+        assert 'W_UnicodeBufferObject' in __pypy__.internal_repr(s)
+        assert hash(s) == hash(t)
+
+    def test_add_twice(self):
+        x = u"a".__add__(u"b")
+        y = x + u"c"
+        c = x + u"d"
+        assert y == u"abc"
+        assert c == u"abd"
+
+    def test_more_adding_fun(self):
+        s = u'a'.__add__(u'b')
+        t = s + u'c'
+        u = s + u'd'
+        v = s + u'e'
+        assert v == u'abe'
+        assert u == u'abd'
+        assert t == u'abc'
+        x = u'0'.__add__(u'1') + s
+        assert x == u'01ab'
+
+    def test_mixed(self):
+        s = u'a'.__add__(u'b')
+        assert s + 'c' == u'abc'
+        assert 'c' + s == u'cab'
+        assert s.upper() == u'AB'
+
+    def test_int_long_float(self):
+        import __pypy__
+        s = u'1'.__add__(u'2')
+        assert 'W_UnicodeBufferObject' in __pypy__.internal_repr(s)
+        assert int(s) == 12
+        assert int(s, 16) == 18
+        assert long(s) == 12L
+        assert long(s, 8) == 10L
+        assert float(s + u'.5') == 12.5
+        assert float(s) == 12.0
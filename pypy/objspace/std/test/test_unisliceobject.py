@@ -0,0 +1,129 @@
+import py, sys
+
+from pypy.objspace.std.test import test_unicodeobject
+from pypy.conftest import gettestobjspace
+from pypy.interpreter import gateway
+from pypy.objspace.std.unisliceobject import W_UnicodeSliceObject
+
+class AppTestUnicodeSliceObject(test_unicodeobject.AppTestUnicodeString):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('unicodedata',),
+                                    **{"objspace.std.withunicodeslice": True})
+        cls.w_version_info = cls.space.wrap(sys.version_info)
+        def not_forced(space, w_s):
+            return space.wrap(isinstance(w_s, W_UnicodeSliceObject) and
+                              (w_s.start != 0 or w_s.stop != len(w_s.uni)))
+        cls.w_not_forced = cls.space.wrap(gateway.interp2app(not_forced))
+
+    def test_basic(self):
+        import __pypy__
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'0123456789' * 20)
+        assert len(s) == 200
+        assert type(s) is unicode
+        assert self.not_forced(s)
+        assert s[5] == u'5'
+        assert s[-2] == u'8'
+        assert s[3:7] == u'3456'
+        assert 'W_UnicodeSliceObject' in __pypy__.internal_repr(s)
+        # when the slice is too short, don't use the slice object
+        assert 'W_UnicodeObject' in __pypy__.internal_repr(u"abcdefgh"[3:7])
+        s2 = s.upper()
+        assert not self.not_forced(s)
+        assert s == u'0123456789' * 20
+
+    def test_small_slice_of_slice(self):
+        import __pypy__
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'0123456789' * 20)
+        t = s[10:20]
+        assert t == u'0123456789'
+        assert 'W_UnicodeObject' in __pypy__.internal_repr(t)
+        u = s[1:]
+        assert 'W_UnicodeSliceObject' in __pypy__.internal_repr(u)
+        assert u == (u'0123456789' * 20)[1:]
+        assert u[::-1] == (u'0123456789' * 20)[:0:-1]
+
+    def test_find(self):
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'abcdefghiabc' + u"X" * 100)
+        assert self.not_forced(s)
+        assert s.find(u'abc') == 0
+        assert s.find(u'abc', 1) == 9
+        assert s.find(u'def', 4) == -1
+        assert s.find(u'X', 0, 1000) == 12
+        assert s.find(u'a', 200) == -1
+        assert s.find(u'', 200) == -1
+        assert s.rfind(u'abc') == 9
+        assert s.rfind(u'') == 112
+        assert s.rfind(u'abc', 0, 1000) == 9
+        assert s.count(u'abc') == 2
+        assert s.count(u'abc', 0, 1000) == 2
+        assert self.not_forced(s)
+
+    def test_does_not_see_parent(self):
+        s = (u'abc' + u'X' * 100 + u'abc')[3:-3]
+        assert s.find(u'abc') == -1
+        assert s.rfind(u'abc', -1000, 1000) == -1
+        assert s.count(u'abc', 0, 1000) == 0
+        assert not s.endswith(u'abc', 0, 1000)
+        assert not s.startswith(u'abc', -1000)
+        assert u'abc' not in s
+
+    def test_index(self):
+        import sys
+        m = sys.maxint
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'abcdefghiabc' * 20)
+        assert s.index(u'') == 0
+        assert s.index(u'def') == 3
+        assert s.index(u'abc', 1) == 9
+        assert s.index(u'def', -4*m, 4*m) == 3
+        assert s.rindex(u'abc') == 237
+        raises(ValueError, s.index, u'hib')
+        raises(ValueError, s.rindex, u'hib')
+        raises(ValueError, slice(u'abcdefghi' + u"X" * 100).index, u'ghi', 8)
+
+    def test_startswith_endswith(self):
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'abc' + u'X' * 100 + u'xyz')
+        assert s.startswith(u'abc')
+        assert s.startswith((u'q', u'abc'))
+        assert s.startswith(u'X', 3)
+        assert s.endswith(u'xyz')
+        assert s.endswith((u'q', u'xyz'))
+        assert s.endswith(u'X', 0, -3)
+        assert not s.endswith(u'abc')
+        assert self.not_forced(s)
+
+    def test_hash_forces(self):
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'a' * 101)
+        assert self.not_forced(s)
+        assert hash(s) == hash(u'a' * 101)
+        assert not self.not_forced(s)
+        d = {s: 1}
+        assert d[u'a' * 101] == 1
+
+    def test_unicode_subclass(self):
+        class U(unicode):
+            pass
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'a' * 101)
+        u = U(s)
+        assert type(u) is U
+        assert u == u'a' * 101
+
+    def test_int_long_float(self):
+        import __pypy__
+        def slice(s): return (s*3)[len(s):-len(s)]
+        s = slice(u'1' * 200)
+        assert 'W_UnicodeSliceObject' in __pypy__.internal_repr(s)
+        assert int(s) == int('1' * 200)
+        assert long(s, 2) == long('1' * 200, 2)
+        assert float(s) == float('1' * 200)
+        t = (u'1' * 200)[1:]
+        assert 'W_UnicodeSliceObject' in __pypy__.internal_repr(t)
+        assert int(t) == int('1' * 199)
+        assert long(t) == long('1' * 199)
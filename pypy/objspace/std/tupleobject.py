@@ -23,6 +23,24 @@ class W_AbstractTupleObject(W_Object):
         "Returns a copy of the items, as a resizable list."
         raise NotImplementedError
 
+    def length(self):
+        "Returns the number of items."
+        raise NotImplementedError
+
+    def getitem(self, index):
+        "Returns the item at 'index', wrapped."
+        raise NotImplementedError
+
+    def getitems_int(self):
+        """Returns a copy of the items as a resizable list of unwrapped ints,
+        if the tuple stores them unboxed.  Returns None otherwise."""
+        return None
+
+    def getitems_float(self):
+        """Returns a copy of the items as a resizable list of unwrapped
+        floats, if the tuple stores them unboxed.  Returns None otherwise."""
+        return None
+
 
 class W_TupleObject(W_AbstractTupleObject):
     from pypy.objspace.std.tupletype import tuple_typedef as typedef
@@ -47,6 +65,12 @@ class W_TupleObject(W_AbstractTupleObject):
     def getitems_copy(self):
         return self.wrappeditems[:]   # returns a resizable list
 
+    def length(self):
+        return len(self.wrappeditems)
+
+    def getitem(self, index):
+        return self.wrappeditems[index]
+
 registerimplementation(W_TupleObject)
 
 
@@ -13,6 +13,13 @@ def wraptuple(space, list_w):
         except NotSpecialised:
             pass
 
+    if space.config.objspace.std.withunboxedtuple:
+        from unboxedtupleobject import makeunboxedtuple, NotUnboxed
+        try:
+            return makeunboxedtuple(space, list_w)
+        except NotUnboxed:
+            pass
+
     if space.config.objspace.std.withsmalltuple:
         from pypy.objspace.std.smalltupleobject import W_SmallTupleObject2
         from pypy.objspace.std.smalltupleobject import W_SmallTupleObject3
@@ -53,6 +60,12 @@ def descr__new__(space, w_tupletype, w_sequence=gateway.NoneNotWrapped):
           space.is_w(space.type(w_sequence), space.w_tuple)):
         return w_sequence
     else:
+        if (space.config.objspace.std.withunboxedtuple and
+                space.is_w(w_tupletype, space.w_tuple)):
+            from unboxedtupleobject import unboxedtuple_from_list
+            w_obj = unboxedtuple_from_list(space, w_sequence)
+            if w_obj is not None:
+                return w_obj
         tuple_w = space.fixedview(w_sequence)
     w_obj = space.allocate_instance(W_TupleObject, w_tupletype)
     W_TupleObject.__init__(w_obj, tuple_w)
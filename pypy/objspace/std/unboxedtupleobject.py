@@ -0,0 +1,322 @@
+from pypy.interpreter.error import OperationError
+from pypy.objspace.std.model import registerimplementation
+from pypy.objspace.std.register_all import register_all
+from pypy.objspace.std.multimethod import FailedToImplement
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.tupleobject import W_TupleObject, UNROLL_TUPLE_LIMIT
+from pypy.objspace.std.sliceobject import W_SliceObject, normalize_simple_slice
+from pypy.objspace.std.listobject import is_W_IntObject, is_W_FloatObject
+from pypy.objspace.std.listobject import W_ListObject
+from pypy.rlib.rarithmetic import intmask
+from pypy.rlib.rfloat import isnan
+from pypy.rlib.debug import make_sure_not_resized
+from pypy.rlib import jit
+
+# Tuples of any length whose items are all exact ints, or all exact floats,
+# store them unboxed in a fixed-size RPython list.  NaNs are never stored
+# unboxed, because a tuple containing a NaN is only equal to another one
+# if the NaN is the very same object.
+
+class NotUnboxed(Exception):
+    pass
+
+class W_UnboxedTupleObject(W_AbstractTupleObject):
+    from pypy.objspace.std.tupletype import tuple_typedef as typedef
+    __slots__ = []
+
+    def __repr__(self):
+        """ representation for debugging purposes """
+        reprlist = [repr(item) for item in self._to_unwrapped_list()]
+        return "%s(%s)" % (self.__class__.__name__, ', '.join(reprlist))
+
+    def _to_unwrapped_list(self):
+        "NOT_RPYTHON"
+        raise NotImplementedError
+
+    def length(self):
+        raise NotImplementedError
+
+    def getitem(self, index):
+        raise NotImplementedError
+
+    def getslice(self, start, step, slicelength):
+        raise NotImplementedError
+
+    def contains(self, space, w_obj):
+        raise NotImplementedError
+
+    def concat(self, w_other):
+        raise NotImplementedError
+
+    def mul(self, times):
+        raise NotImplementedError
+
+    def hash(self, space):
+        raise NotImplementedError
+
+    def eq(self, space, w_other):
+        raise NotImplementedError
+
+    def unwrap(self, space):
+        return tuple(self._to_unwrapped_list())
+
+    def delegating(self):
+        pass     # for tests only
+
+
+def make_unboxed_class(itemtype):
+    if itemtype is int:
+        def hash_item(space, value):
+            # consistent with hash__Int()
+            return value
+    elif itemtype is float:
+        def hash_item(space, value):
+            from pypy.objspace.std.floatobject import _hash_float
+            return _hash_float(space, value)
+    else:
+        raise AssertionError(itemtype)
+
+    def unroll_condition(space, items):
+        return (jit.isconstant(len(items)) and
+                len(items) < UNROLL_TUPLE_LIMIT)
+
+    def unroll_condition_self(self):
+        return unroll_condition(None, self.items)
+
+    @jit.look_inside_iff(unroll_condition)
+    def hash_items(space, items):
+        # the same algorithm as hash_tuple() in tupleobject.py
+        mult = 1000003
+        x = 0x345678
+        z = len(items)
+        for value in items:
+            y = hash_item(space, value)
+            x = (x ^ y) * mult
+            z -= 1
+            mult += 82520 + z + z
+        x += 97531
+        return intmask(x)
+
+    @jit.look_inside_iff(lambda items1, items2:
+                         unroll_condition(None, items1))
+    def eq_items(items1, items2):
+        if len(items1) != len(items2):
+            return False
+        for i in range(len(items1)):
+            if items1[i] != items2[i]:
+                return False
+        return True
+
+    class cls(W_UnboxedTupleObject):
+        _immutable_fields_ = ['items[*]']
+
+        def __init__(self, space, items):
+            make_sure_not_resized(items)
+            self.space = space
+            self.items = items
+
+        def length(self):
+            return len(self.items)
+
+        @jit.look_inside_iff(unroll_condition_self)
+        def tolist(self):
+            items = self.items
+            list_w = [None] * len(items)
+            for i in range(len(items)):
+                list_w[i] = self.space.wrap(items[i])
+            return list_w
+
+        @jit.look_inside_iff(unroll_condition_self)
+        def getitems_copy(self):
+            return [self.space.wrap(value) for value in self.items]
+
+        def _to_unwrapped_list(self):
+            "NOT_RPYTHON"
+            return list(self.items)
+
+        def getitem(self, index):
+            return self.space.wrap(self.items[index])
+
+        @jit.look_inside_iff(lambda self, start, step, slicelength:
+                             jit.isconstant(slicelength) and
+                             slicelength < UNROLL_TUPLE_LIMIT)
+        def getslice(self, start, step, slicelength):
+            items = self.items
+            subitems = [itemtype(0)] * slicelength
+            for i in range(slicelength):
+                subitems[i] = items[start]
+                start += step
+            return cls(self.space, subitems)
+
+        def contains(self, space, w_obj):
+            if itemtype is int and is_W_IntObject(w_obj):
+                return space.int_w(w_obj) in self.items
+            if itemtype is float and is_W_FloatObject(w_obj):
+                return space.float_w(w_obj) in self.items
+            for value in self.items:
+                if space.eq_w(space.wrap(value), w_obj):
+                    return True
+            return False
+
+        def concat(self, w_other):
+            if not isinstance(w_other, cls):
+                raise FailedToImplement
+            return cls(self.space, self.items + w_other.items)
+
+        def mul(self, times):
+            return cls(self.space, self.items * times)
+
+        def hash(self, space):
+            return space.wrap(hash_items(space, self.items))
+
+        def eq(self, space, w_other):
+            if not isinstance(w_other, cls):
+                # if we are not comparing same types, give up
+                raise FailedToImplement
+            return eq_items(self.items, w_other.items)
+
+    if itemtype is int:
+        def getitems_int(self):
+            return self.items[:]
+        cls.getitems_int = getitems_int
+    else:
+        def getitems_float(self):
+            return self.items[:]
+        cls.getitems_float = getitems_float
+
+    cls.__name__ = 'W_UnboxedTupleObject_' + itemtype.__name__
+    return cls
+
+W_IntTupleObject = make_unboxed_class(int)
+W_FloatTupleObject = make_unboxed_class(float)
+
+# like for W_TupleObject, the loops below are unrolled by the JIT for the
+# small tuples of constant length, so that these tuples can stay virtual
+
+def _unroll_condition(space, list_w):
+    return jit.isconstant(len(list_w)) and len(list_w) < UNROLL_TUPLE_LIMIT
+
+@jit.look_inside_iff(_unroll_condition)
+def makeunboxedtuple(space, list_w):
+    length = len(list_w)
+    if length == 0:
+        raise NotUnboxed
+    w_first = list_w[0]
+    if is_W_IntObject(w_first):
+        intitems = [0] * length
+        for i in range(length):
+            w_item = list_w[i]
+            if not is_W_IntObject(w_item):
+                raise NotUnboxed
+            intitems[i] = space.int_w(w_item)
+        return W_IntTupleObject(space, intitems)
+    if is_W_FloatObject(w_first):
+        floatitems = [0.0] * length
+        for i in range(length):
+            w_item = list_w[i]
+            if not is_W_FloatObject(w_item):
+                raise NotUnboxed
+            value = space.float_w(w_item)
+            if isnan(value):
+                raise NotUnboxed
+            floatitems[i] = value
+        return W_FloatTupleObject(space, floatitems)
+    raise NotUnboxed
+
+def unboxedtuple_from_list(space, w_list):
+    """Builds the unboxed tuple with the same items as 'w_list', if the
+    list strategy already stores them unboxed.  Returns None otherwise."""
+    if type(w_list) is not W_ListObject:
+        return None
+    intlist = w_list.getitems_int()
+    if intlist is not None and intlist:
+        return W_IntTupleObject(space, intlist[:])
+    floatlist = w_list.getitems_float()
+    if floatlist is not None and floatlist:
+        if _contains_nan(space, floatlist):
+            return None
+        return W_FloatTupleObject(space, floatlist[:])
+    return None
+
+@jit.look_inside_iff(_unroll_condition)
+def _contains_nan(space, floatlist):
+    for value in floatlist:
+        if isnan(value):
+            return True
+    return False
+
+# ____________________________________________________________
+
+registerimplementation(W_UnboxedTupleObject)
+
+def delegate_UnboxedTuple2Tuple(space, w_unboxed):
+    w_unboxed.delegating()
+    return W_TupleObject(w_unboxed.tolist())
+
+def len__UnboxedTuple(space, w_tuple):
+    return space.wrap(w_tuple.length())
+
+def getitem__UnboxedTuple_ANY(space, w_tuple, w_index):
+    index = space.getindex_w(w_index, space.w_IndexError, "tuple index")
+    if index < 0:
+        index += w_tuple.length()
+    if not 0 <= index < w_tuple.length():
+        raise OperationError(space.w_IndexError,
+                             space.wrap("tuple index out of range"))
+    return w_tuple.getitem(index)
+
+def getitem__UnboxedTuple_Slice(space, w_tuple, w_slice):
+    length = w_tuple.length()
+    start, stop, step, slicelength = w_slice.indices4(space, length)
+    assert slicelength >= 0
+    if slicelength == 0:
+        return space.newtuple([])
+    return w_tuple.getslice(start, step, slicelength)
+
+def getslice__UnboxedTuple_ANY_ANY(space, w_tuple, w_start, w_stop):
+    length = w_tuple.length()
+    start, stop = normalize_simple_slice(space, length, w_start, w_stop)
+    if start == stop:
+        return space.newtuple([])
+    return w_tuple.getslice(start, 1, stop - start)
+
+def contains__UnboxedTuple_ANY(space, w_tuple, w_obj):
+    return space.newbool(w_tuple.contains(space, w_obj))
+
+def iter__UnboxedTuple(space, w_tuple):
+    from pypy.objspace.std import iterobject
+    return iterobject.W_FastTupleIterObject(w_tuple, w_tuple.tolist())
+
+def add__UnboxedTuple_UnboxedTuple(space, w_tuple1, w_tuple2):
+    return w_tuple1.concat(w_tuple2)
+
+def mul_unboxedtuple_times(space, w_tuple, w_times):
+    try:
+        times = space.getindex_w(w_times, space.w_OverflowError)
+    except OperationError, e:
+        if e.match(space, space.w_TypeError):
+            raise FailedToImplement
+        raise
+    if times == 1 and space.type(w_tuple) == space.w_tuple:
+        return w_tuple
+    if times <= 0:
+        return space.newtuple([])
+    return w_tuple.mul(times)
+
+def mul__UnboxedTuple_ANY(space, w_tuple, w_times):
+    return mul_unboxedtuple_times(space, w_tuple, w_times)
+
+def mul__ANY_UnboxedTuple(space, w_times, w_tuple):
+    return mul_unboxedtuple_times(space, w_tuple, w_times)
+
+def eq__UnboxedTuple_UnboxedTuple(space, w_tuple1, w_tuple2):
+    return space.newbool(w_tuple1.eq(space, w_tuple2))
+
+def ne__UnboxedTuple_UnboxedTuple(space, w_tuple1, w_tuple2):
+    return space.newbool(not w_tuple1.eq(space, w_tuple2))
+
+def hash__UnboxedTuple(space, w_tuple):
+    return w_tuple.hash(space)
+
+from pypy.objspace.std import tupletype
+register_all(vars(), tupletype)
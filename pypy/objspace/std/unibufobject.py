@@ -0,0 +1,70 @@
+from pypy.objspace.std.model import registerimplementation
+from pypy.objspace.std.register_all import register_all
+from pypy.objspace.std.unicodeobject import W_AbstractUnicodeObject
+from pypy.objspace.std.unicodeobject import W_UnicodeObject
+from pypy.rlib.rstring import UnicodeBuilder
+
+class W_UnicodeBufferObject(W_AbstractUnicodeObject):
+    from pypy.objspace.std.unicodetype import unicode_typedef as typedef
+
+    w_uni = None
+
+    def __init__(self, builder):
+        self.builder = builder             # UnicodeBuilder
+        self.length = builder.getlength()
+
+    def force(self):
+        if self.w_uni is None:
+            s = self.builder.build()
+            if self.length < len(s):
+                s = s[:self.length]
+            self.w_uni = W_UnicodeObject(s)
+            return s
+        else:
+            return self.w_uni._value
+
+    def __repr__(w_self):
+        """ representation for debugging purposes """
+        return "%s(%r[:%d])" % (
+            w_self.__class__.__name__, w_self.builder, w_self.length)
+
+    def unwrap(self, space):
+        return self.force()
+
+    def unicode_w(self, space):
+        return self.force()
+
+    def str_w(self, space):
+        return space.str_w(space.str(self))
+
+registerimplementation(W_UnicodeBufferObject)
+
+# ____________________________________________________________
+
+def joined2(uni1, uni2):
+    builder = UnicodeBuilder()
+    builder.append(uni1)
+    builder.append(uni2)
+    return W_UnicodeBufferObject(builder)
+
+# ____________________________________________________________
+
+def delegate_buf2unicode(space, w_unibuf):
+    w_unibuf.force()
+    return w_unibuf.w_uni
+
+def len__UnicodeBuffer(space, w_self):
+    return space.wrap(w_self.length)
+
+def add__UnicodeBuffer_Unicode(space, w_self, w_other):
+    if w_self.builder.getlength() != w_self.length:
+        # somebody already appended to our builder: start a new one
+        builder = UnicodeBuilder()
+        builder.append(w_self.force())
+    else:
+        builder = w_self.builder
+    builder.append(w_other._value)
+    return W_UnicodeBufferObject(builder)
+
+from pypy.objspace.std import unicodetype
+register_all(vars(), unicodetype)
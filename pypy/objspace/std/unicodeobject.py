@@ -71,11 +71,11 @@ registerimplementation(W_UnicodeObject)
 
 # Helper for converting int/long
 def unicode_to_decimal_w(space, w_unistr):
-    if not isinstance(w_unistr, W_UnicodeObject):
+    if not space.isinstance_w(w_unistr, space.w_unicode):
         raise operationerrfmt(space.w_TypeError,
                               "expected unicode, got '%s'",
                               space.type(w_unistr).getname(space))
-    unistr = w_unistr._value
+    unistr = space.unicode_w(w_unistr)
     result = ['\0'] * len(unistr)
     digits = [ '0', '1', '2', '3', '4',
                '5', '6', '7', '8', '9']
@@ -161,6 +161,9 @@ def getnewargs__Unicode(space, w_uni):
     return space.newtuple([W_UnicodeObject(w_uni._value)])
 
 def add__Unicode_Unicode(space, w_left, w_right):
+    if space.config.objspace.std.withunicodebuf:
+        from pypy.objspace.std.unibufobject import joined2
+        return joined2(w_left._value, w_right._value)
     return W_UnicodeObject(w_left._value + w_right._value)
 
 def add__String_Unicode(space, w_left, w_right):
@@ -201,6 +204,11 @@ def contains__Unicode_Unicode(space, w_container, w_item):
     return space.newbool(container.find(item) != -1)
 
 def unicode_join__Unicode_ANY(space, w_self, w_list):
+    l = space.listview_unicode(w_list)
+    if l is not None:
+        if len(l) == 1:
+            return space.wrap(l[0])
+        return space.wrap(w_self._value.join(l))
     list_w = space.listview(w_list)
     size = len(list_w)
 
@@ -273,6 +281,8 @@ def getitem__Unicode_Slice(space, w_uni, w_slice):
         r = u""
     elif step == 1:
         assert start >= 0 and stop >= 0
+        if space.config.objspace.std.withunicodeslice:
+            return sliced(space, uni, start, stop, w_uni)
         r = uni[start:stop]
     else:
         r = u"".join([uni[start + i*step] for i in range(sl)])
@@ -281,6 +291,8 @@ def getitem__Unicode_Slice(space, w_uni, w_slice):
 def getslice__Unicode_ANY_ANY(space, w_uni, w_start, w_stop):
     uni = w_uni._value
     start, stop = normalize_simple_slice(space, len(uni), w_start, w_stop)
+    if space.config.objspace.std.withunicodeslice:
+        return sliced(space, uni, start, stop, w_uni)
     return W_UnicodeObject(uni[start:stop])
 
 def mul__Unicode_ANY(space, w_uni, w_times):
@@ -741,6 +753,12 @@ def sliced(space, s, start, stop, orig_obj):
     assert stop >= 0
     if start == 0 and stop == len(s) and space.is_w(space.type(orig_obj), space.w_unicode):
         return orig_obj
+    if space.config.objspace.std.withunicodeslice:
+        from pypy.objspace.std.unisliceobject import W_UnicodeSliceObject
+        # only share 's' if the slice is a large enough part of it, so that
+        # small slices don't keep a huge parent alive
+        if (stop - start) > len(s) * 0.20 + 40:
+            return W_UnicodeSliceObject(s, start, stop)
     return space.wrap( s[start:stop])
 
 unicode_rsplit__Unicode_Unicode_ANY = make_rsplit_with_delim('unicode_rsplit__Unicode_Unicode_ANY',
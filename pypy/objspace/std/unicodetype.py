@@ -367,9 +367,8 @@ def descr_new_(space, w_unicodetype, w_string='', w_encoding=None, w_errors=None
         W_RopeUnicodeObject.__init__(w_newobj, w_value._node)
         return w_newobj
 
-    assert isinstance(w_value, W_UnicodeObject)
     w_newobj = space.allocate_instance(W_UnicodeObject, w_unicodetype)
-    W_UnicodeObject.__init__(w_newobj, w_value._value)
+    W_UnicodeObject.__init__(w_newobj, space.unicode_w(w_value))
     return w_newobj
 
 # ____________________________________________________________
@@ -0,0 +1,188 @@
+from pypy.interpreter.error import OperationError
+from pypy.objspace.std.model import registerimplementation
+from pypy.objspace.std.register_all import register_all
+from pypy.objspace.std.unicodeobject import W_AbstractUnicodeObject
+from pypy.objspace.std.unicodeobject import W_UnicodeObject, sliced
+from pypy.objspace.std.sliceobject import W_SliceObject, normalize_simple_slice
+from pypy.objspace.std.tupleobject import W_TupleObject
+from pypy.objspace.std import slicetype
+from pypy.objspace.std.stringtype import stringendswith, stringstartswith
+from pypy.rlib.objectmodel import specialize
+
+
+class W_UnicodeSliceObject(W_AbstractUnicodeObject):
+    from pypy.objspace.std.unicodetype import unicode_typedef as typedef
+
+    def __init__(w_self, uni, start, stop):
+        assert start >= 0
+        assert stop >= 0
+        w_self.uni = uni
+        w_self.start = start
+        w_self.stop = stop
+
+    def force(w_self):
+        if w_self.start == 0 and w_self.stop == len(w_self.uni):
+            return w_self.uni
+        # copy the slice and drop the reference to the parent, which
+        # can then be freed
+        uni = w_self.uni[w_self.start:w_self.stop]
+        w_self.uni = uni
+        w_self.start = 0
+        w_self.stop = len(uni)
+        return uni
+
+    def unicode_w(w_self, space):
+        return w_self.force()
+
+    def str_w(w_self, space):
+        return space.str_w(space.str(w_self))
+
+    def unwrap(w_self, space):
+        # for testing
+        return w_self.force()
+
+    def __repr__(w_self):
+        """ representation for debugging purposes """
+        return "%s(%r[%d:%d])" % (w_self.__class__.__name__,
+                                  w_self.uni, w_self.start, w_self.stop)
+
+
+registerimplementation(W_UnicodeSliceObject)
+
+
+def delegate_slice2unicode(space, w_unislice):
+    return W_UnicodeObject(w_unislice.force())
+
+# ____________________________________________________________
+
+def contains__UnicodeSlice_Unicode(space, w_self, w_sub):
+    sub = w_sub._value
+    return space.newbool(w_self.uni.find(sub, w_self.start, w_self.stop) >= 0)
+
+
+@specialize.arg(4)
+def _convert_idx_params(space, w_self, w_start, w_end, upper_bound=False):
+    length = w_self.stop - w_self.start
+    start, end = slicetype.unwrap_start_stop(
+            space, length, w_start, w_end, upper_bound)
+    # never look past the end of the slice in the parent
+    if end > length:
+        end = length
+
+    assert start >= 0
+    assert end >= 0
+
+    return (w_self.uni, w_self.start + start, w_self.start + end)
+
+
+def unicode_find__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_sub,
+                                               w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self, w_start, w_end)
+    res = self.find(w_sub._value, start, end)
+    if res >= 0:
+        res -= w_self.start
+    return space.wrap(res)
+
+def unicode_rfind__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_sub,
+                                                w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self, w_start, w_end)
+    res = self.rfind(w_sub._value, start, end)
+    if res >= 0:
+        res -= w_self.start
+    return space.wrap(res)
+
+def unicode_index__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_sub,
+                                                w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self, w_start, w_end)
+    res = self.find(w_sub._value, start, end)
+    if res < 0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap('substring not found'))
+    return space.wrap(res - w_self.start)
+
+def unicode_rindex__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_sub,
+                                                 w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self, w_start, w_end)
+    res = self.rfind(w_sub._value, start, end)
+    if res < 0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap('substring not found'))
+    return space.wrap(res - w_self.start)
+
+def unicode_count__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_sub,
+                                                w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self, w_start, w_end)
+    return space.wrap(self.count(w_sub._value, start, end))
+
+def unicode_endswith__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_suffix,
+                                                   w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self,
+                                           w_start, w_end, True)
+    return space.newbool(stringendswith(self, w_suffix._value, start, end))
+
+def unicode_startswith__UnicodeSlice_Unicode_ANY_ANY(space, w_self, w_prefix,
+                                                     w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self,
+                                           w_start, w_end, True)
+    return space.newbool(stringstartswith(self, w_prefix._value, start, end))
+
+def unicode_endswith__UnicodeSlice_Tuple_ANY_ANY(space, w_self, w_suffixes,
+                                                 w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self,
+                                           w_start, w_end, True)
+    for w_suffix in space.fixedview(w_suffixes):
+        suffix = space.unicode_w(w_suffix)
+        if stringendswith(self, suffix, start, end):
+            return space.w_True
+    return space.w_False
+
+def unicode_startswith__UnicodeSlice_Tuple_ANY_ANY(space, w_self, w_prefixes,
+                                                   w_start, w_end):
+    self, start, end = _convert_idx_params(space, w_self,
+                                           w_start, w_end, True)
+    for w_prefix in space.fixedview(w_prefixes):
+        prefix = space.unicode_w(w_prefix)
+        if stringstartswith(self, prefix, start, end):
+            return space.w_True
+    return space.w_False
+
+def getitem__UnicodeSlice_ANY(space, w_uni, w_index):
+    ival = space.getindex_w(w_index, space.w_IndexError, "string index")
+    ulen = w_uni.stop - w_uni.start
+    if ival < 0:
+        ival += ulen
+    if ival < 0 or ival >= ulen:
+        raise OperationError(space.w_IndexError,
+                             space.wrap("unicode index out of range"))
+    return W_UnicodeObject(w_uni.uni[w_uni.start + ival])
+
+def getitem__UnicodeSlice_Slice(space, w_uni, w_slice):
+    length = w_uni.stop - w_uni.start
+    start, stop, step, sl = w_slice.indices4(space, length)
+    if sl == 0:
+        return W_UnicodeObject.EMPTY
+    uni = w_uni.uni
+    start = w_uni.start + start
+    if step == 1:
+        stop = w_uni.start + stop
+        assert start >= 0 and stop >= 0
+        return sliced(space, uni, start, stop, w_uni)
+    r = u"".join([uni[start + i*step] for i in range(sl)])
+    return W_UnicodeObject(r)
+
+def getslice__UnicodeSlice_ANY_ANY(space, w_uni, w_start, w_stop):
+    length = w_uni.stop - w_uni.start
+    start, stop = normalize_simple_slice(space, length, w_start, w_stop)
+    if start == stop:
+        return W_UnicodeObject.EMPTY
+    start = w_uni.start + start
+    stop = w_uni.start + stop
+    assert start >= 0 and stop >= 0
+    return sliced(space, w_uni.uni, start, stop, w_uni)
+
+def len__UnicodeSlice(space, w_uni):
+    return space.wrap(w_uni.stop - w_uni.start)
+
+
+from pypy.objspace.std import unicodetype
+register_all(vars(), unicodetype)
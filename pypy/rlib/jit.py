@@ -402,6 +402,8 @@ PARAMETER_DOCS = {
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'compile_budget': 'maximum percentage of the time spent tracing and compiling; beyond it, hot loops and guards wait before being traced (100 = no limit)',
+    'code_memory_limit': 'maximum size in KB of the machine code of the loops kept alive; beyond it, the loops entered the least often for their size are freed first (0 = no limit)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
@@ -415,6 +417,8 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
+              'compile_budget': 100,
+              'code_memory_limit': 0,
               'retrace_limit': 5,
               'max_retrace_guards': 15,
               'max_unroll_loops': 4,
@@ -526,6 +530,13 @@ class JitDriver(object):
         # special-cased by ExtRegistryEntry
         pass
 
+    def mark_hot(_self, **greens):
+        """Make the next can_enter_jit() with these green variables start
+        tracing, as if the threshold had been reached.  Must be called
+        from outside the code seen by the JIT."""
+        # special-cased by ExtRegistryEntry
+        assert dict.fromkeys(greens) == dict.fromkeys(_self.greens)
+
     def _make_extregistryentries(self):
         # workaround: we cannot declare ExtRegistryEntries for functions
         # used as methods of a frozen object, but we can attach the
@@ -534,12 +545,16 @@ class JitDriver(object):
         self.jit_merge_point = self.jit_merge_point
         self.can_enter_jit = self.can_enter_jit
         self.loop_header = self.loop_header
+        self.mark_hot = self.mark_hot
         class Entry(ExtEnterLeaveMarker):
             _about_ = (self.jit_merge_point, self.can_enter_jit)
 
         class Entry(ExtLoopHeader):
             _about_ = self.loop_header
 
+        class Entry(ExtMarkHot):
+            _about_ = self.mark_hot
+
 def _set_param(driver, name, value):
     # special-cased by ExtRegistryEntry
     # (internal, must receive a constant 'name')
@@ -761,6 +776,27 @@ class ExtLoopHeader(ExtRegistryEntry):
         return hop.genop('jit_marker', vlist,
                          resulttype=lltype.Void)
 
+class ExtMarkHot(ExtRegistryEntry):
+    # Replace a call to myjitdriver.mark_hot(**greens)
+    # with an operation jit_marker('mark_hot', myjitdriver, *greens).
+
+    def compute_result_annotation(self, **kwds_s):
+        from pypy.annotation import model as annmodel
+        return annmodel.s_None
+
+    def specialize_call(self, hop, **kwds_i):
+        from pypy.rpython.lltypesystem import lltype
+        driver = self.instance.im_self
+        vlist = [hop.inputconst(lltype.Void, 'mark_hot'),
+                 hop.inputconst(lltype.Void, driver)]
+        for name in driver.greens:
+            assert '.' not in name, "mark_hot() does not support green fields"
+            i = kwds_i['i_' + name]
+            vlist.append(hop.inputarg(hop.args_r[i], arg=i))
+        hop.exception_cannot_occur()
+        return hop.genop('jit_marker', vlist,
+                         resulttype=lltype.Void)
+
 class ExtSetParam(ExtRegistryEntry):
     _about_ = _set_param
 
@@ -18,6 +18,9 @@ r_longlong
          like r_int but double word size
 r_ulonglong
          like r_uint but double word size
+r_longlonglong
+         like r_longlong but double the size again (128 bits); only
+         translatable with C compilers that provide __int128
 widen(x)
          if x is of a type smaller than lltype.Signed or
          lltype.Unsigned, widen it to lltype.Signed.
@@ -82,6 +85,10 @@ LONGLONG_BIT  = 64
 LONGLONG_MASK = (2**LONGLONG_BIT)-1
 LONGLONG_TEST = 2**(LONGLONG_BIT-1)
 
+LONGLONGLONG_BIT  = 128
+LONGLONGLONG_MASK = (2**LONGLONGLONG_BIT)-1
+LONGLONGLONG_TEST = 2**(LONGLONGLONG_BIT-1)
+
 LONG_BIT_SHIFT = 0
 while (1 << LONG_BIT_SHIFT) != LONG_BIT:
     LONG_BIT_SHIFT += 1
@@ -116,6 +123,14 @@ def longlongmask(n):
         n -= 2*LONGLONG_TEST
     return r_longlong(n)
 
+def longlonglongmask(n):
+    assert isinstance(n, (int, long))
+    n = long(n)
+    n &= LONGLONGLONG_MASK
+    if n >= LONGLONGLONG_TEST:
+        n -= 2*LONGLONGLONG_TEST
+    return r_longlonglong(n)
+
 def widen(n):
     from pypy.rpython.lltypesystem import lltype
     if _should_widen_type(lltype.typeOf(n)):
@@ -210,9 +225,11 @@ def normalizedinttype(t):
         return int
     if t.BITS <= r_int.BITS:
         return build_int(None, t.SIGNED, r_int.BITS)
-    else:
-        assert t.BITS <= r_longlong.BITS
+    elif t.BITS <= r_longlong.BITS:
         return build_int(None, t.SIGNED, r_longlong.BITS)
+    else:
+        assert t.BITS <= r_longlonglong.BITS
+        return build_int(None, t.SIGNED, r_longlonglong.BITS)
 
 def most_neg_value_of_same_type(x):
     from pypy.rpython.lltypesystem import lltype
@@ -471,6 +488,15 @@ r_ulonglong = build_int('r_ulonglong', False, 64)
 
 longlongmax = r_longlong(LONGLONG_TEST - 1)
 
+# double-word intermediate results of rbigint on 64-bit hosts; see
+# SUPPORT_INT128 for when the C backend can translate them
+r_longlonglong = build_int('r_longlonglong', True, 128)
+longlonglongmax = r_longlonglong(LONGLONGLONG_TEST - 1)
+
+# the C type '__int128' is provided by gcc and clang on 64-bit targets,
+# but not by MSVC (which is also the case of the emulated 64-bit long)
+SUPPORT_INT128 = LONG_BIT == 64 and not is_emulated_long
+
 if r_longlong is not r_int:
     r_int64 = r_longlong
 else:
@@ -1,6 +1,7 @@
 from pypy.rlib.rarithmetic import LONG_BIT, intmask, r_uint, r_ulonglong
 from pypy.rlib.rarithmetic import ovfcheck, r_longlong, widen, is_valid_int
 from pypy.rlib.rarithmetic import most_neg_value_of_same_type
+from pypy.rlib.rarithmetic import r_longlonglong, SUPPORT_INT128
 from pypy.rlib.rfloat import isfinite
 from pypy.rlib.debug import make_sure_not_resized, check_regular_int
 from pypy.rlib.objectmodel import we_are_translated, specialize
@@ -13,9 +14,18 @@ import math, sys
 # note about digit sizes:
 # In division, the native integer type must be able to hold
 # a sign bit plus two digits plus 1 overflow bit.
-
-#SHIFT = (LONG_BIT // 2) - 1
-SHIFT = 31
+#
+# If the C compiler has a 128-bit integer type, the digits are 63 bits,
+# stored in a machine word, and the intermediate results are
+# r_longlonglong.  Otherwise they are 31 bits, stored in a C int, and
+# the intermediate results are r_longlong.
+
+if SUPPORT_INT128:
+    SHIFT = 63
+    STORE_TYPE = lltype.Signed
+else:
+    SHIFT = 31
+    STORE_TYPE = rffi.INT
 
 MASK = int((1 << SHIFT) - 1)
 FLOAT_MULTIPLIER = float(1 << SHIFT)
@@ -30,11 +40,30 @@ FLOAT_MULTIPLIER = float(1 << SHIFT)
 # For long multiplication, use the O(N**2) school algorithm unless
 # both operands contain more than KARATSUBA_CUTOFF digits (this
 # being an internal Python long digit, in base BASE).
+#
+# All the cutoffs below are numbers of digits, which were tuned with
+# 31-bit digits: 63-bit digits reach the same sizes with half as many.
 
 USE_KARATSUBA = True # set to False for comparison
-KARATSUBA_CUTOFF = 70
+KARATSUBA_CUTOFF = 70 * 31 // SHIFT
 KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
+# For even larger operands of comparable sizes, use Toom-Cook 3-way
+# multiplication: 5 multiplications of numbers a third of the size,
+# instead of the 9 that Karatsuba would need.
+
+TOOM_CUTOFF = 300 * 31 // SHIFT
+
+# Division of numbers whose quotient has more than DIV_LIMIT digits uses
+# the recursive algorithm of Burnikel and Ziegler, on top of the
+# multiplication above.  The conversions to and from strings in a base
+# that is not a power of 2 are divide-and-conquer too above a similar
+# size, so that they are not quadratic either.
+
+DIV_LIMIT = 150 * 31 // SHIFT
+FORMAT_RECURSIVE_CUTOFF = 150 * 31 // SHIFT
+FROMSTR_RECURSIVE_CUTOFF = 150 * 31 // SHIFT
+
 # For exponentiation, use the binary left-to-right algorithm
 # unless the exponent contains more than FIVEARY_CUTOFF digits.
 # In that case, do 5 bits at a time.  The potential drawback is that
@@ -52,17 +81,14 @@ def _widen_digit(x):
         assert is_valid_int(x), "widen_digit() takes an int, got a %r" % type(x)
     if SHIFT <= 15:
         return int(x)
-    return r_longlong(x)
+    elif SHIFT <= 31:
+        return r_longlong(x)
+    return r_longlonglong(x)
 
 def _store_digit(x):
     if not we_are_translated():
         assert is_valid_int(x), "store_digit() takes an int, got a %r" % type(x)
-    if SHIFT <= 15:
-        return rffi.cast(rffi.SHORT, x)
-    elif SHIFT <= 31:
-        return rffi.cast(rffi.INT, x)
-    else:
-        raise ValueError("SHIFT too large!")
+    return rffi.cast(STORE_TYPE, x)
 
 def _load_digit(x):
     return rffi.cast(lltype.Signed, x)
@@ -563,7 +589,7 @@ class rbigint(object):
         while i < newsize:
             newdigit = (self.digit(j) >> loshift) & lomask
             if i+1 < newsize:
-                newdigit |= intmask(self.digit(j+1) << hishift) & himask
+                newdigit |= intmask(self.udigit(j+1) << hishift) & himask
             z.setdigit(i, newdigit)
             i += 1
             j += 1
@@ -914,6 +940,9 @@ def _k_mul(a, b):
     if 2 * asize <= bsize:
         return _k_lopsided_mul(a, b)
 
+    if asize > TOOM_CUTOFF:
+        return _tc_mul(a, b)
+
     # Split a & b into hi & lo pieces.
     shift = bsize >> 1
     ah, al = _kmul_split(a, shift)
@@ -1086,6 +1115,82 @@ def _k_lopsided_mul(a, b):
     return ret
 
 
+def _tcmul_split(n, size):
+    """
+    A helper for Toom-Cook multiplication (tc_mul).
+    Splits abs(n) in three pieces, such that
+    abs(n) == (hi << 2*size) + (mid << size) + lo, viewing the shifts as
+    being by digits.  The return values are >= 0.
+    """
+    rest, lo = _kmul_split(n, size)
+    hi, mid = _kmul_split(rest, size)
+    return hi, mid, lo
+
+def _tc_divexact3(x):
+    """Divide x by 3, knowing that the remainder is 0."""
+    q, rem = _divrem1(x, 3)
+    assert rem == 0
+    q.sign *= x.sign
+    return q
+
+def _tc_mul(a, b):
+    """
+    Toom-Cook 3-way multiplication.  Ignores the input signs, and returns
+    the absolute value of the product.  The sizes of a and b must be
+    comparable: this is called by k_mul when asize*2 > bsize.
+    """
+    asize = a.numdigits()
+    bsize = b.numdigits()
+    # View a and b as polynomials of degree 2 in X, for X a power of 2,
+    # and compute the product polynomial from its values at 0, 1, -1, -2
+    # and infinity; the interpolation is the sequence of Bodrato
+    # ("Towards Optimal Toom-Cook Multiplication for Univariate and
+    # Multivariate Polynomials in Characteristic 2 and 0", 2007).
+    shift = (max(asize, bsize) + 2) // 3
+    a2, a1, a0 = _tcmul_split(a, shift)
+    pa = a0.add(a2)
+    pa1 = pa.add(a1)
+    pam1 = pa.sub(a1)
+    pam2 = pam1.add(a2).lshift(1).sub(a0)
+    if a is b:
+        b2, b1, b0 = a2, a1, a0
+        pb1, pbm1, pbm2 = pa1, pam1, pam2
+    else:
+        b2, b1, b0 = _tcmul_split(b, shift)
+        pb = b0.add(b2)
+        pb1 = pb.add(b1)
+        pbm1 = pb.sub(b1)
+        pbm2 = pbm1.add(b2).lshift(1).sub(b0)
+
+    # The five pointwise products.
+    r0 = a0.mul(b0)
+    r1 = pa1.mul(pb1)
+    rm1 = pam1.mul(pbm1)
+    rm2 = pam2.mul(pbm2)
+    r4 = a2.mul(b2)
+
+    # Interpolation: afterwards, r0 to r4 are the coefficients of the
+    # product, which are all >= 0.
+    r3 = _tc_divexact3(rm2.sub(r1))
+    r1 = r1.sub(rm1).rshift(1)
+    r2 = rm1.sub(r0)
+    r3 = r2.sub(r3).rshift(1).add(r4.lshift(1))
+    r2 = r2.add(r1).sub(r4)
+    r1 = r1.sub(r3)
+
+    # Add the coefficients at their place in the result.  Each of them
+    # fits, because the product does and they are all >= 0.
+    ret = rbigint([NULLDIGIT] * (asize + bsize), 1)
+    size = ret.numdigits()
+    for (r, ofs) in [(r0, 0), (r1, shift), (r2, 2 * shift),
+                     (r3, 3 * shift), (r4, 4 * shift)]:
+        if r.sign != 0:
+            assert r.sign > 0
+            _v_iadd(ret, ofs, size - ofs, r, r.numdigits())
+    ret._normalize()
+    return ret
+
+
 def _inplace_divrem1(pout, pin, n, size=0):
     """
     Divide bigint pin by non-zero digit n, storing quotient
@@ -1264,6 +1369,87 @@ def _x_divrem(v1, w1):
     rem, _ = _divrem1(v, d)
     return a, rem
 
+# Recursive division, following "Fast Recursive Division" by Christoph
+# Burnikel and Joachim Ziegler (1998).  All the sizes are in digits, and
+# all the numbers are >= 0.  The divisor must be normalized, i.e. the
+# highest bit of its top digit must be set.
+
+def _dc_join(hi, lo, n):
+    """Return (hi << n) + lo, viewing the shift as being by digits,
+    when lo has at most n digits."""
+    size_lo = lo.numdigits()
+    assert size_lo <= n
+    digits = lo._digits[:size_lo] + [NULLDIGIT] * (n - size_lo)
+    z = rbigint(digits + hi._digits[:hi.numdigits()], 1)
+    z._normalize()
+    return z
+
+def _div2n1n(a, b, n):
+    """Divide a, which has at most 2n digits, by b, which has n digits,
+    when the quotient fits in n digits."""
+    if a.numdigits() - n <= DIV_LIMIT:
+        return _divrem(a, b)
+    pad = n & 1
+    if pad:
+        a = a.lshift(SHIFT)
+        b = b.lshift(SHIFT)
+        n += 1
+    half_n = n >> 1
+    b1, b2 = _kmul_split(b, half_n)
+    a123, a4 = _kmul_split(a, half_n)
+    a12, a3 = _kmul_split(a123, half_n)
+    q1, r = _div3n2n(a12, a3, b, b1, b2, half_n)
+    q2, r = _div3n2n(r, a4, b, b1, b2, half_n)
+    if pad:
+        r = r.rshift(SHIFT)
+    return _dc_join(q1, q2, half_n), r
+
+def _div3n2n(a12, a3, b, b1, b2, n):
+    """Divide (a12 << n) + a3, which has at most 3n digits, by
+    b == (b1 << n) + b2, which has 2n digits."""
+    a1, _ = _kmul_split(a12, n)
+    if a1.eq(b1):
+        q = rbigint([_store_digit(MASK)] * n, 1)
+        r = a12.sub(_dc_join(b1, rbigint(), n)).add(b1)
+    else:
+        q, r = _div2n1n(a12, b1, n)
+    r = _dc_join(r, a3, n).sub(q.mul(b2))
+    while r.sign < 0:
+        q = q.sub(rbigint([ONEDIGIT], 1))
+        r = r.add(b)
+    return q, r
+
+def _divrem_dc(a, b):
+    """Unsigned bigint division with remainder, for large quotients
+    and divisors."""
+    shift = SHIFT - bits_in_digit(b.digit(b.numdigits() - 1))
+    a = a.abs().lshift(shift)
+    b = b.abs().lshift(shift)
+    n = b.numdigits()
+    size_a = a.numdigits()
+    # Divide the chunks of n digits of a, starting from the top, by b.
+    # Each quotient fits in n digits, because the remainder of the
+    # previous step is smaller than b.
+    nchunks = (size_a + n - 1) // n
+    k = (nchunks - 1) * n
+    assert k >= 0
+    r = rbigint(a._digits[k:size_a], 1)
+    r._normalize()
+    if r.ge(b):
+        r = rbigint()
+        k += n
+    z = rbigint([NULLDIGIT] * k, 1)
+    while k > 0:
+        k -= n
+        assert k >= 0
+        chunk = rbigint(a._digits[k:k + n], 1)
+        chunk._normalize()
+        q, r = _div2n1n(_dc_join(r, chunk, n), b, n)
+        for i in range(q.numdigits()):
+            z.setdigit(k + i, q.digit(i))
+    z._normalize()
+    return z, r.rshift(shift)
+
 
 def _divrem(a, b):
     """ Long division with remainder, top-level routine """
@@ -1283,6 +1469,8 @@ def _divrem(a, b):
     if size_b == 1:
         z, urem = _divrem1(a, b.digit(0))
         rem = rbigint([_store_digit(urem)], int(urem != 0))
+    elif size_b > DIV_LIMIT and size_a - size_b > DIV_LIMIT:
+        z, rem = _divrem_dc(a, b)
     else:
         z, rem = _x_divrem(a, b)
     # Set the signs.
@@ -1576,6 +1764,9 @@ def _format(a, digits, prefix='', suffix=''):
     base = len(digits)
     assert base >= 2 and base <= 36
 
+    if (base & (base - 1)) != 0 and size_a > FORMAT_RECURSIVE_CUTOFF:
+        return _format_recursive(a, digits, prefix, suffix)
+
     # Compute a rough upper bound for the length of the string
     i = base
     bits = 0
@@ -1682,6 +1873,53 @@ def _format(a, digits, prefix='', suffix=''):
                      # hint for the annotator for the slice below)
     return ''.join(s[p:])
 
+def _format_recursive(a, digits, prefix, suffix):
+    """
+    Convert a big bigint object to a string, in a base that is not a
+    power of 2.  Splits it by dividing by powers of the base, so that
+    the time is that of the division instead of being quadratic.
+    """
+    base = len(digits)
+    # pts[0] <- a power of base of about FORMAT_RECURSIVE_CUTOFF // 2
+    # digits, whose 'width0' digits in base are formatted by _format();
+    # pts[i] == pts[i-1] ** 2.
+    powbase = base
+    power = 1
+    while powbase <= MASK // base:
+        powbase *= base
+        power += 1
+    count = FORMAT_RECURSIVE_CUTOFF // 2
+    width0 = power * count
+    pts = [rbigint.fromint(powbase).pow(rbigint.fromint(count))]
+    x = a.abs()
+    while True:
+        nextpt = pts[-1].mul(pts[-1])
+        if nextpt.gt(x):
+            break
+        pts.append(nextpt)
+    output = []
+    _format_rec(x, digits, pts, width0, len(pts) - 1, True, output)
+    result = ''.join(output)
+    if a.sign < 0:
+        return '-' + prefix + result + suffix
+    return prefix + result + suffix
+
+def _format_rec(x, digits, pts, width0, i, first, output):
+    # x < pts[i] ** 2; formats it with 2 * width0 << i digits, or without
+    # the leading zeroes if 'first'.
+    if i < 0:
+        s = _format(x, digits)
+        if not first:
+            s = digits[0] * (width0 - len(s)) + s
+        output.append(s)
+        return
+    top, bot = _divrem(x, pts[i])
+    if first and top.sign == 0:
+        _format_rec(bot, digits, pts, width0, i - 1, True, output)
+    else:
+        _format_rec(top, digits, pts, width0, i - 1, first, output)
+        _format_rec(bot, digits, pts, width0, i - 1, False, output)
+
 
 def _bitwise(a, op, b): # '&', '|', '^'
     """ Bitwise and/or/xor operations """
@@ -1849,6 +2087,39 @@ BASE_MAX = [0, 0] + [digits_max_for_base(_base) for _base in range(2, 37)]
 DEC_MAX = digits_max_for_base(10)
 assert DEC_MAX == BASE_MAX[10]
 
+def _chunks_to_bigint(chunks, chunkbase):
+    """Return the bigint whose digits in base 'chunkbase' are the ints in
+    'chunks', most significant first.  Above FROMSTR_RECURSIVE_CUTOFF
+    chunks, this multiplies the two halves of the list, recursively,
+    instead of the quadratic multiply-and-add of every chunk."""
+    n = len(chunks)
+    if n <= FROMSTR_RECURSIVE_CUTOFF:
+        return _chunks_to_bigint_linear(chunks, 0, n, chunkbase)
+    # powers[i] == chunkbase ** (2 ** i)
+    powers = [rbigint.fromint(chunkbase)]
+    while (1 << len(powers)) < n:
+        powers.append(powers[-1].mul(powers[-1]))
+    return _chunks_to_bigint_rec(chunks, 0, n, chunkbase, powers)
+
+def _chunks_to_bigint_linear(chunks, start, stop, chunkbase):
+    a = rbigint()
+    for i in range(start, stop):
+        a = _muladd1(a, chunkbase, chunks[i])
+    return a
+
+def _chunks_to_bigint_rec(chunks, start, stop, chunkbase, powers):
+    n = stop - start
+    if n <= FROMSTR_RECURSIVE_CUTOFF:
+        return _chunks_to_bigint_linear(chunks, start, stop, chunkbase)
+    # the low part is made of the last 2 ** i chunks, 2 ** i < n <= 2 ** (i+1)
+    i = 0
+    while (2 << i) < n:
+        i += 1
+    mid = stop - (1 << i)
+    hi = _chunks_to_bigint_rec(chunks, start, mid, chunkbase, powers)
+    lo = _chunks_to_bigint_rec(chunks, mid, stop, chunkbase, powers)
+    return hi.mul(powers[i]).add(lo)
+
 def _decimalstr_to_bigint(s):
     # a string that has been already parsed to be decimal and valid,
     # is turned into a bigint
@@ -1861,7 +2132,7 @@ def _decimalstr_to_bigint(s):
     elif s[p] == '+':
         p += 1
 
-    a = rbigint()
+    chunks = []
     tens = 1
     dig = 0
     ord0 = ord('0')
@@ -1869,30 +2140,34 @@ def _decimalstr_to_bigint(s):
         dig = dig * 10 + ord(s[p]) - ord0
         p += 1
         tens *= 10
-        if tens == DEC_MAX or p == lim:
-            a = _muladd1(a, tens, dig)
+        if tens == DEC_MAX and p < lim:
+            chunks.append(dig)
             tens = 1
             dig = 0
+    a = _chunks_to_bigint(chunks, DEC_MAX)
+    a = _muladd1(a, tens, dig)
     if sign and a.sign == 1:
         a.sign = -1
     return a
 
 def parse_digit_string(parser):
     # helper for objspace.std.strutil
-    a = rbigint()
+    chunks = []
     base = parser.base
     digitmax = BASE_MAX[base]
     tens, dig = 1, 0
     while True:
         digit = parser.next_digit()
-        if tens == digitmax or digit < 0:
-            a = _muladd1(a, tens, dig)
-            if digit < 0:
-                break
+        if digit < 0:
+            break
+        if tens == digitmax:
+            chunks.append(dig)
             dig = digit
             tens = base
         else:
             dig = dig * base + digit
             tens *= base
+    a = _chunks_to_bigint(chunks, digitmax)
+    a = _muladd1(a, tens, dig)
     a.sign *= parser.sign
     return a
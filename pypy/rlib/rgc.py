@@ -50,6 +50,65 @@ class SetMaxHeapSizeEntry(ExtRegistryEntry):
         return hop.genop('gc_set_max_heap_size', [v_nbytes],
                          resulttype=lltype.Void)
 
+# Indices for get_statistics().  The first two are the same as in
+# MarkSweepGC: the bytes used by the heap, and (for MarkSweepGC only)
+# the bytes malloced since the last collection.
+STAT_HEAP_USAGE         = 0
+STAT_BYTES_MALLOCED     = 1
+# The arenas of the MiniMark GC: their number and total size in bytes,
+# their number of pages and how many of them are free, the bytes used
+# by the objects they contain, and how many times the pages were
+# compacted.
+STAT_ARENAS             = 2
+STAT_ARENA_BYTES        = 3
+STAT_ARENA_PAGES        = 4
+STAT_ARENA_FREE_PAGES   = 5
+STAT_ARENA_USED_BYTES   = 6
+STAT_ARENA_COMPACTIONS  = 7
+# The number of minor and major collections so far, and the total time
+# spent in them, in milliseconds.
+STAT_MINOR_COLLECTIONS      = 8
+STAT_MAJOR_COLLECTIONS      = 9
+STAT_MINOR_COLLECTION_TIME  = 10
+STAT_MAJOR_COLLECTION_TIME  = 11
+# The total bytes allocated in the nursery, and how many of them
+# survived a minor collection.
+STAT_NURSERY_ALLOCATED_BYTES = 12
+STAT_NURSERY_SURVIVING_BYTES = 13
+# The total number of arrays whose marked cards were walked by minor
+# collections, instead of walking the whole array.
+STAT_CARD_MARKED_ARRAYS = 14
+# The number of size classes of small objects.  For each size class n
+# between 1 and this number, used for objects of n words, the index
+# STAT_SIZE_CLASS_ALLOCATED_BYTES + n gives the bytes allocated so far
+# and STAT_SIZE_CLASS_SURVIVING_BYTES + n the bytes that survived the
+# last major collection.
+STAT_SIZE_CLASSES       = 15
+# The current size of the nursery, and how many times it was changed
+# (only with PYPY_GC_NURSERY_MAX).
+STAT_NURSERY_SIZE       = 16
+STAT_NURSERY_RESIZES    = 17
+STAT_SIZE_CLASS_ALLOCATED_BYTES = 1000
+STAT_SIZE_CLASS_SURVIVING_BYTES = 2000
+
+def get_statistics(index):
+    """Return the GC statistic number 'index', one of the STAT_xxx
+    constants above, or -1 if the GC does not support it.
+    """
+    return -1
+
+class GetStatisticsEntry(ExtRegistryEntry):
+    _about_ = get_statistics
+
+    def compute_result_annotation(self, s_index):
+        from pypy.annotation import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        [v_index] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_statistics', [v_index], resulttype=hop.r_result)
+
 def can_move(p):
     """Check if the GC object 'p' is at an address that can move.
     Must not be called with None.  With non-moving GCs, it is always False.
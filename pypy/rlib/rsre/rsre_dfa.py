@@ -0,0 +1,578 @@
+"""
+A lazily-built DFA that runs in front of the rsre matcher.
+
+Patterns without backreferences describe regular languages, so we can
+decide in a single left-to-right pass, without backtracking and without
+allocating MatchResult objects, whether a string contains a match at all.
+The DFA is only a filter: when it says "no match" the answer is final,
+and when it says "maybe" we run the regular rsre matcher, which computes
+the exact span and groups with the usual leftmost-first semantics.
+
+The automaton is built from the sre code in two steps.  First we build a
+Thompson NFA over an alphabet of 257 character classes: the 256 byte
+values, plus one class for all characters >= 256.  Constructs that are
+hard to express exactly (lookarounds, most AT codes, very large repeat
+counts, ...) are over-approximated: this only makes the filter less
+selective, never wrong.  Then the DFA states are built lazily from the
+NFA while scanning, by the usual subset construction.  If there are too
+many DFA states, we give up and always fall back to rsre.
+"""
+from pypy.rlib.rsre import rsre_char, rsre_core
+from pypy.rlib.rsre.rsre_core import specializectx
+from pypy.rlib.rsre.rsre_core import OPCODE_FAILURE, OPCODE_SUCCESS
+from pypy.rlib.rsre.rsre_core import OPCODE_ANY, OPCODE_ANY_ALL
+from pypy.rlib.rsre.rsre_core import OPCODE_ASSERT, OPCODE_ASSERT_NOT
+from pypy.rlib.rsre.rsre_core import OPCODE_AT, OPCODE_BRANCH
+from pypy.rlib.rsre.rsre_core import OPCODE_CATEGORY, OPCODE_IN
+from pypy.rlib.rsre.rsre_core import OPCODE_IN_IGNORE, OPCODE_INFO
+from pypy.rlib.rsre.rsre_core import OPCODE_JUMP, OPCODE_LITERAL
+from pypy.rlib.rsre.rsre_core import OPCODE_LITERAL_IGNORE, OPCODE_MARK
+from pypy.rlib.rsre.rsre_core import OPCODE_MAX_UNTIL, OPCODE_MIN_UNTIL
+from pypy.rlib.rsre.rsre_core import OPCODE_NOT_LITERAL
+from pypy.rlib.rsre.rsre_core import OPCODE_NOT_LITERAL_IGNORE
+from pypy.rlib.rsre.rsre_core import OPCODE_REPEAT, OPCODE_REPEAT_ONE
+from pypy.rlib.rsre.rsre_core import OPCODE_MIN_REPEAT_ONE
+from pypy.rlib.rsre.rsre_core import AT_BEGINNING, AT_BEGINNING_STRING
+from pypy.rlib.rsre.rsre_core import AT_END, AT_END_STRING
+from pypy.rlib.rsre.rsre_char import MAXREPEAT, CODESIZE
+from pypy.rlib import jit
+
+# opcodes that only appear inside the <set> of an IN
+SET_CHARSET    = 10
+SET_BIGCHARSET = 11
+SET_NEGATE     = 26
+SET_RANGE      = 27
+
+# categories 0-7 are the plain ASCII ones, 8-9 depend on the C locale
+# and 10-17 on the unicode database
+CATEGORY_LOC_WORD = 8
+CATEGORY_UNI_DIGIT = 10
+
+NUM_CHARS = 257          # 0-255, and 256 for "any character >= 256"
+
+NODE_CHAR   = 0          # consumes one character in 'table', then 'out1'
+NODE_SPLIT  = 1          # epsilon-transitions to both 'out1' and 'out2'
+NODE_ACCEPT = 2          # the end of the pattern
+NODE_FAIL   = 3          # never matches
+
+MAX_NFA_NODES = 4000     # bigger patterns are left to rsre
+REPEAT_UNROLL = 16       # larger repeat counts are approximated
+MAX_DFA_STATES = 500     # beyond that, give up and use rsre only
+
+MIN_LENGTH = 16          # shorter strings are left to rsre directly
+CHECK_PERIOD = 500       # how often we check that the DFA is useful
+
+
+class DFAUnsupported(Exception):
+    """The pattern cannot be turned into a DFA."""
+
+class DFAGiveUp(Exception):
+    """The DFA grew too large."""
+
+
+class NFA(object):
+    """Thompson NFA built from the sre code of a pattern."""
+
+    def __init__(self, pattern, flags):
+        self.pattern = pattern
+        self.flags = flags
+        self.kinds = []
+        self.out1 = []
+        self.out2 = []
+        self.tableindex = []
+        self.tables = []          # list of lists of NUM_CHARS booleans
+        self.table_cache = {}     # {ppos of the item: index in tables}
+        self.anchored = False     # pattern starts with '^' or '\A'
+        self.end_anchor = 0       # AT_END or AT_END_STRING, or 0
+        self.fail = self.newnode(NODE_FAIL, -1, -1, -1)
+        accept = self.newnode(NODE_ACCEPT, -1, -1, -1)
+        self.start = self.compile_toplevel(accept)
+        self.compute_classes()
+
+    def pat(self, index):
+        # the pattern comes from the application: check the bounds
+        if index < 0 or index >= len(self.pattern):
+            raise DFAUnsupported
+        result = self.pattern[index]
+        if result < 0:
+            raise DFAUnsupported
+        return result
+
+    def newnode(self, kind, out1, out2, tableindex):
+        if len(self.kinds) >= MAX_NFA_NODES:
+            raise DFAUnsupported
+        self.kinds.append(kind)
+        self.out1.append(out1)
+        self.out2.append(out2)
+        self.tableindex.append(tableindex)
+        return len(self.kinds) - 1
+
+    def newsplit(self, node1, node2):
+        return self.newnode(NODE_SPLIT, node1, node2, -1)
+
+    # ____________________________________________________________
+    # Parsing the sre code
+
+    def skip_item(self, ppos):
+        # returns the position just after the item starting at 'ppos'
+        op = self.pat(ppos)
+        if (op == OPCODE_ANY or op == OPCODE_ANY_ALL):
+            return ppos + 1
+        elif (op == OPCODE_AT or op == OPCODE_CATEGORY or
+              op == OPCODE_LITERAL or op == OPCODE_LITERAL_IGNORE or
+              op == OPCODE_NOT_LITERAL or op == OPCODE_NOT_LITERAL_IGNORE or
+              op == OPCODE_MARK):
+            return ppos + 2
+        elif (op == OPCODE_IN or op == OPCODE_IN_IGNORE or
+              op == OPCODE_INFO or op == OPCODE_ASSERT or
+              op == OPCODE_ASSERT_NOT or op == OPCODE_REPEAT_ONE or
+              op == OPCODE_MIN_REPEAT_ONE):
+            # <OP> <skip> ...
+            return ppos + 1 + self.pat(ppos + 1)
+        elif op == OPCODE_BRANCH:
+            # <BRANCH> <0=skip> code <JUMP> ... <NULL>
+            ppos += 1
+            while self.pat(ppos):
+                ppos += self.pat(ppos)
+            return ppos + 1
+        elif op == OPCODE_REPEAT:
+            # <REPEAT> <skip> <1=min> <2=max> item <UNTIL> tail
+            untilppos = ppos + 1 + self.pat(ppos + 1)
+            untilop = self.pat(untilppos)
+            if untilop != OPCODE_MAX_UNTIL and untilop != OPCODE_MIN_UNTIL:
+                raise DFAUnsupported
+            return untilppos + 1
+        else:
+            # GROUPREF, GROUPREF_IGNORE, GROUPREF_EXISTS, or bogus code
+            raise DFAUnsupported
+
+    def parse_sequence(self, ppos):
+        # returns the list of the positions of the items in the sequence,
+        # and the opcode that terminates it
+        items = []
+        while True:
+            op = self.pat(ppos)
+            if (op == OPCODE_SUCCESS or op == OPCODE_FAILURE or
+                op == OPCODE_JUMP or op == OPCODE_MAX_UNTIL or
+                op == OPCODE_MIN_UNTIL):
+                return items, op
+            items.append(ppos)
+            newppos = self.skip_item(ppos)
+            if newppos <= ppos:
+                raise DFAUnsupported
+            ppos = newppos
+
+    def compile_toplevel(self, accept):
+        items, op = self.parse_sequence(0)
+        if op != OPCODE_SUCCESS:
+            raise DFAUnsupported
+        # a leading '^' or '\A' anchors the pattern at position 0
+        for ppos in items:
+            op = self.pat(ppos)
+            if op == OPCODE_AT:
+                atcode = self.pat(ppos + 1)
+                if atcode == AT_BEGINNING or atcode == AT_BEGINNING_STRING:
+                    self.anchored = True
+            if op != OPCODE_INFO and op != OPCODE_MARK:
+                break
+        # a trailing '$' or '\Z' is checked when we reach the accepting state
+        i = len(items) - 1
+        while i >= 0 and self.pat(items[i]) == OPCODE_MARK:
+            i -= 1
+        if i >= 0 and self.pat(items[i]) == OPCODE_AT:
+            atcode = self.pat(items[i] + 1)
+            if atcode == AT_END or atcode == AT_END_STRING:
+                self.end_anchor = atcode
+        return self.compile_items(items, accept)
+
+    def compile_sequence(self, ppos, nxt):
+        items, op = self.parse_sequence(ppos)
+        if op == OPCODE_FAILURE:
+            nxt = self.fail
+        return self.compile_items(items, nxt)
+
+    def compile_items(self, items, nxt):
+        i = len(items) - 1
+        while i >= 0:
+            nxt = self.compile_item(items[i], nxt)
+            i -= 1
+        return nxt
+
+    def compile_item(self, ppos, nxt):
+        op = self.pat(ppos)
+        if (op == OPCODE_AT or op == OPCODE_MARK or op == OPCODE_INFO or
+            op == OPCODE_ASSERT or op == OPCODE_ASSERT_NOT):
+            # zero-width: over-approximated as always matching
+            return nxt
+        elif op == OPCODE_BRANCH:
+            alternatives = []
+            ppos += 1
+            while self.pat(ppos):
+                alternatives.append(self.compile_sequence(ppos + 1, nxt))
+                ppos += self.pat(ppos)
+            if not alternatives:
+                return self.fail
+            node = alternatives[-1]
+            i = len(alternatives) - 2
+            while i >= 0:
+                node = self.newsplit(alternatives[i], node)
+                i -= 1
+            return node
+        elif op == OPCODE_REPEAT_ONE or op == OPCODE_MIN_REPEAT_ONE:
+            # <REPEAT_ONE> <skip> <1=min> <2=max> item <SUCCESS> tail
+            return self.compile_repeat(ppos + 4, False, self.pat(ppos + 2),
+                                       self.pat(ppos + 3), nxt)
+        elif op == OPCODE_REPEAT:
+            # <REPEAT> <skip> <1=min> <2=max> item <UNTIL> tail
+            return self.compile_repeat(ppos + 4, True, self.pat(ppos + 2),
+                                       self.pat(ppos + 3), nxt)
+        else:
+            tableindex = self.get_table(ppos)
+            return self.newnode(NODE_CHAR, nxt, -1, tableindex)
+
+    def compile_one(self, ppos, is_sequence, nxt):
+        if is_sequence:
+            return self.compile_sequence(ppos, nxt)
+        else:
+            return self.compile_item(ppos, nxt)
+
+    def compile_repeat(self, ppos, is_sequence, min, max, nxt):
+        # big repeat counts are approximated: 'x{100,200}' is turned into
+        # 'x{16,}', which matches more strings
+        if min > REPEAT_UNROLL:
+            min = REPEAT_UNROLL
+            max = MAXREPEAT
+        if max != MAXREPEAT and max > REPEAT_UNROLL:
+            max = MAXREPEAT
+        if max != MAXREPEAT and max < min:
+            return self.fail
+        if max == MAXREPEAT:
+            loop = self.newsplit(-1, nxt)
+            self.out1[loop] = self.compile_one(ppos, is_sequence, loop)
+            node = loop
+        else:
+            node = nxt
+            for i in range(max - min):
+                node = self.newsplit(self.compile_one(ppos, is_sequence, node),
+                                     nxt)
+        for i in range(min):
+            node = self.compile_one(ppos, is_sequence, node)
+        return node
+
+    # ____________________________________________________________
+    # Character tables
+
+    def get_table(self, ppos):
+        try:
+            return self.table_cache[ppos]
+        except KeyError:
+            table = self.build_table(ppos)
+            index = len(self.tables)
+            self.tables.append(table)
+            self.table_cache[ppos] = index
+            return index
+
+    def build_table(self, ppos):
+        op = self.pat(ppos)
+        table = [False] * NUM_CHARS
+        if op == OPCODE_ANY:
+            for c in range(NUM_CHARS):
+                table[c] = not rsre_char.is_linebreak(c)
+        elif op == OPCODE_ANY_ALL:
+            for c in range(NUM_CHARS):
+                table[c] = True
+        elif op == OPCODE_LITERAL or op == OPCODE_NOT_LITERAL:
+            char = self.pat(ppos + 1)
+            if char >= 256:
+                raise DFAUnsupported
+            for c in range(NUM_CHARS):
+                table[c] = (c == char) == (op == OPCODE_LITERAL)
+        elif op == OPCODE_LITERAL_IGNORE or op == OPCODE_NOT_LITERAL_IGNORE:
+            char = self.pat(ppos + 1)
+            for c in range(256):
+                lower = rsre_char.getlower(c, self.flags)
+                table[c] = (lower == char) == (op == OPCODE_LITERAL_IGNORE)
+            table[256] = True
+        elif op == OPCODE_CATEGORY:
+            category = self.pat(ppos + 1)
+            if category >= CATEGORY_LOC_WORD:
+                raise DFAUnsupported
+            for c in range(NUM_CHARS):
+                table[c] = rsre_char.category_dispatch(category, c)
+        elif op == OPCODE_IN or op == OPCODE_IN_IGNORE:
+            # <IN> <skip> <set>
+            setppos = ppos + 2
+            uniform = self.check_set(setppos)
+            ignore = (op == OPCODE_IN_IGNORE)
+            for c in range(256):
+                if ignore:
+                    char = rsre_char.getlower(c, self.flags)
+                else:
+                    char = c
+                table[c] = rsre_char.check_charset(self.pattern, setppos,
+                                                   char)
+            if uniform and not ignore:
+                table[256] = rsre_char.check_charset(self.pattern, setppos,
+                                                     256)
+            else:
+                table[256] = True
+        else:
+            raise DFAUnsupported
+        return table
+
+    def check_set(self, ppos):
+        # Check that the <set> starting at 'ppos' is well-formed and doesn't
+        # depend on the locale.  Returns True if all characters >= 256
+        # behave identically with respect to it.
+        uniform = True
+        while True:
+            op = self.pat(ppos)
+            if op == OPCODE_FAILURE:
+                return uniform
+            elif op == OPCODE_LITERAL:
+                if self.pat(ppos + 1) >= 256:
+                    uniform = False
+                ppos += 2
+            elif op == OPCODE_CATEGORY:
+                category = self.pat(ppos + 1)
+                if category >= CATEGORY_UNI_DIGIT:
+                    uniform = False
+                elif category >= CATEGORY_LOC_WORD:
+                    raise DFAUnsupported
+                ppos += 2
+            elif op == SET_RANGE:
+                if self.pat(ppos + 2) >= 256:
+                    uniform = False
+                ppos += 3
+            elif op == SET_CHARSET:
+                ppos += 1 + 256 / (8 * CODESIZE)
+            elif op == SET_BIGCHARSET:
+                # <BIGCHARSET> <blockcount> <256 blockindices> <blocks>
+                count = self.pat(ppos + 1)
+                ppos += 2 + 256 / CODESIZE + count * (32 / CODESIZE)
+                uniform = False
+            elif op == SET_NEGATE:
+                ppos += 1
+            else:
+                raise DFAUnsupported
+
+    def compute_classes(self):
+        # Characters that are in exactly the same tables are equivalent:
+        # the DFA only needs one column for each class of characters.
+        self.classmap = [0] * NUM_CHARS
+        classes = {}
+        for c in range(NUM_CHARS):
+            bits = ['0'] * len(self.tables)
+            for i in range(len(self.tables)):
+                if self.tables[i][c]:
+                    bits[i] = '1'
+            signature = ''.join(bits)
+            try:
+                self.classmap[c] = classes[signature]
+            except KeyError:
+                self.classmap[c] = classes[signature] = len(classes)
+        self.num_classes = len(classes)
+        self.class_representative = [0] * self.num_classes
+        for c in range(NUM_CHARS - 1, -1, -1):
+            self.class_representative[self.classmap[c]] = c
+
+
+class DFA(object):
+    """The subset construction on an NFA, computed lazily."""
+
+    def __init__(self, nfa, searching):
+        self.nfa = nfa
+        self.searching = searching   # if True, a match can start anywhere
+        self.marks = [0] * len(nfa.kinds)
+        self.generation = 0
+        self.keys = {}               # {key of a set of nodes: state number}
+        self.statenodes = []         # list of lists of NFA nodes
+        self.accepting = []          # list of bools
+        self.transitions = []        # num_classes entries per state
+        self.initial = self.getstate([nfa.start])
+        self.dead = -1
+        if not searching:
+            self.dead = self.getstate([])
+
+    def closure(self, nodes):
+        # returns the sorted list of all the CHAR and ACCEPT nodes reachable
+        # from 'nodes' by epsilon-transitions
+        nfa = self.nfa
+        self.generation += 1
+        generation = self.generation
+        marks = self.marks
+        pending = nodes
+        while pending:
+            node = pending.pop()
+            if marks[node] == generation:
+                continue
+            marks[node] = generation
+            if nfa.kinds[node] == NODE_SPLIT:
+                pending.append(nfa.out1[node])
+                pending.append(nfa.out2[node])
+        result = []
+        for node in range(len(marks)):
+            if marks[node] == generation:
+                kind = nfa.kinds[node]
+                if kind == NODE_CHAR or kind == NODE_ACCEPT:
+                    result.append(node)
+        return result
+
+    def getstate(self, nodes):
+        if self.searching:
+            nodes.append(self.nfa.start)
+        nodes = self.closure(nodes)
+        key = ','.join([str(node) for node in nodes])
+        try:
+            return self.keys[key]
+        except KeyError:
+            pass
+        state = len(self.statenodes)
+        if state >= MAX_DFA_STATES:
+            raise DFAGiveUp
+        self.keys[key] = state
+        self.statenodes.append(nodes)
+        accepting = False
+        for node in nodes:
+            if self.nfa.kinds[node] == NODE_ACCEPT:
+                accepting = True
+        self.accepting.append(accepting)
+        self.transitions.extend([-1] * self.nfa.num_classes)
+        return state
+
+    def encode(self, state):
+        # The entries of 'transitions' are directly the offset of the row
+        # of the target state, so that the main loop of dfa_scan() needs
+        # no multiplication.  Accepting states and the dead state, which
+        # must stop the loop, are encoded as -2-offset; -1 means that the
+        # transition was not computed so far.
+        offset = state * self.nfa.num_classes
+        if self.accepting[state] or state == self.dead:
+            return -2 - offset
+        return offset
+
+    def compute_transition(self, state, charclass):
+        nfa = self.nfa
+        c = nfa.class_representative[charclass]
+        targets = []
+        for node in self.statenodes[state]:
+            if nfa.kinds[node] == NODE_CHAR:
+                if nfa.tables[nfa.tableindex[node]][c]:
+                    targets.append(nfa.out1[node])
+        target = self.encode(self.getstate(targets))
+        self.transitions[state * nfa.num_classes + charclass] = target
+        return target
+
+
+@specializectx
+@jit.dont_look_inside
+def dfa_scan(ctx, dfa, start):
+    """Returns True if the DFA reaches an accepting state when reading
+    the string from 'start'.  With dfa.searching, this checks whether
+    a match starts at any position >= start; otherwise, only at 'start'."""
+    nfa = dfa.nfa
+    classmap = nfa.classmap
+    num_classes = nfa.num_classes
+    transitions = dfa.transitions
+    end = ctx.end
+    i = start
+    target = dfa.encode(dfa.initial)
+    while True:
+        if target < 0:
+            # stopping state: check if we are done
+            offset = -2 - target
+            state = offset // num_classes
+            if dfa.accepting[state]:
+                end_anchor = nfa.end_anchor
+                if end_anchor == 0 or i == end:
+                    return True
+                if (end_anchor == AT_END and i == end - 1 and
+                        rsre_char.is_linebreak(ctx.str(i))):
+                    return True
+            elif state == dfa.dead:
+                return False
+        else:
+            offset = target
+        if i >= end:
+            return False
+        c = ctx.str(i)
+        if c > 255:
+            c = 256
+        target = transitions[offset + classmap[c]]
+        if target == -1:
+            target = dfa.compute_transition(offset // num_classes, classmap[c])
+        i += 1
+
+
+class DFAMatcher(object):
+    """Prefilter for one compiled pattern, holding its two lazy DFAs."""
+
+    def __init__(self, pattern, flags):
+        self.nfa = NFA(pattern, flags)
+        self.enabled = True
+        self.match_dfa = None
+        self.search_dfa = None
+        self.num_checks = 0
+        self.num_rejects = 0
+
+    def get_dfa(self, searching):
+        if searching and not self.nfa.anchored:
+            if self.search_dfa is None:
+                self.search_dfa = DFA(self.nfa, True)
+            return self.search_dfa
+        else:
+            if self.match_dfa is None:
+                self.match_dfa = DFA(self.nfa, False)
+            return self.match_dfa
+
+    def may_match(self, ctx, searching):
+        """Returns False only if there is certainly no match."""
+        if self.nfa.anchored and ctx.match_start != 0:
+            return False
+        if ctx.end - ctx.match_start < MIN_LENGTH:
+            return True
+        try:
+            found = dfa_scan(ctx, self.get_dfa(searching), ctx.match_start)
+        except DFAGiveUp:
+            self.enabled = False
+            return True
+        # if the DFA almost never rejects anything, it is just overhead
+        self.num_checks += 1
+        if not found:
+            self.num_rejects += 1
+        if self.num_checks == CHECK_PERIOD:
+            if self.num_rejects * 8 < self.num_checks:
+                self.enabled = False
+            self.num_checks = 0
+            self.num_rejects = 0
+        return found
+
+
+def compile_dfa(pattern, flags):
+    """Returns a DFAMatcher for the sre code 'pattern', or None if the
+    pattern cannot be turned into a DFA (e.g. if it has backreferences)."""
+    if flags & rsre_char.SRE_FLAG_LOCALE:
+        return None
+    if (len(pattern) > 2 and pattern[0] == OPCODE_INFO and
+            pattern[2] & rsre_char.SRE_INFO_LITERAL):
+        # the whole pattern is a literal string: rsre_core.fast_search()
+        # already finds it faster than the DFA would
+        return None
+    try:
+        return DFAMatcher(pattern, flags)
+    except DFAUnsupported:
+        return None
+
+def match_context(ctx, matcher):
+    """Like rsre_core.match_context(), using 'matcher' to quickly reject
+    strings that don't match."""
+    if matcher.enabled and not matcher.may_match(ctx, False):
+        return False
+    return rsre_core.match_context(ctx)
+
+def search_context(ctx, matcher):
+    """Like rsre_core.search_context(), using 'matcher' to quickly reject
+    strings that don't contain any match."""
+    if matcher.enabled and not matcher.may_match(ctx, True):
+        return False
+    return rsre_core.search_context(ctx)
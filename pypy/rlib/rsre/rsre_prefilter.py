@@ -0,0 +1,213 @@
+"""
+Literal prefilter for searching.
+
+rsre_core.search_context() can only skip ahead quickly if the pattern
+starts with a single literal prefix, a single character or a charset.
+For patterns like '(ERROR|WARN|FATAL): .*' it tries the full matcher at
+every position.  Here we extract from the pattern code the set of literal
+strings one of which must start every match, and scan for them with a
+set-Horspool search: the window is as long as the shortest literal, and
+we only run the matcher at positions where one of the literals is found.
+"""
+from pypy.rlib.rsre import rsre_char
+from pypy.rlib.rsre.rsre_core import specializectx, sre_match
+from pypy.rlib.rsre.rsre_core import OPCODE_BRANCH, OPCODE_IN, OPCODE_INFO
+from pypy.rlib.rsre.rsre_core import OPCODE_JUMP, OPCODE_LITERAL
+from pypy.rlib.rsre.rsre_core import OPCODE_MARK, OPCODE_SUCCESS
+from pypy.rlib.rsre.rsre_dfa import SET_RANGE
+from pypy.rlib.rsre.rsre_jit import install_jitdriver_spec
+from pypy.rlib import jit
+
+MAX_LITERALS = 32         # more alternatives are not worth it
+MAX_LITERAL_LENGTH = 16   # longer literals don't make the scan faster
+
+
+class BadCode(Exception):
+    pass
+
+
+class Prefilter(object):
+    """The set of literals that start every match of a pattern, with the
+    tables for the set-Horspool search."""
+    _immutable_fields_ = ['literals[*]', 'window', 'shift[*]', 'last[*]']
+
+    def __init__(self, literals):
+        # list of lists of character codes, copied into fixed-size lists
+        self.literals = [None] * len(literals)
+        for i in range(len(literals)):
+            self.literals[i] = literals[i][:]
+        window = MAX_LITERAL_LENGTH
+        for literal in literals:
+            if len(literal) < window:
+                window = len(literal)
+        assert window > 0
+        self.window = window
+        # 'shift[c]' is how far the window can be moved if its last
+        # character is 'c'; 'last[c]' tells if 'c' ends the first 'window'
+        # characters of one of the literals.  All characters >= 256 are
+        # handled together in the entry 256.
+        shift = [window] * 257
+        last = [False] * 257
+        for literal in literals:
+            for j in range(window - 1):
+                c = _charindex(literal[j])
+                if window - 1 - j < shift[c]:
+                    shift[c] = window - 1 - j
+            last[_charindex(literal[window - 1])] = True
+        self.shift = shift
+        self.last = last
+
+def _charindex(c):
+    if c > 255:
+        return 256
+    return c
+
+# ____________________________________________________________
+# Extracting the literals from the pattern code
+
+def _pat(pattern, index):
+    # the pattern comes from the application: check the bounds
+    if index < 0 or index >= len(pattern):
+        raise BadCode
+    return pattern[index]
+
+def _product(prefixes, suffixes):
+    result = []
+    for prefix in prefixes:
+        for suffix in suffixes:
+            result.append(prefix + suffix)
+    return result
+
+def _literals_of_sequence(pattern, ppos, prefixes):
+    """Extend 'prefixes' with the literals at the start of the sequence at
+    'ppos'.  Returns the new prefixes, and a flag telling if the whole
+    sequence was made of literals (up to its final JUMP or SUCCESS)."""
+    while True:
+        for prefix in prefixes:
+            if len(prefix) >= MAX_LITERAL_LENGTH:
+                return prefixes, False
+        op = _pat(pattern, ppos)
+        if op == OPCODE_MARK:
+            ppos += 2
+        elif op == OPCODE_LITERAL:
+            c = _pat(pattern, ppos + 1)
+            prefixes = [prefix + [c] for prefix in prefixes]
+            ppos += 2
+        elif op == OPCODE_IN:
+            # <IN> <skip> <set>, with only LITERAL and small RANGE entries
+            chars = _literal_set(pattern, ppos + 2)
+            if (chars is None or
+                    len(prefixes) * len(chars) > MAX_LITERALS):
+                return prefixes, False
+            prefixes = _product(prefixes, [[c] for c in chars])
+            ppos += 1 + _pat(pattern, ppos + 1)
+        elif op == OPCODE_BRANCH:
+            # <BRANCH> <0=skip> code <JUMP> ... <NULL>
+            alternatives = []
+            complete = True
+            ppos += 1
+            while _pat(pattern, ppos):
+                literals, altcomplete = _literals_of_sequence(pattern,
+                                                              ppos + 1, [[]])
+                alternatives.extend(literals)
+                complete = complete and altcomplete
+                ppos += _pat(pattern, ppos)
+            ppos += 1
+            if len(prefixes) * len(alternatives) > MAX_LITERALS:
+                return prefixes, False
+            prefixes = _product(prefixes, alternatives)
+            if not complete:
+                return prefixes, False
+        else:
+            return prefixes, (op == OPCODE_JUMP or op == OPCODE_SUCCESS)
+
+def _literal_set(pattern, ppos):
+    chars = []
+    while True:
+        op = _pat(pattern, ppos)
+        if op == OPCODE_LITERAL:
+            chars.append(_pat(pattern, ppos + 1))
+            ppos += 2
+        elif op == SET_RANGE:
+            lower = _pat(pattern, ppos + 1)
+            upper = _pat(pattern, ppos + 2)
+            if upper - lower >= MAX_LITERALS:
+                return None
+            for c in range(lower, upper + 1):
+                chars.append(c)
+            ppos += 3
+        elif op == 0:     # FAILURE
+            return chars
+        else:
+            return None
+
+def extract_prefilter(pattern):
+    """Returns a Prefilter for the pattern code, or None if we cannot find
+    a useful set of literals that every match must start with."""
+    try:
+        ppos = 0
+        if _pat(pattern, 0) == OPCODE_INFO:
+            flags = _pat(pattern, 2)
+            if flags & rsre_char.SRE_INFO_PREFIX and _pat(pattern, 5) > 1:
+                return None      # rsre_core.fast_search() handles it
+            ppos = 1 + _pat(pattern, 1)
+        literals, _ = _literals_of_sequence(pattern, ppos, [[]])
+    except BadCode:
+        return None
+    if not literals:
+        return None
+    for literal in literals:
+        if len(literal) < 2:
+            # with one-character literals we would not skip anything;
+            # literal_search() and charset_search() handle these cases
+            return None
+    return Prefilter(literals)
+
+# ____________________________________________________________
+
+install_jitdriver_spec('PrefilterSearch',
+                       greens=['base', 'prefilter', 'ctx.pattern'],
+                       reds=['end_window', 'ctx'],
+                       debugprint=(2, 0))
+@specializectx
+def prefilter_search(ctx, base, prefilter):
+    window = prefilter.window
+    end_window = ctx.match_start + window - 1
+    while end_window < ctx.end:
+        ctx.jitdriver_PrefilterSearch.jit_merge_point(ctx=ctx,
+                end_window=end_window, base=base, prefilter=prefilter)
+        assert end_window >= 0
+        c = _charindex(ctx.str(end_window))
+        if prefilter.last[c]:
+            start = end_window - window + 1
+            assert start >= 0
+            if _any_literal_at(ctx, prefilter, start):
+                if sre_match(ctx, base, start, None) is not None:
+                    ctx.match_start = start
+                    return True
+        end_window += prefilter.shift[c]
+    return False
+
+@specializectx
+@jit.unroll_safe
+def _any_literal_at(ctx, prefilter, start):
+    for literal in prefilter.literals:
+        if start + len(literal) <= ctx.end:
+            i = 0
+            while i < len(literal):
+                if ctx.str(start + i) != literal[i]:
+                    break
+                i += 1
+            if i == len(literal):
+                return True
+    return False
+
+def search_context(ctx, prefilter):
+    """Like rsre_core.search_context(), but skips ahead using 'prefilter'."""
+    ctx.original_pos = ctx.match_start
+    if ctx.end < ctx.match_start:
+        return False
+    base = 0
+    if ctx.pat(base) == OPCODE_INFO:
+        base += 1 + ctx.pat(1)
+    return prefilter_search(ctx, base, prefilter)
@@ -0,0 +1,184 @@
+import re, random
+from pypy.rlib.rsre import rsre_core, rsre_dfa
+from pypy.rlib.rsre.test.test_match import get_code
+from pypy.rpython.test.test_llinterp import interpret
+
+
+def dfa_check(regexp, string, searching, flags=0):
+    code = get_code(regexp, flags)
+    matcher = rsre_dfa.DFAMatcher(code, flags)
+    ctx = rsre_core.StrMatchContext(code, string, 0, len(string), flags)
+    if matcher.nfa.anchored and ctx.match_start != 0:
+        return False
+    dfa = matcher.get_dfa(searching)
+    return rsre_dfa.dfa_scan(ctx, dfa, ctx.match_start)
+
+def rsre_check(regexp, string, searching, flags=0):
+    code = get_code(regexp, flags)
+    if searching:
+        return rsre_core.search(code, string, flags=flags) is not None
+    else:
+        return rsre_core.match(code, string, flags=flags) is not None
+
+
+class TestDFA:
+
+    def check_exact(self, regexp, strings):
+        for searching in [False, True]:
+            for s in strings:
+                expected = rsre_check(regexp, s, searching)
+                assert dfa_check(regexp, s, searching) == expected, (
+                    regexp, s, searching)
+
+    def test_unsupported(self):
+        for regexp in [r'(a)\1', r'(a)(?(1)b|c)', r'(?i)(a)\1']:
+            assert rsre_dfa.compile_dfa(get_code(regexp), 0) is None
+        assert rsre_dfa.compile_dfa(get_code(r'(?L)\w+'),
+                                    rsre_core.rsre_char.SRE_FLAG_LOCALE) is None
+        assert rsre_dfa.compile_dfa([rsre_core.OPCODE_LITERAL], 0) is None
+        assert rsre_dfa.compile_dfa([rsre_core.OPCODE_BRANCH, 5], 0) is None
+
+    def test_pure_literal(self):
+        # left to rsre_core.fast_search()
+        assert rsre_dfa.compile_dfa(get_code(r'abc'), 0) is None
+        assert rsre_dfa.compile_dfa(get_code(r'abc\d+'), 0) is not None
+
+    def test_literal(self):
+        self.check_exact('abc', ['abc', 'xabc', 'ab', 'abd', 'xxabcxx', ''])
+
+    def test_branch(self):
+        self.check_exact('(ERROR|WARN|FATAL): .*',
+                         ['ERROR: x', 'WARN: ', 'foo FATAL: bar', 'WARN:',
+                          'INFO: x', 'ERRORWARN: y'])
+
+    def test_repeat_one(self):
+        self.check_exact(r'a\d+b', ['a1b', 'a123b', 'ab', 'xa9b', 'a12c'])
+        self.check_exact(r'a\d*?b', ['a1b', 'ab', 'xa9b', 'a12c'])
+        self.check_exact(r'a\d{2,3}b', ['a1b', 'a12b', 'a123b', 'a1234b'])
+
+    def test_repeat(self):
+        self.check_exact(r'<(?:xy){2,3}>', ['<xy>', '<xyxy>', '<xyxyxy>',
+                                            '<xyxyxyxy>', 'a<xyxy>b'])
+        self.check_exact(r'(?:ab|c)*d', ['d', 'abd', 'cabcd', 'abx', 'ab'])
+        self.check_exact(r'(?:a*)*b', ['b', 'aab', 'aaa', ''])
+
+    def test_big_repeat(self):
+        # approximated: the DFA may accept more, but never less
+        for s in ['a' * 50, 'a' * 100, 'a' * 150, 'a' * 250]:
+            assert dfa_check('a{100,200}$', s, False) or not rsre_check(
+                'a{100,200}$', s, False)
+        assert not dfa_check('a{100,200}$', 'a' * 10, False)
+
+    def test_charset(self):
+        self.check_exact(r'[a-f0-9]+:[^\s]+', ['ab:x', 'g:x', 'zz 0:y',
+                                               'ab: x', ''])
+        self.check_exact(r'[\w.]+@[\w.]+', ['x@y', 'foo.bar@baz', '@x'])
+
+    def test_ignore_case(self):
+        self.check_exact(r'(?i)error', ['ERROR', 'Error here', 'err'])
+        self.check_exact(r'(?i)[a-c]x', ['Bx', 'bX', 'dx'])
+
+    def test_anchors(self):
+        self.check_exact(r'^abc', ['abc', 'xabc', 'abcx'])
+        self.check_exact(r'\Aabc', ['abc', 'xabc'])
+        self.check_exact(r'abc$', ['abc', 'xabc', 'abcx', 'abc\n',
+                                   'abc\n\n'])
+        self.check_exact(r'abc\Z', ['abc', 'xabc', 'abcx', 'abc\n'])
+        self.check_exact(r'(abc)$', ['abc', 'xabc', 'abcx', 'abc\n'])
+        matcher = rsre_dfa.DFAMatcher(get_code(r'^abc'), 0)
+        assert matcher.nfa.anchored
+        matcher = rsre_dfa.DFAMatcher(get_code(r'abc$'), 0)
+        assert matcher.nfa.end_anchor == rsre_core.AT_END
+
+    def test_lookaround(self):
+        # over-approximated as always matching
+        assert dfa_check(r'a(?=b)', 'ac', True)
+        assert not dfa_check(r'a(?!b)', 'xyz', True)
+
+    def test_unicode(self):
+        code = get_code(u'a.c')
+        matcher = rsre_dfa.DFAMatcher(code, 0)
+        for s, expected in [(u'a\u1234c', True), (u'abc', True),
+                            (u'a\u1234', False), (u'\u1234' * 20, False)]:
+            ctx = rsre_core.UnicodeMatchContext(code, s, 0, len(s), 0)
+            assert rsre_dfa.dfa_scan(ctx, matcher.get_dfa(True), 0) == expected
+
+    def test_too_many_states(self):
+        # the classical exponential blowup of searching a(a|b){n}c
+        code = get_code(r'a[ab][ab][ab][ab][ab][ab][ab][ab][ab][ab]c')
+        matcher = rsre_dfa.compile_dfa(code, 0)
+        r = random.Random(42)
+        s = ''.join([r.choice('ab') for i in range(3000)])
+        ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        assert rsre_dfa.search_context(ctx, matcher) is False
+        assert not matcher.enabled
+        # falls back to rsre
+        s += 'c'
+        ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        assert rsre_dfa.search_context(ctx, matcher) is True
+
+    def test_disabled_if_useless(self):
+        code = get_code(r'\w+')
+        matcher = rsre_dfa.compile_dfa(code, 0)
+        s = 'x' * 100
+        for i in range(rsre_dfa.CHECK_PERIOD):
+            ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+            assert rsre_dfa.search_context(ctx, matcher)
+        assert not matcher.enabled
+
+    def test_search_context(self):
+        code = get_code(r'(ERROR|WARN) (\d+)')
+        matcher = rsre_dfa.compile_dfa(code, 0)
+        s = 'x' * 100 + 'WARN 42' + 'y' * 100
+        ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        assert rsre_dfa.search_context(ctx, matcher)
+        assert ctx.span(2) == (105, 107)
+        ctx = rsre_core.StrMatchContext(code, s, 106, len(s), 0)
+        assert not rsre_dfa.search_context(ctx, matcher)
+        ctx = rsre_core.StrMatchContext(code, s, 100, len(s), 0)
+        assert rsre_dfa.match_context(ctx, matcher)
+        ctx = rsre_core.StrMatchContext(code, s, 99, len(s), 0)
+        assert not rsre_dfa.match_context(ctx, matcher)
+
+
+def test_external():
+    # the DFA must never reject a string for which rsre finds a match
+    from pypy.rlib.rsre.test.re_tests import tests
+    for t in tests:
+        pattern, s = t[:2]
+        try:
+            code = get_code(pattern)
+        except re.error:
+            continue
+        try:
+            matcher = rsre_dfa.DFAMatcher(code, 0)
+        except rsre_dfa.DFAUnsupported:
+            continue
+        for searching in [False, True]:
+            ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+            if searching:
+                found = rsre_core.search_context(ctx)
+            else:
+                found = rsre_core.match_context(ctx)
+            if found:
+                assert matcher.may_match(ctx.fresh_copy(0), searching), (
+                    pattern, s)
+                ctx = ctx.fresh_copy(0)
+                assert rsre_dfa.dfa_scan(ctx, matcher.get_dfa(searching), 0), (
+                    pattern, s)
+
+
+def test_translates():
+    code = get_code(r'(ERROR|WARN): (\w+)$')
+    def f(n):
+        matcher = rsre_dfa.compile_dfa(code, 0)
+        s = 'x' * n + 'WARN: foo'
+        ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        if not rsre_dfa.search_context(ctx, matcher):
+            return -1
+        u = u'y' * n
+        ctx = rsre_core.UnicodeMatchContext(code, u, 0, len(u), 0)
+        if rsre_dfa.search_context(ctx, matcher):
+            return -2
+        return ctx.match_start
+    assert interpret(f, [20]) == 0
@@ -0,0 +1,126 @@
+import re
+from pypy.rlib.rsre import rsre_core, rsre_prefilter
+from pypy.rlib.rsre.test.test_match import get_code
+from pypy.rpython.test.test_llinterp import interpret
+
+
+def literals_of(regexp):
+    prefilter = rsre_prefilter.extract_prefilter(get_code(regexp))
+    if prefilter is None:
+        return None
+    return sorted([''.join([chr(c) for c in literal])
+                   for literal in prefilter.literals])
+
+def prefilter_search(regexp, string, start=0):
+    code = get_code(regexp)
+    prefilter = rsre_prefilter.extract_prefilter(code)
+    assert prefilter is not None
+    ctx = rsre_core.StrMatchContext(code, string, start, len(string), 0)
+    if rsre_prefilter.search_context(ctx, prefilter):
+        return ctx.span()
+    return None
+
+def rsre_search(regexp, string, start=0):
+    res = rsre_core.search(get_code(regexp), string, start)
+    if res is None:
+        return None
+    return res.span()
+
+
+class TestExtract:
+
+    def test_branch(self):
+        assert literals_of(r'(ERROR|WARN|FATAL).*') == ['ERROR', 'FATAL',
+                                                        'WARN']
+        assert literals_of(r'(?:ab|cd)ef') == ['abef', 'cdef']
+        assert literals_of(r'(?:ab|cd\d)ef') == ['ab', 'cd']
+        assert literals_of(r'(?:ab|cd)(?:ef|gh)') == ['abef', 'abgh',
+                                                     'cdef', 'cdgh']
+
+    def test_charset(self):
+        assert literals_of(r'(?:ab|cd)[xy]') == ['abx', 'aby', 'cdx', 'cdy']
+        assert literals_of(r'(?:ab|cd)[^xy]') == ['ab', 'cd']
+        assert literals_of(r'(?:ab|cd)[0-2x]') == ['ab0', 'ab1', 'ab2', 'abx',
+                                                  'cd0', 'cd1', 'cd2', 'cdx']
+
+    def test_none(self):
+        assert literals_of(r'\w+') is None
+        assert literals_of(r'(?:ab|c)') is None         # 'c' too short
+        assert literals_of(r'(?:ab|cd)[a-z]') == ['ab', 'cd']
+        assert literals_of(r'(?:ab|c*)d') is None
+        assert literals_of(r'(?i)(?:ab|cd)') is None
+        assert literals_of(r'abc') is None              # fast_search()
+        assert literals_of(r'\b(?:ab|cd)') is None
+        assert rsre_prefilter.extract_prefilter([rsre_core.OPCODE_BRANCH,
+                                                 5]) is None
+
+    def test_limits(self):
+        literals = literals_of(r'(?:ab|cd|ef|gh)(?:ij|kl|mn|op)'
+                               r'(?:qr|st|uv)')
+        assert len(literals) == 16
+        assert literals[0] == 'abij'
+        assert len(literals_of(r'(?:ab|cd)' + 'x' * 40)[0]) <= (
+            rsre_prefilter.MAX_LITERAL_LENGTH + 2)
+
+
+class TestSearch:
+
+    def check(self, regexp, strings):
+        for s in strings:
+            for start in range(len(s) + 1):
+                assert (prefilter_search(regexp, s, start) ==
+                        rsre_search(regexp, s, start)), (regexp, s, start)
+
+    def test_branch(self):
+        self.check(r'(ERROR|WARN|FATAL): (\w+)',
+                   ['xx WARN: a', 'ERROR: x FATAL: y', 'WARN:x', 'WARN',
+                    'FATAL FATAL: z', 'ERRORWARN: q'])
+
+    def test_overlapping(self):
+        self.check(r'(?:aab|abb)c', ['aaabbc', 'aabbc', 'abbabbc', 'aabc'])
+        self.check(r'(?:abcd|bc)x', ['abcx', 'abcdx', 'bcbcabcdx'])
+
+    def test_unicode(self):
+        code = get_code(u'(?:\u1234b|cd)e')
+        prefilter = rsre_prefilter.extract_prefilter(code)
+        for s, expected in [(u'xx\u1234be', 2), (u'\u1235be', -1),
+                            (u'\u1234cde', 1)]:
+            ctx = rsre_core.UnicodeMatchContext(code, s, 0, len(s), 0)
+            if rsre_prefilter.search_context(ctx, prefilter):
+                assert ctx.match_start == expected
+            else:
+                assert expected == -1
+
+
+def test_external():
+    from pypy.rlib.rsre.test.re_tests import tests
+    for t in tests:
+        pattern, s = t[:2]
+        try:
+            code = get_code(pattern)
+        except re.error:
+            continue
+        prefilter = rsre_prefilter.extract_prefilter(code)
+        if prefilter is None:
+            continue
+        ctx1 = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        ctx2 = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        found = rsre_core.search_context(ctx1)
+        assert rsre_prefilter.search_context(ctx2, prefilter) == found
+        if found:
+            assert ctx1.span() == ctx2.span()
+
+def test_translates():
+    code = get_code(r'(ERROR|WARN|FATAL): (\w+)')
+    def f(n):
+        prefilter = rsre_prefilter.extract_prefilter(code)
+        s = 'x' * n + 'WARN: foo'
+        ctx = rsre_core.StrMatchContext(code, s, 0, len(s), 0)
+        if not rsre_prefilter.search_context(ctx, prefilter):
+            return -1
+        u = u'y' * n + u'FATAL:'
+        uctx = rsre_core.UnicodeMatchContext(code, u, 0, len(u), 0)
+        if rsre_prefilter.search_context(uctx, prefilter):
+            return -2
+        return ctx.match_start
+    assert interpret(f, [20]) == 20
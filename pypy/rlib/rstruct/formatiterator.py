@@ -1,4 +1,5 @@
 from pypy.rlib import jit
+from pypy.rlib.objectmodel import specialize
 from pypy.rlib.rarithmetic import ovfcheck
 from pypy.rlib.rstruct.error import StructError
 from pypy.rlib.rstruct.nativefmttable import native_is_bigendian, native_fmttable
@@ -79,6 +80,41 @@ class FormatIterator(object):
                 self.operate(fmtdesc, repetitions)
         self.finished()
 
+    @jit.look_inside_iff(lambda self, compiled: jit.isconstant(compiled))
+    def interpret_compiled(self, compiled):
+        # like interpret(), but replays a CompiledFormat instead of
+        # parsing the format string again
+        self.bigendian = compiled.bigendian
+        if compiled.native:
+            self._interpret_units(compiled, True)
+        else:
+            self._interpret_units(compiled, False)
+        self.finished()
+
+    @specialize.arg(2)
+    @jit.unroll_safe
+    def _interpret_units(self, compiled, native):
+        if native:
+            table = unroll_native_fmtdescs
+        else:
+            table = unroll_standard_fmtdescs
+        for i in range(len(compiled.counts)):
+            c = compiled.fmtchars[i]
+            repetitions = compiled.counts[i]
+            for fmtdesc in table:
+                if c == fmtdesc.fmtchar:
+                    if self._operate_is_specialized_:
+                        if fmtdesc.alignment > 1:
+                            self.align(fmtdesc.mask)
+                        self.operate(fmtdesc, repetitions)
+                    break
+            else:
+                raise StructError("bad char in struct format")
+            if not self._operate_is_specialized_:
+                if fmtdesc.alignment > 1:
+                    self.align(fmtdesc.mask)
+                self.operate(fmtdesc, repetitions)
+
     def finished(self):
         pass
 
@@ -100,6 +136,46 @@ class CalcSizeFormatIterator(FormatIterator):
             raise StructError("total struct size too long")
 
 
+class CompileFormatIterator(CalcSizeFormatIterator):
+    """Parses a format string once, collecting its units for
+    interpret_compiled()."""
+
+    def __init__(self):
+        self.fmtchars = []
+        self.counts = []
+
+    def operate(self, fmtdesc, repetitions):
+        CalcSizeFormatIterator.operate(self, fmtdesc, repetitions)
+        self.fmtchars.append(fmtdesc.fmtchar)
+        self.counts.append(repetitions)
+
+
+class CompiledFormat(object):
+    """A format string parsed by compile_format(): the byte order, the
+    total size, and the units as pairs of a format char and a repetition
+    count."""
+    _immutable_fields_ = ['native', 'bigendian', 'size', 'fmtchars',
+                          'counts[*]']
+
+    def __init__(self, native, bigendian, size, fmtchars, counts):
+        self.native = native
+        self.bigendian = bigendian
+        self.size = size
+        self.fmtchars = fmtchars
+        self.counts = counts
+
+def compile_format(fmt):
+    """Parse 'fmt' into a CompiledFormat.  Raises StructError."""
+    fmtiter = CompileFormatIterator()
+    fmtiter.interpret(fmt)
+    native = True
+    if len(fmt) > 0:
+        c = fmt[0]
+        native = not (c == '=' or c == '<' or c == '>' or c == '!')
+    return CompiledFormat(native, fmtiter.bigendian, fmtiter.totalsize,
+                          ''.join(fmtiter.fmtchars), fmtiter.counts[:])
+
+
 class FmtDesc(object):
     def __init__(self, fmtchar, attrs):
         self.fmtchar = fmtchar
@@ -258,6 +258,13 @@ class Stream(object):
                 break
         return ''.join(result)
 
+    def readline_slice(self):
+        """Like readline(), but returns a tuple (data, start, stop): the
+        line is data[start:stop].  Streams with a read buffer can return
+        the buffer itself instead of copying the line out of it."""
+        line = self.readline()
+        return line, 0, len(line)
+
     def truncate(self, size):
         raise MyNotImplementedError
 
@@ -439,6 +446,7 @@ STREAM_METHODS = dict([
     ("seek", [r_longlong, int]),
     ("readall", []),
     ("readline", []),
+    ("readline_slice", []),
     ("truncate", [r_longlong]),
     ("flush", []),
     ("flushable", []),
@@ -678,6 +686,22 @@ class BufferingInputStream(Stream):
             chunks.append(self.buf)
         return "".join(chunks)
 
+    def readline_slice(self):
+        pos = self.pos
+        assert pos >= 0
+        if pos == len(self.buf):
+            self.buf = self.do_read(self.bufsize)
+            self.pos = pos = 0
+            if not self.buf:
+                return "", 0, 0
+        i = self.buf.find("\n", pos)
+        if i >= 0: # new line found, share the buffer
+            i += 1
+            self.pos = i
+            return self.buf, pos, i
+        line = self.readline()
+        return line, 0, len(line)
+
     def peek(self):
         pos = self.pos
         assert pos >= 0
@@ -750,6 +774,17 @@ class ReadlineInputStream(Stream):
         self.bufstart = i
         return result
 
+    def readline_slice(self):
+        if self.buf is not None:
+            start = self.bufstart
+            i = self.buf.find('\n', start)
+            if i >= 0:
+                i += 1
+                self.bufstart = i
+                return self.buf, start, i
+        line = self.readline()
+        return line, 0, len(line)
+
     def peek(self):
         if self.buf is None:
             return ''
@@ -1164,6 +1199,7 @@ class CallbackReadFilter(Stream):
     read       = PassThrough("read",      flush_buffers=True)
     readall    = PassThrough("readall",   flush_buffers=True)
     readline   = PassThrough("readline",  flush_buffers=True)
+    readline_slice = PassThrough("readline_slice", flush_buffers=True)
     peek       = PassThrough("peek",      flush_buffers=False)
     flush      = PassThrough("flush",     flush_buffers=False)
     flushable  = PassThrough("flushable", flush_buffers=False)
@@ -138,6 +138,21 @@ class BaseTestJIT(BaseRtypingTest):
             t.view()
         # assert did not raise
 
+    def test_mark_hot(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def fn(n):
+            myjitdriver.mark_hot(m=n)
+            return n
+        t = self.gengraph(fn, [int])[0]
+        graph = t.graphs[0]
+        [op] = [op for op in graph.startblock.operations
+                   if op.opname == 'jit_marker']
+        assert op.args[0].value == 'mark_hot'
+        assert op.args[1].value is myjitdriver
+        assert op.args[2] is graph.getargs()[0]
+        res = self.interpret(fn, [5])
+        assert res == 5
+
     def test_isconstant(self):
         def f(n):
             assert isconstant(n) is False
@@ -192,6 +192,13 @@ def test_intmask():
     assert intmask(r_uint(-1)) == -1
     assert intmask(r_ulonglong(-1)) == -1
 
+def test_longlonglongmask():
+    assert longlonglongmask(-1) == -1
+    assert type(longlonglongmask(1)) is r_longlonglong
+    assert longlonglongmask(1 << 127) == -(1 << 127)
+    assert longlonglongmask((1 << 128) + 5) == 5
+    assert longlonglongmask(long(longlonglongmax) + 1) == -longlonglongmax - 1
+
 def test_intmask_small():
     from pypy.rpython.lltypesystem import rffi
     for tp in [rffi.r_signedchar, rffi.r_short, rffi.r_int,
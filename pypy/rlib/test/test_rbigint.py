@@ -6,6 +6,7 @@ from pypy.rlib.rbigint import rbigint, SHIFT, MASK, KARATSUBA_CUTOFF
 from pypy.rlib.rbigint import _store_digit
 from pypy.rlib import rbigint as lobj
 from pypy.rlib.rarithmetic import r_uint, r_longlong, r_ulonglong, intmask
+from pypy.rlib.rarithmetic import longlongmax
 from pypy.rpython.test.test_llinterp import interpret
 
 class TestRLong(object):
@@ -145,14 +146,16 @@ class Test_rbigint(object):
         assert rbigint.fromrarith_int(0).eq(bigint([0], 0))
         assert rbigint.fromrarith_int(17).eq(bigint([17], 1))
         assert rbigint.fromrarith_int(MAX).eq(bigint([MAX], 1))
-        assert rbigint.fromrarith_int(r_longlong(BASE)).eq(bigint([0, 1], 1))
-        assert rbigint.fromrarith_int(r_longlong(BASE**2)).eq(
-            bigint([0, 0, 1], 1))
         assert rbigint.fromrarith_int(-17).eq(bigint([17], -1))
         assert rbigint.fromrarith_int(-MAX).eq(bigint([MAX], -1))
         assert rbigint.fromrarith_int(-MAX-1).eq(bigint([0, 1], -1))
-        assert rbigint.fromrarith_int(r_longlong(-(BASE**2))).eq(
-            bigint([0, 0, 1], -1))
+        if BASE**2 <= longlongmax:
+            assert rbigint.fromrarith_int(r_longlong(BASE)).eq(
+                bigint([0, 1], 1))
+            assert rbigint.fromrarith_int(r_longlong(BASE**2)).eq(
+                bigint([0, 0, 1], 1))
+            assert rbigint.fromrarith_int(r_longlong(-(BASE**2))).eq(
+                bigint([0, 0, 1], -1))
 #        assert rbigint.fromrarith_int(-sys.maxint-1).eq((
 #            rbigint.digits_for_most_neg_long(-sys.maxint-1), -1)
 
@@ -506,22 +509,22 @@ class TestInternalFunctions(object):
         assert prod.tolong() == x * y + z
 
     def test__x_divrem(self):
-        x = 12345678901234567890L
+        x = 12345678901234567890L ** 3
         for i in range(100):
-            y = long(randint(0, 1 << 30))
-            y <<= 30
-            y += randint(0, 1 << 30)
+            y = long(randint(1, 1 << (SHIFT - 1)))
+            y <<= SHIFT
+            y += randint(0, 1 << (SHIFT - 1))
             f1 = rbigint.fromlong(x)
             f2 = rbigint.fromlong(y)
             div, rem = lobj._x_divrem(f1, f2)
             assert div.tolong(), rem.tolong() == divmod(x, y)
 
     def test__divrem(self):
-        x = 12345678901234567890L
+        x = 12345678901234567890L ** 3
         for i in range(100):
-            y = long(randint(0, 1 << 30))
-            y <<= 30
-            y += randint(0, 1 << 30)
+            y = long(randint(1, 1 << (SHIFT - 1)))
+            y <<= SHIFT
+            y += randint(0, 1 << (SHIFT - 1))
             for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
                 sx *= x
                 sy *= y
@@ -569,6 +572,68 @@ class TestInternalFunctions(object):
         ret = lobj._k_lopsided_mul(f1, f2)
         assert ret.tolong() == f1.tolong() * f2.tolong()
 
+    def test__tc_mul(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'KARATSUBA_CUTOFF', 3)
+        monkeypatch.setattr(lobj, 'KARATSUBA_SQUARE_CUTOFF', 6)
+        monkeypatch.setattr(lobj, 'TOOM_CUTOFF', 5)
+        for digs_a, digs_b in [(6, 6), (7, 9), (12, 12), (31, 40), (40, 79)]:
+            f1 = bigint([lobj.MASK] * digs_a, 1)
+            f2 = bigint([lobj.MASK] * digs_b, 1)
+            ret = lobj._tc_mul(f1, f2)
+            assert ret.tolong() == f1.tolong() * f2.tolong()
+            ret = lobj._tc_mul(f1, f1)
+            assert ret.tolong() == f1.tolong() ** 2
+        for i in range(20):
+            x = long(randint(1, 1 << 1500))
+            y = long(randint(1, 1 << 1500))
+            f1 = rbigint.fromlong(-x)
+            f2 = rbigint.fromlong(y)
+            assert f1.mul(f2).tolong() == -x * y
+            assert f1.mul(f1).tolong() == x * x
+
+    def test__divrem_dc(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'KARATSUBA_CUTOFF', 3)
+        monkeypatch.setattr(lobj, 'KARATSUBA_SQUARE_CUTOFF', 6)
+        monkeypatch.setattr(lobj, 'DIV_LIMIT', 2)
+        for i in range(50):
+            x = long(randint(1, 1 << randint(200, 3000)))
+            y = long(randint(1, 1 << randint(100, 1000)))
+            if i % 5 == 0:
+                y = (1 << randint(100, 1000)) - 1   # top digits all MASK
+            for sx, sy in (1, 1), (1, -1), (-1, -1), (-1, 1):
+                sx *= x
+                sy *= y
+                f1 = rbigint.fromlong(sx)
+                f2 = rbigint.fromlong(sy)
+                div, rem = lobj._divrem(f1, f2)
+                q = x // y * (sx // x) * (sy // y)    # rounded towards 0
+                assert (div.tolong(), rem.tolong()) == (q, sx - q * sy)
+                div, mod = f1.divmod(f2)
+                assert (div.tolong(), mod.tolong()) == divmod(sx, sy)
+                assert f1.tolong() == sx and f2.tolong() == sy
+
+    def test__format_recursive(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'FORMAT_RECURSIVE_CUTOFF', 4)
+        for x in [10L ** 200, 10L ** 200 - 1, -3L ** 500, 7L ** 600 + 1,
+                  long(randint(1, 1 << 2000)), 1L << 1000]:
+            f1 = rbigint.fromlong(x)
+            assert f1.str() == str(x)
+            assert f1.repr() == repr(x)
+            assert f1.format('01234567', '0', 'L') == oct(x)
+        x = 5L ** 700
+        assert rbigint.fromlong(-x).format('0123456789ab', '[', ']') == (
+            '-[' + lobj._format(rbigint.fromlong(x), '0123456789ab') + ']')
+
+    def test_chunks_to_bigint(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'FROMSTR_RECURSIVE_CUTOFF', 3)
+        for n in range(40):
+            chunks = [randint(0, 999) for i in range(n)]
+            x = lobj._chunks_to_bigint(chunks, 1000)
+            assert x.tolong() == long('0' + ''.join(['%03d' % c
+                                                     for c in chunks]))
+        s = '-' + '1234567890' * 100
+        assert lobj._decimalstr_to_bigint(s).tolong() == long(s)
+
     def test_longlong(self):
         max = 1L << (r_longlong.BITS-1)
         f1 = rbigint.fromlong(max-1)    # fits in r_longlong
@@ -626,6 +691,23 @@ class TestInternalFunctions(object):
         x = parse_digit_string(Parser(7, -1, [0, 0, 0]))
         assert x.tobool() is False
 
+    def test_parse_digit_string_recursive(self, monkeypatch):
+        from pypy.rlib.rbigint import parse_digit_string
+        monkeypatch.setattr(lobj, 'FROMSTR_RECURSIVE_CUTOFF', 3)
+        class Parser:
+            def __init__(self, base, sign, digits):
+                self.base = base
+                self.sign = sign
+                self.next_digit = iter(digits + [-1]).next
+        for base in [10, 16, 7]:
+            for n in [50, 120, 333]:
+                digits = [randint(0, base - 1) for i in range(n)]
+                x = parse_digit_string(Parser(base, -1, digits))
+                num = 0L
+                for digit in digits:
+                    num = num * base + digit
+                assert x.tolong() == -num
+
 
 BASE = 2 ** SHIFT
 
@@ -160,6 +160,21 @@ class BaseTestBufferingInputStreamTests(BaseRtypingTest):
             res = self.interpret(f, [])
             assert res
 
+    def test_readline_slice(self):
+        for file in [self.makeStream(), self.makeStream(bufsize=1)]:
+            def f():
+                i = 0
+                result = True
+                while 1:
+                    data, start, stop = file.readline_slice()
+                    if start == stop:
+                        break
+                    result = result and self.lines[i] == data[start:stop]
+                    i += 1
+                return result and i == len(self.lines)
+            res = self.interpret(f, [])
+            assert res
+
     def test_readall(self):
         file = self.makeStream()
         def f():
@@ -1039,6 +1054,17 @@ class TestReadlineInputStream:
                 i += 1
             assert i == len(self.lines)
 
+    def test_readline_slice(self):
+        for file in [self.makeStream(), self.makeStream(bufsize=2)]:
+            i = 0
+            while 1:
+                data, start, stop = file.readline_slice()
+                if start == stop:
+                    break
+                assert self.lines[i] == data[start:stop]
+                i += 1
+            assert i == len(self.lines)
+
     def test_readline_and_read_interleaved(self):
         for file in [self.makeStream(seek=True),
                      self.makeStream(seek=True, bufsize=2)]:
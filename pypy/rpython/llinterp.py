@@ -1,6 +1,6 @@
 from pypy.objspace.flow.model import FunctionGraph, Constant, Variable, c_last_exception
 from pypy.rlib.rarithmetic import intmask, r_uint, ovfcheck, r_longlong
-from pypy.rlib.rarithmetic import r_ulonglong, is_valid_int
+from pypy.rlib.rarithmetic import r_ulonglong, is_valid_int, r_longlonglong
 from pypy.rpython.lltypesystem import lltype, llmemory, lloperation, llheap
 from pypy.rpython.lltypesystem import rclass
 from pypy.rpython.ootypesystem import ootype
@@ -804,6 +804,9 @@ class LLFrame(object):
         addr = llmemory.cast_ptr_to_adr(ptr)
         return self.heap.can_move(addr)
 
+    def op_gc_statistics(self, index):
+        return self.heap.get_statistics(index)
+
     def op_gc_thread_prepare(self):
         self.heap.thread_prepare()
 
@@ -1102,6 +1105,9 @@ class LLFrame(object):
     _makefunc2('op_ullong_floordiv_zer',  '//', 'r_ulonglong')
     _makefunc2('op_ullong_mod_zer',       '%',  'r_ulonglong')
 
+    _makefunc2('op_lllong_floordiv_zer',  '//', 'r_longlonglong')
+    _makefunc2('op_lllong_mod_zer',       '%',  'r_longlonglong')
+
     def op_int_add_nonneg_ovf(self, x, y):
         if isinstance(y, int):
             assert y >= 0
@@ -1,7 +1,8 @@
 import py
 from pypy.rlib.rarithmetic import (r_int, r_uint, intmask, r_singlefloat,
                                    r_ulonglong, r_longlong, r_longfloat,
-                                   base_int, normalizedinttype, longlongmask)
+                                   base_int, normalizedinttype, longlongmask,
+                                   r_longlonglong, longlonglongmask)
 from pypy.rlib.objectmodel import Symbolic
 from pypy.tool.uid import Hashable
 from pypy.tool.identity_dict import identity_dict
@@ -670,6 +671,8 @@ _numbertypes[r_int] = _numbertypes[int]
 if r_longlong is not r_int:
     _numbertypes[r_longlong] = Number("SignedLongLong", r_longlong,
                                       longlongmask)
+_numbertypes[r_longlonglong] = Number("SignedLongLongLong", r_longlonglong,
+                                      longlonglongmask)
 
 def build_number(name, type):
     try:
@@ -690,6 +693,7 @@ Signed   = build_number("Signed", int)
 Unsigned = build_number("Unsigned", r_uint)
 SignedLongLong = build_number("SignedLongLong", r_longlong)
 UnsignedLongLong = build_number("UnsignedLongLong", r_ulonglong)
+SignedLongLongLong = build_number("SignedLongLongLong", r_longlonglong)
 
 Float       = Primitive("Float",       0.0)                  # C type 'double'
 SingleFloat = Primitive("SingleFloat", r_singlefloat(0.0))   # C type 'float'
@@ -21,6 +21,7 @@ ops_unary = {'is_true': True, 'neg': True, 'abs': True, 'invert': True}
 # global synonyms for some types
 from pypy.rlib.rarithmetic import intmask
 from pypy.rlib.rarithmetic import r_int, r_uint, r_longlong, r_ulonglong
+from pypy.rlib.rarithmetic import r_longlonglong
 from pypy.rpython.lltypesystem.llmemory import AddressAsInt
 
 if r_longlong is r_int:
@@ -36,6 +37,7 @@ argtype_by_name = {
     'uint': r_uint,
     'llong': r_longlong_arg,
     'ullong': r_ulonglong,
+    'lllong': r_longlonglong,
     }
 
 def no_op(x):
@@ -283,6 +285,22 @@ def op_llong_mod(x, y):
         r -= y
     return r
 
+def op_lllong_floordiv(x, y):
+    assert isinstance(x, r_longlonglong)
+    assert isinstance(y, r_longlonglong)
+    r = x//y
+    if x^y < 0 and x%y != 0:
+        r += 1
+    return r
+
+def op_lllong_mod(x, y):
+    assert isinstance(x, r_longlonglong)
+    assert isinstance(y, r_longlonglong)
+    r = x%y
+    if x^y < 0 and x%y != 0:
+        r -= y
+    return r
+
 def op_uint_lshift(x, y):
     assert isinstance(x, r_uint)
     assert is_valid_int(y)
@@ -313,6 +331,16 @@ def op_ullong_rshift(x, y):
     assert is_valid_int(y)
     return r_ulonglong(x >> y)
 
+def op_lllong_lshift(x, y):
+    assert isinstance(x, r_longlonglong)
+    assert is_valid_int(y)
+    return r_longlonglong(x << y)
+
+def op_lllong_rshift(x, y):
+    assert isinstance(x, r_longlonglong)
+    assert is_valid_int(y)
+    return r_longlonglong(x >> y)
+
 def op_same_as(x):
     return x
 
@@ -2,7 +2,7 @@ from pypy.tool.pairtype import pairtype
 from pypy.annotation import model as annmodel
 from pypy.rpython.lltypesystem import lltype
 from pypy.rpython.lltypesystem import rclass
-from pypy.rpython.lltypesystem.rdict import rtype_r_dict
+from pypy.rpython.lltypesystem.rordereddict import rtype_r_dict
 from pypy.rlib import objectmodel
 from pypy.rpython.rmodel import TyperError, Constant
 from pypy.rpython.robject import pyobj_repr
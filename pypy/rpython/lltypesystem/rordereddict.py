@@ -0,0 +1,1051 @@
+from pypy.tool.pairtype import pairtype
+from pypy.objspace.flow.model import Constant
+from pypy.rpython.rdict import (AbstractDictRepr, AbstractDictIteratorRepr,
+     rtype_newdict)
+from pypy.rpython.lltypesystem import lltype, llmemory
+from pypy.rlib import objectmodel, jit, rgc
+from pypy.rlib.debug import ll_assert
+from pypy.rlib.rarithmetic import r_uint, intmask, LONG_BIT
+from pypy.rpython import rmodel
+from pypy.rpython.error import TyperError
+from pypy.rlib.unroll import unrolling_iterable
+from pypy.tool.sourcetools import func_with_new_name
+
+
+# ____________________________________________________________
+#
+#  generic implementation of RPython dictionary, with parametric DICTKEY and
+#  DICTVALUE types.  The dictionary is "compact": the entries are stored
+#  densely, in insertion order, in 'entries', and a separate sparse array
+#  'indexes' maps the hash of a key to the position of its entry.  The
+#  items of 'indexes' are 1, 2, 4 or 8 bytes wide depending on the size of
+#  the dictionary.  Iteration simply walks 'entries' from left to right,
+#  so it is linear and follows insertion order.
+#
+#    struct dictentry {
+#        DICTKEY key;
+#        bool f_valid;      # (optional) the entry is filled
+#        DICTVALUE value;
+#        int f_hash;        # (optional) key hash, if hard to recompute
+#    }
+#
+#    struct dicttable {
+#        int num_live_items;
+#        int num_ever_used_items;
+#        int resize_counter;
+#        char *indexes;            # items of 1, 2, 4 or 8 chars
+#        int lookup_function_no;   # FUNC_BYTE, FUNC_SHORT, FUNC_INT, FUNC_LONG
+#        dictentry *entries;
+#        (Function DICTKEY, DICTKEY -> bool) *fnkeyeq;
+#        (Function DICTKEY -> int) *fnkeyhash;
+#    }
+#
+#  The items of 'indexes' are FREE, DELETED, or VALID_OFFSET plus the
+#  position of the entry in 'entries'.  Only the first num_ever_used_items
+#  items of 'entries' are meaningful; among them, the deleted ones are
+#  marked as not valid and are squeezed out the next time the indexes are
+#  rebuilt.
+#
+
+IS_64BIT = LONG_BIT == 64
+
+# 'lookup_function_no' is the log2 of the width of the items of 'indexes'
+FUNC_BYTE, FUNC_SHORT, FUNC_INT, FUNC_LONG = range(4)
+
+DICTINDEX = lltype.Ptr(lltype.GcArray(lltype.Char))
+
+FREE = 0
+DELETED = 1
+VALID_OFFSET = 2
+
+FLAG_LOOKUP = 0
+FLAG_DELETE = 1
+
+DICT_INITSIZE = 8
+
+
+class DictRepr(AbstractDictRepr):
+
+    def __init__(self, rtyper, key_repr, value_repr, dictkey, dictvalue,
+                 custom_eq_hash=None, force_non_null=False):
+        self.rtyper = rtyper
+        self.DICT = lltype.GcForwardReference()
+        self.lowleveltype = lltype.Ptr(self.DICT)
+        self.custom_eq_hash = custom_eq_hash is not None
+        if not isinstance(key_repr, rmodel.Repr):  # not computed yet, done by setup()
+            assert callable(key_repr)
+            self._key_repr_computer = key_repr
+        else:
+            self.external_key_repr, self.key_repr = self.pickkeyrepr(key_repr)
+        if not isinstance(value_repr, rmodel.Repr):  # not computed yet, done by setup()
+            assert callable(value_repr)
+            self._value_repr_computer = value_repr
+        else:
+            self.external_value_repr, self.value_repr = self.pickrepr(value_repr)
+        self.dictkey = dictkey
+        self.dictvalue = dictvalue
+        self.dict_cache = {}
+        self._custom_eq_hash_repr = custom_eq_hash
+        # the entries up to num_ever_used_items have all been filled, so
+        # NULLs never need to be told apart from never-used entries any
+        # more; 'force_non_null' is accepted for compatibility only.
+        self.force_non_null = force_non_null
+        # setup() needs to be called to finish this initialization
+
+    def _externalvsinternal(self, rtyper, item_repr):
+        return rmodel.externalvsinternal(self.rtyper, item_repr)
+
+    def _setup_repr(self):
+        if 'key_repr' not in self.__dict__:
+            key_repr = self._key_repr_computer()
+            self.external_key_repr, self.key_repr = self.pickkeyrepr(key_repr)
+        if 'value_repr' not in self.__dict__:
+            self.external_value_repr, self.value_repr = self.pickrepr(self._value_repr_computer())
+        if isinstance(self.DICT, lltype.GcForwardReference):
+            self.DICTKEY = self.key_repr.lowleveltype
+            self.DICTVALUE = self.value_repr.lowleveltype
+
+            # compute the shape of the DICTENTRY structure
+            entryfields = []
+            must_clear_key = (isinstance(self.DICTKEY, lltype.Ptr)
+                              and self.DICTKEY._needsgc())
+            must_clear_value = (isinstance(self.DICTVALUE, lltype.Ptr)
+                                and self.DICTVALUE._needsgc())
+            entrymeths = {
+                'allocate': lltype.typeMethod(_ll_malloc_entries),
+                'must_clear_key':   must_clear_key,
+                'must_clear_value': must_clear_value,
+                # the unused tail of 'entries' never keeps objects alive
+                'gc_key':           must_clear_key,
+                'gc_value':         must_clear_value,
+                }
+
+            # * the key
+            entryfields.append(("key", self.DICTKEY))
+
+            # * the state of the entry - trying to encode it as dummy objects
+            s_key   = self.dictkey.s_value
+            s_value = self.dictvalue.s_value
+            dummykeyobj = self.key_repr.get_ll_dummyval_obj(self.rtyper,
+                                                            s_key)
+            dummyvalueobj = self.value_repr.get_ll_dummyval_obj(self.rtyper,
+                                                                s_value)
+            if dummykeyobj:
+                entrymeths['dummy_obj'] = dummykeyobj
+                entrymeths['valid'] = ll_valid_from_key
+                entrymeths['mark_deleted'] = ll_mark_deleted_in_key
+                # the key is overwritten by 'dummy' when the entry is deleted
+                entrymeths['must_clear_key'] = False
+            elif dummyvalueobj:
+                entrymeths['dummy_obj'] = dummyvalueobj
+                entrymeths['valid'] = ll_valid_from_value
+                entrymeths['mark_deleted'] = ll_mark_deleted_in_value
+                # value is overwritten by 'dummy' when entry is deleted
+                entrymeths['must_clear_value'] = False
+            else:
+                entryfields.append(("f_valid", lltype.Bool))
+                entrymeths['valid'] = ll_valid_from_flag
+                entrymeths['mark_deleted'] = ll_mark_deleted_in_flag
+
+            # * the value
+            entryfields.append(("value", self.DICTVALUE))
+
+            # * the hash, if needed
+            if self.custom_eq_hash:
+                fasthashfn = None
+            else:
+                fasthashfn = self.key_repr.get_ll_fasthash_function()
+            if fasthashfn is None:
+                entryfields.append(("f_hash", lltype.Signed))
+                entrymeths['hash'] = ll_hash_from_cache
+            else:
+                entrymeths['hash'] = ll_hash_recomputed
+                entrymeths['fasthashfn'] = fasthashfn
+
+            # Build the lltype data structures
+            self.DICTENTRY = lltype.Struct("dictentry", *entryfields)
+            self.DICTENTRYARRAY = lltype.GcArray(self.DICTENTRY,
+                                                 adtmeths=entrymeths)
+            fields =          [ ("num_live_items", lltype.Signed),
+                                ("num_ever_used_items", lltype.Signed),
+                                ("resize_counter", lltype.Signed),
+                                ("indexes", DICTINDEX),
+                                ("lookup_function_no", lltype.Signed),
+                                ("entries", lltype.Ptr(self.DICTENTRYARRAY)) ]
+            if self.custom_eq_hash:
+                self.r_rdict_eqfn, self.r_rdict_hashfn = self._custom_eq_hash_repr()
+                fields.extend([ ("fnkeyeq", self.r_rdict_eqfn.lowleveltype),
+                                ("fnkeyhash", self.r_rdict_hashfn.lowleveltype) ])
+                adtmeths = {
+                    'keyhash':        ll_keyhash_custom,
+                    'keyeq':          ll_keyeq_custom,
+                    'r_rdict_eqfn':   self.r_rdict_eqfn,
+                    'r_rdict_hashfn': self.r_rdict_hashfn,
+                    'paranoia':       True,
+                    }
+            else:
+                # figure out which functions must be used to hash and compare
+                ll_keyhash = self.key_repr.get_ll_hash_function()
+                ll_keyeq = self.key_repr.get_ll_eq_function()  # can be None
+                ll_keyhash = lltype.staticAdtMethod(ll_keyhash)
+                if ll_keyeq is not None:
+                    ll_keyeq = lltype.staticAdtMethod(ll_keyeq)
+                adtmeths = {
+                    'keyhash':  ll_keyhash,
+                    'keyeq':    ll_keyeq,
+                    'paranoia': False,
+                    }
+            adtmeths['KEY']   = self.DICTKEY
+            adtmeths['VALUE'] = self.DICTVALUE
+            adtmeths['allocate'] = lltype.typeMethod(_ll_malloc_dict)
+            self.DICT.become(lltype.GcStruct("dicttable", adtmeths=adtmeths,
+                                             *fields))
+
+
+    def convert_const(self, dictobj):
+        # get object from bound dict methods
+        #dictobj = getattr(dictobj, '__self__', dictobj)
+        if dictobj is None:
+            return lltype.nullptr(self.DICT)
+        if not isinstance(dictobj, (dict, objectmodel.r_dict)):
+            raise TypeError("expected a dict: %r" % (dictobj,))
+        try:
+            key = Constant(dictobj)
+            return self.dict_cache[key]
+        except KeyError:
+            self.setup()
+            l_dict = ll_newdict_size(self.DICT, len(dictobj))
+            self.dict_cache[key] = l_dict
+            r_key = self.key_repr
+            if r_key.lowleveltype == llmemory.Address:
+                raise TypeError("No prebuilt dicts of address keys")
+            r_value = self.value_repr
+            if isinstance(dictobj, objectmodel.r_dict):
+                if self.r_rdict_eqfn.lowleveltype != lltype.Void:
+                    l_fn = self.r_rdict_eqfn.convert_const(dictobj.key_eq)
+                    l_dict.fnkeyeq = l_fn
+                if self.r_rdict_hashfn.lowleveltype != lltype.Void:
+                    l_fn = self.r_rdict_hashfn.convert_const(dictobj.key_hash)
+                    l_dict.fnkeyhash = l_fn
+
+                for dictkeycontainer, dictvalue in dictobj._dict.items():
+                    llkey = r_key.convert_const(dictkeycontainer.key)
+                    llvalue = r_value.convert_const(dictvalue)
+                    ll_dict_insertclean(l_dict, llkey, llvalue,
+                                        dictkeycontainer.hash)
+                return l_dict
+
+            else:
+                for dictkey, dictvalue in dictobj.items():
+                    llkey = r_key.convert_const(dictkey)
+                    llvalue = r_value.convert_const(dictvalue)
+                    ll_dict_insertclean(l_dict, llkey, llvalue,
+                                        l_dict.keyhash(llkey))
+                return l_dict
+
+    def rtype_len(self, hop):
+        v_dict, = hop.inputargs(self)
+        return hop.gendirectcall(ll_dict_len, v_dict)
+
+    def rtype_is_true(self, hop):
+        v_dict, = hop.inputargs(self)
+        return hop.gendirectcall(ll_dict_is_true, v_dict)
+
+    def make_iterator_repr(self, *variant):
+        return DictIteratorRepr(self, *variant)
+
+    def rtype_method_get(self, hop):
+        v_dict, v_key, v_default = hop.inputargs(self, self.key_repr,
+                                                 self.value_repr)
+        hop.exception_cannot_occur()
+        v_res = hop.gendirectcall(ll_get, v_dict, v_key, v_default)
+        return self.recast_value(hop.llops, v_res)
+
+    def rtype_method_setdefault(self, hop):
+        v_dict, v_key, v_default = hop.inputargs(self, self.key_repr,
+                                                 self.value_repr)
+        hop.exception_cannot_occur()
+        v_res = hop.gendirectcall(ll_setdefault, v_dict, v_key, v_default)
+        return self.recast_value(hop.llops, v_res)
+
+    def rtype_method_copy(self, hop):
+        v_dict, = hop.inputargs(self)
+        hop.exception_cannot_occur()
+        return hop.gendirectcall(ll_copy, v_dict)
+
+    def rtype_method_update(self, hop):
+        v_dic1, v_dic2 = hop.inputargs(self, self)
+        hop.exception_cannot_occur()
+        return hop.gendirectcall(ll_update, v_dic1, v_dic2)
+
+    def _rtype_method_kvi(self, hop, ll_func):
+        v_dic, = hop.inputargs(self)
+        r_list = hop.r_result
+        cLIST = hop.inputconst(lltype.Void, r_list.lowleveltype.TO)
+        hop.exception_cannot_occur()
+        return hop.gendirectcall(ll_func, cLIST, v_dic)
+
+    def rtype_method_keys(self, hop):
+        return self._rtype_method_kvi(hop, ll_dict_keys)
+
+    def rtype_method_values(self, hop):
+        return self._rtype_method_kvi(hop, ll_dict_values)
+
+    def rtype_method_items(self, hop):
+        return self._rtype_method_kvi(hop, ll_dict_items)
+
+    def rtype_method_iterkeys(self, hop):
+        hop.exception_cannot_occur()
+        return DictIteratorRepr(self, "keys").newiter(hop)
+
+    def rtype_method_itervalues(self, hop):
+        hop.exception_cannot_occur()
+        return DictIteratorRepr(self, "values").newiter(hop)
+
+    def rtype_method_iteritems(self, hop):
+        hop.exception_cannot_occur()
+        return DictIteratorRepr(self, "items").newiter(hop)
+
+    def rtype_method_clear(self, hop):
+        v_dict, = hop.inputargs(self)
+        hop.exception_cannot_occur()
+        return hop.gendirectcall(ll_clear, v_dict)
+
+    def rtype_method_popitem(self, hop):
+        v_dict, = hop.inputargs(self)
+        r_tuple = hop.r_result
+        cTUPLE = hop.inputconst(lltype.Void, r_tuple.lowleveltype)
+        hop.exception_is_here()
+        return hop.gendirectcall(ll_popitem, cTUPLE, v_dict)
+
+    def rtype_method_pop(self, hop):
+        if hop.nb_args == 2:
+            v_args = hop.inputargs(self, self.key_repr)
+            target = ll_pop
+        elif hop.nb_args == 3:
+            v_args = hop.inputargs(self, self.key_repr, self.value_repr)
+            target = ll_pop_default
+        hop.exception_is_here()
+        v_res = hop.gendirectcall(target, *v_args)
+        return self.recast_value(hop.llops, v_res)
+
+class __extend__(pairtype(DictRepr, rmodel.Repr)):
+
+    def rtype_getitem((r_dict, r_key), hop):
+        v_dict, v_key = hop.inputargs(r_dict, r_dict.key_repr)
+        if not r_dict.custom_eq_hash:
+            hop.has_implicit_exception(KeyError)   # record that we know about it
+        hop.exception_is_here()
+        v_res = hop.gendirectcall(ll_dict_getitem, v_dict, v_key)
+        return r_dict.recast_value(hop.llops, v_res)
+
+    def rtype_delitem((r_dict, r_key), hop):
+        v_dict, v_key = hop.inputargs(r_dict, r_dict.key_repr)
+        if not r_dict.custom_eq_hash:
+            hop.has_implicit_exception(KeyError)   # record that we know about it
+        hop.exception_is_here()
+        return hop.gendirectcall(ll_dict_delitem, v_dict, v_key)
+
+    def rtype_setitem((r_dict, r_key), hop):
+        v_dict, v_key, v_value = hop.inputargs(r_dict, r_dict.key_repr, r_dict.value_repr)
+        if r_dict.custom_eq_hash:
+            hop.exception_is_here()
+        else:
+            hop.exception_cannot_occur()
+        hop.gendirectcall(ll_dict_setitem, v_dict, v_key, v_value)
+
+    def rtype_contains((r_dict, r_key), hop):
+        v_dict, v_key = hop.inputargs(r_dict, r_dict.key_repr)
+        hop.exception_is_here()
+        return hop.gendirectcall(ll_contains, v_dict, v_key)
+
+class __extend__(pairtype(DictRepr, DictRepr)):
+    def convert_from_to((r_dict1, r_dict2), v, llops):
+        # check that we don't convert from Dicts with
+        # different key/value types
+        if r_dict1.dictkey is None or r_dict2.dictkey is None:
+            return NotImplemented
+        if r_dict1.dictkey is not r_dict2.dictkey:
+            return NotImplemented
+        if r_dict1.dictvalue is None or r_dict2.dictvalue is None:
+            return NotImplemented
+        if r_dict1.dictvalue is not r_dict2.dictvalue:
+            return NotImplemented
+        return v
+
+# ____________________________________________________________
+#
+#  Low-level methods.  These can be run for testing, but are meant to
+#  be direct_call'ed from rtyped flow graphs, which means that they will
+#  get flowed and annotated, mostly with SomePtr.
+
+def ll_valid_from_flag(entries, i):
+    return entries[i].f_valid
+
+def ll_mark_deleted_in_flag(entries, i):
+    entries[i].f_valid = False
+
+def ll_valid_from_key(entries, i):
+    ENTRIES = lltype.typeOf(entries).TO
+    dummy = ENTRIES.dummy_obj.ll_dummy_value
+    return entries[i].key != dummy
+
+def ll_mark_deleted_in_key(entries, i):
+    ENTRIES = lltype.typeOf(entries).TO
+    dummy = ENTRIES.dummy_obj.ll_dummy_value
+    entries[i].key = dummy
+
+def ll_valid_from_value(entries, i):
+    ENTRIES = lltype.typeOf(entries).TO
+    dummy = ENTRIES.dummy_obj.ll_dummy_value
+    return entries[i].value != dummy
+
+def ll_mark_deleted_in_value(entries, i):
+    ENTRIES = lltype.typeOf(entries).TO
+    dummy = ENTRIES.dummy_obj.ll_dummy_value
+    entries[i].value = dummy
+
+def ll_hash_from_cache(entries, i):
+    return entries[i].f_hash
+
+def ll_hash_recomputed(entries, i):
+    ENTRIES = lltype.typeOf(entries).TO
+    return ENTRIES.fasthashfn(entries[i].key)
+
+def ll_get_value(d, i):
+    return d.entries[i].value
+
+def ll_keyhash_custom(d, key):
+    DICT = lltype.typeOf(d).TO
+    return objectmodel.hlinvoke(DICT.r_rdict_hashfn, d.fnkeyhash, key)
+
+def ll_keyeq_custom(d, key1, key2):
+    DICT = lltype.typeOf(d).TO
+    return objectmodel.hlinvoke(DICT.r_rdict_eqfn, d.fnkeyeq, key1, key2)
+
+def ll_dict_len(d):
+    return d.num_live_items
+
+def ll_dict_is_true(d):
+    # check if a dict is True, allowing for None
+    return bool(d) and d.num_live_items != 0
+
+def ll_dict_getitem(d, key):
+    i = ll_call_lookup_function(d, key, d.keyhash(key), FLAG_LOOKUP)
+    if i >= 0:
+        return ll_get_value(d, i)
+    else:
+        raise KeyError
+
+def ll_dict_setitem(d, key, value):
+    hash = d.keyhash(key)
+    i = ll_call_lookup_function(d, key, hash, FLAG_LOOKUP)
+    return _ll_dict_setitem_lookup_done(d, key, value, hash, i)
+
+# It may be safe to look inside always, it has a few branches though, and their
+# frequencies needs to be investigated.
+@jit.look_inside_iff(lambda d, key, value, hash, i: jit.isvirtual(d) and jit.isconstant(key))
+def _ll_dict_setitem_lookup_done(d, key, value, hash, i):
+    if i >= 0:
+        d.entries[i].value = value
+        return
+    # a new key: make room for it in the indexes...
+    if d.resize_counter <= 3:
+        ll_dict_resize(d)
+    # ...and at the end of the entries
+    if d.num_ever_used_items == len(d.entries):
+        ll_dict_grow(d)
+    d.resize_counter -= 3
+    ll_assert(d.resize_counter > 0, "ll_dict_resize failed?")
+    _ll_dict_append_entry(d, key, value, hash)
+
+def _ll_dict_append_entry(d, key, value, hash):
+    index = d.num_ever_used_items
+    ll_call_insert_clean_function(d, hash, index)
+    ENTRY = lltype.typeOf(d.entries).TO.OF
+    entry = d.entries[index]
+    entry.key = key
+    entry.value = value
+    if hasattr(ENTRY, 'f_hash'):  entry.f_hash = hash
+    if hasattr(ENTRY, 'f_valid'): entry.f_valid = True
+    d.num_ever_used_items = index + 1
+    d.num_live_items += 1
+
+def ll_dict_insertclean(d, key, value, hash):
+    # Internal routine used to insert an item which is known to be absent
+    # from the dict.  This routine has the advantage of never calling
+    # d.keyhash() and d.keyeq(), so it cannot call back to user code.
+    _ll_dict_setitem_lookup_done(d, key, value, hash, -1)
+
+def ll_dict_delitem(d, key):
+    i = ll_call_lookup_function(d, key, d.keyhash(key), FLAG_DELETE)
+    if i < 0:
+        raise KeyError
+    _ll_dict_del(d, i)
+
+@jit.look_inside_iff(lambda d, i: jit.isvirtual(d) and jit.isconstant(i))
+def _ll_dict_del(d, i):
+    # the item of 'd.indexes' pointing to this entry was already set
+    # to DELETED by the caller
+    entries = d.entries
+    entries.mark_deleted(i)
+    d.num_live_items -= 1
+    # clear the key and the value if they are GC pointers
+    ENTRIES = lltype.typeOf(entries).TO
+    ENTRY = ENTRIES.OF
+    entry = entries[i]
+    if ENTRIES.must_clear_key:
+        entry.key = lltype.nullptr(ENTRY.key.TO)
+    if ENTRIES.must_clear_value:
+        entry.value = lltype.nullptr(ENTRY.value.TO)
+    # if we deleted the last entries, they can be reused directly; this
+    # makes a sequence of popitem() run in constant time
+    if i == d.num_ever_used_items - 1:
+        n = i
+        while n > 0 and not entries.valid(n - 1):
+            n -= 1
+        _ll_clear_entries_tail(entries, n, d.num_ever_used_items)
+        d.num_ever_used_items = n
+
+def _ll_clear_entries_tail(entries, start, stop):
+    # drop the GC references from the now-unused entries start:stop
+    ENTRIES = lltype.typeOf(entries).TO
+    ENTRY = ENTRIES.OF
+    if ENTRIES.gc_key or ENTRIES.gc_value:
+        while start < stop:
+            entry = entries[start]
+            if ENTRIES.gc_key:
+                entry.key = lltype.nullptr(ENTRY.key.TO)
+            if ENTRIES.gc_value:
+                entry.value = lltype.nullptr(ENTRY.value.TO)
+            start += 1
+
+def _ll_max_num_entries(index_size):
+    # the number of entries that can be added, starting from an empty
+    # 'indexes' of this size, before 'resize_counter' reaches zero
+    return (index_size * 2 - 1) // 3
+
+def _overallocate_entries_len(baselen):
+    # This over-allocates proportional to the number of entries, making
+    # room for additional growth, like for lists.  The growth pattern is
+    # 0, 6, 12, 19, 27, 36, 46, 57, 70, ...
+    return baselen + (baselen >> 3) + 6
+
+def ll_dict_grow(d):
+    # called when 'd.entries' is full.  If at least half of the entries
+    # are deleted, squeeze them out instead of growing the array.
+    if d.num_live_items < d.num_ever_used_items // 2:
+        ll_dict_reindex(d, _ll_len_of_d_indexes(d))
+        return
+    old_entries = d.entries
+    old_len = len(old_entries)
+    new_len = _overallocate_entries_len(old_len)
+    max_len = _ll_max_num_entries(_ll_len_of_d_indexes(d))
+    if new_len > max_len:
+        new_len = max_len
+    ll_assert(new_len > old_len, "ll_dict_grow: indexes are full")
+    new_entries = lltype.typeOf(old_entries).TO.allocate(new_len)
+    _ll_copy_entries(old_entries, new_entries, old_len)
+    d.entries = new_entries
+
+def _ll_copy_entries(src, dst, length):
+    ENTRY = lltype.typeOf(src).TO.OF
+    i = 0
+    while i < length:
+        s_entry = src[i]
+        d_entry = dst[i]
+        d_entry.key = s_entry.key
+        if hasattr(ENTRY, 'f_valid'): d_entry.f_valid = s_entry.f_valid
+        d_entry.value = s_entry.value
+        if hasattr(ENTRY, 'f_hash'):  d_entry.f_hash = s_entry.f_hash
+        i += 1
+
+def ll_dict_resize(d):
+    # make a 'new_size' estimate based on the number of live items; see
+    # CPython for why it is a good idea to quadruple the size as long as
+    # the dictionary is not too big.  A small 'indexes' costs only one
+    # byte per item.
+    num_items = d.num_live_items
+    if num_items > 50000:
+        new_estimate = num_items * 2
+    else:
+        new_estimate = num_items * 4
+    new_size = DICT_INITSIZE
+    while new_size <= new_estimate:
+        new_size *= 2
+    ll_dict_reindex(d, new_size)
+ll_dict_resize.oopspec = 'dict.resize(d)'
+
+def ll_dict_reindex(d, new_size):
+    # squeeze the deleted entries out of 'd.entries', then rebuild
+    # 'd.indexes' from scratch with 'new_size' items
+    if d.num_live_items < d.num_ever_used_items:
+        _ll_dict_remove_deleted_items(d, new_size)
+    ll_malloc_indexes_and_choose_lookup(d, new_size)
+    d.resize_counter = new_size * 2 - d.num_live_items * 3
+    ll_assert(d.resize_counter > 0, "ll_dict_reindex: too many items")
+    entries = d.entries
+    i = 0
+    ibound = d.num_ever_used_items
+    while i < ibound:
+        ll_call_insert_clean_function(d, entries.hash(i), i)
+        i += 1
+
+def _ll_dict_remove_deleted_items(d, new_size):
+    old_entries = d.entries
+    ENTRIES = lltype.typeOf(old_entries).TO
+    ENTRY = ENTRIES.OF
+    num_live = d.num_live_items
+    # shrink the array too if it is mostly empty
+    new_len = _overallocate_entries_len(num_live)
+    max_len = _ll_max_num_entries(new_size)
+    if new_len > max_len:
+        new_len = max_len
+    if new_len < len(old_entries) // 2:
+        new_entries = ENTRIES.allocate(new_len)
+    else:
+        new_entries = old_entries
+    isrc = 0
+    idst = 0
+    isrclimit = d.num_ever_used_items
+    while isrc < isrclimit:
+        if old_entries.valid(isrc):
+            if isrc != idst or new_entries != old_entries:
+                src = old_entries[isrc]
+                dst = new_entries[idst]
+                dst.key = src.key
+                if hasattr(ENTRY, 'f_valid'): dst.f_valid = True
+                dst.value = src.value
+                if hasattr(ENTRY, 'f_hash'):  dst.f_hash = src.f_hash
+            idst += 1
+        isrc += 1
+    ll_assert(idst == num_live, "_ll_dict_remove_deleted_items: bad count")
+    if new_entries == old_entries:
+        _ll_clear_entries_tail(new_entries, idst, isrclimit)
+    d.entries = new_entries
+    d.num_ever_used_items = num_live
+
+# ------- the 'indexes' array, whose items are 1, 2, 4 or 8 bytes -------
+#
+# 'd.indexes' is always an array of chars; an item of 2, 4 or 8 bytes is
+# stored in little-endian order in as many consecutive chars.  The C
+# compiler merges the loads and stores of the individual chars into single
+# instructions, and all GCs and the JIT only ever see one array type.
+
+def ll_malloc_indexes_and_choose_lookup(d, n):
+    if n <= 256:
+        fun = FUNC_BYTE
+    elif n <= 65536:
+        fun = FUNC_SHORT
+    elif not IS_64BIT or n <= 2 ** 32:
+        fun = FUNC_INT
+    else:
+        fun = FUNC_LONG
+    d.indexes = lltype.malloc(DICTINDEX.TO, n << fun, zero=True)
+    d.lookup_function_no = fun
+
+def _ll_len_of_d_indexes(d):
+    return len(d.indexes) >> d.lookup_function_no
+
+def ll_copy_indexes(d):
+    indexes = d.indexes
+    n = len(indexes)
+    newindexes = lltype.malloc(DICTINDEX.TO, n)
+    rgc.ll_arraycopy(indexes, newindexes, 0, 0, n)
+    return newindexes
+
+def ll_call_lookup_function(d, key, hash, flag):
+    fun = d.lookup_function_no
+    if fun == FUNC_BYTE:
+        return ll_dict_lookup_byte(d, key, hash, flag)
+    elif fun == FUNC_SHORT:
+        return ll_dict_lookup_short(d, key, hash, flag)
+    elif not IS_64BIT or fun == FUNC_INT:
+        return ll_dict_lookup_int(d, key, hash, flag)
+    else:
+        return ll_dict_lookup_long(d, key, hash, flag)
+
+def ll_call_insert_clean_function(d, hash, i):
+    fun = d.lookup_function_no
+    if fun == FUNC_BYTE:
+        ll_dict_store_clean_byte(d, hash, i)
+    elif fun == FUNC_SHORT:
+        ll_dict_store_clean_short(d, hash, i)
+    elif not IS_64BIT or fun == FUNC_INT:
+        ll_dict_store_clean_int(d, hash, i)
+    else:
+        ll_dict_store_clean_long(d, hash, i)
+
+def ll_call_delete_by_entry_index(d, hash, i):
+    fun = d.lookup_function_no
+    if fun == FUNC_BYTE:
+        ll_dict_delete_by_entry_index_byte(d, hash, i)
+    elif fun == FUNC_SHORT:
+        ll_dict_delete_by_entry_index_short(d, hash, i)
+    elif not IS_64BIT or fun == FUNC_INT:
+        ll_dict_delete_by_entry_index_int(d, hash, i)
+    else:
+        ll_dict_delete_by_entry_index_long(d, hash, i)
+
+# ------- a port of CPython's dictobject.c's lookdict implementation -------
+PERTURB_SHIFT = 5
+
+def _make_index_functions(fun, suffix):
+    width = 1 << fun
+    other_bytes = unrolling_iterable(range(1, width))
+
+    def ll_index_getitem(indexes, i):
+        i = i << fun
+        result = ord(indexes[i])
+        for k in other_bytes:
+            result |= ord(indexes[i + k]) << (8 * k)
+        return result
+
+    def ll_index_setitem(indexes, i, value):
+        i = i << fun
+        indexes[i] = chr(value & 0xFF)
+        for k in other_bytes:
+            indexes[i + k] = chr((value >> (8 * k)) & 0xFF)
+
+    @jit.look_inside_iff(lambda d, key, hash, flag:
+                         jit.isvirtual(d) and jit.isconstant(key))
+    def ll_dict_lookup(d, key, hash, flag):
+        # returns the position of the entry in 'd.entries', or -1 if the
+        # key is not found.  With FLAG_DELETE, the item of 'd.indexes'
+        # pointing to the entry found is marked as DELETED.
+        entries = d.entries
+        ENTRIES = lltype.typeOf(entries).TO
+        direct_compare = not hasattr(ENTRIES, 'no_direct_compare')
+        indexes = d.indexes
+        mask = (len(indexes) >> fun) - 1
+        i = r_uint(hash & mask)
+        perturb = r_uint(hash)
+        while True:
+            index = ll_index_getitem(indexes, intmask(i))
+            if index >= VALID_OFFSET:
+                index -= VALID_OFFSET
+                checkingkey = entries[index].key
+                if direct_compare and checkingkey == key:
+                    break   # found the entry
+                if d.keyeq is not None and entries.hash(index) == hash:
+                    # correct hash, maybe the key is e.g. a different pointer
+                    # to an equal object
+                    found = d.keyeq(checkingkey, key)
+                    if d.paranoia:
+                        if (entries != d.entries or indexes != d.indexes or
+                            not entries.valid(index) or
+                            entries[index].key != checkingkey):
+                            # the compare did major nasty stuff to the dict:
+                            # start over
+                            return ll_call_lookup_function(d, key, hash, flag)
+                    if found:
+                        break   # found the entry
+            elif index == FREE:
+                return -1       # pristine item -- lookup failed
+            # compute the next index using unsigned arithmetic
+            i = (i << 2) + i + perturb + 1
+            i = i & mask
+            perturb >>= PERTURB_SHIFT
+        if flag == FLAG_DELETE:
+            ll_index_setitem(indexes, intmask(i), DELETED)
+        return index
+
+    def ll_dict_store_clean(d, hash, index):
+        # a simplified version of ll_dict_lookup() which assumes that the
+        # key is new.  It only finds the next free item of 'd.indexes' for
+        # the given hash, and stores 'index' there.
+        indexes = d.indexes
+        mask = (len(indexes) >> fun) - 1
+        i = r_uint(hash & mask)
+        perturb = r_uint(hash)
+        while ll_index_getitem(indexes, intmask(i)) != FREE:
+            i = (i << 2) + i + perturb + 1
+            i = i & mask
+            perturb >>= PERTURB_SHIFT
+        ll_index_setitem(indexes, intmask(i), index + VALID_OFFSET)
+
+    def ll_dict_delete_by_entry_index(d, hash, locate_index):
+        # finds the item of 'd.indexes' pointing to the entry at position
+        # 'locate_index', and marks it as DELETED
+        indexes = d.indexes
+        mask = (len(indexes) >> fun) - 1
+        i = r_uint(hash & mask)
+        perturb = r_uint(hash)
+        locate_value = locate_index + VALID_OFFSET
+        while True:
+            index = ll_index_getitem(indexes, intmask(i))
+            if index == locate_value:
+                break
+            ll_assert(index != FREE, "ll_dict_delete_by_entry_index: lost")
+            i = (i << 2) + i + perturb + 1
+            i = i & mask
+            perturb >>= PERTURB_SHIFT
+        ll_index_setitem(indexes, intmask(i), DELETED)
+
+    return (func_with_new_name(ll_dict_lookup, 'll_dict_lookup_' + suffix),
+            func_with_new_name(ll_dict_store_clean,
+                               'll_dict_store_clean_' + suffix),
+            func_with_new_name(ll_dict_delete_by_entry_index,
+                               'll_dict_delete_by_entry_index_' + suffix))
+
+(ll_dict_lookup_byte, ll_dict_store_clean_byte,
+ ll_dict_delete_by_entry_index_byte) = _make_index_functions(FUNC_BYTE,
+                                                             'byte')
+(ll_dict_lookup_short, ll_dict_store_clean_short,
+ ll_dict_delete_by_entry_index_short) = _make_index_functions(FUNC_SHORT,
+                                                              'short')
+(ll_dict_lookup_int, ll_dict_store_clean_int,
+ ll_dict_delete_by_entry_index_int) = _make_index_functions(FUNC_INT, 'int')
+(ll_dict_lookup_long, ll_dict_store_clean_long,
+ ll_dict_delete_by_entry_index_long) = _make_index_functions(FUNC_LONG,
+                                                             'long')
+
+
+# ____________________________________________________________
+#
+#  Irregular operations.
+
+def ll_newdict(DICT):
+    d = DICT.allocate()
+    d.entries = DICT.entries.TO.allocate(_ll_max_num_entries(DICT_INITSIZE))
+    ll_malloc_indexes_and_choose_lookup(d, DICT_INITSIZE)
+    d.num_live_items = 0
+    d.num_ever_used_items = 0
+    d.resize_counter = DICT_INITSIZE * 2
+    return d
+
+def ll_newdict_size(DICT, length_estimate):
+    n = DICT_INITSIZE
+    while _ll_max_num_entries(n) < length_estimate:
+        n *= 2
+    d = DICT.allocate()
+    d.entries = DICT.entries.TO.allocate(length_estimate)
+    ll_malloc_indexes_and_choose_lookup(d, n)
+    d.num_live_items = 0
+    d.num_ever_used_items = 0
+    d.resize_counter = n * 2
+    return d
+
+def _ll_malloc_dict(DICT):
+    return lltype.malloc(DICT)
+def _ll_malloc_entries(ENTRIES, n):
+    return lltype.malloc(ENTRIES, n, zero=True)
+
+
+def rtype_r_dict(hop, i_force_non_null=None):
+    r_dict = hop.r_result
+    if not r_dict.custom_eq_hash:
+        raise TyperError("r_dict() call does not return an r_dict instance")
+    v_eqfn = hop.inputarg(r_dict.r_rdict_eqfn, arg=0)
+    v_hashfn = hop.inputarg(r_dict.r_rdict_hashfn, arg=1)
+    if i_force_non_null is not None:
+        assert i_force_non_null == 2
+        hop.inputarg(lltype.Void, arg=2)
+    cDICT = hop.inputconst(lltype.Void, r_dict.DICT)
+    hop.exception_cannot_occur()
+    v_result = hop.gendirectcall(ll_newdict, cDICT)
+    if r_dict.r_rdict_eqfn.lowleveltype != lltype.Void:
+        cname = hop.inputconst(lltype.Void, 'fnkeyeq')
+        hop.genop('setfield', [v_result, cname, v_eqfn])
+    if r_dict.r_rdict_hashfn.lowleveltype != lltype.Void:
+        cname = hop.inputconst(lltype.Void, 'fnkeyhash')
+        hop.genop('setfield', [v_result, cname, v_hashfn])
+    return v_result
+
+# ____________________________________________________________
+#
+#  Iteration.
+
+class DictIteratorRepr(AbstractDictIteratorRepr):
+
+    def __init__(self, r_dict, variant="keys"):
+        self.r_dict = r_dict
+        self.variant = variant
+        self.lowleveltype = lltype.Ptr(lltype.GcStruct('dictiter',
+                                         ('dict', r_dict.lowleveltype),
+                                         ('index', lltype.Signed)))
+        self.ll_dictiter = ll_dictiter
+        self.ll_dictnext = ll_dictnext_group[variant]
+
+
+def ll_dictiter(ITERPTR, d):
+    iter = lltype.malloc(ITERPTR.TO)
+    iter.dict = d
+    iter.index = 0
+    return iter
+
+def _make_ll_dictnext(kind):
+    # make three versions of the following function: keys, values, items
+    def ll_dictnext(RETURNTYPE, iter):
+        # note that RETURNTYPE is None for keys and values
+        dict = iter.dict
+        if dict:
+            entries = dict.entries
+            index = iter.index
+            entries_len = dict.num_ever_used_items
+            while index < entries_len:
+                entry = entries[index]
+                is_valid = entries.valid(index)
+                index = index + 1
+                if is_valid:
+                    iter.index = index
+                    if RETURNTYPE is lltype.Void:
+                        return None
+                    elif kind == 'items':
+                        r = lltype.malloc(RETURNTYPE.TO)
+                        r.item0 = recast(RETURNTYPE.TO.item0, entry.key)
+                        r.item1 = recast(RETURNTYPE.TO.item1, entry.value)
+                        return r
+                    elif kind == 'keys':
+                        return entry.key
+                    elif kind == 'values':
+                        return entry.value
+            # clear the reference to the dict and prevent restarts
+            iter.dict = lltype.nullptr(lltype.typeOf(iter).TO.dict.TO)
+        raise StopIteration
+    ll_dictnext.oopspec = 'dictiter.next%s(iter)' % kind
+    return ll_dictnext
+
+ll_dictnext_group = {'keys'  : _make_ll_dictnext('keys'),
+                     'values': _make_ll_dictnext('values'),
+                     'items' : _make_ll_dictnext('items')}
+
+# _____________________________________________________________
+# methods
+
+def ll_get(dict, key, default):
+    i = ll_call_lookup_function(dict, key, dict.keyhash(key), FLAG_LOOKUP)
+    if i >= 0:
+        return ll_get_value(dict, i)
+    else:
+        return default
+
+def ll_setdefault(dict, key, default):
+    hash = dict.keyhash(key)
+    i = ll_call_lookup_function(dict, key, hash, FLAG_LOOKUP)
+    if i >= 0:
+        return ll_get_value(dict, i)
+    else:
+        _ll_dict_setitem_lookup_done(dict, key, default, hash, i)
+        return default
+
+def ll_copy(dict):
+    DICT = lltype.typeOf(dict).TO
+    d = DICT.allocate()
+    d.entries = DICT.entries.TO.allocate(len(dict.entries))
+    _ll_copy_entries(dict.entries, d.entries, dict.num_ever_used_items)
+    d.indexes = ll_copy_indexes(dict)
+    d.lookup_function_no = dict.lookup_function_no
+    d.num_live_items = dict.num_live_items
+    d.num_ever_used_items = dict.num_ever_used_items
+    d.resize_counter = dict.resize_counter
+    if hasattr(DICT, 'fnkeyeq'):   d.fnkeyeq   = dict.fnkeyeq
+    if hasattr(DICT, 'fnkeyhash'): d.fnkeyhash = dict.fnkeyhash
+    return d
+ll_copy.oopspec = 'dict.copy(dict)'
+
+def ll_clear(d):
+    if (d.num_ever_used_items == 0 and
+        d.resize_counter == DICT_INITSIZE * 2 and
+        _ll_len_of_d_indexes(d) == DICT_INITSIZE):
+        return
+    DICT = lltype.typeOf(d).TO
+    d.entries = DICT.entries.TO.allocate(_ll_max_num_entries(DICT_INITSIZE))
+    ll_malloc_indexes_and_choose_lookup(d, DICT_INITSIZE)
+    d.num_live_items = 0
+    d.num_ever_used_items = 0
+    d.resize_counter = DICT_INITSIZE * 2
+ll_clear.oopspec = 'dict.clear(d)'
+
+def ll_update(dic1, dic2):
+    entries = dic2.entries
+    d2len = dic2.num_ever_used_items
+    i = 0
+    while i < d2len:
+        if entries.valid(i):
+            entry = entries[i]
+            hash = entries.hash(i)
+            key = entry.key
+            j = ll_call_lookup_function(dic1, key, hash, FLAG_LOOKUP)
+            _ll_dict_setitem_lookup_done(dic1, key, entry.value, hash, j)
+        i += 1
+ll_update.oopspec = 'dict.update(dic1, dic2)'
+
+# this is an implementation of keys(), values() and items()
+# in a single function.
+# note that by specialization on func, three different
+# and very efficient functions are created.
+
+def recast(P, v):
+    if isinstance(P, lltype.Ptr):
+        return lltype.cast_pointer(P, v)
+    else:
+        return v
+
+def _make_ll_keys_values_items(kind):
+    def ll_kvi(LIST, dic):
+        res = LIST.ll_newlist(dic.num_live_items)
+        entries = dic.entries
+        dlen = dic.num_ever_used_items
+        items = res.ll_items()
+        i = 0
+        p = 0
+        while i < dlen:
+            if entries.valid(i):
+                ELEM = lltype.typeOf(items).TO.OF
+                if ELEM is not lltype.Void:
+                    entry = entries[i]
+                    if kind == 'items':
+                        r = lltype.malloc(ELEM.TO)
+                        r.item0 = recast(ELEM.TO.item0, entry.key)
+                        r.item1 = recast(ELEM.TO.item1, entry.value)
+                        items[p] = r
+                    elif kind == 'keys':
+                        items[p] = recast(ELEM, entry.key)
+                    elif kind == 'values':
+                        items[p] = recast(ELEM, entry.value)
+                p += 1
+            i += 1
+        assert p == res.ll_length()
+        return res
+    ll_kvi.oopspec = 'dict.%s(dic)' % kind
+    return ll_kvi
+
+ll_dict_keys   = _make_ll_keys_values_items('keys')
+ll_dict_values = _make_ll_keys_values_items('values')
+ll_dict_items  = _make_ll_keys_values_items('items')
+
+def ll_contains(d, key):
+    i = ll_call_lookup_function(d, key, d.keyhash(key), FLAG_LOOKUP)
+    return i >= 0
+
+def ll_popitem(ELEM, dic):
+    # removes the most recently inserted item.  Thanks to _ll_dict_del(),
+    # the last of the num_ever_used_items entries is always a valid one.
+    i = dic.num_ever_used_items - 1
+    if i < 0:
+        raise KeyError
+    entries = dic.entries
+    ll_assert(entries.valid(i), "ll_popitem: last entry is not valid")
+    entry = entries[i]
+    r = lltype.malloc(ELEM.TO)
+    r.item0 = recast(ELEM.TO.item0, entry.key)
+    r.item1 = recast(ELEM.TO.item1, entry.value)
+    ll_call_delete_by_entry_index(dic, entries.hash(i), i)
+    _ll_dict_del(dic, i)
+    return r
+
+def ll_pop(dic, key):
+    i = ll_call_lookup_function(dic, key, dic.keyhash(key), FLAG_DELETE)
+    if i >= 0:
+        value = ll_get_value(dic, i)
+        _ll_dict_del(dic, i)
+        return value
+    else:
+        raise KeyError
+
+def ll_pop_default(dic, key, dfl):
+    try:
+        return ll_pop(dic, key)
+    except KeyError:
+        return dfl
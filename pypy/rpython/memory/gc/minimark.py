@@ -5,6 +5,17 @@ Environment variables can be used to fine-tune the following parameters:
  PYPY_GC_NURSERY        The nursery size.  Defaults to '4MB'.  Small values
                         (like 1 or 1KB) are useful for debugging.
 
+ PYPY_GC_NURSERY_MAX    If set, the nursery size is adaptive: it is doubled
+                        or halved after minor collections, depending on
+                        the fraction of the nursery that survived and on
+                        the time spent tracing the old objects that point
+                        to young ones.  It never grows above this value.
+                        Defaults to 0, which means a fixed-size nursery.
+
+ PYPY_GC_NURSERY_MIN    The lower bound of the adaptive nursery size.
+                        Defaults to the smallest possible nursery, about
+                        264KB on 64-bit.
+
  PYPY_GC_MAJOR_COLLECT  Major collection memory factor.  Default is '1.82',
                         which means trigger a major collection when the
                         memory consumed equals 1.82 times the memory
@@ -37,12 +48,28 @@ Environment variables can be used to fine-tune the following parameters:
                         too slow for normal use.  Values are 0 (off),
                         1 (on major collections) or 2 (also on minor
                         collections).
+
+ PYPY_GC_INCREMENT_STEP If set, major collections are incremental: the
+                        marking of the old objects is split into steps,
+                        one after every minor collection, each visiting
+                        about this many bytes of objects.  This bounds
+                        the pause time of major collections.  Values
+                        below twice the nursery size are rounded up.
+                        Defaults to 0, which means non-incremental.
+
+ PYPY_GC_COMPACT        If set to a value between 0.0 and 1.0, compact
+                        the pages of small objects after a major collection
+                        that left more than this fraction of the arenas
+                        unused.  Objects are not moved; instead, new
+                        objects go to the fullest arenas first, which lets
+                        the mostly-empty arenas be returned to the OS.
+                        Try values like '0.5'.  Defaults to off.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
 # XXX pre-reserved, enough for a few nursery collections?  What about
 # XXX raw-malloced memory?
-import sys
+import sys, time
 from pypy.rpython.lltypesystem import lltype, llmemory, llarena, llgroup
 from pypy.rpython.lltypesystem.lloperation import llop
 from pypy.rpython.lltypesystem.llmemory import raw_malloc_usage
@@ -52,6 +79,7 @@ from pypy.rpython.memory.support import mangle_hash
 from pypy.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from pypy.rlib.rarithmetic import LONG_BIT_SHIFT
 from pypy.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
+from pypy.rlib import rgc
 from pypy.rlib.objectmodel import we_are_translated
 from pypy.tool.sourcetools import func_with_new_name
 
@@ -95,6 +123,8 @@ GCFLAG_NO_HEAP_PTRS = first_gcflag << 1
 
 # The following flag is set on surviving objects during a major collection,
 # and on surviving raw-malloced young objects during a minor collection.
+# With incremental major collections, it stays set on the objects already
+# marked between the steps of the marking phase.
 GCFLAG_VISITED      = first_gcflag << 2
 
 # The following flag is set on nursery objects of which we asked the id
@@ -121,6 +151,14 @@ FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
 FORWARDSTUBPTR = lltype.Ptr(FORWARDSTUB)
 
+# The states of the major collection.  Without incremental major
+# collections, the GC is always in STATE_IDLE outside major_collection().
+# With them, the GC stays in STATE_MARKING between the steps of the
+# marking phase; in this state the write barrier records all writes into
+# old objects, not only the writes of young pointers.
+STATE_IDLE    = 0
+STATE_MARKING = 1
+
 # ____________________________________________________________
 
 class MiniMarkGC(MovingGCBase):
@@ -203,8 +241,31 @@ class MiniMarkGC(MovingGCBase):
         # minimal allocated size of the nursery is 2x the following
         # number (by default, at least 132KB on 32-bit and 264KB on 64-bit).
         "large_object": (16384+512)*WORD,
+
+        # If > 0, major collections are incremental: the marking phase is
+        # split into steps done after each minor collection, each visiting
+        # about this many bytes of objects.  Usually set from the
+        # environment variable PYPY_GC_INCREMENT_STEP.
+        "incremental_marking_step": 0,
+
+        # If 'nursery_size_max' > 'nursery_size_min', the size of the
+        # nursery changes between these bounds after minor collections.
+        # Usually set from PYPY_GC_NURSERY_MIN and PYPY_GC_NURSERY_MAX.
+        "nursery_size_min": 0,
+        "nursery_size_max": 0,
         }
 
+    # Adaptive nursery: the nursery is doubled after a minor collection
+    # in which more than 'nursery_grow_survival' of it survived, or in
+    # which collect_oldrefs_to_nursery() took more than
+    # 'nursery_grow_oldrefs_time' of the time spent in the program since
+    # the previous minor collection.  It is halved when both numbers are
+    # below the 'shrink' values.
+    nursery_grow_survival = 0.10
+    nursery_grow_oldrefs_time = 0.05
+    nursery_shrink_survival = 0.02
+    nursery_shrink_oldrefs_time = 0.01
+
     def __init__(self, config,
                  read_from_env=False,
                  nursery_size=32*WORD,
@@ -215,21 +276,39 @@ class MiniMarkGC(MovingGCBase):
                  growth_rate_max=2.5,   # for tests
                  card_page_indices=0,
                  large_object=8*WORD,
+                 incremental_marking_step=0,
+                 nursery_size_min=0,
+                 nursery_size_max=0,
                  ArenaCollectionClass=None,
                  **kwds):
         MovingGCBase.__init__(self, config, **kwds)
         assert small_request_threshold % WORD == 0
         self.read_from_env = read_from_env
         self.nursery_size = nursery_size
+        self.nursery_size_min = nursery_size_min
+        self.nursery_size_max = nursery_size_max
         self.small_request_threshold = small_request_threshold
         self.major_collection_threshold = major_collection_threshold
         self.growth_rate_max = growth_rate_max
         self.num_major_collects = 0
+        #
+        # statistics, see statistics()
+        self.num_minor_collects = 0
+        self.total_minor_collection_time = 0.0
+        self.total_major_collection_time = 0.0
+        self.nursery_allocated_size = 0
+        self.nursery_surviving_size = 0
+        self.num_card_marked_arrays = 0
+        self.num_nursery_resizes = 0
+        self.last_minor_collection_end = 0.0
         self.min_heap_size = 0.0
         self.max_heap_size = 0.0
         self.max_heap_size_already_raised = False
         self.max_delta = float(r_uint(-1))
         #
+        self.incremental_marking_step = incremental_marking_step
+        self.gc_state = STATE_IDLE
+        #
         self.card_page_indices = card_page_indices
         if self.card_page_indices > 0:
             self.card_page_shift = 0
@@ -309,6 +388,7 @@ class MiniMarkGC(MovingGCBase):
         # up the env var, which requires the GC; and then really
         # allocate the nursery of the final size.
         if not self.read_from_env:
+            self.set_nursery_bounds()
             self.allocate_nursery()
         else:
             #
@@ -336,6 +416,11 @@ class MiniMarkGC(MovingGCBase):
                 self.debug_tiny_nursery = newsize & ~(WORD-1)
                 newsize = minsize
             #
+            self.nursery_size_min = env.read_from_env(
+                'PYPY_GC_NURSERY_MIN')
+            self.nursery_size_max = env.read_from_env(
+                'PYPY_GC_NURSERY_MAX')
+            #
             major_coll = env.read_float_from_env('PYPY_GC_MAJOR_COLLECT')
             if major_coll > 1.0:
                 self.major_collection_threshold = major_coll
@@ -361,15 +446,49 @@ class MiniMarkGC(MovingGCBase):
             else:
                 self.max_delta = 0.125 * env.get_total_memory()
             #
+            # Marking must proceed faster than the minor collections can
+            # move objects out of the nursery, otherwise it never ends.
+            step = env.read_uint_from_env('PYPY_GC_INCREMENT_STEP')
+            if step > 0:
+                self.incremental_marking_step = max(
+                    step, 2 * max(newsize, self.nursery_size_max))
+            #
+            compact = env.read_float_from_env('PYPY_GC_COMPACT')
+            if compact > 0.0 and compact < 1.0:
+                self.ac.compaction_threshold = compact
+            #
             self.minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
+            self.set_nursery_bounds()
             self.allocate_nursery()
 
+    def set_nursery_bounds(self):
+        # Fix 'nursery_size_min' and 'nursery_size_max', and bring
+        # 'nursery_size' between them.  If they are equal, the nursery
+        # has a fixed size.
+        if self.nursery_size_max <= 0:
+            self.nursery_size_min = self.nursery_size
+            self.nursery_size_max = self.nursery_size
+            return
+        minsize = 2 * (self.nonlarge_max + 1)
+        if self.nursery_size_min < minsize:
+            self.nursery_size_min = minsize
+        self.nursery_size_min &= ~(WORD-1)
+        self.nursery_size_max &= ~(WORD-1)
+        if self.nursery_size_max < self.nursery_size_min:
+            self.nursery_size_max = self.nursery_size_min
+        if self.nursery_size < self.nursery_size_min:
+            self.nursery_size = self.nursery_size_min
+        if self.nursery_size > self.nursery_size_max:
+            self.nursery_size = self.nursery_size_max
+
 
     def _nursery_memory_size(self):
+        # with an adaptive nursery, we allocate the largest size, and
+        # only move 'nursery_top' around.
         extra = self.nonlarge_max + 1
-        return self.nursery_size + extra
+        return max(self.nursery_size, self.nursery_size_max) + extra
 
     def _alloc_nursery(self):
         # the start of the nursery: we actually allocate a bit more for
@@ -570,6 +689,12 @@ class MiniMarkGC(MovingGCBase):
         """Do a minor (gen=0) or major (gen>0) collection."""
         self.minor_collection()
         if gen > 0:
+            if self.gc_state == STATE_MARKING:
+                # Finish the incremental major collection in progress.
+                # The objects that died since it started are not freed by
+                # it, so we need another complete one afterwards.
+                self.major_collection()
+                self.minor_collection()
             self.major_collection()
 
     def collect_and_reserve(self, totalsize):
@@ -580,8 +705,12 @@ class MiniMarkGC(MovingGCBase):
         """
         self.minor_collection()
         #
-        if self.get_total_memory_used() > self.next_major_collection_threshold:
-            self.major_collection()
+        # During the marking phase of an incremental major collection,
+        # do one more step after every minor collection.
+        if (self.gc_state == STATE_MARKING or
+                self.get_total_memory_used() >
+                self.next_major_collection_threshold):
+            self.major_collection_step()
             #
             # The nursery might not be empty now, because of
             # execute_finalizers().  If it is almost full again,
@@ -638,7 +767,7 @@ class MiniMarkGC(MovingGCBase):
         if (float(self.get_total_memory_used()) + raw_malloc_usage(totalsize) >
                 self.next_major_collection_threshold):
             self.minor_collection()
-            self.major_collection(raw_malloc_usage(totalsize))
+            self.major_collection_step(raw_malloc_usage(totalsize))
         #
         # Check if the object would fit in the ArenaCollection.
         if raw_malloc_usage(totalsize) <= self.small_request_threshold:
@@ -658,7 +787,7 @@ class MiniMarkGC(MovingGCBase):
             # if 'can_make_young'.  The interesting case of 'can_make_young'
             # is for large objects, bigger than the 'large_objects' threshold,
             # which are raw-malloced but still young.
-            extra_flags = GCFLAG_TRACK_YOUNG_PTRS
+            extra_flags = GCFLAG_TRACK_YOUNG_PTRS | self._old_alloc_flags()
             #
         else:
             # No, so proceed to allocate it externally with raw_malloc().
@@ -723,7 +852,7 @@ class MiniMarkGC(MovingGCBase):
                 self.young_rawmalloced_objects.add(result + size_gc_header)
             else:
                 self.old_rawmalloced_objects.append(result + size_gc_header)
-                extra_flags |= GCFLAG_TRACK_YOUNG_PTRS
+                extra_flags |= GCFLAG_TRACK_YOUNG_PTRS | self._old_alloc_flags()
         #
         # Common code to fill the header and length of the object.
         self.init_gc_object(result, typeid, extra_flags)
@@ -732,6 +861,16 @@ class MiniMarkGC(MovingGCBase):
             (result + size_gc_header + offset_to_length).signed[0] = length
         return result + size_gc_header
 
+    def _old_alloc_flags(self):
+        # Objects allocated directly as old objects during the marking
+        # phase of an incremental major collection are considered already
+        # visited: they contain no pointer yet, and any pointer written
+        # into them later goes through the write barrier.
+        if self.gc_state == STATE_MARKING:
+            return GCFLAG_VISITED
+        return 0
+    _old_alloc_flags._always_inline_ = True
+
 
     # ----------
     # Other functions in the GC API
@@ -885,6 +1024,50 @@ class MiniMarkGC(MovingGCBase):
         """
         return self.ac.total_memory_used + self.rawmalloced_total_size
 
+    def statistics(self, index):
+        # no memory allocation here!
+        if index >= rgc.STAT_SIZE_CLASS_SURVIVING_BYTES:
+            return self.ac.surviving_bytes(
+                index - rgc.STAT_SIZE_CLASS_SURVIVING_BYTES)
+        if index >= rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES:
+            return self.ac.allocated_bytes(
+                index - rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES)
+        if index == rgc.STAT_HEAP_USAGE:
+            return intmask(self.get_total_memory_used())
+        if index == rgc.STAT_MINOR_COLLECTIONS:
+            return self.num_minor_collects
+        if index == rgc.STAT_MAJOR_COLLECTIONS:
+            return self.num_major_collects
+        if index == rgc.STAT_MINOR_COLLECTION_TIME:
+            return int(self.total_minor_collection_time * 1000.0)
+        if index == rgc.STAT_MAJOR_COLLECTION_TIME:
+            return int(self.total_major_collection_time * 1000.0)
+        if index == rgc.STAT_NURSERY_ALLOCATED_BYTES:
+            return self.nursery_allocated_size
+        if index == rgc.STAT_NURSERY_SURVIVING_BYTES:
+            return self.nursery_surviving_size
+        if index == rgc.STAT_CARD_MARKED_ARRAYS:
+            return self.num_card_marked_arrays
+        if index == rgc.STAT_SIZE_CLASSES:
+            return self.small_request_threshold // WORD
+        if index == rgc.STAT_NURSERY_SIZE:
+            return self.nursery_size
+        if index == rgc.STAT_NURSERY_RESIZES:
+            return self.num_nursery_resizes
+        if index == rgc.STAT_ARENAS:
+            return self.ac.num_arenas
+        if index == rgc.STAT_ARENA_BYTES:
+            return self.ac.num_arenas * self.ac.arena_size
+        if index == rgc.STAT_ARENA_PAGES:
+            return self.ac.count_pages(False)
+        if index == rgc.STAT_ARENA_FREE_PAGES:
+            return self.ac.count_pages(True)
+        if index == rgc.STAT_ARENA_USED_BYTES:
+            return intmask(self.ac.total_memory_used)
+        if index == rgc.STAT_ARENA_COMPACTIONS:
+            return self.ac.num_compactions
+        return -1
+
     def card_marking_words_for_length(self, length):
         # --- Unoptimized version:
         #num_bits = ((length-1) >> self.card_page_shift) + 1
@@ -918,9 +1101,11 @@ class MiniMarkGC(MovingGCBase):
         # similarily, all objects should have this flag:
         ll_assert(self.header(obj).tid & GCFLAG_TRACK_YOUNG_PTRS,
                   "missing GCFLAG_TRACK_YOUNG_PTRS")
-        # the GCFLAG_VISITED should not be set between collections
-        ll_assert(self.header(obj).tid & GCFLAG_VISITED == 0,
-                  "unexpected GCFLAG_VISITED")
+        # the GCFLAG_VISITED should not be set between collections,
+        # except between the steps of an incremental major collection
+        if self.gc_state == STATE_IDLE:
+            ll_assert(self.header(obj).tid & GCFLAG_VISITED == 0,
+                      "unexpected GCFLAG_VISITED")
         # the GCFLAG_FINALIZATION_ORDERING should not be set between coll.
         ll_assert(self.header(obj).tid & GCFLAG_FINALIZATION_ORDERING == 0,
                   "unexpected GCFLAG_FINALIZATION_ORDERING")
@@ -1016,8 +1201,13 @@ class MiniMarkGC(MovingGCBase):
             # to the list 'old_objects_pointing_to_young'.  We know that
             # 'addr_struct' cannot be in the nursery, because nursery objects
             # never have the flag GCFLAG_TRACK_YOUNG_PTRS to start with.
+            # During the marking phase of an incremental major collection
+            # we do it for any written value, so that the next minor
+            # collection can trace 'addr_struct' again if it was already
+            # marked.
             objhdr = self.header(addr_struct)
-            if self.appears_to_be_young(newvalue):
+            if (self.appears_to_be_young(newvalue) or
+                    self.gc_state == STATE_MARKING):
                 self.old_objects_pointing_to_young.append(addr_struct)
                 objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
             #
@@ -1105,8 +1295,9 @@ class MiniMarkGC(MovingGCBase):
                 # case with cards.
                 #
                 # If the newly written address does not actually point to a
-                # young object, leave now.
-                if not self.appears_to_be_young(newvalue):
+                # young object, leave now (unless we are marking).
+                if (not self.appears_to_be_young(newvalue) and
+                        self.gc_state != STATE_MARKING):
                     return
                 #
                 # 'addr_array' is a raw_malloc'ed array with card markers
@@ -1133,7 +1324,8 @@ class MiniMarkGC(MovingGCBase):
                 ll_assert(self.debug_is_old_object(addr_array),
                         "young array with no card but GCFLAG_TRACK_YOUNG_PTRS")
             #
-            if self.appears_to_be_young(newvalue):
+            if (self.appears_to_be_young(newvalue) or
+                    self.gc_state == STATE_MARKING):
                 self.old_objects_pointing_to_young.append(addr_array)
                 objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
 
@@ -1174,6 +1366,13 @@ class MiniMarkGC(MovingGCBase):
             return True
         # ^^^ a fast path of write-barrier
         #
+        if self.gc_state == STATE_MARKING:
+            # During the marking phase of an incremental major collection,
+            # the whole 'dest' must be traced again by the next minor
+            # collection, whatever we copy into it.
+            self.assume_young_pointers(dest_addr)
+            return True
+        #
         if source_hdr.tid & GCFLAG_HAS_CARDS != 0:
             #
             if source_hdr.tid & GCFLAG_TRACK_YOUNG_PTRS == 0:
@@ -1235,6 +1434,11 @@ class MiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start_time = time.time()
+        allocated_size = self.nursery_free - self.nursery
+        self.nursery_allocated_size += allocated_size
+        surviving_size_before = self.nursery_surviving_size
+        oldrefs_time = 0.0
         #
         # Before everything else, remove from 'old_objects_pointing_to_young'
         # the young arrays.
@@ -1261,7 +1465,9 @@ class MiniMarkGC(MovingGCBase):
             # nursery, and again added to 'old_objects_pointing_to_young'.
             # All young raw-malloced object found are flagged GCFLAG_VISITED.
             # We proceed until 'old_objects_pointing_to_young' is empty.
+            oldrefs_start_time = time.time()
             self.collect_oldrefs_to_nursery()
+            oldrefs_time += time.time() - oldrefs_start_time
             #
             # We have to loop back if collect_oldrefs_to_nursery caused
             # new objects to show up in old_objects_with_cards_set
@@ -1292,13 +1498,63 @@ class MiniMarkGC(MovingGCBase):
         self.debug_rotate_nursery()
         self.nursery_free = self.nursery
         #
+        # With an adaptive nursery, pick the size of the next one.
+        if self.nursery_size_max > self.nursery_size_min:
+            if allocated_size > 0:
+                survival_rate = (float(self.nursery_surviving_size -
+                                       surviving_size_before) /
+                                 allocated_size)
+            else:
+                survival_rate = 0.0
+            program_time = start_time - self.last_minor_collection_end
+            if program_time > 0.0:
+                oldrefs_time_ratio = oldrefs_time / program_time
+            else:
+                oldrefs_time_ratio = 0.0
+            self.adapt_nursery_size(survival_rate, oldrefs_time_ratio)
+        #
         debug_print("minor collect, total memory used:",
                     self.get_total_memory_used())
         if self.DEBUG >= 2:
             self.debug_check_consistency()     # expensive!
+        self.num_minor_collects += 1
+        end_time = time.time()
+        self.total_minor_collection_time += end_time - start_time
+        self.last_minor_collection_end = end_time
         debug_stop("gc-minor")
 
 
+    def adapt_nursery_size(self, survival_rate, oldrefs_time_ratio):
+        """Grow or shrink the (empty) nursery, given the fraction of it
+        that survived the last minor collection and the time spent in
+        collect_oldrefs_to_nursery() relative to the time spent in the
+        program since the previous minor collection."""
+        ll_assert(self.nursery_free == self.nursery, "nursery not empty")
+        newsize = self.nursery_size
+        if (survival_rate > self.nursery_grow_survival or
+                oldrefs_time_ratio > self.nursery_grow_oldrefs_time):
+            # many objects survive just because the nursery is too small
+            # for them to die, or the minor collections are too frequent
+            newsize = newsize * 2
+            if newsize > self.nursery_size_max:
+                newsize = self.nursery_size_max
+        elif (survival_rate < self.nursery_shrink_survival and
+                oldrefs_time_ratio < self.nursery_shrink_oldrefs_time):
+            # almost everything dies anyway: a smaller nursery stays
+            # in the cache
+            newsize = (newsize // 2) & ~(WORD-1)
+            if newsize < self.nursery_size_min:
+                newsize = self.nursery_size_min
+        if newsize != self.nursery_size:
+            debug_start("gc-set-nursery-size")
+            debug_print("nursery size:", newsize)
+            debug_stop("gc-set-nursery-size")
+            # the memory above 'nursery_top' is allocated and zero
+            self.nursery_size = newsize
+            self.nursery_top = self.nursery + newsize
+            self.num_nursery_resizes += 1
+
+
     def collect_roots_in_nursery(self):
         # we don't need to trace prebuilt GcStructs during a minor collect:
         # if a prebuilt GcStruct contains a pointer to a young object,
@@ -1316,6 +1572,7 @@ class MiniMarkGC(MovingGCBase):
         oldlist = self.old_objects_with_cards_set
         while oldlist.non_empty():
             obj = oldlist.pop()
+            self.num_card_marked_arrays += 1
             #
             # Remove the GCFLAG_CARDS_SET flag.
             ll_assert(self.header(obj).tid & GCFLAG_CARDS_SET != 0,
@@ -1342,6 +1599,16 @@ class MiniMarkGC(MovingGCBase):
                     bytes -= 1
                 #
             else:
+                # During the marking phase of an incremental major
+                # collection, the items in the cards must also be marked
+                # again if 'obj' was already visited.
+                marking_again = False
+                if self.gc_state == STATE_MARKING:
+                    if self.header(obj).tid & GCFLAG_VISITED:
+                        marking_again = True
+                    else:
+                        self.objects_to_trace.append(obj)
+                #
                 # Walk the bytes encoding the card marker bits, and for
                 # each bit set, call trace_and_drag_out_of_nursery_partial().
                 interval_start = 0
@@ -1362,6 +1629,11 @@ class MiniMarkGC(MovingGCBase):
                                           "premature end of object")
                             self.trace_and_drag_out_of_nursery_partial(
                                 obj, interval_start, interval_stop)
+                            if marking_again:
+                                self.trace_partial(obj, interval_start,
+                                                   interval_stop,
+                                                   self._append_if_nonnull,
+                                                   self.objects_to_trace)
                         #
                         interval_start = interval_stop
                         cardbyte >>= 1
@@ -1389,6 +1661,24 @@ class MiniMarkGC(MovingGCBase):
             # outside the nursery, possibly forcing nursery objects out
             # and adding them to 'old_objects_pointing_to_young' as well.
             self.trace_and_drag_out_of_nursery(obj)
+            #
+            # During the marking phase of an incremental major collection,
+            # 'obj' was either written to or just moved out of the nursery.
+            if self.gc_state == STATE_MARKING:
+                self._mark_modified_object(obj)
+
+    def _mark_modified_object(self, obj):
+        # If 'obj' was already visited by the marking phase, it may now
+        # contain pointers to objects not visited so far: mark its
+        # content again.  Otherwise, make sure 'obj' itself is visited.
+        # Note that surviving young raw-malloced objects have
+        # GCFLAG_VISITED too at this point, so that only their content
+        # is added; they are added themselves by their referrers.  This
+        # is also why we cannot use _collect_ref_rec() here.
+        if self.header(obj).tid & GCFLAG_VISITED:
+            self.trace(obj, self._append_if_nonnull, self.objects_to_trace)
+        else:
+            self.objects_to_trace.append(obj)
 
     def trace_and_drag_out_of_nursery(self, obj):
         """obj must not be in the nursery.  This copies all the
@@ -1458,6 +1748,7 @@ class MiniMarkGC(MovingGCBase):
         # Copy it.  Note that references to other objects in the
         # nursery are kept unchanged in this step.
         llmemory.raw_memcopy(obj - size_gc_header, newhdr, totalsize)
+        self.nursery_surviving_size += raw_malloc_usage(totalsize)
         #
         # Set the old object's tid to -42 (containing all flags) and
         # replace the old object's content with the target address.
@@ -1564,9 +1855,54 @@ class MiniMarkGC(MovingGCBase):
     # Full collection
 
     def major_collection(self, reserving_size=0):
-        """Do a major collection.  Only for when the nursery is empty."""
+        """Do a major collection.  Only for when the nursery is empty.
+        If an incremental major collection is in progress, finish it."""
         #
         debug_start("gc-collect")
+        start_time = time.time()
+        if self.gc_state == STATE_IDLE:
+            self.start_major_collection()
+        else:
+            self.collect_nonbarriered_roots()
+        self.visit_all_objects()
+        self.finish_major_collection()
+        self.total_major_collection_time += time.time() - start_time
+        debug_stop("gc-collect")
+        self.major_collection_done(reserving_size)
+
+    def major_collection_step(self, reserving_size=0):
+        """Do one step of an incremental major collection, starting a new
+        one if needed.  Without incremental major collections, do a full
+        major collection.  Only for when the nursery is empty."""
+        #
+        if self.incremental_marking_step <= 0:
+            self.major_collection(reserving_size)
+            return
+        #
+        debug_start("gc-collect-step")
+        start_time = time.time()
+        if self.gc_state == STATE_IDLE:
+            self.start_major_collection()
+        else:
+            self.collect_nonbarriered_roots()
+        #
+        if self.visit_some_objects(self.incremental_marking_step):
+            self.finish_major_collection()
+            self.total_major_collection_time += time.time() - start_time
+            debug_stop("gc-collect-step")
+            self.major_collection_done(reserving_size)
+        else:
+            # Not finished.  Until the next step, reuse the threshold to
+            # know when a series of external_malloc() must force a step.
+            self.next_major_collection_threshold = (
+                float(self.get_total_memory_used()) +
+                self.incremental_marking_step)
+            debug_print("incremental marking step, total memory used:",
+                        self.get_total_memory_used())
+            self.total_major_collection_time += time.time() - start_time
+            debug_stop("gc-collect-step")
+
+    def start_major_collection(self):
         debug_print()
         debug_print(".----------- Full collection ------------------")
         debug_print("| used before collection:")
@@ -1583,10 +1919,18 @@ class MiniMarkGC(MovingGCBase):
         # Note that a major collection is non-moving.  The goal is only to
         # find and free some of the objects allocated by the ArenaCollection.
         # We first visit all objects and toggle the flag GCFLAG_VISITED on
-        # them, starting from the roots.
+        # them, starting from the roots.  This marking phase can be done
+        # in several steps, with the GC in STATE_MARKING in-between.
         self.objects_to_trace = self.AddressStack()
         self.collect_roots()
-        self.visit_all_objects()
+        self.gc_state = STATE_MARKING
+
+    def finish_major_collection(self):
+        """Called when the marking phase is complete: free the objects
+        that have not been visited."""
+        ll_assert(not self.objects_to_trace.non_empty(),
+                  "marking phase not complete in finish_major_collection()")
+        self.gc_state = STATE_IDLE
         #
         # Finalizer support: adds the flag GCFLAG_VISITED to all objects
         # with a finalizer and all objects reachable from there (and also
@@ -1624,11 +1968,13 @@ class MiniMarkGC(MovingGCBase):
                     self.ac.total_memory_used, "bytes")
         debug_print("|          raw_malloced:           ",
                     self.rawmalloced_total_size, "bytes")
+        debug_print("| number of arenas:                ",
+                    self.ac.num_arenas)
         debug_print("| number of major collects:        ",
                     self.num_major_collects)
         debug_print("`----------------------------------------------")
-        debug_stop("gc-collect")
-        #
+
+    def major_collection_done(self, reserving_size):
         # Set the threshold for the next major collection to be when we
         # have allocated 'major_collection_threshold' times more than
         # we currently have -- but no more than 'max_delta' more than
@@ -1727,6 +2073,15 @@ class MiniMarkGC(MovingGCBase):
         self.run_finalizers.foreach(self._collect_obj,
                                     self.objects_to_trace)
 
+    def collect_nonbarriered_roots(self):
+        # Between the steps of an incremental major collection, the
+        # mutator may store pointers to not-yet-visited objects in places
+        # that are not protected by the write barrier.  Visit them again.
+        self.root_walker.walk_roots(
+            MiniMarkGC._collect_ref_stk, # stack roots
+            MiniMarkGC._collect_ref_stk, # static in prebuilt non-gc structures
+            None)
+
     def enumerate_all_roots(self, callback, arg):
         self.prebuilt_root_objects.foreach(callback, arg)
         MovingGCBase.enumerate_all_roots(self, callback, arg)
@@ -1742,7 +2097,14 @@ class MiniMarkGC(MovingGCBase):
         self.objects_to_trace.append(obj)
 
     def _collect_ref_rec(self, root, ignored):
-        self.objects_to_trace.append(root.address[0])
+        # Don't push on 'objects_to_trace' the objects that visit() would
+        # ignore anyway.  Objects referenced from many places (types,
+        # shared instances...) are then only pushed and popped once; and
+        # the other headers read here are typically read again soon by
+        # visit(), while they are still in the cache.
+        obj = root.address[0]
+        if self.header(obj).tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS) == 0:
+            self.objects_to_trace.append(obj)
 
     def visit_all_objects(self):
         pending = self.objects_to_trace
@@ -1750,6 +2112,21 @@ class MiniMarkGC(MovingGCBase):
             obj = pending.pop()
             self.visit(obj)
 
+    def visit_some_objects(self, budget):
+        # Like visit_all_objects(), but stops after having visited objects
+        # totalling about 'budget' bytes.  Returns True if finished.
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        pending = self.objects_to_trace
+        while pending.non_empty():
+            if budget <= 0:
+                return False
+            obj = pending.pop()
+            if self.header(obj).tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS):
+                continue
+            budget -= raw_malloc_usage(size_gc_header + self.get_size(obj))
+            self.visit(obj)
+        return True
+
     def visit(self, obj):
         #
         # 'obj' is a live object.  Check GCFLAG_VISITED to know if we
@@ -2047,6 +2424,18 @@ class SimpleArenaCollection(object):
         self.small_request_threshold = small_request_threshold
         self.all_objects = []
         self.total_memory_used = 0
+        self.num_arenas = 0            # no arena
+        self.num_compactions = 0
+        self.compaction_threshold = 1.0
+
+    def count_pages(self, only_free):
+        return 0
+
+    def allocated_bytes(self, size_class):
+        return -1
+
+    def surviving_bytes(self, size_class):
+        return -1
 
     def malloc(self, size):
         nsize = raw_malloc_usage(size)
@@ -108,6 +108,16 @@ class ArenaCollection(object):
         self.nblocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
                                               length, flavor='raw',
                                               immortal=True)
+        #
+        # statistics: for each size class, the number of blocks
+        # allocated so far, and the number of blocks that survived
+        # the last mass_free()
+        self.nallocated_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
+                                                 length, flavor='raw',
+                                                 zero=True, immortal=True)
+        self.nsurviving_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
+                                                 length, flavor='raw',
+                                                 zero=True, immortal=True)
         self.hdrsize = llmemory.raw_malloc_usage(llmemory.sizeof(PAGE_HEADER))
         assert page_size > self.hdrsize
         self.nblocks_for_size[0] = 0    # unused
@@ -141,6 +151,22 @@ class ArenaCollection(object):
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
+        #
+        # the number of arenas currently allocated, and the number of
+        # times compact_pages() ran
+        self.num_arenas = 0
+        self.num_compactions = 0
+        #
+        # if, at the end of mass_free(), more than this fraction of the
+        # arenas is not used by objects, call compact_pages().  The
+        # default value of 1.0 disables it.
+        self.compaction_threshold = 1.0
+        #
+        # this is used in compact_pages() only
+        self.pages_by_nfreepages = lltype.malloc(rffi.CArray(PAGE_PTR),
+                                                 self.max_pages_per_arena,
+                                                 flavor='raw', zero=True,
+                                                 immortal=True)
 
 
     def malloc(self, size):
@@ -153,6 +179,7 @@ class ArenaCollection(object):
         #
         # Get the page to use from the size
         size_class = nsize >> WORD_POWER_2
+        self.nallocated_for_size[size_class] += 1
         page = self.page_for_size[size_class]
         if page == PAGE_NULL:
             page = self.allocate_new_page(size_class)
@@ -293,6 +320,7 @@ class ArenaCollection(object):
         arena.freepages = firstpage
         self.num_uninitialized_pages = npages
         self.current_arena = arena
+        self.num_arenas += 1
         #
     allocate_new_arena._dont_inline_ = True
 
@@ -338,6 +366,7 @@ class ArenaCollection(object):
                     # The whole arena is empty.  Free it.
                     llarena.arena_free(arena.base)
                     lltype.free(arena, flavor='raw', track_allocation=False)
+                    self.num_arenas -= 1
                     #
                 else:
                     # Insert 'arena' in the correct arenas_lists[n]
@@ -351,6 +380,111 @@ class ArenaCollection(object):
             i += 1
         #
         self.min_empty_nfreepages = 1
+        #
+        if self.fragmentation() > self.compaction_threshold:
+            self.compact_pages()
+
+
+    def fragmentation(self):
+        """Return the fraction of the memory of all arenas that is not
+        used by objects, between 0.0 and 1.0."""
+        if self.num_arenas == 0:
+            return 0.0
+        total = float(self.num_arenas) * float(self.arena_size)
+        return 1.0 - float(self.total_memory_used) / total
+
+
+    def count_pages(self, only_free):
+        """Return the number of pages in all arenas, or only the number
+        of free (or still uninitialized) pages if 'only_free' is True."""
+        result = 0
+        arena = self.current_arena
+        if arena != ARENA_NULL:
+            if only_free:
+                result += arena.nfreepages + self.num_uninitialized_pages
+            else:
+                result += arena.totalpages
+        i = 0
+        while i < self.max_pages_per_arena:
+            arena = self.arenas_lists[i]
+            while arena != ARENA_NULL:
+                if only_free:
+                    result += arena.nfreepages
+                else:
+                    result += arena.totalpages
+                arena = arena.nextarena
+            i += 1
+        return result
+
+
+    def allocated_bytes(self, size_class):
+        """Return the number of bytes allocated so far in blocks of the
+        given size class, or -1 if there is no such size class."""
+        if size_class < 1 or size_class > (self.small_request_threshold >>
+                                           WORD_POWER_2):
+            return -1
+        return self.nallocated_for_size[size_class] * (size_class * WORD)
+
+
+    def surviving_bytes(self, size_class):
+        """Return the number of bytes in blocks of the given size class
+        that survived the last mass_free(), or -1 if there is no such
+        size class."""
+        if size_class < 1 or size_class > (self.small_request_threshold >>
+                                           WORD_POWER_2):
+            return -1
+        return self.nsurviving_for_size[size_class] * (size_class * WORD)
+
+
+    def compact_pages(self):
+        """Reduce the fragmentation of the arenas.
+
+        The objects cannot move, so this only reorders, for each size
+        class, the chained list of pages that still have room: the pages
+        that belong to the arenas with the fewest free pages come first,
+        and are filled first by malloc().  The mostly-empty arenas then
+        stop receiving new objects, and are returned to the OS as soon
+        as their remaining objects die.
+        """
+        self.num_compactions += 1
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            self.sort_pages_by_arena(size_class)
+            size_class -= 1
+
+
+    def sort_pages_by_arena(self, size_class):
+        page = self.page_for_size[size_class]
+        if page == PAGE_NULL or page.nextpage == PAGE_NULL:
+            return
+        #
+        # Bucket sort: 'pages_by_nfreepages[n]' receives the pages whose
+        # arena has 'nfreepages == n'.  Such an arena contains at least
+        # the current page, so 'n < max_pages_per_arena'.
+        buckets = self.pages_by_nfreepages
+        while page != PAGE_NULL:
+            nextpage = page.nextpage
+            n = page.arena.nfreepages
+            ll_assert(n < self.max_pages_per_arena,
+                      "the arena of a used page has too many free pages")
+            page.nextpage = buckets[n]
+            buckets[n] = page
+            page = nextpage
+        #
+        # Rebuild the chained list backwards, starting from the pages
+        # in the arenas with the most free pages.
+        result = PAGE_NULL
+        n = self.max_pages_per_arena - 1
+        while n >= 0:
+            page = buckets[n]
+            buckets[n] = PAGE_NULL
+            while page != PAGE_NULL:
+                nextpage = page.nextpage
+                page.nextpage = result
+                result = page
+                page = nextpage
+            n -= 1
+        self.page_for_size[size_class] = result
 
 
     def mass_free_in_pages(self, size_class, ok_to_free_func):
@@ -358,6 +492,7 @@ class ArenaCollection(object):
         block_size = size_class * WORD
         remaining_partial_pages = PAGE_NULL
         remaining_full_pages = PAGE_NULL
+        nsurviving = 0
         #
         step = 0
         while step < 2:
@@ -370,6 +505,7 @@ class ArenaCollection(object):
                 #
                 # Collect the page.
                 surviving = self.walk_page(page, block_size, ok_to_free_func)
+                nsurviving += surviving
                 nextpage = page.nextpage
                 #
                 if surviving == nblocks:
@@ -398,6 +534,7 @@ class ArenaCollection(object):
         #
         self.page_for_size[size_class] = remaining_partial_pages
         self.full_page_for_size[size_class] = remaining_full_pages
+        self.nsurviving_for_size[size_class] = nsurviving
 
 
     def free_page(self, page):
@@ -599,3 +599,200 @@ class TestMiniMarkGCSimple(DirectGCTest):
 
 class TestMiniMarkGCFull(DirectGCTest):
     from pypy.rpython.memory.gc.minimark import MiniMarkGC as GCClass
+
+    def test_statistics(self):
+        from pypy.rlib import rgc
+        size = llmemory.raw_malloc_usage(
+            self.gc.gcheaderbuilder.size_gc_header + llmemory.sizeof(S))
+        size_class = size // WORD
+        for i in range(20):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        stat = self.gc.statistics
+        assert stat(rgc.STAT_MINOR_COLLECTIONS) >= 1
+        assert stat(rgc.STAT_MAJOR_COLLECTIONS) >= 1
+        assert stat(rgc.STAT_MINOR_COLLECTION_TIME) >= 0
+        assert stat(rgc.STAT_MAJOR_COLLECTION_TIME) >= 0
+        assert stat(rgc.STAT_NURSERY_ALLOCATED_BYTES) >= 20 * size
+        assert stat(rgc.STAT_NURSERY_SURVIVING_BYTES) >= 20 * size
+        assert stat(rgc.STAT_HEAP_USAGE) >= 20 * size
+        assert stat(rgc.STAT_SIZE_CLASSES) >= size_class
+        surviving = stat(rgc.STAT_SIZE_CLASS_SURVIVING_BYTES + size_class)
+        assert surviving == 20 * size
+        allocated = stat(rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES + size_class)
+        assert allocated == 20 * size
+        #
+        del self.stackroots[10:]
+        self.malloc(S)
+        self.gc.collect()
+        surviving = stat(rgc.STAT_SIZE_CLASS_SURVIVING_BYTES + size_class)
+        assert surviving == 10 * size
+        allocated = stat(rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES + size_class)
+        assert allocated == 20 * size
+        assert stat(rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES) == -1
+        assert stat(rgc.STAT_SIZE_CLASS_ALLOCATED_BYTES + 999) == -1
+        assert stat(rgc.STAT_BYTES_MALLOCED) == -1
+
+    def test_statistics_card_marked_arrays(self):
+        from pypy.rlib import rgc
+        a = self.malloc(VAR, 300)    # large enough to get cards
+        self.stackroots.append(a)
+        self.gc.collect()
+        count = self.gc.statistics(rgc.STAT_CARD_MARKED_ARRAYS)
+        self.writearray(self.stackroots[0], 5, self.malloc(S))
+        self.gc.minor_collection()
+        assert self.gc.statistics(rgc.STAT_CARD_MARKED_ARRAYS) == count + 1
+        self.gc.minor_collection()
+        assert self.gc.statistics(rgc.STAT_CARD_MARKED_ARRAYS) == count + 1
+
+    test_statistics_card_marked_arrays.GC_PARAMS = {"card_page_indices": 4}
+
+
+class TestMiniMarkGCIncremental(TestMiniMarkGCFull):
+    # a tiny step: each step of the marking phase visits a single object
+    GC_PARAMS = {'incremental_marking_step': WORD}
+
+    def make_old_chain(self, length):
+        head = self.malloc(S)
+        self.stackroots.append(head)
+        for i in range(1, length):
+            p = self.malloc(S)
+            p.x = i
+            self.write(p, 'next', self.stackroots[-1])
+            self.stackroots[-1] = p
+        self.gc.collect()    # make them old
+        return self.stackroots[-1]
+
+    def step_until_done(self):
+        from pypy.rpython.memory.gc import minimark
+        while self.gc.gc_state == minimark.STATE_MARKING:
+            self.gc.minor_collection()
+            self.gc.major_collection_step()
+
+    def test_step(self):
+        from pypy.rpython.memory.gc import minimark
+        head = self.make_old_chain(10)
+        assert self.gc.gc_state == minimark.STATE_IDLE
+        self.gc.minor_collection()
+        self.gc.major_collection_step()
+        assert self.gc.gc_state == minimark.STATE_MARKING
+        hdr = self.gc.header(llmemory.cast_ptr_to_adr(head))
+        assert hdr.tid & minimark.GCFLAG_VISITED
+        self.step_until_done()
+        assert self.gc.num_major_collects == 2
+        p = self.stackroots[0]
+        for i in range(9, -1, -1):
+            assert p.x == i
+            p = p.next
+
+    def test_write_into_visited_object(self):
+        head = self.make_old_chain(10)
+        self.gc.minor_collection()
+        self.gc.major_collection_step()
+        # 'head' is visited, but not the rest of the chain.  Move the
+        # tail of the chain to 'head.prev' and unlink it from the chain.
+        p = head
+        for i in range(4):
+            p = p.next
+        tail = p.next
+        self.write(head, 'prev', tail)
+        self.write(p, 'next', lltype.nullptr(S))
+        self.step_until_done()
+        p = self.stackroots[0].prev
+        for i in range(4, -1, -1):
+            assert p.x == i
+            p = p.next
+        assert not p
+
+    def test_young_objects_during_marking(self):
+        head = self.make_old_chain(5)
+        self.gc.minor_collection()
+        self.gc.major_collection_step()
+        for i in range(20):
+            p = self.malloc(S)
+            p.x = 100 + i
+            self.write(p, 'next', self.stackroots[0].prev)
+            self.write(self.stackroots[0], 'prev', p)
+            self.gc.minor_collection()
+            self.gc.major_collection_step()
+        self.step_until_done()
+        self.gc.collect()
+        p = self.stackroots[0].prev
+        for i in range(19, -1, -1):
+            assert p.x == 100 + i
+            p = p.next
+        assert not p
+
+    def test_arraycopy_during_marking(self):
+        a = self.malloc(VAR, 5)
+        self.stackroots.append(a)
+        self.writearray(a, 3, self.malloc(S))
+        self.stackroots[0][3].x = 42
+        b = self.malloc(VAR, 5)
+        self.stackroots.append(b)
+        self.gc.collect()    # make them old
+        self.gc.minor_collection()
+        self.gc.major_collection_step()
+        # 'b' is visited, but not 'a'
+        a = self.stackroots[0]
+        b = self.stackroots[1]
+        addr_a = llmemory.cast_ptr_to_adr(a)
+        addr_b = llmemory.cast_ptr_to_adr(b)
+        assert self.gc.writebarrier_before_copy(addr_a, addr_b, 0, 0, 5)
+        b[3] = a[3]
+        self.writearray(a, 3, lltype.nullptr(S))
+        self.step_until_done()
+        assert self.stackroots[1][3].x == 42
+
+
+class TestMiniMarkGCAdaptiveNursery(TestMiniMarkGCFull):
+    GC_PARAMS = {'nursery_size_min': 16*WORD,
+                 'nursery_size_max': 128*WORD}
+
+    def test_adapt_nursery_size(self):
+        gc = self.gc
+        assert gc.nursery_size == 32*WORD
+        gc.adapt_nursery_size(0.5, 0.0)
+        assert gc.nursery_size == 64*WORD
+        assert gc.nursery_top == gc.nursery + 64*WORD
+        gc.adapt_nursery_size(0.0, 0.5)
+        gc.adapt_nursery_size(0.5, 0.5)
+        assert gc.nursery_size == 128*WORD
+        gc.adapt_nursery_size(0.05, 0.0)    # between the bounds
+        assert gc.nursery_size == 128*WORD
+        for i in range(5):
+            gc.adapt_nursery_size(0.0, 0.0)
+        assert gc.nursery_size == 16*WORD
+        assert gc.nursery_top == gc.nursery + 16*WORD
+        assert gc.num_nursery_resizes == 5
+
+    def test_nursery_follows_survival_rate(self):
+        from pypy.rlib import rgc
+        # ignore the timings, which are not reproducible
+        self.gc.nursery_grow_oldrefs_time = 1e100
+        self.gc.nursery_shrink_oldrefs_time = 1e100
+        for i in range(200):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+        assert self.gc.statistics(rgc.STAT_NURSERY_SIZE) == 128*WORD
+        del self.stackroots[:]
+        for i in range(200):
+            self.malloc(S)
+        assert self.gc.statistics(rgc.STAT_NURSERY_SIZE) == 16*WORD
+        assert self.gc.statistics(rgc.STAT_NURSERY_RESIZES) >= 5
+
+    def test_nursery_keeps_objects(self):
+        self.gc.nursery_grow_oldrefs_time = 1e100
+        self.gc.nursery_shrink_oldrefs_time = 1e100
+        for i in range(100):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+            for j in range(i % 7):
+                self.malloc(S)     # garbage
+        for i in range(100):
+            assert self.stackroots[i].x == i
+        self.gc.collect()
+        for i in range(100):
+            assert self.stackroots[i].x == i
@@ -400,6 +400,36 @@ def test_mass_free_half_page_becomes_more_free():
     assert freepages(ac) == NULL
     assert ac.full_page_for_size[2] == PAGE_NULL
 
+def test_compact_pages():
+    pagesize = hdrsize + 4*WORD      # 2 objects of size 2*WORD per page
+    #
+    def fill_two_arenas(compaction_threshold):
+        ac = ArenaCollection(pagesize * 5 - 1, pagesize, 4*WORD)
+        ac.compaction_threshold = compaction_threshold
+        objs = [ac.malloc(2*WORD) for i in range(16)]
+        assert ac.num_arenas == 2
+        assert ac.count_pages(False) == 8
+        assert ac.count_pages(True) == 0
+        # in the first arena, only one object survives, in page 0;
+        # the second arena stays mostly full, with a hole in page 4.
+        survivors = [objs[0], objs[8]] + objs[10:]
+        ac.mass_free(lambda obj: obj not in survivors)
+        assert ac.count_pages(True) == 3
+        return ac, objs
+    #
+    ac, objs = fill_two_arenas(1.0)
+    assert ac.num_compactions == 0
+    assert ac.malloc(2*WORD) == objs[1]     # in the emptier arena
+    #
+    ac, objs = fill_two_arenas(0.5)
+    assert ac.fragmentation() > 0.5
+    assert ac.num_compactions == 1
+    assert ac.malloc(2*WORD) == objs[9]     # in the fuller arena
+    ac.mass_free(lambda obj: obj == objs[0])
+    assert ac.num_arenas == 1               # the emptier arena was freed
+    assert ac.count_pages(False) == 4
+    assert ac.count_pages(True) == 0
+
 # ____________________________________________________________
 
 def test_random():
@@ -769,6 +769,12 @@ class FrameworkGCTransformer(GCTransformer):
         hop.genop("direct_call", [self.assume_young_pointers_ptr,
                                   self.c_const_gc, v_addr])
 
+    def gct_gc_statistics(self, hop):
+        [v_index] = hop.spaceop.args
+        hop.genop("direct_call", [self.statistics_ptr, self.c_const_gc,
+                                  v_index],
+                  resultvar=hop.spaceop.result)
+
     def gct_gc_heap_stats(self, hop):
         if not hasattr(self, 'heap_stats_ptr'):
             return GCTransformer.gct_gc_heap_stats(self, hop)
@@ -636,5 +636,8 @@ class GCTransformer(BaseGCTransformer):
     def gct_gc_can_move(self, hop):
         return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
 
+    def gct_gc_statistics(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Signed, -1))
+
     def gct_shrink_array(self, hop):
         return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
@@ -919,5 +919,27 @@ class TestMiniMarkGC(TestSemiSpaceGC):
     GC_CAN_MALLOC_NONMOVABLE = True
     BUT_HOW_BIG_IS_A_BIG_STRING = 11*WORD
 
+    def test_arena_statistics(self):
+        from pypy.rlib.objectmodel import keepalive_until_here
+        class A(object):
+            pass
+        def f(n):
+            lst = [A() for i in range(n)]
+            llop.gc__collect(lltype.Void)
+            used = rgc.get_statistics(rgc.STAT_ARENA_USED_BYTES)
+            keepalive_until_here(lst)
+            return (rgc.get_statistics(rgc.STAT_ARENAS) * 1000000 +
+                    (used >= n * WORD) * 1000 +
+                    (rgc.get_statistics(rgc.STAT_ARENA_FREE_PAGES) <
+                     rgc.get_statistics(rgc.STAT_ARENA_PAGES)))
+        res = self.interpret(f, [50])
+        assert res // 1000000 >= 1
+        assert res % 1000000 == 1001
+
 class TestMiniMarkGCCardMarking(TestMiniMarkGC):
     GC_PARAMS = {'card_page_indices': 4}
+
+class TestMiniMarkGCIncremental(TestMiniMarkGCCardMarking):
+    # two times the default nursery size used in the tests
+    GC_PARAMS = {'card_page_indices': 4,
+                 'incremental_marking_step': 64*WORD}
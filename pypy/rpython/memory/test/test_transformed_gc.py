@@ -8,6 +8,7 @@ from pypy.rpython.lltypesystem import lltype, llmemory, llarena, rffi, llgroup
 from pypy.rpython.memory.gctransform import framework
 from pypy.rpython.lltypesystem.lloperation import llop, void
 from pypy.rlib.objectmodel import compute_unique_id, we_are_translated
+from pypy.rlib.objectmodel import keepalive_until_here
 from pypy.rlib.debug import ll_assert
 from pypy.rlib import rgc
 from pypy import conftest
@@ -1312,6 +1313,39 @@ class TestMiniMarkGC(TestHybridGC):
         res = run([])
         assert res == 123
 
+    def define_arena_statistics(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            lst = [lltype.malloc(S) for i in range(50)]
+            rgc.collect()
+            narenas = rgc.get_statistics(rgc.STAT_ARENAS)
+            npages = rgc.get_statistics(rgc.STAT_ARENA_PAGES)
+            nfree = rgc.get_statistics(rgc.STAT_ARENA_FREE_PAGES)
+            unknown = rgc.get_statistics(-5)
+            keepalive_until_here(lst)
+            return (narenas > 0) * 100 + (nfree < npages) * 10 + unknown
+        return f
+
+    def test_arena_statistics(self):
+        run = self.runner("arena_statistics")
+        res = run([])
+        assert res == 109
+
+class TestMiniMarkGCIncremental(TestMiniMarkGC):
+    class gcpolicy(gc.FrameworkGcPolicy):
+        class transformerclass(framework.FrameworkGCTransformer):
+            from pypy.rpython.memory.gc.minimark import MiniMarkGC as GCClass
+            GC_PARAMS = {'nursery_size': 32*WORD,
+                         'page_size': 16*WORD,
+                         'arena_size': 64*WORD,
+                         'small_request_threshold': 5*WORD,
+                         'large_object': 8*WORD,
+                         'card_page_indices': 4,
+                         'incremental_marking_step': 64*WORD,
+                         'translated_to_c': False,
+                         }
+            root_stack_depth = 200
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -4,11 +4,12 @@ from pypy.annotation import model as annmodel
 from pypy.objspace.flow.operation import op_appendices
 from pypy.rpython.lltypesystem.lltype import Signed, Unsigned, Bool, Float, \
      Void, Char, UniChar, malloc, pyobjectptr, UnsignedLongLong, \
-     SignedLongLong, build_number, Number, cast_primitive, typeOf
+     SignedLongLong, build_number, Number, cast_primitive, typeOf, \
+     SignedLongLongLong
 from pypy.rpython.rmodel import IntegerRepr, inputconst
 from pypy.rpython.robject import PyObjRepr, pyobj_repr
 from pypy.rlib.rarithmetic import intmask, r_int, r_uint, r_ulonglong, \
-     r_longlong, is_emulated_long
+     r_longlong, is_emulated_long, r_longlonglong
 from pypy.rpython.error import TyperError, MissingRTypeOperation
 from pypy.rpython.rmodel import log
 from pypy.rlib import objectmodel
@@ -34,6 +35,7 @@ signed_repr = getintegerrepr(Signed, 'int_')
 signedlonglong_repr = getintegerrepr(SignedLongLong, 'llong_')
 unsigned_repr = getintegerrepr(Unsigned, 'uint_')
 unsignedlonglong_repr = getintegerrepr(UnsignedLongLong, 'ullong_')
+signedlonglonglong_repr = getintegerrepr(SignedLongLongLong, 'lllong_')
 
 
 class __extend__(pairtype(IntegerRepr, IntegerRepr)):
@@ -205,7 +207,7 @@ def _rtype_template(hop, func, implicit_excs=[]):
 
     v_res = hop.genop(prefix+func, vlist, resulttype=repr)
     bothnonneg = hop.args_s[0].nonneg and hop.args_s[1].nonneg
-    if prefix in ('int_', 'llong_') and not bothnonneg:
+    if prefix in ('int_', 'llong_', 'lllong_') and not bothnonneg:
 
         # cpython, and rpython, assumed that integer division truncates
         # towards -infinity.  however, in C99 and most (all?) other
@@ -228,6 +230,7 @@ def _rtype_template(hop, func, implicit_excs=[]):
 
 INT_BITS_1 = r_int.BITS - 1
 LLONG_BITS_1 = r_longlong.BITS - 1
+LLLONG_BITS_1 = r_longlonglong.BITS - 1
 
 def ll_correct_int_floordiv(x, y, r):
     p = r * y
@@ -241,6 +244,12 @@ def ll_correct_llong_floordiv(x, y, r):
     else:     u = x - p
     return r + (u >> LLONG_BITS_1)
 
+def ll_correct_lllong_floordiv(x, y, r):
+    p = r * y
+    if y < 0: u = p - x
+    else:     u = x - p
+    return r + (u >> LLLONG_BITS_1)
+
 def ll_correct_int_mod(y, r):
     if y < 0: u = -r
     else:     u = r
@@ -251,6 +260,11 @@ def ll_correct_llong_mod(y, r):
     else:     u = r
     return r + (y & (u >> LLONG_BITS_1))
 
+def ll_correct_lllong_mod(y, r):
+    if y < 0: u = -r
+    else:     u = r
+    return r + (y & (u >> LLLONG_BITS_1))
+
 
 #Helper functions for comparisons
 
@@ -1,7 +1,7 @@
 from pypy.translator.translator import TranslationContext
 from pypy.rpython.lltypesystem import lltype, rffi
 from pypy.rpython import rint
-from pypy.rpython.lltypesystem import rdict, rstr
+from pypy.rpython.lltypesystem import rordereddict, rstr
 from pypy.rpython.test.tool import BaseRtypingTest, LLRtypeMixin, OORtypeMixin
 from pypy.rlib.objectmodel import r_dict
 from pypy.rlib.rarithmetic import r_int, r_uint, r_longlong, r_ulonglong
@@ -701,7 +701,7 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
             return d[c2]
 
         char_by_hash = {}
-        base = rdict.DICT_INITSIZE
+        base = rordereddict.DICT_INITSIZE
         for y in range(0, 256):
             y = chr(y)
             y_hash = lowlevelhash(y) % base
@@ -723,8 +723,9 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
             return d
 
         res = self.interpret(func2, [ord(x), ord(y)])
-        for i in range(len(res.entries)):
-            assert not (res.entries.everused(i) and not res.entries.valid(i))
+        assert res.num_live_items == 2
+        assert [res.entries[i].key for i in range(res.num_ever_used_items)
+                                   if res.entries.valid(i)] == [y, x]
 
         def func3(c0, c1, c2, c3, c4, c5, c6, c7):
             d = {}
@@ -738,29 +739,36 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
             c7 = chr(c7) ; d[c7] = 1; del d[c7]
             return d
 
-        if rdict.DICT_INITSIZE != 8:
+        if rordereddict.DICT_INITSIZE != 8:
             py.test.skip("make dict tests more indepdent from initsize")
         res = self.interpret(func3, [ord(char_by_hash[i][0])
-                                   for i in range(rdict.DICT_INITSIZE)])
+                                   for i in range(rordereddict.DICT_INITSIZE)])
+        assert res.num_ever_used_items == 0
+        assert res.lookup_function_no == rordereddict.FUNC_BYTE
         count_frees = 0
-        for i in range(len(res.entries)):
-            if not res.entries.everused(i):
+        for i in range(len(res.indexes)):
+            if ord(res.indexes[i]) == rordereddict.FREE:
                 count_frees += 1
         assert count_frees >= 3
 
     def test_dict_resize(self):
         def func(want_empty):
             d = {}
-            for i in range(rdict.DICT_INITSIZE):
+            for i in range(rordereddict.DICT_INITSIZE):
                 d[chr(ord('a') + i)] = i
             if want_empty:
-                for i in range(rdict.DICT_INITSIZE):
+                for i in range(rordereddict.DICT_INITSIZE):
                     del d[chr(ord('a') + i)]
             return d
         res = self.interpret(func, [0])
-        assert len(res.entries) > rdict.DICT_INITSIZE
+        assert (rordereddict._ll_len_of_d_indexes(res) >
+                rordereddict.DICT_INITSIZE)
+        assert res.num_ever_used_items == rordereddict.DICT_INITSIZE
         res = self.interpret(func, [1])
-        assert len(res.entries) == rdict.DICT_INITSIZE
+        assert res.num_live_items == 0
+        # deleting the last entry makes all the trailing deleted entries
+        # available again
+        assert res.num_ever_used_items == 0
 
     def test_dict_valid_resize(self):
         # see if we find our keys after resize
@@ -776,6 +784,44 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         # if it does not crash, we are fine. It crashes if you forget the hash field.
         self.interpret(func, [])
 
+    def test_dict_insertion_order(self):
+        def func(n):
+            d = {}
+            for i in range(n):
+                d[str(i * 7 % n)] = i
+            del d['0']
+            d['0'] = -1
+            d.pop(str(7 % n))
+            keys = d.keys()
+            for key in d:
+                assert key == keys[0]
+                del keys[0]
+            return len(d.values()), d.items()[0][1], d.popitem()[0]
+        res = self.interpret(func, [13])
+        assert res.item0 == 12
+        assert res.item1 == 2        # '1', inserted for i == 2
+        assert self.ll_to_string(res.item2) == '0'
+
+    def test_dict_index_width(self):
+        def func(n):
+            d = {}
+            for i in range(n):
+                d[i] = i + 1
+            for i in range(0, n, 2):
+                del d[i]
+            total = 0
+            for i in range(n):
+                total += d.get(i, 0)
+            return total, d
+        res = self.interpret(func, [60])
+        assert res.item0 == 930
+        assert res.item1.lookup_function_no == rordereddict.FUNC_BYTE
+        assert len(res.item1.indexes) == 128
+        res = self.interpret(func, [500])
+        assert res.item0 == 62750
+        assert res.item1.lookup_function_no == rordereddict.FUNC_SHORT
+        assert len(res.item1.indexes) == 2 * 2048
+
     # ____________________________________________________________
 
     def test_opt_nullkeymarker(self):
@@ -786,7 +832,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(f, [])
         assert res.item0 == True
         DICT = lltype.typeOf(res.item1).TO
-        assert not hasattr(DICT.entries.TO.OF, 'f_everused')# non-None string keys
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')   # strings have a dummy
 
     def test_opt_nullvaluemarker(self):
@@ -797,7 +842,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(f, [-5])
         assert res.item0 == 4
         DICT = lltype.typeOf(res.item1).TO
-        assert not hasattr(DICT.entries.TO.OF, 'f_everused')# non-None str values
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')   # strs have a dummy
 
     def test_opt_nonullmarker(self):
@@ -814,7 +858,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(f, [-5])
         assert res.item0 == -5441
         DICT = lltype.typeOf(res.item1).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # can-be-None A instances
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')# with a dummy A instance
 
         res = self.interpret(f, [6])
@@ -830,7 +873,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         assert res.item0 == 1
         assert res.item1 == 24
         DICT = lltype.typeOf(res.item2).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # all ints can be zero
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')# nonneg int: dummy -1
 
     def test_opt_no_dummy(self):
@@ -843,7 +885,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         assert res.item0 == 1
         assert res.item1 == -24
         DICT = lltype.typeOf(res.item2).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # all ints can be zero
         assert hasattr(DICT.entries.TO.OF, 'f_valid')    # no dummy available
 
     def test_opt_boolean_has_no_dummy(self):
@@ -856,7 +897,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         assert res.item0 == 1
         assert res.item1 is True
         DICT = lltype.typeOf(res.item2).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # all ints can be zero
         assert hasattr(DICT.entries.TO.OF, 'f_valid')    # no dummy available
 
     def test_opt_multiple_identical_dicts(self):
@@ -974,11 +1014,11 @@ class TestStress:
     def test_stress(self):
         from pypy.annotation.dictdef import DictKey, DictValue
         from pypy.annotation import model as annmodel
-        dictrepr = rdict.DictRepr(None, rint.signed_repr, rint.signed_repr,
+        dictrepr = rordereddict.DictRepr(None, rint.signed_repr, rint.signed_repr,
                                   DictKey(None, annmodel.SomeInteger()),
                                   DictValue(None, annmodel.SomeInteger()))
         dictrepr.setup()
-        l_dict = rdict.ll_newdict(dictrepr.DICT)
+        l_dict = rordereddict.ll_newdict(dictrepr.DICT)
         referencetable = [None] * 400
         referencelength = 0
         value = 0
@@ -986,7 +1026,7 @@ class TestStress:
         def complete_check():
             for n, refvalue in zip(range(len(referencetable)), referencetable):
                 try:
-                    gotvalue = rdict.ll_dict_getitem(l_dict, n)
+                    gotvalue = rordereddict.ll_dict_getitem(l_dict, n)
                 except KeyError:
                     assert refvalue is None
                 else:
@@ -996,18 +1036,18 @@ class TestStress:
             n = int(x*100.0)    # 0 <= x < 400
             op = repr(x)[-1]
             if op <= '2' and referencetable[n] is not None:
-                rdict.ll_dict_delitem(l_dict, n)
+                rordereddict.ll_dict_delitem(l_dict, n)
                 referencetable[n] = None
                 referencelength -= 1
             elif op <= '6':
-                rdict.ll_dict_setitem(l_dict, n, value)
+                rordereddict.ll_dict_setitem(l_dict, n, value)
                 if referencetable[n] is None:
                     referencelength += 1
                 referencetable[n] = value
                 value += 1
             else:
                 try:
-                    gotvalue = rdict.ll_dict_getitem(l_dict, n)
+                    gotvalue = rordereddict.ll_dict_getitem(l_dict, n)
                 except KeyError:
                     assert referencetable[n] is None
                 else:
@@ -1015,7 +1055,7 @@ class TestStress:
             if 1.38 <= x <= 1.39:
                 complete_check()
                 print 'current dict length:', referencelength
-            assert l_dict.num_items == referencelength
+            assert l_dict.num_live_items == referencelength
         complete_check()
 
     def test_stress_2(self):
@@ -1035,14 +1075,14 @@ class TestStress:
 
         class PseudoRTyper:
             cache_dummy_values = {}
-        dictrepr = rdict.DictRepr(PseudoRTyper(), string_repr, string_repr,
+        dictrepr = rordereddict.DictRepr(PseudoRTyper(), string_repr, string_repr,
                        DictKey(None, annmodel.SomeString(key_can_be_none)),
                        DictValue(None, annmodel.SomeString(value_can_be_none)))
         dictrepr.setup()
         print dictrepr.lowleveltype
         for key, value in dictrepr.DICTENTRY._adtmeths.items():
             print '    %s = %s' % (key, value)
-        l_dict = rdict.ll_newdict(dictrepr.DICT)
+        l_dict = rordereddict.ll_newdict(dictrepr.DICT)
         referencetable = [None] * 400
         referencelength = 0
         values = not_really_random()
@@ -1052,7 +1092,7 @@ class TestStress:
         def complete_check():
             for n, refvalue in zip(range(len(referencetable)), referencetable):
                 try:
-                    gotvalue = rdict.ll_dict_getitem(l_dict, keytable[n])
+                    gotvalue = rordereddict.ll_dict_getitem(l_dict, keytable[n])
                 except KeyError:
                     assert refvalue is None
                 else:
@@ -1062,18 +1102,18 @@ class TestStress:
             n = int(x*100.0)    # 0 <= x < 400
             op = repr(x)[-1]
             if op <= '2' and referencetable[n] is not None:
-                rdict.ll_dict_delitem(l_dict, keytable[n])
+                rordereddict.ll_dict_delitem(l_dict, keytable[n])
                 referencetable[n] = None
                 referencelength -= 1
             elif op <= '6':
                 ll_value = string_repr.convert_const(str(values.next()))
-                rdict.ll_dict_setitem(l_dict, keytable[n], ll_value)
+                rordereddict.ll_dict_setitem(l_dict, keytable[n], ll_value)
                 if referencetable[n] is None:
                     referencelength += 1
                 referencetable[n] = ll_value
             else:
                 try:
-                    gotvalue = rdict.ll_dict_getitem(l_dict, keytable[n])
+                    gotvalue = rordereddict.ll_dict_getitem(l_dict, keytable[n])
                 except KeyError:
                     assert referencetable[n] is None
                 else:
@@ -1081,5 +1121,5 @@ class TestStress:
             if 1.38 <= x <= 1.39:
                 complete_check()
                 print 'current dict length:', referencelength
-            assert l_dict.num_items == referencelength
+            assert l_dict.num_live_items == referencelength
         complete_check()
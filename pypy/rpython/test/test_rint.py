@@ -5,6 +5,7 @@ from pypy.annotation import model as annmodel
 from pypy.rpython.test import snippet
 from pypy.rlib.rarithmetic import r_int, r_uint, r_longlong, r_ulonglong
 from pypy.rlib.rarithmetic import ovfcheck, r_int64, intmask, int_between
+from pypy.rlib.rarithmetic import r_longlonglong
 from pypy.rlib import objectmodel
 from pypy.rpython.test.tool import BaseRtypingTest, LLRtypeMixin, OORtypeMixin
 
@@ -412,7 +413,17 @@ class BaseTestRint(BaseRtypingTest):
 
 
 class TestLLtype(BaseTestRint, LLRtypeMixin):
-    pass
+
+    def test_longlonglong(self):
+        big = r_longlonglong(-(3 << 90) + 12345)
+        def f(x, y):
+            a = r_longlonglong(x) << 70
+            b = a * y + big
+            return (intmask(b // y), intmask(b % y), intmask(b >> 64),
+                    a < big, intmask(abs(b) >> 100))
+        for x, y in [(5, -7), (-123456, 1000), (0, 3)]:
+            res = self.interpret(f, [x, y])
+            assert tuple([getattr(res, 'item%d' % i) for i in range(5)]) == f(x, y)
 
 class TestOOtype(BaseTestRint, OORtypeMixin):
     def test_oobox_int(self):
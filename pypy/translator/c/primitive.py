@@ -1,7 +1,7 @@
 import sys
 from pypy.rlib.objectmodel import Symbolic, ComputedIntSymbolic
 from pypy.rlib.objectmodel import CDefinedIntSymbolic
-from pypy.rlib.rarithmetic import r_longlong, is_emulated_long
+from pypy.rlib.rarithmetic import r_longlong, r_ulonglong, is_emulated_long
 from pypy.rlib.rfloat import isinf, isnan
 from pypy.rpython.lltypesystem.lltype import *
 from pypy.rpython.lltypesystem import rffi, llgroup
@@ -98,6 +98,17 @@ def name_signedlonglong(value, db):
     else:
         return '%dLL' % value
 
+def name_signedlonglonglong(value, db):
+    # C has no literals of type __int128: build the constants that don't
+    # fit in a long long from their two 64-bit halves
+    maxlonglong = r_longlong.MASK>>1
+    if -maxlonglong-1 <= value <= maxlonglong:
+        return '((__int128)%s)' % name_signedlonglong(value, db)
+    hi = value >> 64
+    lo = value & r_ulonglong.MASK
+    return '((((__int128)%s) << 64) | %s)' % (name_signedlonglong(hi, db),
+                                              name_unsignedlonglong(lo, db))
+
 def is_positive_nan(value):
     # bah.  we don't have math.copysign() if we're running Python 2.5
     import struct
@@ -199,6 +210,7 @@ PrimitiveName = {
     Signed:   name_signed,
     UnsignedLongLong: name_unsignedlonglong,
     Unsigned: name_unsigned,
+    SignedLongLongLong: name_signedlonglonglong,
     Float:    name_float,
     SingleFloat: name_singlefloat,
     LongFloat: name_longfloat,
@@ -215,6 +227,7 @@ PrimitiveType = {
     Signed:   'Signed @',
     UnsignedLongLong: 'unsigned long long @',
     Unsigned: 'Unsigned @',
+    SignedLongLongLong: '__int128 @',
     Float:    'double @',
     SingleFloat: 'float @',
     LongFloat: 'long double @',
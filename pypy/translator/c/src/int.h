@@ -98,6 +98,8 @@
 						r = Py_ARITHMETIC_RIGHT_SHIFT(PY_LONG_LONG,x, (y))
 #define OP_ULLONG_RSHIFT(x,y,r) CHECK_SHIFT_RANGE(y, PYPY_LONGLONG_BIT); \
 						r = (x) >> (y)
+#define OP_LLLONG_RSHIFT(x,y,r) CHECK_SHIFT_RANGE(y, 128); \
+						r = Py_ARITHMETIC_RIGHT_SHIFT(__int128, x, (y))
 
 
 #define OP_INT_LSHIFT(x,y,r)    CHECK_SHIFT_RANGE(y, PYPY_LONG_BIT); \
@@ -108,6 +110,8 @@
 							r = (x) << (y)
 #define OP_ULLONG_LSHIFT(x,y,r) CHECK_SHIFT_RANGE(y, PYPY_LONGLONG_BIT); \
 							r = (x) << (y)
+#define OP_LLLONG_LSHIFT(x,y,r) CHECK_SHIFT_RANGE(y, 128); \
+							r = (x) << (y)
 
 #define OP_INT_LSHIFT_OVF(x,y,r) \
 	OP_INT_LSHIFT(x,y,r); \
@@ -120,6 +124,7 @@
 #define OP_UINT_FLOORDIV(x,y,r)   r = (x) / (y)
 #define OP_LLONG_FLOORDIV(x,y,r)  r = (x) / (y)
 #define OP_ULLONG_FLOORDIV(x,y,r) r = (x) / (y)
+#define OP_LLLONG_FLOORDIV(x,y,r) r = (x) / (y)
 
 #define OP_INT_FLOORDIV_OVF(x,y,r)                      \
 	if ((y) == -1 && (x) == SIGNED_MIN)               \
@@ -147,6 +152,11 @@
 	    { FAIL_ZER("unsigned integer division"); r=0; }     \
 	else                                                    \
 	    r = (x) / (y)
+#define OP_LLLONG_FLOORDIV_ZER(x,y,r)                   \
+	if ((y) == 0)                                   \
+	    { FAIL_ZER("integer division"); r=0; }      \
+	else                                            \
+	    r = (x) / (y)
 
 #define OP_INT_FLOORDIV_OVF_ZER(x,y,r)                  \
 	if ((y) == 0)                                   \
@@ -160,6 +170,7 @@
 #define OP_UINT_MOD(x,y,r)    r = (x) % (y)
 #define OP_LLONG_MOD(x,y,r)   r = (x) % (y)
 #define OP_ULLONG_MOD(x,y,r)  r = (x) % (y)
+#define OP_LLLONG_MOD(x,y,r)  r = (x) % (y)
 
 #define OP_INT_MOD_OVF(x,y,r)                           \
 	if ((y) == -1 && (x) == SIGNED_MIN)               \
@@ -186,6 +197,11 @@
 	    { FAIL_ZER("unsigned integer modulo"); r=0; }       \
 	else                                                    \
 	    r = (x) % (y)
+#define OP_LLLONG_MOD_ZER(x,y,r)                        \
+	if ((y) == 0)                                   \
+	    { FAIL_ZER("integer modulo"); r=0; }        \
+	else                                            \
+	    r = (x) % (y)
 
 #define OP_INT_MOD_OVF_ZER(x,y,r)                       \
 	if ((y) == 0)                                   \
@@ -317,3 +333,21 @@ long long op_llong_mul_ovf(long long a, long long b)
 #define OP_ULLONG_AND OP_LLONG_AND
 #define OP_ULLONG_OR OP_LLONG_OR
 #define OP_ULLONG_XOR OP_LLONG_XOR
+
+#define OP_LLLONG_IS_TRUE OP_INT_IS_TRUE
+#define OP_LLLONG_NEG     OP_INT_NEG
+#define OP_LLLONG_ABS     OP_INT_ABS
+#define OP_LLLONG_INVERT  OP_INT_INVERT
+
+#define OP_LLLONG_ADD OP_INT_ADD
+#define OP_LLLONG_SUB OP_INT_SUB
+#define OP_LLLONG_MUL OP_INT_MUL
+#define OP_LLLONG_LT  OP_INT_LT
+#define OP_LLLONG_LE  OP_INT_LE
+#define OP_LLLONG_EQ  OP_INT_EQ
+#define OP_LLLONG_NE  OP_INT_NE
+#define OP_LLLONG_GT  OP_INT_GT
+#define OP_LLLONG_GE  OP_INT_GE
+#define OP_LLLONG_AND    OP_INT_AND
+#define OP_LLLONG_OR     OP_INT_OR
+#define OP_LLLONG_XOR    OP_INT_XOR
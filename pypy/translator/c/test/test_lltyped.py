@@ -567,6 +567,26 @@ class TestLowLevelType(test_typed.CompilationTestCase):
             0, maxlonglong>>4,                    # rshift
             ))
 
+    def test_longlonglong(self):
+        from pypy.rlib.rarithmetic import r_longlonglong, intmask
+        from pypy.rlib.rarithmetic import SUPPORT_INT128
+        if not SUPPORT_INT128:
+            py.test.skip("no 128-bit integer type in C")
+        big = r_longlonglong(-(3 << 90) + 12345)
+
+        def f(x, y):
+            a = r_longlonglong(x) << 70
+            b = a * y + big
+            q = b // y
+            r = b % y
+            return (intmask(q >> 64), intmask(q), intmask(r),
+                    intmask(a >> 70), a < big, intmask(-b >> 100))
+
+        fn = self.getcompiled(f, [int, int])
+        for x, y in [(5, -7), (-123456, 1000), (0, 3), (1 << 40, -1 << 10)]:
+            res = fn(x, y)
+            assert res == f(x, y)
+
     def test_direct_ptradd_barebone(self):
         from pypy.rpython.lltypesystem import rffi
         ARRAY_OF_CHAR = Array(Char, hints={'nolength': True})
@@ -10,7 +10,7 @@ from pypy.rpython.lltypesystem import lloperation
 from pypy.rpython import rtyper
 from pypy.rpython import rclass
 from pypy.rpython.rmodel import inputconst
-from pypy.rlib.rarithmetic import r_uint, r_longlong, r_ulonglong
+from pypy.rlib.rarithmetic import r_uint, r_longlong, r_ulonglong, r_longlonglong
 from pypy.rlib.rarithmetic import r_singlefloat
 from pypy.rlib.debug import ll_assert
 from pypy.annotation import model as annmodel
@@ -21,6 +21,7 @@ PrimitiveErrorValue = {lltype.Signed: -1,
                        lltype.Unsigned: r_uint(-1),
                        lltype.SignedLongLong: r_longlong(-1),
                        lltype.UnsignedLongLong: r_ulonglong(-1),
+                       lltype.SignedLongLongLong: r_longlonglong(-1),
                        lltype.Float: -1.0,
                        lltype.SingleFloat: r_singlefloat(-1.0),
                        lltype.Char: chr(255),
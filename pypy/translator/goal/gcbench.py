@@ -28,14 +28,11 @@
 #       heap, though we don't currently know how to enforce that uniformly.
 #
 #       Unlike the original Ellis and Kovac benchmark, we do not attempt
-#       measure pause times.  This facility should eventually be added back
-#       in.  There are several reasons for omitting it for now.  The original
-#       implementation depended on assumptions about the thread scheduler
-#       that don't hold uniformly.  The results really measure both the
-#       scheduler and GC.  Pause time measurements tend to not fit well with
-#       current benchmark suites.  As far as we know, none of the current
-#       commercial Java implementations seriously attempt to minimize GC pause
-#       times.
+#       measure pause times directly.  Instead, we time the construction of
+#       every single tree and report the distribution of these times: the
+#       slowest constructions are the ones interrupted by the GC, so the
+#       tail of the distribution shows the GC pause times (compare e.g.
+#       with and without PYPY_GC_INCREMENT_STEP).
 #
 #       Known deficiencies:
 #               - No way to check on memory use
@@ -91,20 +88,53 @@ def print_diagnostics():
     "ought to print free/total memory"
     pass
 
+class PauseDistribution(object):
+    "Distribution of the times taken by the individual tree constructions"
+    LIMITS = [0.1, 1.0, 10.0, 100.0, 1000.0]     # in ms
+
+    def __init__(self):
+        self.counts = [0] * (len(self.LIMITS) + 1)
+        self.max_ms = 0.0
+
+    def record(self, t_start, t_finish):
+        ms = (t_finish - t_start) * 1000.
+        i = 0
+        while i < len(self.LIMITS) and ms >= self.LIMITS[i]:
+            i += 1
+        self.counts[i] += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def report(self):
+        print "Distribution of the tree construction times:"
+        low = 0.0
+        for i in range(len(self.LIMITS)):
+            print "\t%f ms - %f ms: %d" % (low, self.LIMITS[i],
+                                           self.counts[i])
+            low = self.LIMITS[i]
+        print "\tmore than %f ms: %d" % (low, self.counts[len(self.LIMITS)])
+        print "\tlongest: %f ms" % (self.max_ms,)
+
+pauses = PauseDistribution()
+
 def time_construction(depth):
     niters = num_iters(depth)
     print "Creating %d trees of depth %d" % (niters, depth)
     t_start = time.time()
     for i in range(niters):
+        t0 = time.time()
         temp_tree = Node()
         populate(depth, temp_tree)
         temp_tree = None
+        pauses.record(t0, time.time())
     t_finish = time.time()
     print "\tTop down constrution took %f ms" % ((t_finish-t_start)*1000.)
     t_start = time.time()
     for i in range(niters):
+        t0 = time.time()
         temp_tree = make_tree(depth)
         temp_tree = None
+        pauses.record(t0, time.time())
     t_finish = time.time()
     print "\tBottom up constrution took %f ms" % ((t_finish-t_start)*1000.)
 
@@ -159,6 +189,7 @@ def main(depths=DEFAULT_DEPTHS, threads=0):
     t_finish = time.time()
     print_diagnostics()
     print "Completed in %f ms." % ((t_finish-t_start)*1000.)
+    pauses.report()
 
 class Failed(Exception):
     pass
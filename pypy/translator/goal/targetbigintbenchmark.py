@@ -0,0 +1,113 @@
+#! /usr/bin/env python
+"""
+A benchmark for the operations of rbigint whose cost is not linear in the
+size of the numbers: multiplication, division, and conversions to and from
+decimal strings.  Each operation is timed for numbers of a range of sizes,
+so that the crossover points of the algorithms (KARATSUBA_CUTOFF,
+TOOM_CUTOFF, DIV_LIMIT, FORMAT_RECURSIVE_CUTOFF, FROMSTR_RECURSIVE_CUTOFF)
+can be checked after translation.  It ends with the pidigits spigot, which
+instead does many additions, and multiplications and divisions by a single
+digit, of numbers of a few thousand bits:
+
+    translate.py targetbigintbenchmark.py
+    ./targetbigintbenchmark-c [max number of decimal digits]
+"""
+
+import time
+from pypy.rlib.rbigint import rbigint, _decimalstr_to_bigint
+
+# __________  Entry point  __________
+
+def make_number(ndigits, seed):
+    # a number with 'ndigits' decimal digits, all of them non-zero
+    digits = ['0'] * ndigits
+    for i in range(ndigits):
+        seed = (seed * 1103515245 + 12345) & 0x7fffffff
+        digits[i] = chr(ord('1') + seed % 9)
+    return _decimalstr_to_bigint(''.join(digits))
+
+def bench(ndigits):
+    repeat = max(1, 200000 // ndigits)
+    a = make_number(ndigits, 1)
+    b = make_number(ndigits, 2)
+    c = a.mul(b)
+    s = c.str()
+
+    t0 = time.time()
+    for i in range(repeat):
+        a.mul(b)
+    t1 = time.time()
+    for i in range(repeat):
+        a.mul(a)
+    t2 = time.time()
+    for i in range(repeat):
+        c.divmod(b)
+    t3 = time.time()
+    for i in range(repeat):
+        c.str()
+    t4 = time.time()
+    for i in range(repeat):
+        _decimalstr_to_bigint(s)
+    t5 = time.time()
+
+    print '%d\t%f\t%f\t%f\t%f\t%f' % (
+        ndigits, (t1 - t0) / repeat, (t2 - t1) / repeat,
+        (t3 - t2) / repeat, (t4 - t3) / repeat, (t5 - t4) / repeat)
+
+def pidigits(n):
+    # the unbounded spigot algorithm of Jeremy Gibbons, as in the
+    # Computer Language Benchmarks Game; returns the last digit computed
+    acc = rbigint.fromint(0)
+    den = rbigint.fromint(1)
+    num = rbigint.fromint(1)
+    three = rbigint.fromint(3)
+    four = rbigint.fromint(4)
+    ten = rbigint.fromint(10)
+    d = 0
+    i = 0
+    k = 0
+    while i < n:
+        k += 1
+        k2 = rbigint.fromint(k * 2 + 1)
+        acc = acc.add(num.lshift(1)).mul(k2)
+        den = den.mul(k2)
+        num = num.mul(rbigint.fromint(k))
+        if num.gt(acc):
+            continue
+        d3 = num.mul(three).add(acc).floordiv(den)
+        d4 = num.mul(four).add(acc).floordiv(den)
+        if not d3.eq(d4):
+            continue
+        d = d3.toint()
+        i += 1
+        acc = acc.sub(den.mul(d3)).mul(ten)
+        num = num.mul(ten)
+    return d
+
+def entry_point(argv):
+    if len(argv) > 1:
+        maxdigits = int(argv[1])
+    else:
+        maxdigits = 100000
+    print 'digits\tmul\tsquare\tdivmod\tstr\tfromstr'
+    ndigits = 10
+    while ndigits <= maxdigits:
+        bench(ndigits)
+        bench(ndigits * 3)
+        ndigits *= 10
+    n = 5000
+    t0 = time.time()
+    d = pidigits(n)
+    t1 = time.time()
+    print 'pidigits(%d)\t%f\t(last digit %d)' % (n, t1 - t0, d)
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    import sys
+    res = entry_point(sys.argv)
+    sys.exit(res)